@@ -0,0 +1,452 @@
+# -*- coding: utf-8 -*-
+"""bench_convert —— 轉換鏈的離線微基準／巨基準（不連網、不需帳號）。
+
+為什麼需要這支
+--------------
+``test_sanma.py``、``batch_diff.py``、``validate_mjai_libriichi.py`` 只驗對錯，沒有任何東西量
+速度：像 ``_handle_game_record`` 曾經每個動作都重建一次 ``res["log"]``（整局 O(n²)）這種退化，
+輸出完全一樣、只是變慢，一直沒人發現。本模組對一份**入庫的語料**（``bench_corpus/``）計時：
+
+微基準（micro）
+  - ``tile.parse`` / ``tile.encode_tenhou`` / ``tile.encode_mjai``：全部 37 種牌（含赤五）。
+  - ``parser.feed``：預先解好的 Record* 逐筆餵 ``MajsoulPaipuParser``，含 ``finalize_mjai``。
+  - ``timing.parse_full_record`` / ``timing.extract`` / ``timing.inject``：思考時間擷取與注入。
+巨基準（macro）
+  - ``downloader.handle_game_record``：``ResGameRecord`` -> tenhou6 + mjai。
+  - ``toumajsoul.decode_record``：同上再加思考時間（下載端實際跑的 CPU 段）。
+  - ``toumajsoul.process_log.sanma`` / ``.yonma``：decode + ``process_log`` 寫檔端到端。
+    四麻要呼叫 mjai-reviewer，找不到執行檔（``MJAI_REVIEWER_BIN`` / PATH）就標記 skipped。
+  - ``mjlog_to_mjai.convert`` / ``mjlog_to_tenhou6.convert``：天鳳 mjlog XML。
+
+每個基準的一次操作 = 跑完整份語料（或全部牌種）；以 ``timeit`` 自動決定每輪次數，量
+``--repeat`` 輪，記錄中位數與最小值。結果輸出為 JSON（``--out``），``compare`` 子命令（或 run
+的 ``--compare``）以**最小值**比對兩份結果（背景負載只會讓單輪變慢，最小值最接近程式本身的
+成本），任何基準變慢超過門檻（預設 10%）即列出並以 exit 1 結束，可直接掛在 CI 或改動前後
+手動跑。
+
+語料
+----
+``bench_corpus/raw/<uuid>.bin`` 為序列化的 ``ResGameRecord``（與 ``fake_majsoul.py capture``
+的錄製格式相同，真牌譜可直接放進來），``bench_corpus/mjlog/<id>.xml`` 為天鳳 mjlog。
+入庫的那份由 ``corpus`` 子命令以固定種子合成（``fake_majsoul.synthesize_record`` 與本檔的
+``synthesize_mjlog``），牌效不求合理，只求事件數量接近真實半莊；雀魂那份另外涵蓋吃碰槓、
+立直、和了、拔北與大三元包牌，``parser.feed`` 的各分支都量得到。換語料後的結果不可與舊
+結果比較（meta.corpus 會記錄檔案與大小）。
+
+用法
+----
+    python bench_convert.py run --out bench.json
+    python bench_convert.py run --filter parser --repeat 9
+    python bench_convert.py run --compare bench.json --threshold 0.15
+    python bench_convert.py compare before.json after.json
+    python bench_convert.py corpus            （重新產生入庫語料）
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+CORPUS_DIR = os.path.join(_HERE, "bench_corpus")
+SCHEMA = 1
+
+# corpus 子命令：(名稱, 局數, 人數)
+_RAW_SPECS = [("synth-yonma-1", 8, 4), ("synth-yonma-2", 10, 4), ("synth-sanma-1", 6, 3)]
+_MJLOG_SPECS = [("synth-yonma-1", 8, 4), ("synth-yonma-2", 10, 4), ("synth-sanma-1", 6, 3)]
+
+
+def _log(msg: str) -> None:
+    print(msg, file=sys.stderr, flush=True)
+
+
+# ── 語料 ─────────────────────────────────────────────────────────────
+def synthesize_mjlog(seed: str, kyokus: int = 8, nplayers: int = 4) -> str:
+    """以 seed 合成一份天鳳 mjlog XML（鳳凰卓規則）：每局摸打到流局，每局一家中途立直
+    （之後摸切）。結構與真 mjlog 相同，兩支 mjlog 轉換器皆可完整轉換。"""
+    rng = random.Random(int(hashlib.md5(seed.encode("utf-8")).hexdigest()[:8], 16))
+    sanma = nplayers == 3
+    # 三麻拔掉 2m~8m（tile id 4..31）
+    tiles = [t for t in range(136) if not (sanma and 4 <= t < 32)]
+    ten = [350 if sanma else 250] * nplayers
+    go_type = 0xB9 if sanma else 0xA9  # 鳳凰、半莊、赤有り、喰斷有り（+三麻）
+    names = "".join(f' n{i}="%62%65%6E%63%68{i}"' for i in range(4))
+    out = ['<mjloggm ver="2.3">', f'<SHUFFLE seed="mt19937ar-sha512-n288-base64,{seed}" ref=""/>',
+           f'<GO type="{go_type}" lobby="0"/>',
+           f'<UN{names} dan="16,16,16,16" rate="2000.00,2000.00,2000.00,2000.00" sx="M,M,M,M"/>',
+           '<TAIKYOKU oya="0"/>']
+    draw_tag, discard_tag = "TUVW", "DEFG"
+    kyotaku = 0
+    for k in range(kyokus):
+        wall = tiles[:]
+        rng.shuffle(wall)
+        oya = k % nplayers
+        hands = [[wall.pop() for _ in range(13)] for _ in range(nplayers)]
+        dora = wall.pop()
+        hai = "".join(f' hai{i}="{",".join(map(str, hands[i])) if i < nplayers else ""}"' for i in range(4))
+        scores = ",".join(map(str, ten + [0] * (4 - nplayers)))
+        out.append(f'<INIT seed="{k},0,{kyotaku},{rng.randrange(6)},{rng.randrange(6)},{dora}" '
+                   f'ten="{scores}" oya="{oya}"{hai}/>')
+        riichi_seat, riichi_at = rng.randrange(nplayers), rng.randrange(8, 30)
+        riichi = False
+        seat, draws = oya, 0
+        while len(wall) > 14:
+            tile = wall.pop()
+            draws += 1
+            out.append(f"<{draw_tag[seat]}{tile}/>")
+            if riichi and seat == riichi_seat:
+                out.append(f"<{discard_tag[seat]}{tile}/>")
+            else:
+                hands[seat].append(tile)
+                declare = seat == riichi_seat and draws >= riichi_at
+                if declare:
+                    out.append(f'<REACH who="{seat}" step="1"/>')
+                discarded = hands[seat].pop(rng.randrange(len(hands[seat])))
+                out.append(f"<{discard_tag[seat]}{discarded}/>")
+                if declare:
+                    riichi = True
+                    ten[seat] -= 10
+                    kyotaku += 1
+                    out.append(f'<REACH who="{seat}" ten="{",".join(map(str, ten + [0] * (4 - nplayers)))}" '
+                               f'step="2"/>')
+            seat = (seat + 1) % nplayers
+        sc = ",".join(f"{t},0" for t in ten + [0] * (4 - nplayers))
+        owari = ""
+        if k == kyokus - 1:
+            owari = ' owari="%s"' % ",".join(f"{t},{(t - 300) / 10:.1f}" for t in ten + [0] * (4 - nplayers))
+        out.append(f'<RYUUKYOKU ba="0,{kyotaku}" sc="{sc}"{owari}/>')
+    out.append("</mjloggm>")
+    return "".join(out)
+
+
+def build_corpus(corpus_dir: str = CORPUS_DIR) -> None:
+    """以固定種子重新產生入庫語料（raw/*.bin 與 mjlog/*.xml）。"""
+    import fake_majsoul
+
+    raw_dir, mjlog_dir = os.path.join(corpus_dir, "raw"), os.path.join(corpus_dir, "mjlog")
+    os.makedirs(raw_dir, exist_ok=True)
+    os.makedirs(mjlog_dir, exist_ok=True)
+    for name, kyokus, nplayers in _RAW_SPECS:
+        res = fake_majsoul.synthesize_record(name, kyokus, nplayers)
+        with open(os.path.join(raw_dir, f"{name}.bin"), "wb") as f:
+            f.write(res.SerializeToString())
+    for name, kyokus, nplayers in _MJLOG_SPECS:
+        with open(os.path.join(mjlog_dir, f"{name}.xml"), "w", encoding="utf-8") as f:
+            f.write(synthesize_mjlog(name, kyokus, nplayers))
+    _log(f"[bench] 語料已寫入 {corpus_dir}（raw {len(_RAW_SPECS)}、mjlog {len(_MJLOG_SPECS)}）")
+
+
+def _load_corpus(corpus_dir: str):
+    import ms.protocol_pb2 as pb
+
+    raw, mjlog, files = [], [], {}
+    for sub, ext in (("raw", ".bin"), ("mjlog", ".xml")):
+        folder = os.path.join(corpus_dir, sub)
+        for name in sorted(os.listdir(folder)) if os.path.isdir(folder) else ():
+            if not name.endswith(ext):
+                continue
+            path = os.path.join(folder, name)
+            files[f"{sub}/{name}"] = os.path.getsize(path)
+            if sub == "raw":
+                res = pb.ResGameRecord()
+                with open(path, "rb") as f:
+                    res.ParseFromString(f.read())
+                raw.append(res)
+            else:
+                with open(path, "r", encoding="utf-8") as f:
+                    mjlog.append(f.read())
+    return raw, mjlog, files
+
+
+# ── 基準 ─────────────────────────────────────────────────────────────
+def _record_logs(res):
+    """ResGameRecord -> 依序的 Record* protobuf（parser.feed 的輸入）。"""
+    import ms.protocol_pb2 as pb
+
+    wrapper = pb.Wrapper()
+    wrapper.ParseFromString(res.data)
+    details = pb.GameDetailRecords()
+    details.ParseFromString(wrapper.data)
+    items = details.records if details.version < 210715 and details.records else \
+        [act.result for act in details.actions if act.result]
+    logs = []
+    for item in items:
+        w = pb.Wrapper()
+        w.ParseFromString(item)
+        log = getattr(pb, w.name[len(".lq."):])()
+        log.ParseFromString(w.data)
+        logs.append(log)
+    return logs
+
+
+def _is_sanma(res) -> bool:
+    return len(res.head.result.players) == 3
+
+
+def _mjai_reviewer():
+    return shutil.which(os.environ.get("MJAI_REVIEWER_BIN", "mjai-reviewer"))
+
+
+def _benchmarks(raw, mjlog, workdir):
+    """回傳 [(名稱, 群組, 單位說明, 無參數函式 或 skip 原因字串)]。"""
+    import mjlog_to_mjai
+    import mjlog_to_tenhou6
+    import toumajsoul
+    from tensoul import MajsoulPaipuDownloader
+    from tensoul.model import Tile
+    from tensoul.parser import MajsoulPaipuParser
+
+    dl = MajsoulPaipuDownloader()
+    names = ["AI"] * 4
+    tile_strs = [f"{n}{s}" for s in "mps" for n in range(10)] + [f"{n}z" for n in range(1, 8)]
+    tiles = [Tile.parse(s) for s in tile_strs]
+    logs = [_record_logs(res) for res in raw]
+    details = [toumajsoul.parse_full_record(res)[0] for res in raw]
+    timing_maps = [toumajsoul.extract_timing_data(d) for d in details]
+    mjai_paths = []
+    for i, res in enumerate(raw):
+        path = os.path.join(workdir, f"inject-{i}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            for ev in dl._handle_game_record(res, 0)["mjai"]:
+                f.write(json.dumps(ev, ensure_ascii=False) + "\n")
+        mjai_paths.append(path)
+    yonma_xml = [x for x in mjlog if 'hai3=""' not in x]
+    loop = asyncio.new_event_loop()
+    out_dir = os.path.join(workdir, "out")
+
+    def tile_parse():
+        for s in tile_strs:
+            Tile.parse(s)
+
+    def tile_encode_tenhou():
+        for t in tiles:
+            t.encode_tenhou()
+
+    def tile_encode_mjai():
+        for t in tiles:
+            t.encode_mjai()
+
+    def parser_feed():
+        for record_logs in logs:
+            parser = MajsoulPaipuParser()
+            parser.set_mjai_header(names, True, 0)
+            for log in record_logs:
+                parser.feed(log)
+            parser.finalize_mjai()
+
+    def parse_full_record():
+        for res in raw:
+            toumajsoul.parse_full_record(res)
+
+    def extract():
+        for d in details:
+            toumajsoul.extract_timing_data(d)
+
+    def inject():
+        for path, timing_map in zip(mjai_paths, timing_maps):
+            toumajsoul.inject_timing_to_mjai(path, timing_map)
+
+    def handle_game_record():
+        for res in raw:
+            dl._handle_game_record(res, 0)
+
+    def decode_record():
+        for res in raw:
+            toumajsoul.decode_record(res, dl, collect_timing=True)
+
+    def process_log(records):
+        def run():
+            for res in records:
+                log_data, timing, full = toumajsoul.decode_record(res, dl, collect_timing=True)
+                loop.run_until_complete(toumajsoul.process_log(res.head.uuid, log_data, out_dir,
+                                                               raw_timing_data=timing, full_record=full))
+        return run
+
+    def to_mjai():
+        for x in mjlog:
+            mjlog_to_mjai.convert(x)
+
+    def to_tenhou6():
+        for x in yonma_xml:
+            mjlog_to_tenhou6.convert(x)
+
+    sanma = [res for res in raw if _is_sanma(res)]
+    yonma = [res for res in raw if not _is_sanma(res)]
+    n_tiles, n_raw, n_xml = f"{len(tile_strs)} tiles", f"{len(raw)} records", f"{len(mjlog)} mjlogs"
+    return [
+        ("tile.parse", "micro", n_tiles, tile_parse),
+        ("tile.encode_tenhou", "micro", n_tiles, tile_encode_tenhou),
+        ("tile.encode_mjai", "micro", n_tiles, tile_encode_mjai),
+        ("parser.feed", "micro", n_raw, parser_feed if raw else "no raw records"),
+        ("timing.parse_full_record", "micro", n_raw, parse_full_record if raw else "no raw records"),
+        ("timing.extract", "micro", n_raw, extract if raw else "no raw records"),
+        ("timing.inject", "micro", n_raw, inject if raw else "no raw records"),
+        ("downloader.handle_game_record", "macro", n_raw, handle_game_record if raw else "no raw records"),
+        ("toumajsoul.decode_record", "macro", n_raw, decode_record if raw else "no raw records"),
+        ("toumajsoul.process_log.sanma", "macro", f"{len(sanma)} records",
+         process_log(sanma) if sanma else "no sanma records"),
+        ("toumajsoul.process_log.yonma", "macro", f"{len(yonma)} records",
+         (process_log(yonma) if _mjai_reviewer() else "mjai-reviewer not found") if yonma
+         else "no yonma records"),
+        ("mjlog_to_mjai.convert", "macro", n_xml, to_mjai if mjlog else "no mjlogs"),
+        ("mjlog_to_tenhou6.convert", "macro", f"{len(yonma_xml)} mjlogs",
+         to_tenhou6 if yonma_xml else "no yonma mjlogs"),
+    ]
+
+
+def _time(fn, repeat: int, min_time: float) -> dict:
+    timer = timeit.Timer(fn)
+    number = 1
+    while True:  # 與 Timer.autorange 相同，只是門檻可調
+        if timer.timeit(number) >= min_time:
+            break
+        number *= 2 if number < 8 else 5
+    runs = [t / number for t in timer.repeat(repeat, number)]
+    return {"median_s": statistics.median(runs), "min_s": min(runs), "max_s": max(runs),
+            "number": number, "repeat": repeat}
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=_HERE, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(corpus_dir: str = CORPUS_DIR, only=None, repeat: int = 5, min_time: float = 0.2) -> dict:
+    """跑基準並回傳結果 dict（schema 見 _print_results / compare）。only：名稱子字串清單。"""
+    raw, mjlog, files = _load_corpus(corpus_dir)
+    if not raw and not mjlog:
+        raise SystemExit(f"語料是空的：{corpus_dir}（先跑 python bench_convert.py corpus）")
+    results = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="bench_convert_") as workdir:
+        benches = _benchmarks(raw, mjlog, workdir)
+        # process_log 寫 temp_logs/ 相對路徑；在暫存目錄裡跑，不弄髒工作目錄
+        os.makedirs(os.path.join(workdir, "temp_logs"))
+        os.chdir(workdir)
+        try:
+            for name, group, unit, fn in benches:
+                if only and not any(s in name for s in only):
+                    continue
+                if isinstance(fn, str):
+                    results[name] = {"group": group, "unit": unit, "skipped": fn}
+                    _log(f"[bench] {name}: skipped（{fn}）")
+                    continue
+                results[name] = {"group": group, "unit": unit, **_time(fn, repeat, min_time)}
+                _log(f"[bench] {name}: {results[name]['median_s'] * 1e3:.3f} ms / {unit}")
+        finally:
+            os.chdir(cwd)
+    return {
+        "schema": SCHEMA,
+        "meta": {"commit": _git_commit(), "python": platform.python_version(),
+                 "platform": platform.platform(), "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                 "corpus": files},
+        "results": results,
+    }
+
+
+def compare(base: dict, new: dict, threshold: float = 0.10) -> list[dict]:
+    """逐項比對兩份結果的最小值；回傳 [{name, base_s, new_s, ratio, regressed}]（兩邊皆有數值者）。"""
+    if base.get("meta", {}).get("corpus") != new.get("meta", {}).get("corpus"):
+        _log("[bench] 警告：兩份結果的語料不同，比較僅供參考")
+    rows = []
+    for name, b in base.get("results", {}).items():
+        n = new.get("results", {}).get(name)
+        if not n or "min_s" not in b or "min_s" not in n:
+            continue
+        ratio = n["min_s"] / b["min_s"] if b["min_s"] else float("inf")
+        rows.append({"name": name, "base_s": b["min_s"], "new_s": n["min_s"],
+                     "ratio": ratio, "regressed": ratio > 1 + threshold})
+    return rows
+
+
+def _fmt(seconds: float) -> str:
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.3f} ms"
+    return f"{seconds * 1e6:.3f} µs"
+
+
+def _print_results(data: dict) -> None:
+    print(f"{'benchmark':<34}{'median':>13}{'min':>13}{'n × r':>14}  per")
+    for name, r in data["results"].items():
+        if "skipped" in r:
+            print(f"{name:<34}{'skipped':>13}{'':>13}{'':>14}  {r['skipped']}")
+            continue
+        runs = f"{r['number']} × {r['repeat']}"
+        print(f"{name:<34}{_fmt(r['median_s']):>13}{_fmt(r['min_s']):>13}{runs:>14}  {r['unit']}")
+
+
+def _print_compare(rows: list[dict], threshold: float) -> bool:
+    print(f"{'benchmark':<34}{'base':>13}{'new':>13}{'change':>9}")
+    for r in rows:
+        flag = "  <-- 退化" if r["regressed"] else ""
+        print(f"{r['name']:<34}{_fmt(r['base_s']):>13}{_fmt(r['new_s']):>13}{(r['ratio'] - 1):>+9.1%}{flag}")
+    regressed = [r for r in rows if r["regressed"]]
+    if regressed:
+        print(f"{len(regressed)} 項變慢超過 {threshold:.0%}")
+    return bool(regressed)
+
+
+def _load_json(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="轉換鏈離線基準（micro / macro）")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    rp = sub.add_parser("run", help="跑基準")
+    rp.add_argument("--corpus", default=CORPUS_DIR)
+    rp.add_argument("--filter", action="append", help="只跑名稱含此字串的基準，可重複")
+    rp.add_argument("--repeat", type=int, default=5, help="每個基準量幾輪（取中位數）")
+    rp.add_argument("--min-time", type=float, default=0.2, help="每輪至少跑幾秒（自動決定次數）")
+    rp.add_argument("--out", help="結果 JSON 輸出路徑")
+    rp.add_argument("--compare", help="跑完後與此結果 JSON 比對")
+    rp.add_argument("--threshold", type=float, default=0.10, help="變慢超過此比例視為退化")
+
+    cp = sub.add_parser("compare", help="比對兩份結果 JSON")
+    cp.add_argument("base")
+    cp.add_argument("new")
+    cp.add_argument("--threshold", type=float, default=0.10)
+
+    gp = sub.add_parser("corpus", help="重新產生入庫語料")
+    gp.add_argument("--out", default=CORPUS_DIR)
+
+    args = ap.parse_args(argv)
+    if args.cmd == "corpus":
+        build_corpus(args.out)
+        return 0
+    if args.cmd == "compare":
+        return int(_print_compare(compare(_load_json(args.base), _load_json(args.new), args.threshold),
+                                  args.threshold))
+
+    data = run(args.corpus, args.filter, args.repeat, args.min_time)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    _print_results(data)
+    if args.compare:
+        print()
+        return int(_print_compare(compare(_load_json(args.compare), data, args.threshold), args.threshold))
+    return 0
+
+
+if __name__ == "__main__":
+    # toumajsoul 以相對路徑 append 'tensoul-py-ng'；這裡用絕對路徑，從任何目錄執行都找得到
+    sys.path.insert(0, os.path.join(_HERE, "tensoul-py-ng"))
+    sys.path.insert(0, _HERE)
+    sys.exit(main())
@@ -31,6 +31,7 @@ _ENV_MAP: dict[tuple[str, str], str] = {
     ("download", "collect_timing"): "COLLECT_TIMING",
     ("download", "save_debug"): "SAVE_DEBUG",
     ("download", "save_raw_json"): "SAVE_RAW_JSON",
+    ("download", "trace_path"): "TRACE_PATH",
 }
 
 DEFAULT_FILENAME = "config.ini"
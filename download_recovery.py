@@ -33,6 +33,8 @@ import os
 import re
 from datetime import datetime, timezone
 
+import stage_trace
+
 
 class AllAccountsFailed(RuntimeError):
     """號池中所有帳號皆無法登入（呼叫端應中止並記錄斷點）。"""
@@ -206,6 +208,10 @@ class AccountSession:
     def current_username(self) -> str:
         return self.accounts[self._index]["username"]
 
+    def set_notify(self, notify) -> None:
+        """換掉事件回呼（常駐後端跨 job 重用同一會話時，事件要歸到目前的 job）。"""
+        self._notify = notify or (lambda code, msg="": None)
+
     async def ensure_login(self) -> None:
         """初次登入：自第一個帳號起依序嘗試，全滅拋 AllAccountsFailed。"""
         async with self._lock:
@@ -695,15 +701,17 @@ async def download_with_retry(session: AccountSession, download_fn, uuid: str,
             break  # 牌譜本身的問題：重試無用
         if attempt + 1 >= max_attempts:
             break
-        if is_session_error(last_err) or recovered:
-            # 連線/會話壞了（或原地重試過仍失敗）→ 重建連線；已重建過一次就換帳號。
-            await session.recover(gen, force_switch=recovered, reason=f"{uuid}: {last_err}")
-            recovered = True
-            await asyncio.sleep(base_delay * (attempt + 1))
-        else:
-            await asyncio.sleep(base_delay * 0.5)  # 未知錯誤：先便宜地原地重試
+        with stage_trace.span(uuid, "retry"):
+            if is_session_error(last_err) or recovered:
+                # 連線/會話壞了（或原地重試過仍失敗）→ 重建連線；已重建過一次就換帳號。
+                await session.recover(gen, force_switch=recovered, reason=f"{uuid}: {last_err}")
+                recovered = True
+                await asyncio.sleep(base_delay * (attempt + 1))
+            else:
+                await asyncio.sleep(base_delay * 0.5)  # 未知錯誤：先便宜地原地重試
 
     if session.note_failure(is_permanent_error(last_err)):
         # 連續失敗過多（且不是「牌譜不存在」這種明確答案）：重建一次連線當安全網。
-        await session.recover(session.generation, reason=f"連續失敗 {_RECOVER_AFTER_CONSECUTIVE} 筆")
+        with stage_trace.span(uuid, "retry"):
+            await session.recover(session.generation, reason=f"連續失敗 {_RECOVER_AFTER_CONSECUTIVE} 筆")
     return None, None, None, last_err
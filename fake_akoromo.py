@@ -0,0 +1,554 @@
+# -*- coding: utf-8 -*-
+"""fake_akoromo —— 本機假 amae-koromo 資料 API：離線壓測／回歸測試 Stage 1 收集端用。
+
+為什麼需要這支
+--------------
+``akoromo_api``（date_room_api / follow / 玩家 API 收集）只能對公開服務跑：有速率限制、
+收錄延遲與資料量天天在變，同一個實驗跑兩次結果就不同，也不該為了調參數對它一次打上萬
+個請求。本模組在本機扮演 ``*-data.amae-koromo.com``：
+
+- ``/api/v2/{pl4|pl3}/games/{end}/{start}?limit&mode&descending``：房間對局清單，uuid
+  **遮蔽成短碼**（``_masked: true``），與匿名請求看到的一樣；單次最多回 500 筆（``ROW_CAP``），
+  超過就截斷——``akoromo_api._enumerate`` 的二分補齊靠的就是這個行為。
+- ``/api/v2/{pl}/player_records/{accountId}/{end}/{start}?limit&mode&descending``：
+  該玩家的對局、完整 uuid，同樣 500 筆上限。
+- ``/api/v2/{pl}/player_delta_ranking/{period}?mode``：由資料集內的 gradingScore 加總。
+- 資料集可為錄製（``capture`` 子命令對真 API 跑一次去遮蔽流程，存成 JSON lines）或合成
+  （各房間每小時局數、玩家池大小、「player_records 查不到」的比例皆可調）。錄製時還原
+  不了的局照樣只以短碼保存，回放時一樣還原不了。
+- 可調延遲與抖動、依比例注入 HTTP 錯誤（如 429 / 500 / 503）。
+
+時間窗端點兩端都含（``start <= startTime <= end``）；``iter_player_uuids`` 註明的
+「邊界那局會重複出現」即依此。
+
+用法
+----
+    python fake_akoromo.py serve --port 18081 --start 2026-10-01 --end 2026-10-02 \\
+        --latency 0.03 --errors 429=0.01,500=0.005
+    AKOROMO_FAKE_API=http://127.0.0.1:18081 python -m scrapy crawl ...   （akoromo_api 改打本機）
+    python fake_akoromo.py bench --room Jade --start 2026-10-01 --end 2026-10-01
+    python fake_akoromo.py capture --room Jade --start 2026-10-01 --end 2026-10-01 \\
+        --out fixtures/akoromo/jade.jsonl
+
+Selenium 擷取器（date_room / capture 模式）渲染的是 amae-koromo 前端 SPA，資料網域寫死在
+前端裡，無法指向本機；本模組只涵蓋純 API 的收集路徑。
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import io
+import json
+import os
+import random
+import sys
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+ROW_CAP = 500
+_B62 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+
+# 合成資料的預設每小時局數（粗略依各房間熱度；王座最少、金之間最多）。
+SYNTH_RATES = {
+    "pl4": {16: 30, 12: 200, 9: 500, 15: 20, 11: 120, 8: 300},
+    "pl3": {26: 10, 24: 60, 22: 150, 25: 8, 23: 40, 21: 100},
+}
+_RANKING_SECONDS = {"4w": 28 * 86400, "1w": 7 * 86400, "3d": 3 * 86400, "1d": 86400}
+
+# bench 預設拿掉 akoromo_api 對公開服務的禮貌延遲，並縮短整輪失敗後的退避，量到的才是
+# 收集策略本身（請求數、往返次數）而非 sleep。--polite 保留原值。
+_FAST = {"_REQ_DELAY": (0.0, 0.0), "_RETRY_BACKOFF": [0.1, 0.2, 0.5, 1, 2]}
+
+# 收集策略＝akoromo_api 模組常數的覆寫組合（bench 逐一套用、量完還原）。
+STRATEGIES = {
+    "default": {},
+    "slice-1h": {"_SLICE_SECONDS": 3600},
+    "slice-24h": {"_SLICE_SECONDS": 24 * 3600},
+    "player-limit-500": {"_PLAYER_LIMIT": 500},
+}
+
+
+class FakeAkoromo:
+    """本機假 amae-koromo 資料 API。
+
+    games：對局 dict 清單（含 ``pl``、``modeId``、``startTime``、``players``；``uuid`` 為
+    完整 uuid 者可經 player_records 還原，否則視為只剩短碼）。errors：{HTTP 狀態碼: 機率}，
+    每個請求依序擲骰。mask=False 模擬有權限的請求（games 直接回完整 uuid）。
+    unresolvable_rate：合成資料時不列入 player_records 的比例（見 synthesize_games）。"""
+
+    def __init__(self, games, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 jitter: float = 0.0, errors: dict[int, float] | None = None, mask: bool = True,
+                 seed: int | None = None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.errors = dict(errors or {})
+        self.mask = mask
+        self._rng = random.Random(seed)
+        self.games = 0
+        self._by_mode: dict[tuple, tuple[list, list]] = {}
+        self._by_player: dict[tuple, tuple[list, list]] = {}
+        self._index(games)
+        self.stats = {"requests": 0, "games": 0, "player_records": 0, "ranking": 0,
+                      "rows": 0, "truncated": 0, "errors": {}}
+        self._runner = None
+        self._installed = None
+
+    def _index(self, games) -> None:
+        by_mode: dict[tuple, list] = {}
+        by_player: dict[tuple, list] = {}
+        for g in games:
+            pl = g.get("pl", "pl4")
+            by_mode.setdefault((pl, int(g["modeId"])), []).append(g)
+            if _is_full(g.get("uuid")) and not g.get("_hidden"):
+                for p in g.get("players", []):
+                    by_player.setdefault((pl, int(p["accountId"])), []).append(g)
+            self.games += 1
+        for src, dst in ((by_mode, self._by_mode), (by_player, self._by_player)):
+            for key, rows in src.items():
+                rows.sort(key=lambda g: g["startTime"])
+                dst[key] = ([g["startTime"] for g in rows], rows)
+
+    # ── 生命週期 ───────────────────────────────────────────────────────
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> "FakeAkoromo":
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_get("/api/v2/{pl}/games/{end}/{start}", self._games)
+        app.router.add_get("/api/v2/{pl}/player_records/{account}/{end}/{start}", self._player_records)
+        app.router.add_get("/api/v2/{pl}/player_delta_ranking/{period}", self._ranking)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        if not self.port:  # port=0：取得實際綁到的 port
+            self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "FakeAkoromo":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        self.uninstall()
+        await self.stop()
+
+    def install(self) -> None:
+        """把 akoromo_api 的鏡像清單指向本機。"""
+        install(self.base_url)
+        self._installed = True
+
+    def uninstall(self) -> None:
+        if self._installed:
+            uninstall()
+            self._installed = None
+
+    # ── 查詢 ─────────────────────────────────────────────────────────
+    def query(self, pl: str, modes, start: int, end: int, account: int | None = None) -> list:
+        """[start, end]（含兩端）內的對局，依 startTime 遞增。modes 為 None = 不篩房間。"""
+        out = []
+        if account is not None:
+            starts, rows = self._by_player.get((pl, account), ((), ()))
+            out = rows[bisect_left(starts, start):bisect_right(starts, end)]
+            if modes is not None:
+                out = [g for g in out if int(g["modeId"]) in modes]
+            return out
+        keys = [(pl, m) for m in modes] if modes is not None else [k for k in self._by_mode if k[0] == pl]
+        for key in keys:
+            starts, rows = self._by_mode.get(key, ((), ()))
+            out.extend(rows[bisect_left(starts, start):bisect_right(starts, end)])
+        if len(keys) > 1:
+            out.sort(key=lambda g: g["startTime"])
+        return out
+
+    # ── HTTP ─────────────────────────────────────────────────────────
+    async def _gate(self, kind: str):
+        """每個請求共用：記數、延遲、錯誤注入。回傳錯誤回應或 None（照常處理）。"""
+        from aiohttp import web
+
+        self.stats["requests"] += 1
+        self.stats[kind] += 1
+        delay = self.latency + (self._rng.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        for status, rate in self.errors.items():
+            if rate and self._rng.random() < rate:
+                self.stats["errors"][status] = self.stats["errors"].get(status, 0) + 1
+                return web.Response(status=status, text=f"fake error {status}")
+        return None
+
+    def _page(self, request, rows: list, masked: bool):
+        from aiohttp import web
+
+        q = request.query
+        if q.get("descending", "false").lower() == "true":
+            rows = rows[::-1]
+        limit = min(_int(q.get("limit"), ROW_CAP), ROW_CAP)
+        if len(rows) > limit:
+            self.stats["truncated"] += 1
+            rows = rows[:limit]
+        self.stats["rows"] += len(rows)
+        return web.json_response([_public(g, masked) for g in rows])
+
+    async def _games(self, request):
+        err = await self._gate("games")
+        if err is not None:
+            return err
+        m = request.match_info
+        rows = self.query(m["pl"], _modes(request.query.get("mode")), _ts(m["start"]), _ts(m["end"]))
+        return self._page(request, rows, self.mask)
+
+    async def _player_records(self, request):
+        err = await self._gate("player_records")
+        if err is not None:
+            return err
+        m = request.match_info
+        rows = self.query(m["pl"], _modes(request.query.get("mode")), _ts(m["start"]), _ts(m["end"]),
+                          account=_int(m["account"], 0))
+        return self._page(request, rows, False)
+
+    async def _ranking(self, request):
+        from aiohttp import web
+
+        err = await self._gate("ranking")
+        if err is not None:
+            return err
+        pl, period = request.match_info["pl"], request.match_info["period"]
+        if period not in _RANKING_SECONDS:
+            return web.Response(status=404, text="unknown period")
+        modes = _modes(request.query.get("mode"))
+        latest = max((rows[-1]["startTime"] for (p, _), (_, rows) in self._by_mode.items()
+                      if p == pl and rows), default=0)
+        delta: dict[int, float] = {}
+        names: dict[int, str] = {}
+        for g in self.query(pl, modes, latest - _RANKING_SECONDS[period], latest):
+            for p in g.get("players", []):
+                acc = int(p["accountId"])
+                delta[acc] = delta.get(acc, 0) + p.get("gradingScore", 0)
+                names[acc] = p.get("nickname", "")
+        ranked = sorted(delta.items(), key=lambda kv: kv[1], reverse=True)
+        row = lambda kv: {"id": kv[0], "nickname": names[kv[0]], "delta": kv[1]}
+        return web.json_response({"positive": [row(kv) for kv in ranked[:100] if kv[1] > 0],
+                                  "negative": [row(kv) for kv in ranked[::-1][:100] if kv[1] < 0]})
+
+
+def _int(value, default: int) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _ts(value) -> int:
+    """路徑上的時間戳；毫秒（前端網址慣用）自動換成秒。"""
+    ts = _int(value, 0)
+    return ts // 1000 if ts > 10 ** 11 else ts
+
+
+def _modes(value):
+    if not value:
+        return None
+    return {int(m) for m in str(value).split(".") if m.isdigit()}
+
+
+def _is_full(u) -> bool:
+    return bool(u) and len(u) == 43 and u[6] == "-"
+
+
+def mask_uuid(record_uuid: str) -> str:
+    """完整 uuid -> 11 字元短碼（穩定；與真實服務的編碼無關，只求形似且不可逆推）。"""
+    n = int.from_bytes(hashlib.sha1(record_uuid.encode("utf-8")).digest()[:8], "big")
+    out = []
+    for _ in range(11):
+        n, r = divmod(n, 62)
+        out.append(_B62[r])
+    return "".join(out)
+
+
+def _public(game: dict, masked: bool) -> dict:
+    """對外回應的樣子：去掉內部欄位；遮蔽時 uuid/_id 換成短碼並標 _masked。"""
+    out = {k: v for k, v in game.items() if k not in ("pl", "_hidden")}
+    u = game.get("uuid")
+    if masked or not _is_full(u):
+        short = mask_uuid(u) if _is_full(u) else u
+        out["_id"] = out["uuid"] = short
+        out["_masked"] = True
+    else:
+        out["_id"] = u
+        out.pop("_masked", None)
+    return out
+
+
+# ── 資料集 ────────────────────────────────────────────────────────────
+def synthesize_games(start_ts: int, end_ts: int, pl: str = "pl4", modes=None,
+                     rates: dict[int, float] | None = None, players: int = 2000,
+                     unresolvable_rate: float = 0.0, seed: int | None = 0) -> list[dict]:
+    """在 [start_ts, end_ts) 依每小時局數（rates，預設 SYNTH_RATES[pl]）合成對局。
+
+    每個房間一個玩家池（players 人），每局隨機抽 4 人（pl3 為 3 人）。startTime 在時間窗內
+    均勻亂數，同房間同秒開局的碰撞照真實情況保留。unresolvable_rate 比例的局標 _hidden：
+    games 端點列得出來，player_records 卻查不到（對應真實服務收錄不同步的情形）。"""
+    rng = random.Random(seed)
+    nseats = 3 if pl == "pl3" else 4
+    rates = dict(rates or SYNTH_RATES[pl])
+    if modes is not None:
+        rates = {m: r for m, r in rates.items() if m in modes}
+    out = []
+    for mode, per_hour in rates.items():
+        pool = [mode * 1_000_000 + i for i in range(players)]
+        for _ in range(int(per_hour * (end_ts - start_ts) / 3600)):
+            st = rng.randrange(start_ts, end_ts)
+            seats = rng.sample(pool, nseats)
+            uuid = "{:%y%m%d}-{}-{}-{}-{}-{}".format(
+                datetime.fromtimestamp(st), *(rng.getrandbits(4 * n).to_bytes(n // 2, "big").hex()
+                                              for n in (8, 4, 4, 4, 12)))
+            deltas = sorted((rng.randint(-150, 150) for _ in seats), reverse=True)
+            game = {"pl": pl, "uuid": uuid, "modeId": mode, "startTime": st,
+                    "endTime": st + rng.randint(900, 2400),
+                    "players": [{"accountId": acc, "nickname": f"p{acc}", "level": 10401,
+                                 "score": 25000, "gradingScore": d} for acc, d in zip(seats, deltas)]}
+            if unresolvable_rate and rng.random() < unresolvable_rate:
+                game["_hidden"] = True
+            out.append(game)
+    return out
+
+
+def load_games(path: str) -> list[dict]:
+    """讀 capture 錄下的 JSON lines（一行一局）。"""
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(ln) for ln in f if ln.strip()]
+
+
+# ── 掛到 akoromo_api ──────────────────────────────────────────────────
+_saved: dict = {}
+
+
+def akoromo_api_module():
+    """import paipu_project.spiders.akoromo_api（外層 scrapy 專案目錄加進 sys.path）。"""
+    outer = os.path.join(os.path.dirname(os.path.abspath(__file__)), "paipu_project")
+    if outer not in sys.path:
+        sys.path.insert(0, outer)
+    from paipu_project.spiders import akoromo_api
+    return akoromo_api
+
+
+def install(base_url: str, mirrors: int = 4) -> None:
+    """把 akoromo_api.API_MIRRORS 換成 mirrors 份 base_url：_get 換鏡像重試的路徑照走，
+    只是每個「鏡像」都是本機。重複呼叫以最後一次為準。"""
+    api = akoromo_api_module()
+    if not _saved:
+        _saved["mirrors"] = api.API_MIRRORS
+    api.API_MIRRORS = [base_url] * max(1, mirrors)
+
+
+def uninstall() -> None:
+    if not _saved:
+        return
+    akoromo_api_module().API_MIRRORS = _saved.pop("mirrors")
+
+
+@contextlib.contextmanager
+def _overrides(module, values: dict):
+    old = {k: getattr(module, k) for k in values}
+    for k, v in values.items():
+        setattr(module, k, v)
+    try:
+        yield
+    finally:
+        for k, v in old.items():
+            setattr(module, k, v)
+
+
+# ── 基準 ─────────────────────────────────────────────────────────────
+def bench_collect(fake: FakeAkoromo, room: str, start_date: str, end_date: str,
+                  game_mode: str = "yonma", strategies=None, polite: bool = False,
+                  quiet: bool = True) -> list[dict]:
+    """對每個策略跑一次 collect_room_paipus（同步，請在 fake 之外的執行緒呼叫），回傳
+    [{strategy, seconds, uuids, uuids_per_sec, requests, requests_per_uuid, games_requests,
+    player_requests, truth, unresolved_ratio, errors}]。
+
+    truth 是資料集在該日期區間、該房間的實際局數；unresolved_ratio = 1 - uuids / truth，
+    同時涵蓋還原失敗與列舉漏掉的局。fake 需已 install。"""
+    api = akoromo_api_module()
+    room_map, pl = api._GAME_MODES[game_mode]
+    slices = list(api._iter_slices(start_date, end_date))
+    truth = len([g for g in fake.query(pl, {room_map[room]}, slices[0][0], slices[-1][1])
+                 if g["startTime"] < slices[-1][1]])
+    base = {} if polite else _FAST
+    results = []
+    for name in strategies or STRATEGIES:
+        fake.stats.update(requests=0, games=0, player_records=0, ranking=0, rows=0, truncated=0,
+                          errors={})
+        sink = io.StringIO()
+        with _overrides(api, {**base, **STRATEGIES[name]}), contextlib.redirect_stdout(sink), \
+                (contextlib.redirect_stderr(sink) if quiet else contextlib.nullcontext()):
+            t0 = time.perf_counter()
+            uuids = api.collect_room_paipus(room, start_date, end_date, existing_ids=set(),
+                                            game_mode=game_mode)
+            seconds = time.perf_counter() - t0
+        s = fake.stats
+        results.append({
+            "strategy": name, "seconds": round(seconds, 3), "uuids": len(uuids),
+            "uuids_per_sec": round(len(uuids) / seconds, 1) if seconds else 0.0,
+            "requests": s["requests"],
+            "requests_per_uuid": round(s["requests"] / len(uuids), 3) if uuids else None,
+            "games_requests": s["games"], "player_requests": s["player_records"],
+            "truncated": s["truncated"], "truth": truth,
+            "unresolved_ratio": round(1 - len(uuids) / truth, 4) if truth else 0.0,
+            "errors": dict(s["errors"]),
+        })
+    return results
+
+
+# ── CLI ──────────────────────────────────────────────────────────────
+def _parse_errors(text: str) -> dict[int, float]:
+    out = {}
+    for item in filter(None, (t.strip() for t in (text or "").split(","))):
+        code, _, rate = item.partition("=")
+        out[int(code)] = float(rate)
+    return out
+
+
+def _date_range(start_date: str, end_date: str) -> tuple[int, int]:
+    slices = list(akoromo_api_module()._iter_slices(start_date, end_date))
+    return slices[0][0], slices[-1][1]
+
+
+def _build(args, modes=None) -> FakeAkoromo:
+    if args.dataset:
+        games = load_games(args.dataset)
+    else:
+        pl = "pl3" if args.game_mode == "sanma" else "pl4"
+        start_ts, end_ts = _date_range(args.start, args.end)
+        games = synthesize_games(start_ts, end_ts, pl, modes=modes, players=args.players,
+                                 unresolvable_rate=args.unresolvable, seed=args.seed)
+    return FakeAkoromo(games, args.host, args.port, latency=args.latency, jitter=args.jitter,
+                       errors=_parse_errors(args.errors), mask=not args.unmasked, seed=args.seed)
+
+
+async def _serve(args) -> None:
+    fake = _build(args)
+    await fake.start()
+    print(f"假 amae-koromo API 已啟動：{fake.base_url}（對局 {fake.games} 筆）")
+    print(f"收集端請設 AKOROMO_FAKE_API={fake.base_url}")
+    try:
+        while True:
+            await asyncio.sleep(10)
+            s = fake.stats
+            print(f"請求 {s['requests']}｜games {s['games']}｜player_records {s['player_records']}｜"
+                  f"截斷 {s['truncated']}｜錯誤 {s['errors']}")
+    finally:
+        await fake.stop()
+
+
+async def _bench(args) -> None:
+    api = akoromo_api_module()
+    room_map, _ = api._GAME_MODES[args.game_mode]
+    fake = _build(args, modes={room_map[args.room]})
+    async with fake:
+        fake.install()
+        results = await asyncio.to_thread(
+            bench_collect, fake, args.room, args.start, args.end, args.game_mode,
+            args.strategy or None, args.polite, not args.verbose)
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+    print(f"{args.game_mode} {args.room} {args.start}~{args.end}：資料集 {results[0]['truth']} 局"
+          f"｜延遲 {args.latency * 1000:.0f}ms｜錯誤 {args.errors or '無'}")
+    print(f"{'strategy':<18}{'sec':>8}{'uuids':>8}{'uuid/s':>9}{'req':>7}{'req/uuid':>10}"
+          f"{'games':>7}{'player':>8}{'unresolved':>12}")
+    for r in results:
+        print(f"{r['strategy']:<18}{r['seconds']:>8.2f}{r['uuids']:>8}{r['uuids_per_sec']:>9.1f}"
+              f"{r['requests']:>7}{(r['requests_per_uuid'] or 0):>10.3f}{r['games_requests']:>7}"
+              f"{r['player_requests']:>8}{r['unresolved_ratio']:>11.2%}")
+
+
+def _capture(args) -> None:
+    """對真 API 跑一次 games -> player_records 去遮蔽，錄成 JSON lines 供 serve/bench 回放。"""
+    api = akoromo_api_module()
+    room_map, pl = api._GAME_MODES[args.game_mode]
+    mode = room_map[args.room]
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    seen = set()
+    resolved = total = 0
+    with open(args.out, "w", encoding="utf-8") as f:
+        for win_start, win_end in api._iter_slices(args.start, args.end):
+            cache: dict[int, str] = {}
+            for g in api._enumerate(pl, mode, win_start, win_end):
+                key = g.get("_id") or g.get("uuid")
+                if key in seen:  # 時間窗邊界那局兩邊都會列到
+                    continue
+                seen.add(key)
+                total += 1
+                rec = dict(g, pl=pl)
+                full = api._resolve_full_uuid(pl, g, mode, win_start, win_end, cache)
+                if full:
+                    resolved += 1
+                    rec["_id"] = rec["uuid"] = full
+                    rec.pop("_masked", None)
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    print(f"已錄製 {total} 局（可還原 {resolved}）-> {args.out}")
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="本機假 amae-koromo 資料 API（離線壓測收集端）")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    def dataset_args(p, room: bool = False):
+        p.add_argument("--host", default="127.0.0.1")
+        p.add_argument("--port", type=int, default=0 if room else 18081)
+        p.add_argument("--dataset", help="capture 錄下的 JSON lines；不給則合成")
+        p.add_argument("--game-mode", choices=("yonma", "sanma"), default="yonma")
+        p.add_argument("--start", default=datetime.now().strftime("%Y-%m-%d"), help="合成資料起日")
+        p.add_argument("--end", default=datetime.now().strftime("%Y-%m-%d"), help="合成資料迄日（含）")
+        p.add_argument("--players", type=int, default=2000, help="合成資料每房間玩家池大小")
+        p.add_argument("--unresolvable", type=float, default=0.0,
+                       help="合成資料中 player_records 查不到的局比例")
+        p.add_argument("--latency", type=float, default=0.0, help="每個請求延遲（秒）")
+        p.add_argument("--jitter", type=float, default=0.0, help="延遲抖動 ±秒")
+        p.add_argument("--errors", default="", help="HTTP 錯誤注入，如 429=0.01,500=0.005")
+        p.add_argument("--unmasked", action="store_true", help="games 端點回完整 uuid（不遮蔽）")
+        p.add_argument("--seed", type=int, default=0)
+
+    dataset_args(sub.add_parser("serve", help="啟動假 API"))
+
+    bp = sub.add_parser("bench", help="量 collect_room_paipus 各策略的吞吐與請求數")
+    dataset_args(bp, room=True)
+    bp.add_argument("--room", default="Jade")
+    bp.add_argument("--strategy", action="append", choices=list(STRATEGIES),
+                    help="只跑指定策略，可重複（預設全部）")
+    bp.add_argument("--polite", action="store_true", help="保留 akoromo_api 的請求間禮貌延遲")
+    bp.add_argument("--json", action="store_true", help="以 JSON 輸出結果")
+    bp.add_argument("--verbose", action="store_true", help="顯示收集端的 [api] 日誌")
+
+    cp = sub.add_parser("capture", help="對真 API 錄製房間資料集")
+    cp.add_argument("--room", default="Jade")
+    cp.add_argument("--game-mode", choices=("yonma", "sanma"), default="yonma")
+    cp.add_argument("--start", required=True)
+    cp.add_argument("--end", required=True)
+    cp.add_argument("--out", default=os.path.join("fixtures", "akoromo", "games.jsonl"))
+
+    args = ap.parse_args(argv)
+    try:
+        if args.cmd == "capture":
+            _capture(args)
+        else:
+            asyncio.run(_serve(args) if args.cmd == "serve" else _bench(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
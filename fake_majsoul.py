@@ -0,0 +1,781 @@
+# -*- coding: utf-8 -*-
+"""fake_majsoul —— 本機假雀魂閘道：離線壓測／回歸測試 Stage 2 下載管線用。
+
+為什麼需要這支
+--------------
+nettest、batch_diff.py、run_sanma_accept.py 等任何吞吐實驗都要真的 CN 帳號＋線上伺服器：
+結果受網路與伺服器負載左右、無法重現，也不敢對雀魂一次打幾千筆。本模組在本機扮演雀魂：
+
+- HTTP 開機流程：``/1/version.json`` → ``/1/v{ver}/config.json``（gateways）→
+  ``/api/clientgate/routes``，與 ``MajsoulPaipuDownloader._connect`` 走的一模一樣。
+- ``/gateway`` websocket：講 ms-api ``MSRPCChannel`` 的封包格式（``0x02`` + 2 bytes
+  little-endian 序號 + ``Wrapper``；回應 ``0x03`` + 同序號 + ``Wrapper``），實作下載管線會
+  用到的 ``.lq.Route.requestConnection/heartbeat`` 與 ``.lq.Lobby.login/loginSuccess/
+  loginBeat/heatbeat/fetchGameRecord``；其他方法回空的成功回應。
+- ``fetchGameRecord`` 回放錄好的 ``ResGameRecord``（``<records_dir>/<uuid>.bin``，可用
+  ``capture`` 子命令以真帳號錄製），沒錄到的 uuid 借用錄好的牌譜改寫 head.uuid，一筆都
+  沒有時現場合成一局可被 tensoul 正常轉換的牌譜。
+- 可調延遲與抖動、依比例注入 error 1203 / 151 / 1004、每 N 筆或依比例斷線。1004（會話
+  失效）會讓該連線之後的請求持續回 1004 直到重新登入，與真實伺服器一樣，才測得到
+  ``download_recovery`` 的重登流程。
+
+用法
+----
+    python fake_majsoul.py serve --port 18080 --latency 0.05 --jitter 0.02 \\
+        --errors 1203=0.05,151=0.01,1004=0.002 --disconnect-every 2000
+    python fake_majsoul.py capture ids.txt --out fixtures/majsoul   （需 config.ini 帳密）
+
+程式內（測試／基準）：
+    async with FakeMajsoul(latency=0.02) as fake:
+        fake.install()      # 把 MajsoulPaipuDownloader 與 ms_patch 指向本機
+        ...                 # toumajsoul / run_download / AccountSession 照常使用
+        fake.uninstall()
+
+``serve`` 模式則在啟動下載端前設好環境變數 ``MS_FAKE_GATEWAY=http://127.0.0.1:18080``，
+由 ``install_from_env()`` 指過去（toumajsoul 與 run_download 於 import tensoul 後呼叫）。
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import sys
+
+import ms.protocol_pb2 as pb
+from ms.rpc import Lobby, Route
+
+FAKE_VERSION = "0.11.252.w"
+_ROUTE_ID = "route-fake"
+_SERVICES = {"Lobby": Lobby, "Route": Route}
+
+
+class FakeMajsoul:
+    """本機假雀魂（HTTP 開機流程＋ websocket RPC），同一個 port 上提供。
+
+    errors：{錯誤碼: 機率}，每筆 fetchGameRecord 依序擲骰；disconnect_every：每 N 筆
+    fetchGameRecord 後主動斷線（0 = 不斷）；disconnect_rate：每筆斷線的機率。
+    bad_accounts：登入一律回 1002（帳密錯）的帳號，用來測號池輪替。
+    strict：未錄到的 uuid 回 1203，而不是借用／合成。"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, records_dir: str | None = None,
+                 latency: float = 0.0, jitter: float = 0.0, errors: dict[int, float] | None = None,
+                 disconnect_every: int = 0, disconnect_rate: float = 0.0,
+                 bad_accounts=(), strict: bool = False, kyokus: int = 8, seed: int | None = None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.errors = dict(errors or {})
+        self.disconnect_every = disconnect_every
+        self.disconnect_rate = disconnect_rate
+        self.bad_accounts = set(bad_accounts)
+        self.strict = strict
+        self.kyokus = kyokus
+        self._rng = random.Random(seed)
+        self.records: dict[str, bytes] = load_records(records_dir) if records_dir else {}
+        self._templates = list(self.records.values())
+        self._synth_cache: dict[str, bytes] = {}
+        self.stats = {"connections": 0, "requests": 0, "records": 0, "disconnects": 0,
+                      "logins": 0, "errors": {}}
+        self._runner = None
+        self._installed = None
+
+    # ── 生命週期 ───────────────────────────────────────────────────────
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> "FakeMajsoul":
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_get("/1/version.json", self._version)
+        app.router.add_get("/1/v{version}/config.json", self._config)
+        app.router.add_get("/api/clientgate/routes", self._routes)
+        app.router.add_get("/gateway", self._gateway)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        if not self.port:  # port=0：取得實際綁到的 port
+            self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "FakeMajsoul":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        self.uninstall()
+        await self.stop()
+
+    def install(self) -> None:
+        """把 tensoul 的下載器（含之後的重連）與 ms_patch 的版本探測指向本機。"""
+        install(self.base_url)
+        self._installed = True
+
+    def uninstall(self) -> None:
+        if self._installed:
+            uninstall()
+            self._installed = None
+
+    # ── HTTP 開機流程 ─────────────────────────────────────────────────
+    async def _version(self, request):
+        from aiohttp import web
+        return web.json_response({"version": FAKE_VERSION, "force_version": FAKE_VERSION})
+
+    async def _config(self, request):
+        from aiohttp import web
+        return web.json_response({"ip": [{"name": "player", "gateways": [{"id": "fake", "url": self.base_url}]}]})
+
+    async def _routes(self, request):
+        from aiohttp import web
+        return web.json_response({"data": {"routes": [
+            {"id": _ROUTE_ID, "domain": f"{self.host}:{self.port}"}]}})
+
+    # ── websocket RPC ────────────────────────────────────────────────
+    async def _gateway(self, request):
+        from aiohttp import WSMsgType, web
+
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        self.stats["connections"] += 1
+        conn = {"ws": ws, "logged_in": False, "expired": False}
+        pending: set[asyncio.Task] = set()
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.BINARY:
+                    continue
+                data = msg.data
+                if not data or data[0] != 2:  # 只處理 REQUEST
+                    continue
+                # 每個請求各開一個 task：客戶端可同時有多筆在線上，回應依完成順序送回。
+                task = asyncio.create_task(self._handle(conn, data[1:3], data[3:]))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        finally:
+            for task in pending:
+                task.cancel()
+        return ws
+
+    async def _handle(self, conn: dict, idx: bytes, body: bytes) -> None:
+        wrapper = pb.Wrapper()
+        wrapper.ParseFromString(body)
+        _, package, service, method = wrapper.name.split(".", 3)
+        self.stats["requests"] += 1
+        stub = _SERVICES.get(service)
+        if package != "lq" or stub is None or method not in stub._res:
+            res = pb.ResCommon()
+        else:
+            req = stub._req[method]()
+            req.ParseFromString(wrapper.data)
+            res = await self._respond(conn, method, req, stub._res[method]())
+            if res is None:  # 模擬斷線：不回應、直接關掉連線
+                self.stats["disconnects"] += 1
+                await conn["ws"].close()
+                return
+        out = pb.Wrapper()
+        out.data = res.SerializeToString()
+        ws = conn["ws"]
+        if not ws.closed:
+            try:
+                await ws.send_bytes(b"\x03" + idx + out.SerializeToString())
+            except ConnectionError:
+                pass
+
+    async def _respond(self, conn: dict, method: str, req, res):
+        if method == "login":
+            self.stats["logins"] += 1
+            if req.account in self.bad_accounts:
+                res.error.code = 1002
+                return res
+            conn["logged_in"], conn["expired"] = True, False
+            res.account_id = int(hashlib.md5(req.account.encode()).hexdigest()[:7], 16)
+            res.access_token = os.urandom(16).hex()
+            return res
+        if method != "fetchGameRecord":
+            return res  # requestConnection / heartbeat / loginSuccess / loginBeat / ...
+
+        n = self.stats["records"] = self.stats["records"] + 1
+        delay = self.latency + (self._rng.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if (self.disconnect_every and n % self.disconnect_every == 0) or \
+                (self.disconnect_rate and self._rng.random() < self.disconnect_rate):
+            return None
+        if not conn["logged_in"] or conn["expired"]:
+            return self._error(res, 1004)
+        for code, rate in self.errors.items():
+            if self._rng.random() < rate:
+                if code == 1004:
+                    conn["expired"] = True  # 會話失效：之後持續 1004 直到重登
+                return self._error(res, code)
+
+        raw = self.record_bytes(req.game_uuid)
+        if raw is None:
+            return self._error(res, 1203)
+        res.ParseFromString(raw)
+        return res
+
+    def _error(self, res, code: int):
+        res.error.code = code
+        errors = self.stats["errors"]
+        errors[code] = errors.get(code, 0) + 1
+        return res
+
+    # ── 牌譜來源 ─────────────────────────────────────────────────────
+    def record_bytes(self, record_uuid: str) -> bytes | None:
+        """uuid → 序列化的 ResGameRecord；strict 且未錄到時回 None（→ 1203）。"""
+        raw = self.records.get(record_uuid)
+        if raw is not None:
+            return raw
+        if self.strict:
+            return None
+        raw = self._synth_cache.get(record_uuid)
+        if raw is None:
+            if self._templates:
+                res = pb.ResGameRecord()
+                res.ParseFromString(self._templates[_stable_hash(record_uuid) % len(self._templates)])
+                res.head.uuid = record_uuid
+            else:
+                res = synthesize_record(record_uuid, kyokus=self.kyokus)
+            raw = res.SerializeToString()
+            if len(self._synth_cache) < 4096:
+                self._synth_cache[record_uuid] = raw
+        return raw
+
+
+# ── 合成牌譜 ──────────────────────────────────────────────────────────
+_TILES = [f"{n}{s}" for s in "mps" for n in range(1, 10)] + [f"{n}z" for n in range(1, 8)]
+_DRAGONS = ("5z", "6z", "7z")
+_DAISANGEN = 37
+# 一般和了隨機挑的役（fan id）：斷幺九、役牌 白/發/中、平和、混一色、一盃口、對對和
+_PLAIN_YAKU = (12, 7, 8, 9, 14, 27, 13, 21)
+
+
+def _stable_hash(text: str) -> int:
+    return int(hashlib.md5(text.encode("utf-8")).hexdigest()[:8], 16)
+
+
+def _base(tile: str) -> str:
+    """赤五（0m/0p/0s）視同 5，比對碰槓用。"""
+    return "5" + tile[1] if tile[0] == "0" else tile
+
+
+def _action(record) -> pb.GameAction:
+    wrapper = pb.Wrapper()
+    wrapper.name = ".lq." + type(record).__name__
+    wrapper.data = record.SerializeToString()
+    act = pb.GameAction()
+    act.type = 1
+    act.result = wrapper.SerializeToString()
+    return act
+
+
+def _user_op(seat: int, op_type: int, tile: str, timeuse: int) -> pb.GameAction:
+    """玩家自身操作（type 2）：打牌 1、暗槓 4、加槓 6、立直 7、拔北 11。真牌譜的思考時間
+    （timeuse）記在這裡。"""
+    act = pb.GameAction()
+    act.type = 2
+    act.user_input.seat = seat
+    act.user_input.type = 2
+    act.user_input.operation.type = op_type
+    act.user_input.operation.tile = tile
+    act.user_input.operation.timeuse = timeuse
+    return act
+
+
+def _user_call(seat: int, call_type: int, timeuse: int) -> pb.GameAction:
+    """鳴牌操作（type 3，cpg）：吃 0、碰 1、大明槓 2。"""
+    act = pb.GameAction()
+    act.type = 2
+    act.user_input.seat = seat
+    act.user_input.type = 3
+    act.user_input.cpg.type = call_type
+    act.user_input.cpg.timeuse = timeuse
+    return act
+
+
+def _points(han: int, fu: int, oya: bool, zimo: bool) -> tuple[int, int, int]:
+    """(point_rong, point_zimo_qin, point_zimo_xian)，與雀魂 HuleInfo 同義。"""
+    if han >= 13:
+        base = 8000
+    elif han >= 11:
+        base = 6000
+    elif han >= 8:
+        base = 4000
+    elif han >= 6:
+        base = 3000
+    else:
+        base = min(2000, fu * 2 ** (han + 2))
+    up = lambda x: -(-x // 100) * 100
+    if not zimo:
+        return up(base * (6 if oya else 4)), 0, 0
+    if oya:
+        return 0, 0, up(base * 2)
+    return 0, up(base * 2), up(base)
+
+
+class _SynthKyoku:
+    """合成一局：照牌山實際摸打，手牌／副露一路追蹤，鳴牌與槓都合法（拿得出那幾張）。
+
+    事件涵蓋吃、碰、大明槓、加槓、暗槓（含槓寶牌翻開）、立直、三麻拔北，結局為荒牌流局、
+    自摸、榮和或雙響；pao=True 的那局固定演出大三元包牌（見 _rig_pao）。"""
+
+    def __init__(self, rng: random.Random, actions, k: int, nplayers: int, scores: list[int],
+                 sticks: int, pao: bool):
+        self.rng, self.actions, self.n = rng, actions, nplayers
+        self.oya = k % nplayers
+        self.chang = k // nplayers
+        self.scores, self.sticks = scores, sticks
+        wall = [t for t in _TILES if nplayers == 4 or not (t[1] == "m" and "2" <= t[0] <= "8")] * 4
+        for suit in "mps" if nplayers == 4 else "ps":   # 各門一張赤五
+            wall[wall.index("5" + suit)] = "0" + suit
+        rng.shuffle(wall)
+        outcome = rng.random()
+        self.outcome = "ryukyoku" if outcome < 0.3 else "tsumo" if outcome < 0.6 else "ron"
+        self.winner = rng.randrange(nplayers)
+        self.win_after = rng.randint(12, 40)   # 全體打出這麼多張後才可能和了
+        self.pao = pao
+        rigged = self._rig_pao(wall) if pao else {}
+        self.dead = [wall.pop() for _ in range(14)]
+        self.wall = wall
+        self.doras = [self.dead.pop()]
+        self.hands = [rigged.get(seat, []) for seat in range(nplayers)]
+        for hand in self.hands:
+            hand.extend(wall.pop() for _ in range(13 - len(hand)))
+        self.pons: list[dict[str, list[str]]] = [{} for _ in range(nplayers)]
+        self.riichi = [False] * nplayers
+        self.closed = [True] * nplayers
+        self.kans = 0
+        self.pending_dora = 0          # 大明槓／加槓：新寶牌在下一次打牌時翻開
+        self.dragon_pons = 0
+        self.discards = 0
+
+    # ── 配牌 ──
+    def _rig_pao(self, wall: list[str]) -> dict[int, list[str]]:
+        """包牌局：winner（莊家下家）配三種三元牌各一對，feeder（莊家）各一張；feeder 先打
+        三元牌、winner 全碰，第三副碰出時 tensoul 記 paodrag=feeder，之後 winner 和大三元。
+        回傳各家預先配好的牌（已從 wall 移除）。"""
+        self.winner = (self.oya + 1) % self.n
+        self.feeder = self.oya
+        self.outcome = self.rng.choice(("tsumo", "ron"))
+        self.win_after = 0
+        rigged = {self.winner: [d for d in _DRAGONS for _ in range(2)], self.feeder: list(_DRAGONS)}
+        for tiles in rigged.values():
+            for t in tiles:
+                wall.remove(t)
+        return rigged
+
+    # ── 事件 ──
+    def emit(self, record) -> None:
+        self.actions.append(_action(record))
+
+    def draw(self, seat: int, rinshan: bool = False, new_dora: bool = False) -> str | None:
+        """摸牌；嶺上牌直接從牌山另一端拿（等同王牌補足），王牌只留給寶牌指示牌。"""
+        if not self.wall:
+            return None
+        deal = pb.RecordDealTile()
+        deal.seat = seat
+        deal.tile = self.wall.pop(0) if rinshan else self.wall.pop()
+        if new_dora:
+            self.doras.append(self.dead.pop(0))
+            deal.doras.extend(self.doras)
+        self.hands[seat].append(deal.tile)
+        self.emit(deal)
+        return deal.tile
+
+    def start(self) -> None:
+        rnd = pb.RecordNewRound()
+        rnd.chang, rnd.ju, rnd.liqibang = self.chang, self.oya, self.sticks
+        rnd.scores.extend(self.scores)
+        rnd.dora = self.doras[0]
+        self.hands[self.oya].append(self.wall.pop())
+        for seat in range(self.n):
+            getattr(rnd, f"tiles{seat}").extend(self.hands[seat])
+        self.emit(rnd)
+
+    def can_win(self, seat: int) -> bool:
+        if self.pao:
+            return seat == self.winner and self.dragon_pons == 3
+        return self.outcome != "ryukyoku" and seat == self.winner and self.discards >= self.win_after
+
+    def self_kan(self, seat: int) -> bool:
+        """摸牌後可暗槓／加槓就（多半）槓，嶺上摸牌。回傳是否槓了。"""
+        if not self.wall or self.riichi[seat] or self.kans >= 3 or self.rng.random() < 0.3:
+            return False
+        hand = self.hands[seat]
+        for t in hand:
+            if _base(t) in self.pons[seat] and not (self.pao and t in _DRAGONS):
+                kind, tiles = 2, [t]
+                break
+        else:
+            counts: dict[str, int] = {}
+            for t in hand:
+                counts[_base(t)] = counts.get(_base(t), 0) + 1
+            four = [b for b, c in counts.items() if c == 4 and b not in _DRAGONS]
+            if not four:
+                return False
+            kind, tiles = 3, [t for t in hand if _base(t) == four[0]]
+        self.actions.append(_user_op(seat, 6 if kind == 2 else 4, tiles[0], self.rng.randint(1, 6)))
+        rec = pb.RecordAnGangAddGang()
+        rec.seat, rec.type = seat, kind
+        rec.tiles = tiles[0] if kind == 2 else next((t for t in tiles if t[0] != "0"), tiles[0])
+        for t in tiles:
+            hand.remove(t)
+        if kind == 2:
+            self.pons[seat].pop(_base(tiles[0]))
+        self.emit(rec)
+        self.kans += 1
+        if kind == 2:
+            self.pending_dora += 1
+        self.draw(seat, rinshan=True, new_dora=kind == 3)
+        return True
+
+    def nuki(self, seat: int) -> bool:
+        """三麻拔北：手上有北就拔，嶺上摸牌。"""
+        if self.n != 3 or not self.wall or "4z" not in self.hands[seat] or self.rng.random() < 0.2:
+            return False
+        self.actions.append(_user_op(seat, 11, "4z", self.rng.randint(1, 4)))
+        self.hands[seat].remove("4z")
+        rec = pb.RecordBaBei()
+        rec.seat = seat
+        self.emit(rec)
+        self.draw(seat, rinshan=True)
+        return True
+
+    def discard(self, seat: int, drawn: str | None) -> str:
+        hand = self.hands[seat]
+        declare = False
+        if self.riichi[seat] and drawn is not None:
+            tile = drawn
+        elif self.pao and seat == self.feeder and any(d in hand for d in _DRAGONS):
+            tile = next(d for d in _DRAGONS if d in hand)
+        else:
+            pool = [t for t in hand if not (self.pao and seat == self.winner and t in _DRAGONS)] or hand
+            tile = self.rng.choice(pool)
+            declare = (self.closed[seat] and not self.riichi[seat] and self.scores[seat] >= 1000
+                       and len(self.wall) > 8 and self.discards >= 8 and self.rng.random() < 0.08)
+        hand.remove(tile)
+        self.actions.append(_user_op(seat, 7 if declare else 1, tile, self.rng.randint(1, 8)))
+        rec = pb.RecordDiscardTile()
+        rec.seat, rec.tile = seat, tile
+        rec.moqie = tile == drawn
+        rec.is_liqi = declare
+        if self.pending_dora:
+            self.doras.extend(self.dead.pop(0) for _ in range(self.pending_dora))
+            rec.doras.extend(self.doras)
+            self.pending_dora = 0
+        self.emit(rec)
+        self.discards += 1
+        if declare:
+            self.riichi[seat] = True
+            self.scores[seat] -= 1000
+            self.sticks += 1
+        return tile
+
+    def call(self, discarder: int, tile: str) -> tuple[int, int] | None:
+        """找一家鳴 tile：大明槓 > 碰 > 吃（下家）。回傳 (鳴牌者, 種類) 或 None。"""
+        order = [(discarder + i) % self.n for i in range(1, self.n)]
+        for seat in order:
+            if self.riichi[seat]:
+                continue
+            same = [t for t in self.hands[seat] if _base(t) == _base(tile)]
+            rigged = self.pao and seat == self.winner and tile in _DRAGONS
+            if not rigged and self.pao and tile in _DRAGONS:
+                continue
+            if len(same) == 3 and not rigged and self.kans < 3 and self.rng.random() < 0.5:
+                return self._meld(seat, discarder, 2, same, tile)
+            if len(same) >= 2 and (rigged or self.rng.random() < 0.35):
+                return self._meld(seat, discarder, 1, same[:2], tile)
+        nxt = order[0]
+        if self.n == 4 and not self.riichi[nxt] and tile[1] != "z" and self.rng.random() < 0.35:
+            num = int(_base(tile)[0])
+            have = {int(_base(t)[0]): t for t in self.hands[nxt] if t[1] == tile[1]}
+            for lo in (num - 2, num - 1, num):
+                need = [x for x in range(lo, lo + 3) if x != num]
+                if all(x in have for x in need):
+                    return self._meld(nxt, discarder, 0, [have[x] for x in need], tile)
+        return None
+
+    def _meld(self, seat: int, discarder: int, kind: int, own: list[str], tile: str) -> tuple[int, int]:
+        self.actions.append(_user_call(seat, kind, self.rng.randint(1, 5)))
+        rec = pb.RecordChiPengGang()
+        rec.seat, rec.type = seat, kind
+        rec.tiles.extend(own + [tile])
+        rec.froms.extend([seat] * len(own) + [discarder])
+        for t in own:
+            self.hands[seat].remove(t)
+        self.closed[seat] = False
+        if kind == 1:
+            self.pons[seat][_base(tile)] = own + [tile]
+            if tile in _DRAGONS and self.pao and seat == self.winner:
+                self.dragon_pons += 1
+        self.emit(rec)
+        if kind == 2:
+            self.kans += 1
+            self.pending_dora += 1
+        return seat, kind
+
+    def hule(self, winners: list[int], loser: int | None) -> None:
+        rec = pb.RecordHule()
+        for seat in winners:
+            h = rec.hules.add()
+            h.seat, h.zimo, h.qinjia, h.liqi = seat, loser is None, seat == self.oya, self.riichi[seat]
+            h.doras.extend(self.doras)
+            if self.riichi[seat]:
+                h.li_doras.extend(self.dead[-len(self.doras):])
+            if self.pao:
+                h.yiman, h.count, h.fu = True, 1, 0
+                fans = [(_DAISANGEN, 1)]
+                han = 13
+            else:
+                fans = [(2, 1)] if self.riichi[seat] else []
+                if loser is None and self.closed[seat]:
+                    fans.append((1, 1))
+                fans.append((self.rng.choice(_PLAIN_YAKU), self.rng.randint(1, 3)))
+                fans.append((31, self.rng.randint(0, 3)))
+                han = sum(v for _, v in fans)
+                h.count, h.fu = han, self.rng.choice((30, 40, 50))
+            for fan_id, val in fans:
+                f = h.fans.add()
+                f.id, f.val = fan_id, val
+            h.point_rong, h.point_zimo_qin, h.point_zimo_xian = _points(
+                han, h.fu, seat == self.oya, loser is None)
+            if loser is not None:
+                self.scores[seat] += h.point_rong
+                self.scores[loser] -= h.point_rong
+                continue
+            for other in range(self.n):
+                if other != seat:
+                    pay = h.point_zimo_qin if other == self.oya else h.point_zimo_xian
+                    self.scores[other] -= pay
+                    self.scores[seat] += pay
+        self.scores[winners[0]] += 1000 * self.sticks
+        self.sticks = 0
+        self.emit(rec)
+
+    def play(self) -> int:
+        """跑完一局，回傳留到下一局的供託根數。"""
+        self.start()
+        seat, drawn = self.oya, self.hands[self.oya][-1]
+        while True:
+            if drawn is not None and self.outcome == "tsumo" and self.can_win(seat):
+                self.hule([seat], None)
+                return self.sticks
+            while drawn is not None and (self.nuki(seat) or self.self_kan(seat)):
+                drawn = self.hands[seat][-1]
+            tile = self.discard(seat, drawn)
+            if self.outcome == "ron":
+                ron = [s for s in range(self.n) if s != seat and self.can_win(s)]
+                if ron:
+                    if not self.pao and self.n == 4 and self.rng.random() < 0.15:
+                        ron.append(next(s for s in ((seat + i) % 4 for i in (1, 2, 3)) if s not in ron))
+                    self.hule(sorted(ron, key=lambda s: (s - seat) % self.n), seat)
+                    return self.sticks
+            called = self.call(seat, tile)
+            if called is not None:
+                seat, kind = called
+                # 吃碰後直接打牌；大明槓先摸嶺上牌
+                drawn = self.draw(seat, rinshan=True) if kind == 2 else None
+                continue
+            seat = (seat + 1) % self.n
+            drawn = self.draw(seat)
+            if drawn is None:
+                no_tile = pb.RecordNoTile()
+                no_tile.scores.add()  # delta 為空：tensoul 視為全員聽牌流局，點數不動
+                self.emit(no_tile)
+                return self.sticks
+
+
+def synthesize_record(record_uuid: str, kyokus: int = 8, nplayers: int = 4) -> pb.ResGameRecord:
+    """以 uuid 為種子合成一局半莊，結構與真牌譜相同、可被 tensoul 完整轉換。
+
+    每局照牌山實際摸打（見 _SynthKyoku）：有吃碰槓（含加槓、暗槓與槓寶牌）、立直、自摸／
+    榮和／雙響與荒牌流局，三麻另有拔北；第二局固定是大三元包牌。牌效不求合理，只求事件
+    種類齊全、數量接近真實半莊，供吞吐量測與轉換回歸；每個打牌／鳴牌前都附帶玩家操作
+    （含 timeuse），思考時間擷取也有東西可抽。"""
+    rng = random.Random(_stable_hash(record_uuid))
+    res = pb.ResGameRecord()
+    head = res.head
+    head.uuid = record_uuid
+    head.start_time = 1_700_000_000 + _stable_hash(record_uuid) % 10_000_000
+    head.end_time = head.start_time + 1800
+    head.config.category = 2
+    head.config.mode.mode = 2 if nplayers == 4 else 12
+    head.config.meta.mode_id = 12 if nplayers == 4 else 24
+
+    details = pb.GameDetailRecords()
+    details.version = 210715
+    start = 25000 if nplayers == 4 else 35000
+    scores = [start] * nplayers
+    sticks = 0
+    for k in range(kyokus):
+        sticks = _SynthKyoku(rng, details.actions, k, nplayers, scores, sticks, pao=k == 1).play()
+
+    order = sorted(range(nplayers), key=lambda s: (-scores[s], s))
+    for seat in range(nplayers):
+        acc = head.accounts.add()
+        acc.account_id = 100000 + seat
+        acc.seat = seat
+        acc.nickname = f"fake{seat}"
+        acc.level.id = 10401 if nplayers == 4 else 20401
+        acc.level.score = 1000
+    for seat in order:
+        player = head.result.players.add()
+        player.seat = seat
+        player.part_point_1 = scores[seat]
+        player.total_point = scores[seat] - start
+
+    wrapper = pb.Wrapper()
+    wrapper.name = ".lq.GameDetailRecords"
+    wrapper.data = details.SerializeToString()
+    res.data = wrapper.SerializeToString()
+    return res
+
+
+def load_records(records_dir: str) -> dict[str, bytes]:
+    """讀 ``<records_dir>/<uuid>.bin``（序列化的 ResGameRecord）。"""
+    records = {}
+    for name in sorted(os.listdir(records_dir)):
+        if name.endswith(".bin"):
+            with open(os.path.join(records_dir, name), "rb") as f:
+                records[name[:-4]] = f.read()
+    return records
+
+
+# ── 指向本機 ──────────────────────────────────────────────────────────
+_saved: dict = {}
+
+
+def install(base_url: str) -> None:
+    """把 MajsoulPaipuDownloader（類別屬性，故既有 instance 的重連也吃得到）與 ms_patch
+    的 version.json 探測指向 base_url。重複呼叫以最後一次為準。"""
+    from tensoul.downloader import MajsoulPaipuDownloader
+
+    import ms_patch
+
+    if not _saved:
+        _saved.update(host=MajsoulPaipuDownloader.MS_HOST, scheme=MajsoulPaipuDownloader.WS_SCHEME,
+                      version_url=ms_patch._VERSION_JSON_URL)
+    MajsoulPaipuDownloader.MS_HOST = base_url
+    MajsoulPaipuDownloader.WS_SCHEME = "ws"
+    ms_patch._VERSION_JSON_URL = f"{base_url}/1/version.json"
+
+
+def uninstall() -> None:
+    if not _saved:
+        return
+    from tensoul.downloader import MajsoulPaipuDownloader
+
+    import ms_patch
+
+    MajsoulPaipuDownloader.MS_HOST = _saved["host"]
+    MajsoulPaipuDownloader.WS_SCHEME = _saved["scheme"]
+    ms_patch._VERSION_JSON_URL = _saved["version_url"]
+    _saved.clear()
+
+
+def install_from_env() -> bool:
+    """環境變數 MS_FAKE_GATEWAY 有值時指向該假閘道；回傳是否套用。"""
+    url = os.getenv("MS_FAKE_GATEWAY", "").strip().rstrip("/")
+    if not url:
+        return False
+    install(url)
+    print(f"[fake_majsoul] 下載端指向假閘道 {url}")
+    return True
+
+
+# ── CLI ──────────────────────────────────────────────────────────────
+def _parse_errors(text: str) -> dict[int, float]:
+    out = {}
+    for item in filter(None, (t.strip() for t in (text or "").split(","))):
+        code, _, rate = item.partition("=")
+        out[int(code)] = float(rate)
+    return out
+
+
+async def _serve(args) -> None:
+    fake = FakeMajsoul(args.host, args.port, records_dir=args.records, latency=args.latency,
+                       jitter=args.jitter, errors=_parse_errors(args.errors),
+                       disconnect_every=args.disconnect_every, disconnect_rate=args.disconnect_rate,
+                       bad_accounts=args.bad_account or (), strict=args.strict, kyokus=args.kyokus,
+                       seed=args.seed)
+    await fake.start()
+    print(f"假雀魂閘道已啟動：{fake.base_url}（錄製牌譜 {len(fake.records)} 筆）")
+    print(f"下載端請設 MS_FAKE_GATEWAY={fake.base_url}")
+    try:
+        while True:
+            await asyncio.sleep(10)
+            s = fake.stats
+            print(f"連線 {s['connections']}｜牌譜 {s['records']}｜登入 {s['logins']}｜"
+                  f"斷線 {s['disconnects']}｜錯誤 {s['errors']}")
+    finally:
+        await fake.stop()
+
+
+async def _capture(args) -> None:
+    """以真帳號下載 ids 並錄成 ``<out>/<uuid>.bin``，供 serve/FakeMajsoul 回放。"""
+    sys.path.append("tensoul-py-ng")
+    import config_store
+    import ms_patch
+
+    ms_patch.ensure_ms_cfg()
+    from tensoul import MajsoulPaipuDownloader
+
+    config_store.load_into_env(args.config)
+    with open(args.ids, "r", encoding="utf-8") as f:
+        ids = [ln.strip() for ln in f if ln.strip()]
+    os.makedirs(args.out, exist_ok=True)
+    async with MajsoulPaipuDownloader() as dl:
+        await ms_patch.login(dl, os.getenv("ms_username", ""), os.getenv("ms_password", ""))
+        for i, uuid in enumerate(ids, 1):
+            res = await dl.lobby.fetch_game_record(ms_patch.build_game_record_req(uuid))
+            if res.error.code:
+                print(f"[{i}/{len(ids)}] {uuid} error {res.error.code}")
+                continue
+            with open(os.path.join(args.out, f"{uuid}.bin"), "wb") as f:
+                f.write(res.SerializeToString())
+            print(f"[{i}/{len(ids)}] {uuid} {len(res.data)} bytes")
+            await asyncio.sleep(args.interval)
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="本機假雀魂閘道（離線壓測下載管線）")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    sp = sub.add_parser("serve", help="啟動假閘道")
+    sp.add_argument("--host", default="127.0.0.1")
+    sp.add_argument("--port", type=int, default=18080)
+    sp.add_argument("--records", help="錄製牌譜目錄（<uuid>.bin）")
+    sp.add_argument("--latency", type=float, default=0.0, help="每筆牌譜回應延遲（秒）")
+    sp.add_argument("--jitter", type=float, default=0.0, help="延遲抖動 ±秒")
+    sp.add_argument("--errors", default="", help="錯誤注入，如 1203=0.05,151=0.01,1004=0.002")
+    sp.add_argument("--disconnect-every", type=int, default=0, help="每 N 筆牌譜斷線一次")
+    sp.add_argument("--disconnect-rate", type=float, default=0.0, help="每筆斷線機率")
+    sp.add_argument("--bad-account", action="append", help="登入一律失敗（1002）的帳號，可重複")
+    sp.add_argument("--strict", action="store_true", help="未錄製的 uuid 回 1203")
+    sp.add_argument("--kyokus", type=int, default=8, help="合成牌譜的局數")
+    sp.add_argument("--seed", type=int, default=None)
+
+    cp = sub.add_parser("capture", help="以真帳號錄製牌譜供回放")
+    cp.add_argument("ids", help="uuid 清單檔（一行一個）")
+    cp.add_argument("--out", default=os.path.join("fixtures", "majsoul"))
+    cp.add_argument("--config", default=None, help="config.ini 路徑（預設同 GUI/CLI）")
+    cp.add_argument("--interval", type=float, default=0.5, help="每筆間隔秒數（對伺服器溫和些）")
+
+    args = ap.parse_args(argv)
+    try:
+        asyncio.run(_serve(args) if args.cmd == "serve" else _capture(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -21,13 +21,41 @@ Electron 將 stderr 當作「原始 log」顯示於可折疊區，stdout 則只
 
 事件內**不放在地化字串**：error 用 code、progress 用 phase/stage enum，由前端 i18n
 翻譯；msg 僅作 debug 原文。
+
+progress 合併與非同步寫出
+-------------------------
+下載/轉換每筆都發 progress；解碼加速或重播本機檔時每秒上百筆，逐筆 json.dumps + flush
+會淹沒 renderer，而 Electron 讀得慢時 flush 還會卡住下載迴圈。因此：
+
+- 同一 (stage, phase) 的 progress 在 progress_interval 秒內合併為一筆：欄位以最後一筆為準
+  （done/total/failed 本來就是累計值），另附 merged（合併筆數）、window_rate（窗內筆/秒）、
+  window_failed（窗內 ok=False 筆數），以及 net_ms 等取樣欄位的 _p50/_p95/_max。
+  窗內第一筆若距上次輸出已超過間隔則立即送出（前緣），其餘在窗尾由寫出執行緒補送。
+- 其餘型別（error、notice、stage_start、stage_done、done、log）一律立即送出；送出前先把
+  合併中的 progress 清掉，事件順序與未合併時一致（stage_done 之前一定看得到最終進度）。
+- 實際寫 stdout 由背景執行緒負責，emit() 只做入列；done() 與行程結束時會等佇列寫完。
+
+間隔預設 0.25 秒；環境變數 MS_PROGRESS_INTERVAL 或 job 參數 progress_interval 可調，
+0 表示不合併（仍非同步寫出）。daemon 內 job 參數只調整該 job 的間隔（set_job_progress_interval）。
+
+常駐後端 (daemon)
+-----------------
+daemon 模式下同一行程內會有多個 job：emit 依 contextvar 帶上 job 編號（set_job），
+事件再經 set_envelope 包成 JSON-RPC 通知；RPC 回應走 send_message（不合併、不包裝）。
+job 內自行開的執行緒請用 start_thread，才會沿用所屬 job 的 context。runner 裡的
+asyncio.run 一律改呼叫 run_async：單次 CLI 仍是 asyncio.run，daemon 換成送進常駐事件
+迴圈（保溫中的雀魂連線綁在該迴圈上）。
 """
 from __future__ import annotations
 
 import contextlib
 import json
+import atexit
+import contextvars
 import os
 import sys
+import threading
+import time
 from datetime import datetime, timezone
 
 # NDJSON 事件含非 ASCII（中文 msg 等）。Windows 上被 Electron spawn 時，stdout/stderr 是
@@ -53,11 +81,243 @@ def real_stdout():
     return _EVENT_OUT
 
 
+# progress 取樣欄位：合併時另附窗內的 _p50/_p95/_max。
+_SAMPLE_KEYS = ("net_ms",)
+
+
+def _percentile(sorted_values: list, q: float):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class _ProgressWindow:
+    """一個 (stage, phase) 的合併窗：最後一筆事件＋窗內統計。"""
+
+    __slots__ = ("last", "count", "failed", "samples", "started", "last_out")
+
+    def __init__(self) -> None:
+        self.last: dict | None = None
+        self.count = 0
+        self.failed = 0
+        self.samples: dict = {}
+        self.started = 0.0
+        self.last_out = float("-inf")  # 上次輸出的 monotonic 時間
+
+    def add(self, event: dict, now: float) -> None:
+        if self.count == 0:
+            self.started = now
+        self.last = event
+        self.count += 1
+        if event.get("ok") is False:
+            self.failed += 1
+        for key in _SAMPLE_KEYS:
+            value = event.get(key)
+            if isinstance(value, (int, float)):
+                self.samples.setdefault(key, []).append(value)
+
+    def take(self, now: float) -> dict:
+        """輸出合併後的事件並清空窗。"""
+        event = dict(self.last or {})
+        if self.count > 1:
+            span = max(1e-6, now - self.started)
+            event["merged"] = self.count
+            event["window_rate"] = round(self.count / span, 2)
+            event["window_failed"] = self.failed
+            for key, values in self.samples.items():
+                values.sort()
+                event[f"{key}_p50"] = _percentile(values, 0.5)
+                event[f"{key}_p95"] = _percentile(values, 0.95)
+                event[f"{key}_max"] = values[-1]
+        self.last, self.count, self.failed, self.samples = None, 0, 0, {}
+        self.last_out = now
+        return event
+
+
+class _EventWriter:
+    """合併 progress 並由背景執行緒寫出事件（見模組說明）。執行緒安全。"""
+
+    def __init__(self, out, interval: float) -> None:
+        self._out = out
+        self.interval = max(0.0, interval)
+        self._cond = threading.Condition()
+        self._ready: list[dict] = []
+        self._windows: dict = {}  # (job, stage, phase) -> _ProgressWindow；dict 保持首次出現順序
+        self._job_intervals: dict = {}  # daemon：job 參數 progress_interval 覆寫的間隔
+        self._writing = False
+        self._broken = False
+        self._thread: threading.Thread | None = None
+        self.envelope = None  # daemon：事件寫出前的包裝（JSON-RPC 通知）
+
+    def interval_for(self, job) -> float:
+        return self._job_intervals.get(job, self.interval)
+
+    def set_job_interval(self, job, seconds: float | None) -> None:
+        with self._cond:
+            if seconds is None:
+                self._job_intervals.pop(job, None)
+            else:
+                self._job_intervals[job] = max(0.0, float(seconds))
+
+    def _wrap(self, event: dict) -> dict:
+        return self.envelope(event) if self.envelope is not None else event
+
+    def put(self, event: dict, raw: bool = False) -> None:
+        now = time.monotonic()
+        with self._cond:
+            if raw:
+                self._take_windows(now)
+                self._ready.append(event)
+            elif event.get("type") == "progress" and self.interval_for(event.get("job")) > 0:
+                key = (event.get("job"), event.get("stage"), event.get("phase"))
+                window = self._windows.get(key)
+                if window is None:
+                    window = self._windows[key] = _ProgressWindow()
+                window.add(event, now)
+                if window.count == 1 and now - window.last_out >= self.interval_for(key[0]):
+                    self._ready.append(self._wrap(window.take(now)))  # 前緣：閒置後第一筆立即送出
+            else:
+                self._take_windows(now)
+                self._ready.append(self._wrap(event))
+            self._ensure_thread()
+            self._cond.notify()
+
+    def flush(self, timeout: float | None = 5.0) -> None:
+        """送出合併中的 progress 並等背景執行緒寫完（最多 timeout 秒）。"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._take_windows(time.monotonic())
+            self._cond.notify_all()
+            while (self._ready or self._writing) and self._thread is not None and not self._broken:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return
+                self._cond.wait(remaining)
+
+    def _take_windows(self, now: float, due_only: bool = False) -> None:
+        for key, window in self._windows.items():
+            if window.count and (not due_only or now - window.last_out >= self.interval_for(key[0])):
+                self._ready.append(self._wrap(window.take(now)))
+
+    def _next_due(self) -> float | None:
+        dues = [w.last_out + self.interval_for(key[0]) for key, w in self._windows.items() if w.count]
+        return min(dues) - time.monotonic() if dues else None
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="bridge-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._ready:
+                    wait = self._next_due()
+                    if wait is not None and wait <= 0:
+                        self._take_windows(time.monotonic(), due_only=True)
+                        continue
+                    self._cond.wait(wait)
+                batch, self._ready = self._ready, []
+                self._writing = True
+            try:
+                if not self._broken:
+                    self._out.write("".join(json.dumps(ev, ensure_ascii=False) + "\n"
+                                            for ev in batch))
+                    self._out.flush()
+            except (OSError, ValueError):
+                self._broken = True  # Electron 已關閉管道：之後的事件直接丟棄
+            finally:
+                with self._cond:
+                    self._writing = False
+                    self._cond.notify_all()
+
+
+def _env_interval() -> float:
+    try:
+        return float(os.getenv("MS_PROGRESS_INTERVAL", "0.25"))
+    except ValueError:
+        return 0.25
+
+
+_WRITER = _EventWriter(_EVENT_OUT, _env_interval())
+atexit.register(_WRITER.flush)
+
+
+def set_progress_interval(seconds: float) -> None:
+    """調整 progress 合併間隔（秒）；0 表示不合併。"""
+    _WRITER.interval = max(0.0, float(seconds))
+
+
+def set_job_progress_interval(job_id, seconds: float | None) -> None:
+    """daemon：只調整某個 job 的合併間隔（其他 job 不受影響）；None 還原為全域間隔。"""
+    _WRITER.set_job_interval(job_id, seconds)
+
+
+# daemon 模式下目前 context 所屬的 job 編號（單次 CLI 恆為 None）。
+_JOB: contextvars.ContextVar = contextvars.ContextVar("bridge_job", default=None)
+
+
+def set_job(job_id) -> None:
+    """把目前 context（與之後 start_thread 開的執行緒）的事件標上 job 編號。"""
+    _JOB.set(job_id)
+
+
+def current_job():
+    return _JOB.get()
+
+
+def set_envelope(fn) -> None:
+    """事件寫出前套用 fn(event) -> dict（daemon 包成 JSON-RPC 通知）；None 還原。"""
+    _WRITER.envelope = fn
+
+
+def send_message(msg: dict) -> None:
+    """原樣寫出一個 JSON 物件（RPC 回應）；不加 ts、不合併、不包裝，順序與事件一致。"""
+    _WRITER.put(msg, raw=True)
+
+
+def start_thread(target, *args, name: str | None = None) -> threading.Thread:
+    """開 daemon 執行緒並沿用呼叫端的 context（事件仍標上同一個 job）。"""
+    ctx = contextvars.copy_context()
+    thread = threading.Thread(target=ctx.run, args=(target, *args), name=name, daemon=True)
+    thread.start()
+    return thread
+
+
+class Cancelled(BaseException):
+    """daemon 取消 job 時由 run_async 拋出；BaseException 以穿過 runner 的 except Exception。"""
+
+
+def _asyncio_run(coro):
+    import asyncio
+
+    return asyncio.run(coro)
+
+
+_ASYNC_RUNNER = _asyncio_run
+
+
+def set_async_runner(fn) -> None:
+    """替換 run_async 的實作（daemon：送進常駐事件迴圈並等待結果）。"""
+    global _ASYNC_RUNNER
+    _ASYNC_RUNNER = fn
+
+
+def run_async(coro):
+    """執行 runner 的 async 主體並回傳結果（取代直接呼叫 asyncio.run）。"""
+    return _ASYNC_RUNNER(coro)
+
+
 def emit(event: dict) -> None:
-    """輸出一個 NDJSON 事件到真正的 stdout 並立即 flush。"""
+    """送出一個 NDJSON 事件（progress 可能被合併；實際寫出在背景執行緒）。"""
     event.setdefault("ts", datetime.now(timezone.utc).isoformat())
-    _EVENT_OUT.write(json.dumps(event, ensure_ascii=False) + "\n")
-    _EVENT_OUT.flush()
+    job = _JOB.get()
+    if job is not None:
+        event.setdefault("job", job)
+    _WRITER.put(event)
+
+
+def flush_events(timeout: float | None = 5.0) -> None:
+    """等所有已送出的事件寫到 stdout（行程即將結束或交出 stdout 前呼叫）。"""
+    _WRITER.flush(timeout)
 
 
 def stage_start(stage: str, **extra) -> None:
@@ -87,6 +347,7 @@ def stage_done(stage: str, **stats) -> None:
 
 def done(ok: bool = True, exit_code: int = 0) -> None:
     emit({"type": "done", "ok": ok, "exit": exit_code})
+    flush_events()
 
 
 def has_flag(name: str) -> bool:
@@ -109,8 +370,15 @@ def read_params() -> dict:
       --params-file <path>     從檔案讀 JSON
       argv 中第一個以 '{' 開頭的參數  直接當 JSON (僅供非敏感的手動測試)
       皆無 -> {}
+    參數含 progress_interval 時順便套用 (見 set_progress_interval)。
     """
-    args = sys.argv[1:]
+    params = _read_params_raw(sys.argv[1:])
+    if params.get("progress_interval") is not None:
+        set_progress_interval(params["progress_interval"])
+    return params
+
+
+def _read_params_raw(args: list) -> dict:
     if "--params-stdin" in args:
         data = sys.stdin.read()
         return json.loads(data) if data.strip() else {}
@@ -7,18 +7,31 @@ dev 模式可用 `python -m gui.backend.cli <cmd>`；凍結後即 `backend.exe <
 ------
   crawl        執行 Stage 1 (run_crawler)
   download     執行 Stage 2 (run_download，並行)
+  pipeline     Stage 1 -> Stage 2 串流：邊收集 ID 邊下載 (run_pipeline)
+  follow       持續追新局：amae-koromo 輪詢 + 即時下載 (run_follow，直到取消)
   doctor       環境自檢
   nettest      雀魂連線測速（純延遲 vs 實際牌譜，判斷慢在網路還是流程）
+  daemon       常駐後端：stdin/stdout 上的 JSON-RPC，跨 job 保留熱 import 與已登入會話
   __extractor  (內部) 凍結模式下逐日 extractor 的自我再入；輸出原始 UUID 到真 stdout，
                供 PaipuSpider 的子程序解析迴圈讀取 (取代寫臨時 py 腳本 + python)。
 
 參數一律走 stdin JSON (--params-stdin) / --params-file，避免帳密進 argv。
+
+各子命令只在分派時 import 自己的 runner（runner 再各自延後 import 重量級依賴），
+`doctor` 不會載入 selenium/scrapy/protobuf。任何子命令加上 --profile-startup 會在結束時
+把 import 耗時明細印到 stderr（見 startup_profile；凍結版同樣可用）。
 """
 from __future__ import annotations
 
 import sys
 
-from . import bridge
+# 必須在其他 import 之前裝好，才量得到 bridge 與各 runner 本身。
+if "--profile-startup" in sys.argv:
+    from . import startup_profile
+
+    startup_profile.install()
+
+from . import bridge  # noqa: E402
 
 
 def _run_extractor(args: list[str]) -> None:
@@ -36,6 +49,8 @@ def _run_extractor(args: list[str]) -> None:
     parser.add_argument("--fast", default="False")
     parser.add_argument("--player-mode", default="False")
     parser.add_argument("--game-mode", default="yonma")
+    parser.add_argument("--capture", default="False")
+    parser.add_argument("--lean", default="False")
     ns = parser.parse_args(args)
 
     from date_room_extractor import OptimizedPaipuExtractor, convert_ranks_to_english
@@ -46,6 +61,8 @@ def _run_extractor(args: list[str]) -> None:
         fast_mode=ns.fast == "True",
         player_mode=ns.player_mode == "True",
         game_mode=ns.game_mode,
+        capture_mode=ns.capture == "True",
+        lean=ns.lean == "True",
     )
     try:
         results = extractor.extract_from_rooms(
@@ -60,6 +77,9 @@ def _run_extractor(args: list[str]) -> None:
 def main(argv: list[str] | None = None) -> None:
     argv = list(sys.argv[1:] if argv is None else argv)
     cmd = argv[0] if argv else ""
+    profile = sys.modules.get(f"{__package__}.startup_profile")
+    if profile is not None:
+        profile.mark("dispatch")
 
     if cmd == "crawl":
         from . import run_crawler
@@ -69,6 +89,14 @@ def main(argv: list[str] | None = None) -> None:
         from . import run_download
 
         run_download.run(bridge.read_params())
+    elif cmd == "pipeline":
+        from . import run_pipeline
+
+        run_pipeline.run(bridge.read_params())
+    elif cmd == "follow":
+        from . import run_follow
+
+        run_follow.run(bridge.read_params())
     elif cmd == "doctor":
         from . import doctor
 
@@ -77,6 +105,10 @@ def main(argv: list[str] | None = None) -> None:
         from . import nettest
 
         nettest.run(bridge.read_params())
+    elif cmd == "daemon":
+        from . import daemon
+
+        daemon.run()
     elif cmd == "__extractor":
         _run_extractor(argv[1:])
     else:
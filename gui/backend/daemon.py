@@ -0,0 +1,449 @@
+# -*- coding: utf-8 -*-
+"""daemon —— 常駐後端：JSON-RPC 2.0 over stdio，跨 job 保留熱 import 與已登入的雀魂會話。
+
+為什麼
+------
+每次 GUI 動作（doctor / nettest / crawl / download）原本都 spawn 一個新的（可能是凍結的）
+Python：重新 import selenium/scrapy/protobuf/tensoul、重跑 ensure_ms_cfg、重新連線並登入
+雀魂，光是「按下開始到第一筆下載」就要好幾秒。daemon 只啟動一次：
+
+- 熱 import：runner 模組與其依賴留在 sys.modules，第二個 job 起不再付 import 成本。
+- 保溫會話：run_download 的 open_session 換成 WarmSessions——上個 job 登入的
+  AccountSession 連同心跳留在常駐事件迴圈上，下個 job 只做一次心跳健檢即可開始下載。
+- 多工：可同時有多個 job；事件帶 job 編號（bridge.set_job）。需獨佔 cwd 與雀魂連線的
+  job（download / follow / pipeline / nettest）排隊依序執行，doctor 可並行，crawl
+  以子程序執行（scrapy 的 reactor 每個行程只能啟動一次）、互不干擾。
+- 取消：job.cancel 取消其在事件迴圈上的 task（會話狀態不明即丟棄，下次重新登入）、
+  終止 crawl 子程序樹；未開始的 job 直接不執行。
+
+協定（stdin 每行一個請求，stdout 每行一個訊息）
+----------------------------------------------
+請求   {"jsonrpc": "2.0", "id": 1, "method": "job.start", "params": {"kind": "download", "params": {...}}}
+方法   ping、job.start {kind, params} -> {job}、job.cancel {job} -> {ok}、job.list -> [...]、
+       shutdown
+通知   ready {pid}（啟動完成）、event {...bridge 事件, job}、
+       job.exit {job, kind, code, cancelled, elapsed_s}
+stdin 關閉（Electron 結束）等同 shutdown。
+"""
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import contextlib
+import importlib
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from . import bridge, paths
+
+# 在本行程內執行的 job 種類 -> runner 模組（皆提供 run(params)）。
+_INPROC = {
+    "download": "run_download",
+    "follow": "run_follow",
+    "pipeline": "run_pipeline",
+    "nettest": "nettest",
+    "doctor": "doctor",
+}
+# 會 chdir 或使用雀魂連線的 job：排隊依序執行。
+_EXCLUSIVE = {"download", "follow", "pipeline", "nettest"}
+# 以子程序執行的 job。
+_CHILD = {"crawl"}
+
+_HEALTH_TIMEOUT = 10        # 重用會話前的心跳健檢上限（秒）
+_IDLE_CLOSE = 30 * 60       # 保溫會話閒置多久後登出（秒）
+_CANCEL_GRACE = 30          # 取消後等 task 收尾（停心跳、等轉換）的上限（秒）
+
+
+class _RpcError(Exception):
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def _notification(method: str, params) -> dict:
+    return {"jsonrpc": "2.0", "method": method, "params": params}
+
+
+def _event_envelope(event: dict) -> dict:
+    return _notification("event", event)
+
+
+def _child_command(kind: str) -> list[str]:
+    """以「正在跑的同一個後端」啟動子命令（dev: python -m；凍結: backend.exe）。"""
+    if bridge.is_frozen():
+        return [sys.executable, kind, "--params-stdin"]
+    return [sys.executable, "-m", "gui.backend.cli", kind, "--params-stdin"]
+
+
+def _kill_tree(proc: subprocess.Popen) -> None:
+    """終止子程序；Windows 殺整棵行程樹（否則 chrome/chromedriver 殘留）。"""
+    if os.name == "nt":
+        subprocess.run(["taskkill", "/pid", str(proc.pid), "/T", "/F"],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        return
+    proc.terminate()
+    try:
+        proc.wait(timeout=4)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+class WarmSessions:
+    """保溫的已登入 AccountSession（綁在 daemon 的事件迴圈上），取代
+    run_download._fresh_session。同時只保留一組帳號設定（雀魂一號一連線），設定改變即
+    關掉舊的；job 以例外或取消收場時會話狀態不明，一律丟棄。"""
+
+    def __init__(self) -> None:
+        self._key = None
+        self._downloader = None
+        self._session = None
+        self._idle_handle = None
+        self.logins = 0
+        self.reused = 0
+
+    async def _healthy(self) -> bool:
+        import ms.protocol_pb2 as pb
+
+        try:
+            await asyncio.wait_for(
+                self._session.downloader.lobby.heatbeat(pb.ReqHeatBeat()), timeout=_HEALTH_TIMEOUT)
+            return True
+        except Exception:  # noqa: BLE001 被踢下線/連線已斷：重新登入
+            return False
+
+    async def close(self) -> None:
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+            self._idle_handle = None
+        session, downloader = self._session, self._downloader
+        self._key = self._session = self._downloader = None
+        if session is not None:
+            await session.stop_keepalive()
+        if downloader is not None:
+            with contextlib.suppress(Exception):
+                await downloader.__aexit__(None, None, None)
+
+    @contextlib.asynccontextmanager
+    async def open(self, downloader_cls, download_recovery, accounts: list[dict],
+                   ini_paths: list[str], notify):
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+            self._idle_handle = None
+        key = (tuple((a["username"], a["password"]) for a in accounts), tuple(ini_paths))
+        if self._session is not None and (key != self._key or not await self._healthy()):
+            await self.close()
+        if self._session is None:
+            downloader = downloader_cls()
+            await downloader.__aenter__()
+            session = download_recovery.AccountSession(
+                downloader, accounts, ini_paths=ini_paths, notify=notify)
+            try:
+                await session.ensure_login()
+            except BaseException:
+                with contextlib.suppress(Exception):
+                    await downloader.__aexit__(None, None, None)
+                raise
+            session.start_keepalive()
+            self._key, self._downloader, self._session = key, downloader, session
+            self.logins += 1
+        else:
+            self._session.set_notify(notify)
+            self.reused += 1
+            bridge.log("download", f"重用已登入會話（{self._session.current_username}）")
+        try:
+            yield self._session
+        except BaseException:
+            await self.close()
+            raise
+        if self._session is not None:
+            self._session.set_notify(None)
+            loop = asyncio.get_running_loop()
+            self._idle_handle = loop.call_later(
+                _IDLE_CLOSE, lambda: asyncio.ensure_future(self.close()))
+
+
+class Job:
+    __slots__ = ("id", "kind", "params", "state", "cancelled", "future", "task_done",
+                 "proc", "thread", "created", "ended")
+
+    def __init__(self, job_id: str, kind: str, params: dict) -> None:
+        self.id = job_id
+        self.kind = kind
+        self.params = params
+        self.state = "queued"  # queued -> running -> done / failed / cancelled
+        self.cancelled = False
+        self.future: concurrent.futures.Future | None = None  # 事件迴圈上的 task
+        self.task_done: threading.Event | None = None
+        self.proc: subprocess.Popen | None = None              # crawl 子程序
+        self.thread: threading.Thread | None = None
+        self.created = time.monotonic()
+        self.ended: float | None = None
+
+    def elapsed(self) -> float:
+        return round((self.ended or time.monotonic()) - self.created, 3)
+
+    def info(self) -> dict:
+        return {"job": self.id, "kind": self.kind, "state": self.state, "elapsed_s": self.elapsed()}
+
+
+class Daemon:
+    def __init__(self) -> None:
+        self.loop = asyncio.new_event_loop()
+        self.sessions = WarmSessions()
+        self.jobs: dict[str, Job] = {}
+        self._ids = itertools.count(1)
+        self._exclusive = threading.Lock()
+        self._stopping = False
+        self.started = time.monotonic()
+
+    # ── 啟動與收尾 ───────────────────────────────────────────────────────────
+    def start(self) -> None:
+        threading.Thread(target=self.loop.run_forever, name="daemon-loop", daemon=True).start()
+        bridge.set_envelope(_event_envelope)
+        bridge.set_async_runner(self._run_async)
+        from . import run_download
+
+        run_download.open_session = self.sessions.open
+        bridge.send_message(_notification("ready", {"pid": os.getpid()}))
+
+    def shutdown(self) -> None:
+        self._stopping = True
+        for job in list(self.jobs.values()):
+            self.cancel(job.id)
+        for job in list(self.jobs.values()):
+            if job.thread is not None:
+                job.thread.join(timeout=_CANCEL_GRACE)
+        with contextlib.suppress(Exception):
+            asyncio.run_coroutine_threadsafe(self.sessions.close(), self.loop).result(15)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        bridge.flush_events()
+
+    # ── job 執行 ─────────────────────────────────────────────────────────────
+    def _run_async(self, coro):
+        """bridge.run_async 的 daemon 版：在常駐事件迴圈上跑 coro（帶上 job 的 context），
+        本執行緒等待結果；job 被取消時拋 bridge.Cancelled（等 task 收尾後）。"""
+        job = self.jobs.get(bridge.current_job())
+        if job is not None and job.cancelled:
+            coro.close()
+            raise bridge.Cancelled()
+        job_id = bridge.current_job()
+        task_done = threading.Event()
+
+        async def in_job_context():
+            bridge.set_job(job_id)  # task 有自己的 context 副本；其子 task 也會沿用
+            try:
+                return await coro
+            finally:
+                task_done.set()
+
+        future = asyncio.run_coroutine_threadsafe(in_job_context(), self.loop)
+        if job is not None:
+            job.future, job.task_done = future, task_done
+            if job.cancelled:
+                future.cancel()
+        try:
+            return future.result()
+        except concurrent.futures.CancelledError:
+            task_done.wait(_CANCEL_GRACE)
+            raise bridge.Cancelled() from None
+        finally:
+            if job is not None:
+                job.future = job.task_done = None
+
+    def _run_inproc(self, job: Job) -> None:
+        module = importlib.import_module(f".{_INPROC[job.kind]}", __package__)
+        cwd = os.getcwd()
+        try:
+            module.run(dict(job.params))
+        finally:
+            os.chdir(cwd)  # runner 會切到 work_dir；下個 job 從原處開始
+
+    def _run_child(self, job: Job) -> int:
+        env = os.environ.copy()
+        env["PYTHONIOENCODING"] = "utf-8"
+        proc = subprocess.Popen(
+            _child_command(job.kind),
+            cwd=str(paths.repo_root(job.params)),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            bufsize=1,
+            env=env,
+        )
+        job.proc = proc
+        if job.cancelled:
+            _kill_tree(proc)
+        assert proc.stdin is not None and proc.stdout is not None
+        with contextlib.suppress(OSError):
+            proc.stdin.write(json.dumps(job.params, ensure_ascii=False))
+            proc.stdin.close()
+        # 子程序 stdout 是它自己的事件流：解析後以本 job 的編號重新送出。
+        for line in proc.stdout:
+            line = line.rstrip()
+            if not line:
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError:
+                print(line)
+                continue
+            if isinstance(event, dict):
+                bridge.emit(event)
+            else:
+                print(line)
+        return proc.wait()
+
+    def _run_job(self, job: Job) -> None:
+        bridge.set_job(job.id)
+        if job.params.get("progress_interval") is not None:
+            # CLI 由 read_params 套用；daemon 不經 read_params，且間隔只能套在這個 job 上
+            bridge.set_job_progress_interval(job.id, job.params["progress_interval"])
+        code = 0
+        try:
+            if job.kind in _CHILD:
+                job.state = "running"
+                code = self._run_child(job)
+            elif job.kind in _EXCLUSIVE:
+                with self._exclusive:
+                    if not job.cancelled:
+                        job.state = "running"
+                        self._run_inproc(job)
+            else:
+                job.state = "running"
+                self._run_inproc(job)
+        except bridge.Cancelled:
+            pass
+        except Exception as exc:  # noqa: BLE001 runner 未攔下的例外：回報後 daemon 照常服務
+            import traceback
+
+            traceback.print_exc()
+            bridge.error(job.kind, "DAEMON_JOB_EXCEPTION", str(exc), fatal=True)
+            bridge.done(ok=False, exit_code=1)
+            code = 1
+        if job.cancelled:
+            job.state, code = "cancelled", code or 130
+        else:
+            job.state = "done" if code == 0 else "failed"
+        job.ended = time.monotonic()
+        bridge.set_job_progress_interval(job.id, None)
+        bridge.send_message(_notification("job.exit", {
+            "job": job.id, "kind": job.kind, "code": code, "cancelled": job.cancelled,
+            "elapsed_s": job.elapsed(),
+        }))
+
+    # ── RPC 方法 ─────────────────────────────────────────────────────────────
+    def rpc_ping(self, params: dict) -> dict:
+        return {
+            "pid": os.getpid(),
+            "uptime_s": round(time.monotonic() - self.started, 1),
+            "jobs": sum(1 for j in self.jobs.values() if j.state in ("queued", "running")),
+            "session": {"logins": self.sessions.logins, "reused": self.sessions.reused},
+        }
+
+    def rpc_job_start(self, params: dict) -> dict:
+        kind = params.get("kind")
+        job_params = params.get("params") or {}
+        if kind not in _INPROC and kind not in _CHILD:
+            raise _RpcError(-32602, f"unknown job kind: {kind!r}")
+        if not isinstance(job_params, dict):
+            raise _RpcError(-32602, "params must be an object")
+        if self._stopping:
+            raise _RpcError(-32000, "daemon is shutting down")
+        job = Job(f"j{next(self._ids)}", kind, job_params)
+        self.jobs[job.id] = job
+        job.thread = threading.Thread(target=self._run_job, args=(job,),
+                                      name=f"job-{job.id}", daemon=True)
+        job.thread.start()
+        return {"job": job.id}
+
+    def cancel(self, job_id) -> bool:
+        job = self.jobs.get(job_id)
+        if job is None or job.state in ("done", "failed", "cancelled"):
+            return False
+        job.cancelled = True
+        future = job.future
+        if future is not None:
+            future.cancel()
+        if job.proc is not None and job.proc.poll() is None:
+            _kill_tree(job.proc)
+        return True
+
+    def rpc_job_cancel(self, params: dict) -> dict:
+        return {"ok": self.cancel(params.get("job"))}
+
+    def rpc_job_list(self, params: dict) -> list:
+        return [job.info() for job in self.jobs.values()]
+
+    def rpc_shutdown(self, params: dict) -> dict:
+        self._stopping = True
+        return {"ok": True}
+
+    # ── 分派 ─────────────────────────────────────────────────────────────────
+    def _reply(self, req_id, result=None, error: _RpcError | None = None) -> None:
+        msg: dict = {"jsonrpc": "2.0", "id": req_id}
+        if error is not None:
+            msg["error"] = {"code": error.code, "message": error.message}
+        else:
+            msg["result"] = result
+        bridge.send_message(msg)
+
+    def handle(self, line: str) -> None:
+        try:
+            req = json.loads(line)
+        except ValueError:
+            self._reply(None, error=_RpcError(-32700, "parse error"))
+            return
+        if not isinstance(req, dict) or not isinstance(req.get("method"), str):
+            self._reply(req.get("id") if isinstance(req, dict) else None,
+                        error=_RpcError(-32600, "invalid request"))
+            return
+        req_id = req.get("id")
+        handler = getattr(self, "rpc_" + req["method"].replace(".", "_"), None)
+        try:
+            if handler is None:
+                raise _RpcError(-32601, f"method not found: {req['method']}")
+            params = req.get("params") or {}
+            if not isinstance(params, dict):
+                raise _RpcError(-32602, "params must be an object")
+            result = handler(params)
+        except _RpcError as exc:
+            if req_id is not None:
+                self._reply(req_id, error=exc)
+            return
+        except Exception as exc:  # noqa: BLE001 單一請求失敗不影響 daemon
+            if req_id is not None:
+                self._reply(req_id, error=_RpcError(-32603, str(exc)))
+            return
+        if req_id is not None:
+            self._reply(req_id, result)
+
+    def serve(self, stream=None) -> None:
+        if stream is None:
+            stream = sys.stdin
+            with contextlib.suppress(Exception):
+                stream.reconfigure(encoding="utf-8")  # Windows 管道預設 cp1252（同 bridge 的 stdout）
+        self.start()
+        try:
+            for line in stream:
+                if line.strip():
+                    self.handle(line)
+                if self._stopping:
+                    break
+        finally:
+            self.shutdown()
+
+
+def run(params: dict | None = None) -> None:  # noqa: ARG001 - 與其他 runner 一致的進入點
+    Daemon().serve()
+
+
+if __name__ == "__main__":
+    run()
@@ -7,6 +7,7 @@ dev 模式 (開發者)：額外檢查 pip 套件、PATH 上的 mjai-reviewer、t
 """
 from __future__ import annotations
 
+import importlib.util
 import os
 import shutil
 import sys
@@ -15,10 +16,11 @@ from . import bridge, paths
 
 
 def _check_import(module: str) -> bool:
+    """套件是否可 import。只找 spec、不執行模組：scrapy/twisted/selenium/protobuf 真的
+    import 起來要好幾秒，自檢只需要知道它們在不在。"""
     try:
-        __import__(module)
-        return True
-    except Exception:
+        return importlib.util.find_spec(module) is not None
+    except Exception:  # noqa: BLE001 父套件缺失或 import 失敗
         return False
 
 
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""live_feed —— 「邊收集邊下載」的 UUID 佇列（Stage 1 生產者 -> Stage 2 下載迴圈）。
+
+為什麼需要
+----------
+批次流程是「Stage 1 把整份清單寫完 -> Stage 2 重讀、去重、listdir 過濾」，下載帳號在
+整個收集期間閒置。LiveFeed 讓收集端（跑在背景執行緒的 akoromo_api / extractor）每發現
+一筆就丟進有界的 asyncio.Queue，下載迴圈以 `async for` 直接消費。
+
+- 有界：佇列滿時生產端的 put() 會阻塞（背壓），收集快於下載時不會在記憶體裡無限堆積。
+- backlog 指標：目前在佇列中等待的筆數，以及「最舊一筆已等了幾秒」（端到端延遲）。
+- 可續跑：佇列只是記憶體中的轉手，持久來源仍是生產端 write+flush 的清單檔與下載端的
+  斷點；中止時 drain() 取回尚未下載的項目寫入斷點。
+"""
+from __future__ import annotations
+
+import asyncio
+import collections
+import threading
+import time
+
+_DONE = object()  # 生產端結束的哨兵
+
+
+class LiveFeed:
+    """執行緒安全的有界 UUID 佇列；生產端在任意執行緒呼叫 put/close，消費端在事件迴圈
+    以 `async for uuid in feed` 讀取，close() 後把剩餘項目讀完即結束。"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int = 1000) -> None:
+        self._loop = loop
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, maxsize))
+        # 與佇列內容一一對應的發現時間（供 lag 計算）；只在事件迴圈執行緒上修改。
+        self._stamps: collections.deque = collections.deque()
+        self._closed = False
+        # 下載端讀完靜態清單（輸入檔＋斷點）後 set；生產端等它再開始追加輸出檔，
+        # 以免同一筆 UUID 同時出現在靜態清單與佇列中而被下載兩次。
+        self.ready = threading.Event()
+        self.discovered = 0
+        self.consumed = 0
+
+    # ── 生產端（任意執行緒）──────────────────────────────────────────────────
+    def put(self, uuid: str) -> None:
+        """交出一筆 UUID；佇列滿時阻塞呼叫端直到有空位（背壓）。事件迴圈已結束則忽略。"""
+        if self._closed or self._loop.is_closed():
+            return
+        fut = asyncio.run_coroutine_threadsafe(self._put(uuid), self._loop)
+        try:
+            fut.result()
+        except Exception:  # noqa: BLE001 等待中迴圈結束（任務被取消）＝消費端已不再讀
+            pass
+
+    async def _put(self, item) -> None:
+        await self._queue.put(item)
+        if item is not _DONE:
+            self._stamps.append(time.monotonic())
+            self.discovered += 1
+
+    def close(self) -> None:
+        """生產端結束；消費端讀完剩餘項目後停止。可重複呼叫。"""
+        if self._closed or self._loop.is_closed():
+            return
+        self._closed = True
+        try:
+            asyncio.run_coroutine_threadsafe(self._put(_DONE), self._loop)
+        except RuntimeError:
+            pass
+
+    # ── 消費端（事件迴圈）────────────────────────────────────────────────────
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> str:
+        item = await self._queue.get()
+        if item is _DONE:
+            raise StopAsyncIteration
+        if self._stamps:
+            self._stamps.popleft()
+        self.consumed += 1
+        return item
+
+    @property
+    def backlog(self) -> int:
+        """佇列中等待下載的筆數。"""
+        return len(self._stamps)
+
+    def lag(self) -> float:
+        """最舊一筆待下載 UUID 已等待的秒數（佇列空為 0）。"""
+        return round(time.monotonic() - self._stamps[0], 1) if self._stamps else 0.0
+
+    def drain(self) -> list[str]:
+        """取出佇列中所有尚未下載的 UUID（中止寫斷點用）並停止收件。只能在事件迴圈執行緒
+        呼叫；之後生產端的 put 一律忽略（那些 UUID 已由生產端寫入清單檔，續跑時會再讀到）。"""
+        self._closed = True
+        out: list[str] = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            if item is not _DONE:
+                out.append(item)
+        self._stamps.clear()
+        return out
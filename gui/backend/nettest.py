@@ -128,7 +128,7 @@ def run(params: dict) -> None:
     paths.ensure_repo_on_syspath(params)
     bridge.stage_start("nettest")
     try:
-        result = asyncio.run(_run_async(params, work_dir, repo_root))
+        result = bridge.run_async(_run_async(params, work_dir, repo_root))
     except Exception as exc:  # noqa: BLE001 自檢本身失敗也要有結果可看
         result = {"error": str(exc)}
     bridge.stage_done("nettest", **result)
@@ -20,6 +20,7 @@ import re
 import subprocess
 import sys
 import threading
+import time
 
 from . import bridge, paths
 
@@ -28,31 +29,82 @@ _UUID_RE = re.compile(
 )
 
 
-def _count_ids(output_path: str) -> tuple[int, str | None]:
-    """數出輸出檔目前的 UUID 筆數與最後一筆 (供即時進度回報)。檔案不存在時回 (0, None)。"""
-    count, current = 0, None
-    try:
-        with open(output_path, "r", encoding="utf-8") as f:
-            for ln in f:
-                if _UUID_RE.search(ln):
-                    count += 1
-                    current = ln.strip()
-    except FileNotFoundError:
-        pass
-    return count, current
-
-
-def _watch_output(output_path: str, stop_evt: threading.Event) -> None:
-    """凍結模式下 process.start() 會阻塞主執行緒、無法逐行解析 stdout；改以背景執行緒輪詢
-    輸出檔 (spider 逐筆 append+flush 寫入)，收集數變動時 emit progress，讓前端的計數與
-    進度條會即時更新 (與 dev 模式的逐行解析等效)。"""
-    last = -1
-    while not stop_evt.is_set():
-        count, current = _count_ids(output_path)
-        if count != last:
-            last = count
-            bridge.progress("crawl", unit="id", count=count, total=None, current=current)
-        stop_evt.wait(0.8)
+# 輸出檔輪詢間隔與 progress 事件的最短間隔（秒）：輪詢勤一點讓延遲低，事件則合併。
+_WATCH_INTERVAL = 0.5
+_EMIT_INTERVAL = 1.0
+
+
+class OutputTail:
+    """增量追讀一行一個 UUID 的輸出檔：記住位元組 offset，每次 poll() 只掃新追加的位元組，
+    成本與新增量成正比、與檔案總長無關（數百萬行的輸出檔也是常數開銷）。
+
+    - 只處理完整行；寫到一半的行留待下一輪。
+    - 截斷（檔案變短）或輪替（inode 改變，例如被刪除後重建）時從頭重讀並歸零計數。
+    - count / current：目前檔案中的 UUID 行數與最後一筆。
+    """
+
+    def __init__(self, path: str, offset: int = 0) -> None:
+        self.path = path
+        self.offset = offset
+        self._pending = b""
+        self._ident: tuple[int, int] | None = None
+        self.count = 0
+        self.current: str | None = None
+        self.resets = 0
+
+    def _reset(self) -> None:
+        self.offset = 0
+        self._pending = b""
+        self.count = 0
+        self.current = None
+        self.resets += 1
+
+    def poll(self) -> list[str]:
+        """回傳自上次 poll 以來新增的 UUID（依檔案順序）。檔案不存在時回空清單。"""
+        try:
+            with open(self.path, "rb") as f:
+                st = os.fstat(f.fileno())
+                ident = (st.st_dev, st.st_ino)
+                if self._ident is not None and (ident != self._ident or st.st_size < self.offset):
+                    self._reset()
+                self._ident = ident
+                if st.st_size == self.offset:
+                    return []
+                f.seek(self.offset)
+                chunk = f.read(st.st_size - self.offset)
+        except FileNotFoundError:
+            if self._ident is not None:
+                self._ident = None
+                self._reset()
+            return []
+        self.offset += len(chunk)
+        *lines, self._pending = (self._pending + chunk).split(b"\n")
+        found: list[str] = []
+        for raw in lines:
+            m = _UUID_RE.search(raw.decode("utf-8", "replace"))
+            if m:
+                found.append(m.group(0))
+        if found:
+            self.count += len(found)
+            self.current = found[-1]
+        return found
+
+
+def _watch_output(tail: OutputTail, stop_evt: threading.Event) -> None:
+    """凍結模式下 process.start() 會阻塞主執行緒、無法逐行解析 stdout；改以背景執行緒增量
+    追讀輸出檔 (spider 逐筆/逐批 append 寫入)，收集數變動時 emit progress，讓前端的計數與
+    進度條會即時更新 (與 dev 模式的逐行解析等效)。事件至多每 _EMIT_INTERVAL 秒一次。"""
+    last, last_emit = -1, 0.0
+    while True:
+        stopping = stop_evt.is_set()
+        tail.poll()
+        now = time.monotonic()
+        if tail.count != last and (stopping or now - last_emit >= _EMIT_INTERVAL):
+            last, last_emit = tail.count, now
+            bridge.progress("crawl", unit="id", count=tail.count, total=None, current=tail.current)
+        if stopping:
+            return
+        stop_evt.wait(_WATCH_INTERVAL)
 
 
 def _write_config(params: dict) -> str:
@@ -124,8 +176,8 @@ def _run_scrapy_frozen(params: dict, output_path: str) -> None:
 
     # process.start() 會阻塞主執行緒，故用背景執行緒輪詢輸出檔回報即時收集數 (進度條/計數會動)。
     stop_evt = threading.Event()
-    watcher = threading.Thread(target=_watch_output, args=(output_path, stop_evt), daemon=True)
-    watcher.start()
+    tail = OutputTail(output_path)
+    watcher = bridge.start_thread(_watch_output, tail, stop_evt)
     try:
         with bridge.chdir(inner):
             os.environ.setdefault("SCRAPY_SETTINGS_MODULE", "paipu_project.settings")
@@ -147,7 +199,8 @@ def _run_scrapy_frozen(params: dict, output_path: str) -> None:
         watcher.join(timeout=2)
 
     # 由輸出檔回報最終數量 (watcher 已停，避免與 stage_done 競寫 stdout)。
-    collected, _ = _count_ids(output_path)
+    tail.poll()
+    collected = tail.count
     bridge.stage_done("crawl", collected=collected, output_file=output_path)
     bridge.done(ok=True)
 
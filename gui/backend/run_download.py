@@ -31,6 +31,7 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import os
 import time
 
@@ -64,7 +65,47 @@ def _bool_env(name: str, default: bool) -> bool:
     return os.getenv(name, str(default)).lower() == "true"
 
 
-async def _run_async(params: dict, work_dir: str, repo_root: str) -> None:
+def _write_trace(tracer, trace_path: str) -> dict | None:
+    """寫出 Chrome trace（trace_path）與文字摘要（同名 .summary.txt），摘要也送一份到日誌。
+    回傳摘要 dict（未開啟 trace 時 None）；寫檔失敗只警告，不影響下載結果。"""
+    if tracer is None:
+        return None
+    summary = tracer.summary()
+    text = tracer.format_summary(summary)
+    try:
+        tracer.write_chrome(trace_path)
+        with open(os.path.splitext(trace_path)[0] + ".summary.txt", "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    except OSError as exc:
+        bridge.log("download", f"trace 寫出失敗 {trace_path}: {exc}", level="warn")
+    bridge.log("download", f"stage trace -> {os.path.abspath(trace_path)}\n{text}")
+    summary["path"] = os.path.abspath(trace_path)
+    return summary
+
+
+@contextlib.asynccontextmanager
+async def _fresh_session(downloader_cls, download_recovery, accounts: list[dict],
+                         ini_paths: list[str], notify):
+    """連線＋登入（全滅拋 AllAccountsFailed）並開心跳；離開時停心跳、關連線。"""
+    async with downloader_cls() as downloader:
+        session = download_recovery.AccountSession(
+            downloader, accounts, ini_paths=ini_paths, notify=notify)
+        await session.ensure_login()
+        session.start_keepalive()
+        try:
+            yield session
+        finally:
+            await session.stop_keepalive()  # 心跳任務不可留到連線關閉之後
+
+
+# 取得已登入 AccountSession 的 async context manager。單次 CLI 每個 job 各自連線登入；
+# 常駐後端換成保溫版本（daemon.WarmSessions），跨 job 重用同一條已登入的連線。
+open_session = _fresh_session
+
+
+async def _run_async(params: dict, work_dir: str, repo_root: str, feed=None) -> None:
+    """Stage 2 主體。feed（live_feed.LiveFeed）給定時為「邊收集邊下載」：先跑完靜態清單
+    （斷點續跑項），再消費 feed 直到收集端 close()；此時清單為空也不算錯。"""
     import config_store
 
     # 單一設定檔 config.ini：primary 為「執行檔同層」(GUI 由 params 帶入)，mirror 為 userData
@@ -81,6 +122,7 @@ async def _run_async(params: dict, work_dir: str, repo_root: str) -> None:
         import ms_patch
         import toumajsoul
         import download_recovery
+        import stage_trace
         from toumajsoul import decode_record, fetch_record, process_log
         MajsoulPaipuDownloader = toumajsoul.MajsoulPaipuDownloader
         ms_patch.ensure_ms_cfg()
@@ -95,6 +137,9 @@ async def _run_async(params: dict, work_dir: str, repo_root: str) -> None:
     save_raw_json = params.get("save_raw_json", _bool_env("SAVE_RAW_JSON", False))
     if save_raw_json and not collect_timing:
         collect_timing = True
+    # 逐筆分段計時（stage_trace）：給路徑才開，結束時寫 Chrome trace＋分位數摘要。
+    # 相對路徑以 work_dir 為準。
+    trace_path = params.get("trace_path") or os.getenv("TRACE_PATH", "")
 
     # 0 / 缺省 = 自動（CPU 核心，上限 8）。不可為 0：Semaphore(0) 會讓轉換永遠等不到名額。
     convert_concurrency = max(1, int(params.get("convert_concurrency") or 0)
@@ -121,12 +166,14 @@ async def _run_async(params: dict, work_dir: str, repo_root: str) -> None:
     checkpoint = download_recovery.Checkpoint(
         os.path.join(work_dir, "download_checkpoint.json")).load()
     ids = download_recovery.merge_checkpoint_ids(ids, checkpoint)
-    if not ids:
+    if not ids and feed is None:
         bridge.error("download", "NO_INPUT_LIST", input_path, fatal=True)
         bridge.done(ok=False, exit_code=1)
         return
     unique_ids = _filter_existing(ids, base_dir)
     total = len(unique_ids)
+    if feed is not None:
+        feed.ready.set()  # 靜態清單已讀定，收集端可以開始追加新 UUID
     del ids  # 百萬筆規模時每份副本都是數百 MB，用不到就立刻放掉
 
     # 只要「有幾筆是續跑的」，不要為此再造一份百萬筆清單。
@@ -138,20 +185,36 @@ async def _run_async(params: dict, work_dir: str, repo_root: str) -> None:
     # 只有 set_pending() 會覆寫它）。
     checkpoint.forget_pending()
 
+    # 常駐後端跨 job 重用程序：上個 job 若因例外沒走到收尾，這裡順便關掉殘留的 tracer
+    if trace_path:
+        stage_trace.enable()
+    else:
+        stage_trace.disable()
     bridge.stage_start("download", total=total, collect_timing=collect_timing,
                        convert_concurrency=convert_concurrency,
                        accounts=len(accounts), input_list=input_path)
     if retry_count:
         bridge.notice("download", "RETRY_PREV_FAILED", str(retry_count))
 
-    if total == 0:
+    if total == 0 and feed is None:
+        stage_trace.disable()
         bridge.stage_done("download", downloaded=0, total=0,
                           output_dir=os.path.abspath(base_dir))
         bridge.done(ok=True)
         return
 
     mj_sem = asyncio.Semaphore(convert_concurrency)
-    counters = {"dl": 0, "cv": 0, "fail": 0}
+    counters = {"dl": 0, "cv": 0, "fail": 0, "skip": 0}
+
+    def progress_total() -> int:
+        # 邊收集邊下載時總數會持續增加：靜態清單 + 佇列累計收到（扣掉已下載而略過的）。
+        if feed is None:
+            return total
+        return total + feed.discovered - counters["skip"]
+
+    def feed_stats() -> dict:
+        return {} if feed is None else {"backlog": feed.backlog, "lag_s": feed.lag()}
+
     # 下載是嚴格串行、依序走 unique_ids，所以「還沒處理的」＝目前索引之後的切片。
     # 不用 done_uuids 集合：百萬筆規模下它會長成另一份數百 MB 的副本。
     next_index = 0
@@ -160,13 +223,13 @@ async def _run_async(params: dict, work_dir: str, repo_root: str) -> None:
     convert_tasks: set = set()
     max_attempts = 3 if len(accounts) > 1 else 2
 
-    async with MajsoulPaipuDownloader() as downloader:
-        session = download_recovery.AccountSession(
-            downloader, accounts, ini_paths=ini_paths,
-            notify=lambda code, msg="": bridge.notice("download", code, msg))
+    async with contextlib.AsyncExitStack() as stack:
         try:
-            await session.ensure_login()
+            session = await stack.enter_async_context(open_session(
+                MajsoulPaipuDownloader, download_recovery, accounts, ini_paths,
+                lambda code, msg="": bridge.notice("download", code, msg)))
         except download_recovery.AllAccountsFailed as exc:
+            stage_trace.disable()
             checkpoint.set_pending(unique_ids)
             checkpoint.close()
             # 最終仍是 error 151 → 自動探測全滅，改用帶「如何手動查版本」指引的錯誤碼，
@@ -178,13 +241,13 @@ async def _run_async(params: dict, work_dir: str, repo_root: str) -> None:
             bridge.error("download", code, str(exc), fatal=True)
             bridge.done(ok=False, exit_code=1)
             return
-
-        session.start_keepalive()
+        downloader = session.downloader
 
         # 下載迴圈只做網路那一段；解析（純 CPU，單筆約 70 ms）與轉換一律丟背景，
         # 使串行下載的節奏只受雀魂 RTT 限制。
         async def download_fn(uuid: str):
-            res, err = await fetch_record(uuid, downloader)
+            with stage_trace.span(uuid, "rpc"):
+                res, err = await fetch_record(uuid, downloader)
             return res, None, None, err
 
         loop = asyncio.get_event_loop()
@@ -194,13 +257,15 @@ async def _run_async(params: dict, work_dir: str, repo_root: str) -> None:
         async def convert(uuid: str, res) -> None:
             try:
                 try:
-                    log, timing, full = await loop.run_in_executor(
-                        None, decode_record, res, downloader, collect_timing)
+                    with stage_trace.span(uuid, "decode"):
+                        log, timing, full = await loop.run_in_executor(
+                            None, decode_record, res, downloader, collect_timing)
                 except Exception as exc:  # noqa: BLE001 解析失敗＝這筆沒有任何輸出
                     counters["fail"] += 1
                     failures.append({"uuid": uuid, "error": str(exc)})
                     checkpoint.record_failure(uuid, str(exc), session.current_username)
-                    bridge.progress("convert", phase="mjai", done=counters["cv"], total=total,
+                    bridge.progress("convert", phase="mjai", done=counters["cv"],
+                                    total=progress_total(),
                                     uuid=uuid, ok=False, failed=counters["fail"])
                     return
                 try:
@@ -208,70 +273,90 @@ async def _run_async(params: dict, work_dir: str, repo_root: str) -> None:
                                       save_debug, save_raw_json, mjai_semaphore=mj_sem)
                 except Exception as exc:  # noqa: BLE001 寫檔/轉換失敗只回報，不記斷點
                     # （tenhou 輸出可能已寫出，記入斷點反而會因去重而永遠留在失敗清單）
-                    bridge.progress("convert", phase="mjai", done=counters["cv"], total=total,
+                    bridge.progress("convert", phase="mjai", done=counters["cv"],
+                                    total=progress_total(),
                                     uuid=uuid, ok=False, failed=counters["fail"])
                     bridge.log("download", f"process_log 失敗 {uuid}: {exc}", level="warn")
                     return
                 counters["cv"] += 1
-                bridge.progress("convert", phase="mjai", done=counters["cv"], total=total,
+                bridge.progress("convert", phase="mjai", done=counters["cv"],
+                                total=progress_total(),
                                 uuid=uuid, ok=True)
             finally:
                 slots.release()
 
-        # 下載嚴格串行（單帳號單連線，一次只一個 RPC 在線上）；
-        # 轉換丟背景 task 並行跑，不阻塞下一筆下載。
-        started = time.perf_counter()
-        try:
-            for index, uuid in enumerate(unique_ids):
-                next_index = index
-                t0 = time.perf_counter()
+        async def handle(uuid: str) -> bool:
+            """下載一筆並把後處理丟背景；回傳 False 表示帳號/連線全滅、應中止。"""
+            t0 = time.perf_counter()
+            try:
+                res, _, _, err = await download_recovery.download_with_retry(
+                    session, download_fn, uuid, max_attempts=max_attempts)
+            except download_recovery.AllAccountsFailed as exc:
+                state["aborted"] = True
+                state["abort_exc"] = exc
+                return False
+            # net_ms＝這筆花在雀魂來回的時間，rate＝整體平均筆/秒。慢的時候可據此
+            # 分辨是網路（net_ms 就很大）還是本機（net_ms 小但 rate 低）。
+            net_ms = int((time.perf_counter() - t0) * 1000)
+            counters["dl"] += 1
+            rate = round(counters["dl"] / max(1e-6, time.perf_counter() - started), 2)
+            if res is None:
+                counters["fail"] += 1
+                failures.append({"uuid": uuid, "error": err or "unknown error"})
+                checkpoint.record_failure(uuid, err or "unknown error",
+                                          session.current_username)
+                bridge.progress("download", phase="download", done=counters["dl"],
+                                total=progress_total(), uuid=uuid, ok=False,
+                                failed=counters["fail"], net_ms=net_ms, rate=rate,
+                                **feed_stats())
+                return True
+            checkpoint.clear_failure(uuid)
+            bridge.progress("download", phase="download", done=counters["dl"],
+                            total=progress_total(), uuid=uuid, ok=True,
+                            failed=counters["fail"], net_ms=net_ms, rate=rate,
+                            **feed_stats())
+            # 連線異常緩慢（節點抽壞或帳號被限流）→ 重連換節點＋換下一個帳號。
+            slow = session.note_timing(net_ms / 1000)
+            if slow is not None:
+                bridge.notice("download", "SLOW_SESSION", f"{slow:.1f}")
                 try:
-                    res, _, _, err = await download_recovery.download_with_retry(
-                        session, download_fn, uuid, max_attempts=max_attempts)
+                    with stage_trace.span(uuid, "retry"):
+                        await session.recover(session.generation, force_switch=True,
+                                              reason=f"連線異常緩慢（{slow:.1f}s/筆）")
                 except download_recovery.AllAccountsFailed as exc:
                     state["aborted"] = True
                     state["abort_exc"] = exc
-                    break
-                # net_ms＝這筆花在雀魂來回的時間，rate＝整體平均筆/秒。慢的時候可據此
-                # 分辨是網路（net_ms 就很大）還是本機（net_ms 小但 rate 低）。
-                net_ms = int((time.perf_counter() - t0) * 1000)
-                counters["dl"] += 1
-                next_index = index + 1
-                rate = round(counters["dl"] / max(1e-6, time.perf_counter() - started), 2)
-                if res is None:
-                    counters["fail"] += 1
-                    failures.append({"uuid": uuid, "error": err or "unknown error"})
-                    checkpoint.record_failure(uuid, err or "unknown error",
-                                              session.current_username)
-                    bridge.progress("download", phase="download", done=counters["dl"],
-                                    total=total, uuid=uuid, ok=False, failed=counters["fail"],
-                                    net_ms=net_ms, rate=rate)
-                    continue
-                checkpoint.clear_failure(uuid)
-                bridge.progress("download", phase="download", done=counters["dl"], total=total,
-                                uuid=uuid, ok=True, failed=counters["fail"],
-                                net_ms=net_ms, rate=rate)
-                # 連線異常緩慢（節點抽壞或帳號被限流）→ 重連換節點＋換下一個帳號。
-                slow = session.note_timing(net_ms / 1000)
-                if slow is not None:
-                    bridge.notice("download", "SLOW_SESSION", f"{slow:.1f}")
-                    try:
-                        await session.recover(session.generation, force_switch=True,
-                                              reason=f"連線異常緩慢（{slow:.1f}s/筆）")
-                    except download_recovery.AllAccountsFailed as exc:
-                        state["aborted"] = True
-                        state["abort_exc"] = exc
-                        break
+                    return False
+            with stage_trace.span(uuid, "backpressure"):
                 await slots.acquire()
-                task = asyncio.ensure_future(convert(uuid, res))
-                convert_tasks.add(task)
-                task.add_done_callback(convert_tasks.discard)  # 完成即移除，長時間執行不累積
+            task = asyncio.ensure_future(convert(uuid, res))
+            convert_tasks.add(task)
+            task.add_done_callback(convert_tasks.discard)  # 完成即移除，長時間執行不累積
+            return True
 
-            # 中止與否都要等已下載的牌譜轉完，避免漏寫 mjai 輸出。
-            if convert_tasks:
-                await asyncio.gather(*list(convert_tasks), return_exceptions=True)
-        finally:
-            await session.stop_keepalive()  # 心跳任務不可留到連線關閉之後
+        # 下載嚴格串行（單帳號單連線，一次只一個 RPC 在線上）；
+        # 轉換丟背景 task 並行跑，不阻塞下一筆下載。
+        started = time.perf_counter()
+        for index, uuid in enumerate(unique_ids):
+            next_index = index
+            if not await handle(uuid):
+                break
+            next_index = index + 1
+
+        # 靜態清單（含斷點續跑項）跑完後，接著消費收集端即時送來的 UUID。
+        if feed is not None and not state["aborted"]:
+            tenhou_dir = os.path.join(base_dir, "tenhou")
+            async for uuid in feed:
+                if os.path.exists(os.path.join(tenhou_dir, uuid + ".json")):
+                    counters["skip"] += 1
+                    continue
+                if not await handle(uuid):
+                    state["feed_pending"] = [uuid] + feed.drain()
+                    break
+
+        # 中止與否都要等已下載的牌譜轉完，避免漏寫 mjai 輸出。
+        if convert_tasks:
+            await asyncio.gather(*list(convert_tasks), return_exceptions=True)
 
     # 清理暫存
     try:
@@ -280,9 +365,11 @@ async def _run_async(params: dict, work_dir: str, repo_root: str) -> None:
     except Exception:  # noqa: BLE001
         pass
 
+    trace_summary = _write_trace(stage_trace.disable(), trace_path)
+
     if state["aborted"]:
         # 中止：記錄斷點（剩餘未處理清單＝索引之後的切片），下次執行自動續跑。
-        pending = unique_ids[next_index:]
+        pending = unique_ids[next_index:] + state.get("feed_pending", [])
         checkpoint.set_pending(pending)
         checkpoint.close()
         exc = state.get("abort_exc")
@@ -298,8 +385,8 @@ async def _run_async(params: dict, work_dir: str, repo_root: str) -> None:
     checkpoint.set_pending([])
     checkpoint.close()
     checkpoint.delete_if_clean()
-    bridge.stage_done("download", downloaded=counters["cv"], total=total,
-                      failed=counters["fail"],
+    bridge.stage_done("download", downloaded=counters["cv"], total=progress_total(),
+                      failed=counters["fail"], trace=trace_summary,
                       failed_uuids=[f["uuid"] for f in failures[:20]],
                       checkpoint_path=os.path.abspath(checkpoint.path) if counters["fail"] else "",
                       output_dir=os.path.abspath(base_dir))
@@ -312,7 +399,7 @@ def run(params: dict) -> None:
     paths.ensure_repo_on_syspath(params)
 
     try:
-        asyncio.run(_run_async(params, work_dir, repo_root))
+        bridge.run_async(_run_async(params, work_dir, repo_root))
     except Exception as exc:  # noqa: BLE001
         bridge.error("download", "DOWNLOAD_EXCEPTION", str(exc), fatal=True)
         bridge.done(ok=False, exit_code=1)
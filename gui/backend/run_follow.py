@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""run_follow —— 持續追新局（follow 模式）：amae-koromo 輪詢 + 即時下載，同一程序內完成。
+
+與「每天重跑 Stage 1 -> Stage 2」的差別
+--------------------------------------
+- 收集端（akoromo_api.follow_room_paipus，背景執行緒）每 interval 秒只看最近 lookback
+  的滑動窗，新 UUID 經 live_feed.LiveFeed（有界佇列）直接交給 run_download 的下載迴圈。
+- 下載進度事件多帶 backlog（佇列中待下載筆數）與 lag_s（最舊一筆等了幾秒），即端到端
+  的「發現 -> 下載」延遲；backlog 持續上升代表下載跟不上收錄速度。
+- 可續跑：新 UUID 同時 append 到 work_dir 的清單檔（預設 follow_list.txt），重啟時該檔
+  即 Stage 2 的靜態清單（已下載的照常略過），佇列本身不需持久化。
+
+params.config 欄位：target_room（或 target_rooms 清單）、game_mode、follow_interval（秒）、
+follow_lookback_hours、follow_hours（0=直到取消）、output_filename；其餘下載參數同 download。
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import threading
+
+from . import bridge, paths
+
+_PRODUCER_JOIN_TIMEOUT = 15.0  # 秒
+
+
+def akoromo_api_module(params: dict):
+    """取得 amae-koromo API client。凍結版已 bundle 為 paipu_project.spiders.akoromo_api；
+    dev 需把外層 scrapy 專案目錄加進 sys.path（內層才是套件）。"""
+    try:
+        from paipu_project.spiders import akoromo_api
+    except ImportError:
+        outer = str(paths.repo_root(params) / "paipu_project")
+        if outer not in sys.path:
+            sys.path.insert(0, outer)
+        from paipu_project.spiders import akoromo_api
+    return akoromo_api
+
+
+def stream_into_download(params: dict, produce, max_seconds: float | None = None) -> None:
+    """在背景執行緒跑收集端 produce(put, stop_evt)，同時在事件迴圈跑 Stage 2 下載迴圈
+    消費其產出。produce 結束（或丟例外）即關閉佇列；下載端讀完剩餘項目後收尾。
+
+    produce 必須定期檢查 stop_evt：下載端中止（帳號全滅）或達 max_seconds 時會被 set。"""
+    from . import live_feed, run_download
+
+    work_dir = str(paths.work_dir(params))
+    repo_root = str(paths.repo_root(params))
+    paths.ensure_repo_on_syspath(params)
+    feed_size = int(params.get("feed_maxsize") or 1000)
+
+    async def main() -> None:
+        loop = asyncio.get_running_loop()
+        feed = live_feed.LiveFeed(loop, maxsize=feed_size)
+        stop_evt = threading.Event()
+        count = [0]
+
+        def put(uuid: str) -> None:
+            count[0] += 1
+            bridge.progress("crawl", unit="id", count=count[0], total=None, current=uuid)
+            feed.put(uuid)
+
+        def worker() -> None:
+            try:
+                # 等下載端讀定靜態清單再開始收集（見 LiveFeed.ready）；下載端提早結束則放棄。
+                while not feed.ready.wait(0.5):
+                    if stop_evt.is_set():
+                        return
+                produce(put, stop_evt)
+            except Exception as exc:  # noqa: BLE001 收集端掛掉不影響已在佇列中的下載
+                import traceback
+
+                traceback.print_exc()
+                bridge.error("crawl", "CRAWL_EXCEPTION", str(exc), fatal=False)
+            finally:
+                feed.close()
+                bridge.stage_done("crawl", collected=count[0])
+
+        producer = bridge.start_thread(worker)
+        if max_seconds:
+            loop.call_later(max_seconds, stop_evt.set)
+        try:
+            await run_download._run_async(params, work_dir, repo_root, feed=feed)
+        finally:
+            stop_evt.set()  # 下載端已結束（含中止）：通知收集端停手
+        # 等收集端收尾，讓它的 stage_done("crawl") 先於 job 的 done 送出；卡在單一 HTTP 請求
+        # 上就不再等（daemon 執行緒，隨程序結束）。
+        await loop.run_in_executor(None, producer.join, _PRODUCER_JOIN_TIMEOUT)
+
+    try:
+        bridge.run_async(main())
+    except Exception as exc:  # noqa: BLE001
+        bridge.error("download", "DOWNLOAD_EXCEPTION", str(exc), fatal=True)
+        bridge.done(ok=False, exit_code=1)
+
+
+def _read_ids(path: str) -> set[str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return {ln.strip() for ln in f if ln.strip()}
+    except FileNotFoundError:
+        return set()
+
+
+def run(params: dict) -> None:
+    cfg = dict(params.get("config") or {})
+    api = akoromo_api_module(params)
+    rooms = cfg.get("target_rooms") or [cfg.get("target_room") or "Jade"]
+    game_mode = cfg.get("game_mode") or "yonma"
+    interval = float(cfg.get("follow_interval") or 0) or None        # None = 模組預設
+    lookback = int(float(cfg.get("follow_lookback_hours") or 0) * 3600) or None
+    hours = float(cfg.get("follow_hours") or 0)
+
+    output_path = os.path.join(str(paths.work_dir(params)),
+                               cfg.get("output_filename") or "follow_list.txt")
+    # 清單檔即續跑來源：重啟時它是下載端的靜態清單，也讓收集端不再重送其中的 UUID。
+    existing = _read_ids(output_path)
+    params = dict(params, input_list=output_path)
+
+    bridge.stage_start("crawl", mode="follow", rooms=rooms, interval=interval,
+                       lookback=lookback, output_file=output_path)
+
+    def produce(put, stop_evt: threading.Event) -> None:
+        with open(output_path, "a", encoding="utf-8") as f:
+            api.follow_room_paipus(rooms, put, stop_event=stop_evt, game_mode=game_mode,
+                                   interval=interval, lookback=lookback,
+                                   existing_ids=existing, output_file=f)
+
+    stream_into_download(params, produce, max_seconds=hours * 3600 or None)
+
+
+if __name__ == "__main__":
+    run(bridge.read_params())
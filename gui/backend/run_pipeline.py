@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""run_pipeline —— Stage 1 -> Stage 2 串流銜接：邊收集 ID 邊下載，同一個 job 內完成。
+
+批次流程（crawl 跑完才 download）下，收集動輒數小時，下載帳號全程閒置；下載端再把整份
+清單重讀、去重、listdir 過濾一次。pipeline 讓收集到的 UUID 經 live_feed.LiveFeed（有界
+佇列）直接進 run_download 的下載迴圈，第一筆在收集開始後數秒內就開始下載。
+
+收集端兩種接法
+--------------
+- date_room_api：同程序背景執行緒直接呼叫 akoromo_api.collect_room_paipus(on_new=...)。
+- 其餘（Selenium 各模式）：以子程序跑既有的 `crawl` 子命令（scrapy 需獨佔 reactor 與主
+  執行緒，不宜塞進本程序），並以位元組 offset 追讀其輸出檔——spider 各模式本來就逐筆
+  write+flush，輸出檔即通用介面。子程序的 error（降為非致命）/notice 事件轉發，其餘輸出當原始 log。
+
+可續跑：輸出檔是持久來源。任一端中途死掉，重跑 pipeline 時輸出檔已有的 UUID 成為下載端
+的靜態清單（已下載者照常略過、斷點照常併入），收集端則沿用既有的續跑機制
+（spider 讀回輸出檔去重、date_room_player 的 crawler_progress.json）。
+"""
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import threading
+
+from . import bridge, paths, run_crawler
+from .run_follow import akoromo_api_module, stream_into_download
+
+# 子程序輸出檔的追讀間隔（秒）；spider 逐筆 flush，延遲只影響「發現 -> 入列」的秒數。
+_TAIL_INTERVAL = 0.5
+
+
+def _crawl_command() -> list[str]:
+    """以「正在跑的同一個後端」啟動 crawl 子命令（dev: python -m；凍結: backend.exe）。"""
+    if bridge.is_frozen():
+        return [sys.executable, "crawl", "--params-stdin"]
+    return [sys.executable, "-m", "gui.backend.cli", "crawl", "--params-stdin"]
+
+
+def _relay_child_output(proc: subprocess.Popen, reported: threading.Event) -> None:
+    """子程序 stdout 是它自己的事件流：error/notice 轉發（前端要看得到），其餘
+    （progress 由本程序依佇列自行回報、done 由本程序決定）當原始 log 印到 stderr。
+
+    子程序的 error 一律降為非致命再轉發：收集端失敗不中止整個 job（已收集的照常下載），
+    致命與否由本程序的 done 決定。轉發過 error 即 set reported，本程序不再補報同一件事。"""
+    assert proc.stdout is not None
+    for line in proc.stdout:
+        line = line.rstrip()
+        if not line:
+            continue
+        try:
+            event = json.loads(line)
+        except ValueError:
+            print(line)
+            continue
+        if isinstance(event, dict) and event.get("type") in ("error", "notice"):
+            if event["type"] == "error":
+                event["fatal"] = False
+                reported.set()
+            bridge.emit(event)
+        else:
+            print(line)
+
+
+def _tail_ids(path: str, offset: int, put, stop_evt: threading.Event,
+              proc: subprocess.Popen) -> None:
+    """從 offset 起追讀 path 新增的內容（run_crawler.OutputTail：只處理完整行，截斷/輪替
+    時從頭重讀），每個 UUID 交給 put；子程序結束後把最後一段讀完即返回。"""
+    tail = run_crawler.OutputTail(path, offset)
+    while True:
+        exited = proc.poll() is not None
+        for uuid in tail.poll():
+            put(uuid)
+            if stop_evt.is_set():
+                return
+        if exited:
+            return
+        stop_evt.wait(_TAIL_INTERVAL)
+        if stop_evt.is_set():
+            return
+
+
+def run(params: dict) -> None:
+    cfg = dict(params.get("config") or {})
+    mode = cfg.get("crawler_mode", "auto")
+    output_path = run_crawler._write_config(params)
+    # 輸出檔已有的 UUID（上次中斷的收集）即下載端的靜態清單。
+    params = dict(params, input_list=output_path)
+
+    bridge.stage_start("crawl", mode=mode, pipeline=True, output_file=output_path)
+
+    if mode == "date_room_api":
+        api = akoromo_api_module(params)
+
+        def produce(put, stop_evt: threading.Event) -> None:
+            existing: set[str] = set()
+            if os.path.exists(output_path):
+                with open(output_path, "r", encoding="utf-8") as f:
+                    existing = {ln.strip() for ln in f if ln.strip()}
+            with open(output_path, "a", encoding="utf-8") as f:
+                api.collect_room_paipus(
+                    cfg.get("target_room") or "Jade", cfg["start_date"], cfg["end_date"],
+                    output_file=f, existing_ids=existing,
+                    game_mode=cfg.get("game_mode") or "yonma",
+                    on_new=put, stop_event=stop_evt)
+    else:
+        def produce(put, stop_evt: threading.Event) -> None:
+            offset = os.path.getsize(output_path) if os.path.exists(output_path) else 0
+            env = os.environ.copy()
+            env["PYTHONIOENCODING"] = "utf-8"
+            proc = subprocess.Popen(
+                _crawl_command(),
+                cwd=str(paths.repo_root(params)),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                bufsize=1,
+                env=env,
+            )
+            assert proc.stdin is not None
+            proc.stdin.write(json.dumps(params, ensure_ascii=False))
+            proc.stdin.close()
+            child_reported = threading.Event()
+            relay = bridge.start_thread(_relay_child_output, proc, child_reported)
+            try:
+                _tail_ids(output_path, offset, put, stop_evt, proc)
+            finally:
+                if proc.poll() is None:
+                    proc.terminate()  # 下載端已中止：收集也停，下次重跑從輸出檔續接
+                proc.wait()
+                relay.join(timeout=2)
+            if proc.returncode and not stop_evt.is_set() and not child_reported.is_set():
+                bridge.error("crawl", "SCRAPY_FAILED", f"crawl exited with {proc.returncode}",
+                             fatal=False)
+
+    stream_into_download(params, produce)
+
+
+if __name__ == "__main__":
+    run(bridge.read_params())
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""startup_profile —— `--profile-startup`：列出本次執行各模組的 import 耗時。
+
+為什麼不用 python -X importtime
+-------------------------------
+-X importtime / PYTHONPROFILEIMPORTTIME 要在直譯器啟動前指定，凍結的 backend.exe 無從
+傳入，而使用者最先感受到的正是凍結版在 Windows 上的冷啟動。本模組在 cli 最前面包住
+builtins.__import__，記錄每個模組「第一次」被 import 的耗時：
+
+- cum：含其間觸發的所有子 import；self：扣掉子 import 後模組本身的執行時間。
+- 依頂層套件彙總 self（selenium、scrapy、twisted、google、tensoul…），一眼看出錢花在誰身上。
+- mark(label)：記下自安裝起的時間點（cli 分派子命令時記 "dispatch"）。
+
+行程結束時（atexit）把報告印到 stderr（Electron 當原始 log 顯示），不影響 stdout 事件流。
+只用標準函式庫且不 import 任何重量級模組，本身的成本可忽略。
+"""
+from __future__ import annotations
+
+import atexit
+import builtins
+import sys
+import threading
+import time
+
+FLAG = "--profile-startup"
+
+_orig_import = None
+_t0 = 0.0
+_stacks: dict = {}    # thread id -> [[name, start, children_cum], ...]
+_records: dict = {}   # module -> (cum 秒, self 秒)；只記第一次
+_marks: list = []
+
+
+def active() -> bool:
+    return _orig_import is not None
+
+
+def _resolve(name: str, globals_, level: int) -> str:
+    if level == 0:
+        return name
+    package = (globals_ or {}).get("__package__") or ""
+    base = package.rsplit(".", level - 1)[0] if level > 1 else package
+    return f"{base}.{name}" if name else base
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):  # noqa: A002
+    try:
+        full = _resolve(name, globals, level)
+    except Exception:  # noqa: BLE001 解析失敗就照常 import、不計時
+        full = name
+    target = None
+    if full not in sys.modules:
+        target = full
+    elif fromlist:
+        # `from . import run_download` 這類：套件早已載入，新載入的是 fromlist 裡的子模組。
+        for item in fromlist:
+            if item != "*" and f"{full}.{item}" not in sys.modules:
+                target = f"{full}.{item}"
+                break
+    if target is None:
+        return _orig_import(name, globals, locals, fromlist, level)
+
+    stack = _stacks.setdefault(threading.get_ident(), [])
+    entry = [target, time.perf_counter(), 0.0]
+    stack.append(entry)
+    try:
+        return _orig_import(name, globals, locals, fromlist, level)
+    finally:
+        stack.pop()
+        elapsed = time.perf_counter() - entry[1]
+        if stack:
+            stack[-1][2] += elapsed
+        if target in sys.modules and target not in _records:
+            _records[target] = (elapsed, max(0.0, elapsed - entry[2]))
+
+
+def install() -> None:
+    """包住 __import__ 並在結束時輸出報告；同時把旗標自 sys.argv 移除（子命令不必認得它）。"""
+    global _orig_import, _t0
+    if _orig_import is not None:
+        return
+    _t0 = time.perf_counter()
+    _orig_import = builtins.__import__
+    builtins.__import__ = _timed_import
+    while FLAG in sys.argv:
+        sys.argv.remove(FLAG)
+    atexit.register(report)
+
+
+def mark(label: str) -> None:
+    if active():
+        _marks.append((label, time.perf_counter() - _t0))
+
+
+def report(file=None, top: int = 25) -> None:
+    out = file or sys.stderr
+    total = sum(self_s for _, self_s in _records.values())
+    print(f"[startup] 自安裝起 {(time.perf_counter() - _t0) * 1000:.0f} ms；"
+          f"import {len(_records)} 個模組共 {total * 1000:.0f} ms", file=out)
+    for label, at in _marks:
+        print(f"[startup]   {label:<12} @ {at * 1000:8.1f} ms", file=out)
+
+    packages: dict = {}
+    for module, (_, self_s) in _records.items():
+        root = module.split(".", 1)[0]
+        row = packages.setdefault(root, [0.0, 0])
+        row[0] += self_s
+        row[1] += 1
+    print("[startup] 依頂層套件（self 合計）：", file=out)
+    for root, (self_s, count) in sorted(packages.items(), key=lambda kv: kv[1][0], reverse=True)[:top]:
+        print(f"  {self_s * 1000:8.1f} ms  {count:4d} 模組  {root}", file=out)
+
+    print(f"[startup] 最慢的 {top} 個模組（cum / self）：", file=out)
+    for module, (cum, self_s) in sorted(_records.items(), key=lambda kv: kv[1][0], reverse=True)[:top]:
+        print(f"  {cum * 1000:8.1f} / {self_s * 1000:7.1f} ms  {module}", file=out)
+    try:
+        out.flush()
+    except Exception:  # noqa: BLE001
+        pass
@@ -22,7 +22,7 @@ datas, binaries, hiddenimports = [], [], []
 
 # collect_all：把每個套件的 data/binary/submodule 全部收進來（最保險）。
 for pkg in ('scrapy', 'twisted', 'selenium', 'tensoul', 'webdriver_manager',
-            'google', 'ms', 'nest_asyncio'):
+            'google', 'ms'):
     try:
         d, b, h = collect_all(pkg)
         datas += d
@@ -67,7 +67,13 @@ hiddenimports += [
     'scrapy.pqueues',
     # 本 repo 既有模組（凍結後仍需 import）
     'toumajsoul', 'ms_patch', 'date_room_extractor', 'config_store', 'download_recovery',
+    'stage_trace',
     'paipu_project.settings', 'paipu_project.spiders.PaipuSpider',
+    'paipu_project.pipelines', 'paipu_project.items',
+    'paipu_project.spiders.akoromo_api', 'paipu_project.driver_pool', 'driver_pool',
+    'paipu_project.network_capture', 'network_capture',
+    'paipu_project.page_waits', 'page_waits',
+    'paipu_project.browser_profile', 'browser_profile',
     # protobuf runtime
     'google.protobuf', 'google.protobuf.json_format',
 ]
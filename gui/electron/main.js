@@ -312,8 +312,8 @@ function registerIpc() {
       },
       params || {}
     );
-    // 為下載 job 注入並發設定（下載本身固定串行，僅轉換可並發）
-    if (kind === 'download') {
+    // 為下載 job 注入並發設定（下載本身固定串行，僅轉換可並發）；pipeline / follow 內含下載。
+    if (kind === 'download' || kind === 'pipeline' || kind === 'follow') {
       if (settings.convertConcurrency) merged.convert_concurrency = settings.convertConcurrency;
     }
     return pyRunner.startJob(kind, { params: merged, pythonPath: settings.pythonPath }, send);
@@ -338,6 +338,9 @@ app.whenReady().then(() => {
   });
 });
 
+// 常駐後端隨 app 結束 (關 stdin = shutdown，取消進行中的 job 並登出)。
+app.on('will-quit', () => pyRunner.shutdown());
+
 app.on('window-all-closed', () => {
   if (process.platform !== 'darwin') app.quit();
 });
@@ -1,5 +1,9 @@
 'use strict';
-// pyRunner —— spawn 後端子程序、逐行解析 NDJSON 事件、串給 renderer，並支援取消。
+// pyRunner —— 執行後端 job、把 NDJSON 事件串給 renderer，並支援取消。
+//
+// 預設走常駐後端 (backend daemon，見 gui/backend/daemon.py)：第一次 job 時啟動一次，
+// 之後的 job 以 stdin 上的 JSON-RPC 交給它，免去每次重新 import 與重新登入雀魂。
+// daemon 起不來或環境變數 MS_BACKEND_DAEMON=0 時退回「每個 job spawn 一個後端」。
 //
 // 一次只跑一個 job (wizard 線性流程)。stdout 為乾淨事件流 (每行一 JSON)，stderr 為
 // 原始 log。參數經 stdin 以 JSON 傳入 (含帳密)，不進 argv。
@@ -9,20 +13,142 @@ const readline = require('readline');
 
 const { resolveBackend } = require('./pythonLocator');
 
-let current = null; // { child, kind }
+let current = null; // { child, kind } 或 daemon 模式的 { jobId, kind, early, cancelRequested }
+let daemon = null;  // { child, ready: Promise, nextId, pending: Map, send }
 
 function isRunning() {
   return current !== null;
 }
 
-// 啟動一個 job。send(channel, payload) 用來把事件推給 renderer。
-// kind: 'crawl' | 'download' | 'doctor'；options: { params, pythonPath, cwd }
-function startJob(kind, options, send) {
-  if (current) {
-    send('py:event', { type: 'error', code: 'BUSY', msg: 'a job is already running', fatal: true });
+function daemonEnabled() {
+  return process.env.MS_BACKEND_DAEMON !== '0';
+}
+
+// ── 常駐後端 ────────────────────────────────────────────────────────────────
+
+function startDaemon(backend, send) {
+  const child = spawn(backend.command, [...backend.baseArgs, 'daemon'], {
+    cwd: backend.cwd,
+    env: backend.env,
+    windowsHide: true,
+  });
+  const d = { child, nextId: 1, pending: new Map(), send };
+  d.ready = new Promise((resolve) => {
+    d.resolveReady = resolve;
+  });
+
+  readline.createInterface({ input: child.stdout }).on('line', (line) => {
+    if (!line) return;
+    let msg;
+    try {
+      msg = JSON.parse(line);
+    } catch (_) {
+      d.send('py:raw', line);
+      return;
+    }
+    if (msg.id !== undefined && msg.id !== null && d.pending.has(msg.id)) {
+      const { resolve } = d.pending.get(msg.id);
+      d.pending.delete(msg.id);
+      resolve(msg);
+    } else if (msg.method === 'ready') {
+      d.resolveReady(true);
+    } else if (current && current.jobId === null) {
+      // job.start 的回覆還沒到，但 job 已開始發事件：先存著，拿到 job 編號後再補送。
+      current.early.push(msg);
+    } else {
+      dispatch(d, msg);
+    }
+  });
+  child.stderr.on('data', (chunk) => d.send('py:stderr', chunk.toString()));
+
+  const gone = (code, signal) => {
+    if (daemon === d) daemon = null;
+    d.resolveReady(false);
+    for (const { resolve } of d.pending.values()) resolve({ error: { code: -32000, message: 'daemon exited' } });
+    d.pending.clear();
+    // 執行中的 job 隨 daemon 一起結束：比照子程序退出通知 renderer。
+    if (current && current.jobId) {
+      current = null;
+      d.send('py:exit', { code, signal });
+    }
+  };
+  child.on('error', () => gone(null, null));
+  child.on('exit', gone);
+  return d;
+}
+
+// 把屬於目前 job 的通知轉給 renderer (event -> py:event、job.exit -> py:exit)。
+function dispatch(d, msg) {
+  const p = msg.params || {};
+  if (!current || p.job !== current.jobId) return;
+  if (msg.method === 'event') {
+    d.send('py:event', p);
+  } else if (msg.method === 'job.exit') {
+    current = null;
+    d.send('py:exit', { code: p.code, signal: p.cancelled ? 'SIGTERM' : null });
+  }
+}
+
+function rpc(d, method, params) {
+  return new Promise((resolve) => {
+    const id = d.nextId++;
+    d.pending.set(id, { resolve });
+    try {
+      d.child.stdin.write(JSON.stringify({ jsonrpc: '2.0', id, method, params: params || {} }) + '\n');
+    } catch (err) {
+      d.pending.delete(id);
+      resolve({ error: { code: -32000, message: String(err) } });
+    }
+  });
+}
+
+async function startDaemonJob(kind, options, send) {
+  const backend = resolveBackend({ pythonPath: options.pythonPath });
+  if (!backend) {
+    send('py:event', { type: 'error', code: 'NO_PYTHON', msg: 'no python interpreter found', fatal: true });
     return false;
   }
-  options = options || {};
+  // 先佔住 current，等 daemon 就緒期間再按開始會得到 BUSY。
+  const job = { jobId: null, kind, early: [], cancelRequested: false };
+  current = job;
+  if (!daemon) daemon = startDaemon(backend, send);
+  const d = daemon;
+  d.send = send;
+  if (!(await d.ready)) {
+    if (current === job) current = null;
+    return null; // 起不來：交給呼叫端退回逐 job spawn
+  }
+
+  const reply = await rpc(d, 'job.start', { kind, params: options.params || {} });
+  if (reply.error || !reply.result) {
+    if (current === job) current = null;
+    send('py:event', { type: 'error', code: 'SPAWN_FAILED', msg: reply.error ? reply.error.message : 'no reply', fatal: true });
+    return false;
+  }
+  job.jobId = reply.result.job;
+  if (job.cancelRequested) rpc(d, 'job.cancel', { job: job.jobId });
+  for (const msg of job.early.splice(0)) dispatch(d, msg);
+  return true;
+}
+
+// 結束常駐後端 (app 結束時)。關 stdin 即等同 shutdown。
+function shutdown() {
+  if (!daemon) return;
+  const { child } = daemon;
+  daemon = null;
+  try {
+    child.stdin.end();
+  } catch (_) {
+    /* already gone */
+  }
+  setTimeout(() => {
+    if (child.exitCode === null) child.kill();
+  }, 5000);
+}
+
+// ── 逐 job spawn (fallback) ─────────────────────────────────────────────────
+
+function spawnJob(kind, options, send) {
   const backend = resolveBackend({ pythonPath: options.pythonPath });
   if (!backend) {
     send('py:event', { type: 'error', code: 'NO_PYTHON', msg: 'no python interpreter found', fatal: true });
@@ -72,9 +198,31 @@ function startJob(kind, options, send) {
   return true;
 }
 
-// 取消目前 job。Windows 上殺整棵進程樹 (否則 chrome/chromedriver 殘留)。
+// 啟動一個 job。send(channel, payload) 用來把事件推給 renderer。
+// kind: 'crawl' | 'download' | 'doctor' | ...；options: { params, pythonPath, cwd }
+async function startJob(kind, options, send) {
+  if (current) {
+    send('py:event', { type: 'error', code: 'BUSY', msg: 'a job is already running', fatal: true });
+    return false;
+  }
+  options = options || {};
+  // 指定 cwd 的 job 需要獨立程序 (daemon 的 cwd 在啟動時即固定)。
+  if (daemonEnabled() && !options.cwd) {
+    const ok = await startDaemonJob(kind, options, send);
+    if (ok !== null) return ok;
+  }
+  return spawnJob(kind, options, send);
+}
+
+// 取消目前 job。daemon 模式由後端取消 task／終止子程序樹；spawn 模式在 Windows 上
+// 殺整棵進程樹 (否則 chrome/chromedriver 殘留)。
 function cancelJob() {
   if (!current) return false;
+  if (current.jobId !== undefined) {
+    if (!current.jobId) current.cancelRequested = true; // 編號到手後再送
+    else if (daemon) rpc(daemon, 'job.cancel', { job: current.jobId });
+    return true;
+  }
   const { child } = current;
   if (process.platform === 'win32') {
     try {
@@ -91,4 +239,4 @@ function cancelJob() {
   return true;
 }
 
-module.exports = { startJob, cancelJob, isRunning };
+module.exports = { startJob, cancelJob, isRunning, shutdown };
@@ -27,6 +27,28 @@ function runBackend(args, params) {
   });
 }
 
+// 常駐後端：送出 requests (每個一行 JSON-RPC)，收到 job.exit 後 shutdown，回傳所有訊息。
+function runDaemon(requests) {
+  return new Promise((resolve) => {
+    const child = spawn(PY, ['-u', '-m', 'gui.backend', 'daemon'], {
+      cwd: REPO_ROOT,
+      env: Object.assign({}, process.env, { PYTHONIOENCODING: 'utf-8' }),
+    });
+    const messages = [];
+    readline.createInterface({ input: child.stdout }).on('line', (line) => {
+      if (!line.trim()) return;
+      const msg = JSON.parse(line); // throws if NDJSON invalid
+      messages.push(msg);
+      if (msg.method === 'ready') {
+        for (const req of requests) child.stdin.write(JSON.stringify(req) + '\n');
+      } else if (msg.method === 'job.exit') {
+        child.stdin.write(JSON.stringify({ jsonrpc: '2.0', id: 99, method: 'shutdown' }) + '\n');
+      }
+    });
+    child.on('exit', (code) => resolve({ code, messages }));
+  });
+}
+
 function assert(cond, msg) {
   if (!cond) {
     console.error('FAIL:', msg);
@@ -44,5 +66,19 @@ function assert(cond, msg) {
   assert(types.includes('stage_done'), 'doctor: has stage_done');
   assert(types[types.length - 1] === 'done', 'doctor: last event is done');
 
+  // daemon：JSON-RPC 回應、帶 job 編號的事件通知、job.exit、shutdown 後結束
+  const daemon = await runDaemon([
+    { jsonrpc: '2.0', id: 1, method: 'ping' },
+    { jsonrpc: '2.0', id: 2, method: 'job.start', params: { kind: 'doctor', params: {} } },
+  ]);
+  const byId = (id) => daemon.messages.find((m) => m.id === id);
+  const jobId = byId(2) && byId(2).result && byId(2).result.job;
+  const jobEvents = daemon.messages.filter((m) => m.method === 'event' && m.params.job === jobId);
+  assert(byId(1) && byId(1).result && byId(1).result.pid > 0, 'daemon: ping replies');
+  assert(!!jobId, 'daemon: job.start returns a job id');
+  assert(jobEvents.length && jobEvents[jobEvents.length - 1].params.type === 'done', 'daemon: job events end with done');
+  assert(daemon.messages.some((m) => m.method === 'job.exit' && m.params.job === jobId), 'daemon: job.exit sent');
+  assert(daemon.code === 0, 'daemon: exits cleanly on shutdown');
+
   console.log(process.exitCode ? '\nSMOKE FAILED' : '\nSMOKE PASSED');
 })();
@@ -340,12 +340,9 @@ def is_resource_version_error(exc: BaseException) -> bool:
 
 def patch_downloader(dl) -> None:
     """覆寫 downloader.download 的版本字串 (舊 web-{ver} 下載也回 151)；
-    僅換掉請求建構，回應處理仍重用原本的 _handle_game_record / make_error_message。"""
+    僅換掉請求建構，回應處理（含 metrics 計數）仍重用原本的 download_request。"""
 
     async def patched_download(self, record_uuid, lobby_id=0):
-        res = await self.lobby.fetch_game_record(build_game_record_req(record_uuid))
-        if res.error.code:
-            return self.make_error_message("error_code: %s" % res.error.code)
-        return {"is_error": False, "log": self._handle_game_record(res, lobby_id)}
+        return await self.download_request(build_game_record_req(record_uuid), lobby_id)
 
     dl.download = types.MethodType(patched_download, dl)
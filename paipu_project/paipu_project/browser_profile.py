@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""browser_profile —— Selenium 收集模式的「精簡」Chrome 設定（lean profile）與量測工具。
+
+為什麼
+------
+spider（create_stealth_driver）與 extractor（build_extractor_driver）都載入完整的
+amae-koromo SPA：圖片、網頁字型、CSS 動畫、分析腳本一應俱全，但收集只需要表格的文字
+與連結。一台 crawl 主機跑 32 個 Chrome 時，瓶頸是記憶體而不是 CPU。lean 設定：
+
+- CDP ``Network.setBlockedURLs`` 擋掉圖片、字型、影音與第三方分析腳本（同時以
+  ``imagesEnabled=false`` / ``--disable-remote-fonts`` 在 renderer 層就不解碼）。
+- prefers-reduced-motion + 注入 CSS 關閉 animation/transition（少重排、少合成層）。
+- 較小的 viewport（1280x1600；虛擬表格每次渲染的列數隨 viewport 高度增減）。extractor
+  不套用這項：它靠虛擬捲動逐列比對，保留自己的 headless 1920x3000。
+
+與反偵測 JS 相容：本模組只用 CDP 指令與獨立的 addScriptToEvaluateOnNewDocument，
+不碰 navigator/window 屬性；圖片被擋後 naturalHeight 為 0，stealth JS 對破圖回報的
+20px 尺寸照常生效。
+
+（Fetch 網域的 request interception 需要非同步處理 CDP 事件，Selenium 的同步
+execute_cdp_cmd 做不到，故以 URL 樣式封鎖達成同樣效果。）
+
+量測模式：``python browser_profile.py --measure [--url URL] [--runs N]`` 分別以 full 與
+lean 設定開同一頁，比較頁面就緒時間與每台 driver 的 Chrome 行程樹 RSS。
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+
+try:  # 量測 RSS 用；沒裝時 Linux 改讀 /proc，其餘平台不回報 RSS
+    import psutil
+except ImportError:  # pragma: no cover - optional dependency
+    psutil = None
+
+PROFILES = ("full", "lean")
+
+LEAN_VIEWPORT = (1280, 1600)
+
+# Network.setBlockedURLs 樣式（* 為萬用字元）。只擋靜態資源與分析/廣告；
+# Cloudflare/Vercel 的挑戰腳本與 amae-koromo 的 JS/CSS/API 不在其中。
+LEAN_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3", "*.ogg", "*.wav",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*googlesyndication.com*", "*clarity.ms*", "*hotjar.com*",
+    "*static.cloudflareinsights.com*", "*/_vercel/insights/*", "*/_vercel/speed-insights/*",
+]
+
+LEAN_CHROME_ARGS = [
+    "--blink-settings=imagesEnabled=false",
+    "--disable-remote-fonts",
+    "--force-prefers-reduced-motion",
+    "--mute-audio",
+    "--autoplay-policy=user-gesture-required",
+]
+
+LEAN_PREFS = {
+    "profile.managed_default_content_settings.images": 2,
+}
+
+_NO_ANIMATION_JS = """
+(function () {
+    var css = '*,*::before,*::after{animation:none!important;transition:none!important;' +
+              'scroll-behavior:auto!important}';
+    var add = function () {
+        var style = document.createElement('style');
+        style.textContent = css;
+        (document.head || document.documentElement).appendChild(style);
+    };
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', add);
+    } else {
+        add();
+    }
+})();
+"""
+
+
+def _log(msg: str) -> None:
+    print(msg, file=sys.stderr, flush=True)
+
+
+def is_lean(profile: Optional[str]) -> bool:
+    return (profile or "full").lower() == "lean"
+
+
+def lean_window_arg() -> str:
+    return f"--window-size={LEAN_VIEWPORT[0]},{LEAN_VIEWPORT[1]}"
+
+
+def add_lean_options(chrome_options, with_window_size: bool = True) -> None:
+    """在建立 driver 前加上 lean 啟動參數與偏好設定（prefs 會與既有 prefs 合併）。"""
+    for arg in LEAN_CHROME_ARGS:
+        chrome_options.add_argument(arg)
+    if with_window_size:
+        chrome_options.add_argument(lean_window_arg())
+    prefs = dict(chrome_options.experimental_options.get("prefs") or {})
+    prefs.update(LEAN_PREFS)
+    chrome_options.add_experimental_option("prefs", prefs)
+
+
+def apply_lean(driver, viewport: bool = True) -> None:
+    """driver 建立後套用 lean：封鎖 URL、reduced motion、關動畫、（可選）縮小 viewport。
+
+    各 CDP 指令獨立失敗不影響其餘（舊版 Chrome 可能不支援其中之一）。"""
+    steps = [
+        ("Network.enable", {}),
+        ("Network.setBlockedURLs", {"urls": LEAN_BLOCKED_URLS}),
+        ("Emulation.setEmulatedMedia",
+         {"features": [{"name": "prefers-reduced-motion", "value": "reduce"}]}),
+        ("Page.addScriptToEvaluateOnNewDocument", {"source": _NO_ANIMATION_JS}),
+    ]
+    if viewport:
+        steps.append(("Emulation.setDeviceMetricsOverride", {
+            "width": LEAN_VIEWPORT[0], "height": LEAN_VIEWPORT[1],
+            "deviceScaleFactor": 1, "mobile": False,
+        }))
+    for cmd, params in steps:
+        try:
+            driver.execute_cdp_cmd(cmd, params)
+        except Exception as exc:  # noqa: BLE001
+            _log(f"[lean] {cmd} 失敗（略過）：{exc}")
+
+
+# ── 量測 ─────────────────────────────────────────────────────────────────────
+def _proc_children() -> dict:
+    """/proc 下的 ppid -> [pid] 表（無 psutil 時的 Linux 後備）。"""
+    table: dict = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", "r") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        table.setdefault(ppid, []).append(int(name))
+    return table
+
+
+def _proc_rss(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def driver_rss(driver) -> Optional[int]:
+    """driver 的 chromedriver 行程及其所有子行程（Chrome browser/renderer/GPU）的 RSS 總和。"""
+    process = getattr(getattr(driver, "service", None), "process", None)
+    if process is None:
+        return None
+    if psutil is not None:
+        try:
+            root = psutil.Process(process.pid)
+            procs = [root] + root.children(recursive=True)
+            return sum(p.memory_info().rss for p in procs if p.is_running())
+        except psutil.Error:
+            return None
+    if not os.path.isdir("/proc"):
+        return None
+    children = _proc_children()
+    total, stack = 0, [process.pid]
+    while stack:
+        pid = stack.pop()
+        total += _proc_rss(pid)
+        stack.extend(children.get(pid, []))
+    return total
+
+
+def measure_profile(build: Callable[[bool], object], url: str, ready_js: str,
+                    runs: int = 3, timeout: float = 60) -> dict:
+    """以 full / lean 各開 runs 次 url，回傳 {profile: {"ready_s": [...], "rss_mb": [...]}}。
+
+    build(lean) 建立一台 driver；ready_js 回傳真值即視為頁面就緒。"""
+    results = {}
+    for profile in PROFILES:
+        lean = profile == "lean"
+        ready_times: List[float] = []
+        rss: List[float] = []
+        for i in range(runs):
+            driver = build(lean)
+            try:
+                started = time.monotonic()
+                driver.get(url)
+                deadline = started + timeout
+                while time.monotonic() < deadline:
+                    try:
+                        if driver.execute_script(ready_js):
+                            break
+                    except Exception:  # noqa: BLE001 換頁中
+                        pass
+                    time.sleep(0.05)
+                ready_times.append(time.monotonic() - started)
+                mem = driver_rss(driver)
+                if mem is not None:
+                    rss.append(mem / (1024 * 1024))
+                _log(f"[measure] {profile} run {i + 1}: ready {ready_times[-1]:.2f}s"
+                     + (f", rss {rss[-1]:.0f} MB" if mem is not None else ""))
+            finally:
+                driver.quit()
+        results[profile] = {"ready_s": ready_times, "rss_mb": rss}
+    return results
+
+
+def _avg(values: List[float]) -> Optional[float]:
+    return sum(values) / len(values) if values else None
+
+
+def print_measurement(results: dict) -> None:
+    print(f"{'profile':<8} {'ready (avg s)':>14} {'rss (avg MB)':>14}")
+    for profile in PROFILES:
+        row = results.get(profile) or {}
+        ready, rss = _avg(row.get("ready_s", [])), _avg(row.get("rss_mb", []))
+        print(f"{profile:<8} {ready if ready is not None else float('nan'):>14.2f} "
+              f"{rss if rss is not None else float('nan'):>14.0f}")
+    full, lean = results.get("full", {}), results.get("lean", {})
+    if _avg(full.get("rss_mb", [])) and _avg(lean.get("rss_mb", [])):
+        saved = 1 - _avg(lean["rss_mb"]) / _avg(full["rss_mb"])
+        print(f"lean saves {saved * 100:.0f}% RSS per driver")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compare full vs lean Chrome profiles")
+    parser.add_argument("--measure", action="store_true",
+                        help="load the page with both profiles and compare ready time / RSS")
+    parser.add_argument("--url", default=None,
+                        help="page to load (default: yesterday's Jade room page)")
+    parser.add_argument("--ready-css", default=".ReactVirtualized__Table__row",
+                        help="CSS selector that marks the page as ready")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--headless", default="True")
+    ns = parser.parse_args(argv)
+    if not ns.measure:
+        parser.print_help()
+        return
+
+    from date_room_extractor import build_extractor_driver, get_base_domain
+
+    url = ns.url or (f"https://{get_base_domain('yonma')}/"
+                     f"{(datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')}/12")
+    headless = ns.headless == "True"
+    results = measure_profile(
+        lambda lean: build_extractor_driver(headless, lean=lean),
+        url,
+        f"return document.querySelector({json.dumps(ns.ready_css)}) !== null;",
+        runs=ns.runs,
+    )
+    print(f"url: {url}")
+    print_measurement(results)
+
+
+if __name__ == "__main__":
+    main()
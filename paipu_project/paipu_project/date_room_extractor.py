@@ -1,8 +1,6 @@
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.keys import Keys
 import re
 import time
@@ -18,6 +16,10 @@ import logging
 
 from datetime import datetime
 
+from network_capture import NetworkCapture, full_uuid_of, iter_records
+from page_waits import PageWaiter
+from browser_profile import add_lean_options, apply_lean
+
 # selenium 的 remote_connection logger 在 DEBUG 等級會把每個 WebDriver 指令（含整段注入 JS）
 # 印出來，形成 MB 級洪流灌爆 GUI 前端（拖垮主執行緒、取消鈕點不動）。提到 WARNING 止血。
 for _noisy_logger in ("selenium", "selenium.webdriver.remote.remote_connection", "urllib3"):
@@ -83,9 +85,195 @@ API_REQUEST_DELAY_MAX = 1.5  # 最大延迟
 CLICK_DELAY_MIN = 0.1        # 点击最小延迟
 CLICK_DELAY_MAX = 0.3        # 点击最大延迟
 
+def build_extractor_driver(headless=True, network_capture=False, lean=False):
+    """建立 extractor 用的 Chrome driver（反偵測 CDP 注入、headless 視窗尺寸）。
+
+    setup_driver 與 driver 池（driver_pool.DriverPool 的 factory）共用這份建法。
+    network_capture=True 時開啟 performance log（CDP Network 事件），供 capture 模式使用。
+    lean=True 時套用 browser_profile 的精簡設定（擋圖片/字型/分析腳本、關動畫），但保留本函式的
+    viewport：extractor 靠虛擬捲動找列，headless 1920x3000 一次渲染的列數較多。
+    """
+    chrome_options = Options()
+    if network_capture:
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+    # Basic headless mode setup
+    if headless:
+        chrome_options.add_argument("--headless=new")
+
+    # Core fix: Do not use user-data-dir, use other isolation methods
+
+    # Use random port to avoid debug port conflicts
+    import random
+    remote_port = random.randint(9222, 65535)
+    chrome_options.add_argument(f"--remote-debugging-port={remote_port}")
+
+    # Core stability parameters
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--disable-software-rasterizer")
+
+    # Disable various features that may cause conflicts
+    chrome_options.add_argument("--disable-extensions")
+    chrome_options.add_argument("--disable-background-networking")
+    chrome_options.add_argument("--disable-background-timer-throttling")
+    chrome_options.add_argument("--disable-backgrounding-occluded-windows")
+    chrome_options.add_argument("--disable-breakpad")
+    chrome_options.add_argument("--disable-component-extensions-with-background-pages")
+    chrome_options.add_argument("--disable-features=TranslateUI,BlinkGenPropertyTrees")
+    chrome_options.add_argument("--disable-ipc-flooding-protection")
+    chrome_options.add_argument("--disable-renderer-backgrounding")
+
+    # Browser behavior settings
+    chrome_options.add_argument("--no-first-run")
+    chrome_options.add_argument("--no-default-browser-check")
+    chrome_options.add_argument("--disable-popup-blocking")
+    chrome_options.add_argument("--disable-infobars")
+    chrome_options.add_argument("--disable-notifications")
+    chrome_options.add_argument("--ignore-certificate-errors")
+    # Set window size based on mode (lean keeps it: the tall viewport matters for virtual scrolling)
+    if headless:
+        chrome_options.add_argument("--window-size=1920,3000")
+    else:
+        # Smaller, more manageable size for visible mode
+        chrome_options.add_argument("--window-size=1280,800")
+    
+    # Force device scale factor
+    chrome_options.add_argument("--force-device-scale-factor=1")
+
+    # Prevent detection as automation tool
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation", "enable-logging"])
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+
+    # 額外反檢測參數（針對 Cloudflare/Vercel）
+    prefs = {
+        "credentials_enable_service": False,
+        "profile.password_manager_enabled": False,
+        "profile.default_content_setting_values.notifications": 2,
+        "webrtc.ip_handling_policy": "disable_non_proxied_udp",
+        "webrtc.multiple_routes_enabled": False,
+        "webrtc.nonproxied_udp_enabled": False
+    }
+    chrome_options.add_experimental_option("prefs", prefs)
+
+    # Performance optimization
+    chrome_options.add_argument("--disable-web-security")
+    chrome_options.add_argument("--allow-running-insecure-content")
+    chrome_options.add_argument("--disable-features=IsolateOrigins,site-per-process")
+
+    # Log settings - strongly suppress all logs
+    chrome_options.add_argument("--log-level=3")
+    chrome_options.add_argument("--silent")
+    chrome_options.add_argument("--disable-logging")
+    chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
+
+    # Set environment variables to suppress Chrome logs
+    import os as os_module
+    os_module.environ['WDM_LOG_LEVEL'] = '0'
+    os_module.environ['WDM_PRINT_FIRST_LINE'] = 'False'
+
+    # Set User-Agent（更新至最新版本）
+    chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36")
+
+    # Lean profile last, so its prefs merge into (not get replaced by) the prefs above
+    if lean:
+        add_lean_options(chrome_options, with_window_size=False)
+
+    driver = None
+    try:
+        driver = webdriver.Chrome(options=chrome_options)
+
+        # Set viewport size for headless mode (critical for virtual scrolling)
+        if headless:
+            driver.execute_cdp_cmd('Emulation.setDeviceMetricsOverride', {
+                'width': 1920,
+                'height': 3000,
+                'deviceScaleFactor': 1,
+                'mobile': False
+            })
+
+        # Enhanced anti-detection: Modify more browser features
+        driver.execute_cdp_cmd('Network.setUserAgentOverride', {
+            "userAgent": 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
+            "platform": "Win32"
+        })
+
+        # 繞過 Cloudflare/Vercel 檢測：注入更完整的 navigator 與 window 屬性
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
+            'source': '''
+                delete Object.getPrototypeOf(navigator).webdriver;
+
+                Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
+                Object.defineProperty(navigator, 'maxTouchPoints', {get: () => 0});
+                Object.defineProperty(navigator, 'vendor', {get: () => 'Google Inc.'});
+                Object.defineProperty(navigator, 'appVersion', {get: () => '5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36'});
+                Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]});
+                Object.defineProperty(navigator, 'languages', {get: () => ['zh-TW', 'zh', 'en-US', 'en']});
+                Object.defineProperty(navigator, 'platform', {get: () => 'Win32'});
+                Object.defineProperty(navigator, 'hardwareConcurrency', {get: () => 8});
+                Object.defineProperty(navigator, 'deviceMemory', {get: () => 8});
+
+                window.chrome = {runtime: {}, loadTimes: function() {}, csi: function() {}};
+
+                const originalQuery = window.navigator.permissions.query;
+                window.navigator.permissions.query = (parameters) => (
+                    parameters.name === 'notifications' ?
+                        Promise.resolve({ state: Notification.permission }) :
+                        originalQuery(parameters)
+                );
+
+                if (navigator.connection) {
+                    Object.defineProperty(navigator.connection, 'rtt', {get: () => 50});
+                }
+
+                const getParameter = WebGLRenderingContext.prototype.getParameter;
+                WebGLRenderingContext.prototype.getParameter = function(parameter) {
+                    if (parameter === 37445) return 'Intel Inc.';
+                    if (parameter === 37446) return 'Intel Iris OpenGL Engine';
+                    return getParameter.apply(this, [parameter]);
+                };
+
+                ['height', 'width'].forEach(property => {
+                    const imageDescriptor = Object.getOwnPropertyDescriptor(HTMLImageElement.prototype, property);
+                    Object.defineProperty(HTMLImageElement.prototype, property, {
+                        ...imageDescriptor,
+                        get: function() {
+                            if (this.complete && this.naturalHeight == 0) {
+                                return 20;
+                            }
+                            return imageDescriptor.get.apply(this);
+                        },
+                    });
+                });
+            '''
+        })
+
+
+
+        if lean:
+            # 在 stealth 注入之後套用；lean 只用 CDP 指令與獨立注入腳本，不動 navigator
+            apply_lean(driver, viewport=False)
+
+        import sys
+        print(f"Chrome driver started successfully (debug port: {remote_port})", file=sys.stderr)
+        print(f"Anti-detection measures applied", file=sys.stderr)
+    except Exception as e:
+        import sys
+        print(f"Error starting Chrome driver: {e}", file=sys.stderr)
+        import traceback
+        traceback.print_exc()
+        if driver is not None:
+            driver.quit()
+        raise
+    return driver
+
+
 class OptimizedPaipuExtractor:
 
-    def __init__(self, headless=True, fast_mode=False, player_mode=False, game_mode="yonma"):
+    def __init__(self, headless=True, fast_mode=False, player_mode=False, game_mode="yonma",
+                 driver_pool=None, capture_mode=False, on_paipu=None, lean=False):
         """
         Args:
             headless: 是否使用无头模式
@@ -96,6 +284,15 @@ class OptimizedPaipuExtractor:
                          每局會依序進入所有玩家頁面收集所有牌譜 ID
             game_mode: "yonma"（四麻，預設）或 "sanma"（三麻）。三麻改走 ikeda 網域與三麻
                        房間 mode_id；房間/玩家頁路由結構與四麻完全相同，僅網域與 mode 不同。
+            driver_pool: driver_pool.DriverPool（factory 用 build_extractor_driver）；給定時
+                         driver 由池借出/歸還，restart_driver 不再 quit + 冷啟動。
+            capture_mode: True 時不點擊/掃 DOM，改從 CDP 網路事件收割頁面自己抓的 JSON
+                          （見 network_capture 與 process_room_via_network_capture）。
+                          搭配 driver_pool 時，池的 factory 必須以 network_capture=True 建 driver。
+            on_paipu: 每收集到一筆牌譜 ID 時的回呼（同程序使用時取代讀 stdout，例如 spider 的
+                      多日 worker 池即時寫檔）；stdout 照常輸出。
+            lean: 以 browser_profile 的精簡設定建 driver（無 driver_pool 時才有作用；
+                  池的 factory 自行決定）。
         """
         self.headless = headless
         self.fast_mode = fast_mode
@@ -106,186 +303,56 @@ class OptimizedPaipuExtractor:
         # mode_id → 房間名（顯示用反查表，依 game_mode 取對應 mode 表，三麻才不會落到 'Unknown'）。
         self.room_rank_mapping = {v: k for k, v in self.room_mapping.items()}
         self.driver = None
+        self.driver_pool = driver_pool
+        self.capture_mode = capture_mode
+        self.on_paipu = on_paipu
+        self.lean = lean
+        self.network_capture = None
         self.temp_user_data_dir = None
         # 目標日期的 YYMMDD 前綴（如 "251110"），於 extract_from_rooms 設定；player 模式據此過濾牌譜
         self.date_prefix = None
+        # 事件驅動等待（取代固定 sleep）；各等待點耗時累計在 self.waits.stats
+        self.waits = PageWaiter(lambda: self.driver)
         self.setup_driver()
 
 
     def setup_driver(self):
-        chrome_options = Options()
-
-        # Basic headless mode setup
-        if self.headless:
-            chrome_options.add_argument("--headless=new")
-
-        # Core fix: Do not use user-data-dir, use other isolation methods
-
-        # Use random port to avoid debug port conflicts
-        import random
-        remote_port = random.randint(9222, 65535)
-        chrome_options.add_argument(f"--remote-debugging-port={remote_port}")
-
-        # Core stability parameters
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--disable-software-rasterizer")
-
-        # Disable various features that may cause conflicts
-        chrome_options.add_argument("--disable-extensions")
-        chrome_options.add_argument("--disable-background-networking")
-        chrome_options.add_argument("--disable-background-timer-throttling")
-        chrome_options.add_argument("--disable-backgrounding-occluded-windows")
-        chrome_options.add_argument("--disable-breakpad")
-        chrome_options.add_argument("--disable-component-extensions-with-background-pages")
-        chrome_options.add_argument("--disable-features=TranslateUI,BlinkGenPropertyTrees")
-        chrome_options.add_argument("--disable-ipc-flooding-protection")
-        chrome_options.add_argument("--disable-renderer-backgrounding")
-
-        # Browser behavior settings
-        chrome_options.add_argument("--no-first-run")
-        chrome_options.add_argument("--no-default-browser-check")
-        chrome_options.add_argument("--disable-popup-blocking")
-        chrome_options.add_argument("--disable-infobars")
-        chrome_options.add_argument("--disable-notifications")
-        chrome_options.add_argument("--ignore-certificate-errors")
-        # Set window size based on mode
-        if self.headless:
-            chrome_options.add_argument("--window-size=1920,3000")
-        else:
-            # Smaller, more manageable size for visible mode
-            chrome_options.add_argument("--window-size=1280,800")
-        
-        # Force device scale factor
-        chrome_options.add_argument("--force-device-scale-factor=1")
-
-        # Prevent detection as automation tool
-        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation", "enable-logging"])
-        chrome_options.add_experimental_option('useAutomationExtension', False)
-
-        # 額外反檢測參數（針對 Cloudflare/Vercel）
-        prefs = {
-            "credentials_enable_service": False,
-            "profile.password_manager_enabled": False,
-            "profile.default_content_setting_values.notifications": 2,
-            "webrtc.ip_handling_policy": "disable_non_proxied_udp",
-            "webrtc.multiple_routes_enabled": False,
-            "webrtc.nonproxied_udp_enabled": False
-        }
-        chrome_options.add_experimental_option("prefs", prefs)
-
-        # Performance optimization
-        chrome_options.add_argument("--disable-web-security")
-        chrome_options.add_argument("--allow-running-insecure-content")
-        chrome_options.add_argument("--disable-features=IsolateOrigins,site-per-process")
-
-        # Log settings - strongly suppress all logs
-        chrome_options.add_argument("--log-level=3")
-        chrome_options.add_argument("--silent")
-        chrome_options.add_argument("--disable-logging")
-        chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
-
-        # Set environment variables to suppress Chrome logs
-        import os as os_module
-        os_module.environ['WDM_LOG_LEVEL'] = '0'
-        os_module.environ['WDM_PRINT_FIRST_LINE'] = 'False'
-
-        # Set User-Agent（更新至最新版本）
-        chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36")
-
-        try:
-            self.driver = webdriver.Chrome(options=chrome_options)
-
-            # Set viewport size for headless mode (critical for virtual scrolling)
-            if self.headless:
-                self.driver.execute_cdp_cmd('Emulation.setDeviceMetricsOverride', {
-                    'width': 1920,
-                    'height': 3000,
-                    'deviceScaleFactor': 1,
-                    'mobile': False
-                })
-
-            # Enhanced anti-detection: Modify more browser features
-            self.driver.execute_cdp_cmd('Network.setUserAgentOverride', {
-                "userAgent": 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
-                "platform": "Win32"
-            })
-
-            # 繞過 Cloudflare/Vercel 檢測：注入更完整的 navigator 與 window 屬性
-            self.driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
-                'source': '''
-                    delete Object.getPrototypeOf(navigator).webdriver;
-
-                    Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
-                    Object.defineProperty(navigator, 'maxTouchPoints', {get: () => 0});
-                    Object.defineProperty(navigator, 'vendor', {get: () => 'Google Inc.'});
-                    Object.defineProperty(navigator, 'appVersion', {get: () => '5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36'});
-                    Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]});
-                    Object.defineProperty(navigator, 'languages', {get: () => ['zh-TW', 'zh', 'en-US', 'en']});
-                    Object.defineProperty(navigator, 'platform', {get: () => 'Win32'});
-                    Object.defineProperty(navigator, 'hardwareConcurrency', {get: () => 8});
-                    Object.defineProperty(navigator, 'deviceMemory', {get: () => 8});
-
-                    window.chrome = {runtime: {}, loadTimes: function() {}, csi: function() {}};
-
-                    const originalQuery = window.navigator.permissions.query;
-                    window.navigator.permissions.query = (parameters) => (
-                        parameters.name === 'notifications' ?
-                            Promise.resolve({ state: Notification.permission }) :
-                            originalQuery(parameters)
-                    );
-
-                    if (navigator.connection) {
-                        Object.defineProperty(navigator.connection, 'rtt', {get: () => 50});
-                    }
-
-                    const getParameter = WebGLRenderingContext.prototype.getParameter;
-                    WebGLRenderingContext.prototype.getParameter = function(parameter) {
-                        if (parameter === 37445) return 'Intel Inc.';
-                        if (parameter === 37446) return 'Intel Iris OpenGL Engine';
-                        return getParameter.apply(this, [parameter]);
-                    };
-
-                    ['height', 'width'].forEach(property => {
-                        const imageDescriptor = Object.getOwnPropertyDescriptor(HTMLImageElement.prototype, property);
-                        Object.defineProperty(HTMLImageElement.prototype, property, {
-                            ...imageDescriptor,
-                            get: function() {
-                                if (this.complete && this.naturalHeight == 0) {
-                                    return 20;
-                                }
-                                return imageDescriptor.get.apply(this);
-                            },
-                        });
-                    });
-                '''
-            })
-
-
-
-            import sys
-            print(f"Chrome driver started successfully (debug port: {remote_port})", file=sys.stderr)
-            print(f"Anti-detection measures applied", file=sys.stderr)
-        except Exception as e:
-            import sys
-            print(f"Error starting Chrome driver: {e}", file=sys.stderr)
-            import traceback
-            traceback.print_exc()
-            raise
+        self.network_capture = None  # 綁定舊 driver 的 capture 一併作廢
+        if self.driver_pool is not None:
+            # 池中的 driver 已預熱（同一份 build_extractor_driver 建法），借出即用
+            self.driver = self.driver_pool.acquire()
+            return
+        self.driver = build_extractor_driver(self.headless, network_capture=self.capture_mode,
+                                             lean=self.lean)
 
     def restart_driver(self):
         import sys
         print("Restarting Chrome driver...", file=sys.stderr)
+        if self.driver_pool is not None:
+            # 交回池丟棄（池在背景補新、其餘閒置者已預熱），不必 quit + sleep + 冷啟動
+            driver, self.driver = self.driver, None
+            if driver is not None:
+                self.driver_pool.retire(driver)
+            self.setup_driver()
+            return
+        service = getattr(self.driver, "service", None)
         try:
             if self.driver:
                 self.driver.quit()
         except:
             pass
-        time.sleep(2)
+        # 等 chromedriver 行程真的結束（而不是固定睡 2 秒）再冷啟動
+        process = getattr(service, "process", None)
+        if process is not None:
+            self.waits.until("driver_exit", lambda: process.poll() is not None, timeout=2)
         self.setup_driver()
 
+    def _emit(self, paipu_id):
+        """輸出一筆新牌譜 ID：印到 stdout（供子程序呼叫端逐行讀取）並通知 on_paipu。"""
+        print(paipu_id, flush=True)
+        if self.on_paipu is not None:
+            self.on_paipu(paipu_id)
+
     def is_valid_paipu_id(self, value):
         if not isinstance(value, str) or len(value) < 20:
             return False
@@ -375,27 +442,29 @@ class OptimizedPaipuExtractor:
         import sys
         try:
             print(f"  Waiting for table elements to appear (max wait {max_wait} seconds)...", file=sys.stderr)
-            WebDriverWait(self.driver, max_wait).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, ".ReactVirtualized__Table__rowColumn"))
-            )
+            if not self.waits.present("table_rows", ".ReactVirtualized__Table__rowColumn", max_wait):
+                raise TimeoutError(f"table rows did not appear within {max_wait}s")
             print(f"  Table elements appeared", file=sys.stderr)
 
             # Critical for headless mode: Wait for JavaScript to fully initialize
-            wait_time = 1.5 if self.fast_mode else 2
-            time.sleep(wait_time)
+            # (DOM quiet + no pending requests; upper bound = the old fixed wait)
+            self.waits.settled("table_init", 1.5 if self.fast_mode else 2, quiet=0.3)
 
             # Force trigger initial render in headless mode
             if self.headless:
                 print(f"  Headless mode: Triggering initial content render...", file=sys.stderr)
                 # Scroll down and back up to force virtual list to render
+                token = self.waits.mark()
                 self.driver.execute_script("window.scrollTo(0, 500);")
-                time.sleep(1)
+                self.waits.after_scroll("render_trigger", token, 1)
+                token = self.waits.mark()
                 self.driver.execute_script("window.scrollTo(0, 0);")
-                time.sleep(1)
+                self.waits.after_scroll("render_trigger", token, 1)
                 # Force scroll events
+                token = self.waits.mark()
                 self.driver.execute_script("window.dispatchEvent(new Event('scroll'));")
                 self.driver.execute_script("window.dispatchEvent(new Event('resize'));")
-                time.sleep(2)
+                self.waits.after_scroll("render_trigger", token, 2)
 
             # Check if there are game links
             game_links = self.driver.find_elements(By.XPATH, "//a[contains(@title, 'View game')]")
@@ -411,10 +480,11 @@ class OptimizedPaipuExtractor:
                 if self.headless:
                     print(f"  Headless mode: Attempting aggressive render trigger...", file=sys.stderr)
                     for i in range(3):
+                        token = self.waits.mark()
                         self.driver.execute_script(f"window.scrollTo(0, {(i+1)*300});")
-                        time.sleep(1)
+                        self.waits.after_scroll("render_trigger", token, 1)
                     self.driver.execute_script("window.scrollTo(0, 0);")
-                    time.sleep(2)
+                    self.waits.present("game_links", "a[title*='View game']", 2)
 
                     game_links = self.driver.find_elements(By.XPATH, "//a[contains(@title, 'View game')]")
                     print(f"  After aggressive render: Found {len(game_links)} game links", file=sys.stderr)
@@ -463,7 +533,8 @@ class OptimizedPaipuExtractor:
                     bubbles: true
                 }));
             """)
-            time.sleep(0.1)
+            if self.waits.gone("dialog_close", 'div[role="dialog"]', 0.1):
+                return
 
             # Method 2: Click backdrop (outside dialog)
             self.driver.execute_script("""
@@ -473,7 +544,8 @@ class OptimizedPaipuExtractor:
                     backdrop.click();
                 }
             """)
-            time.sleep(0.1)
+            if self.waits.gone("dialog_close", 'div[role="dialog"]', 0.1):
+                return
 
             # Method 3: Click close button if exists
             self.driver.execute_script("""
@@ -487,6 +559,7 @@ class OptimizedPaipuExtractor:
                     }
                 }
             """)
+            self.waits.gone("dialog_close", 'div[role="dialog"]', 0.3)
         except:
             # Fallback: go back
             try:
@@ -523,7 +596,7 @@ class OptimizedPaipuExtractor:
         """
         try:
             # 添加随机延迟，避免请求过快被拦截
-            time.sleep(random.uniform(API_REQUEST_DELAY_MIN, API_REQUEST_DELAY_MAX))
+            self.waits.pause("throttle_api", random.uniform(API_REQUEST_DELAY_MIN, API_REQUEST_DELAY_MAX))
 
             session = requests.Session()
             session.headers.update({
@@ -642,7 +715,7 @@ class OptimizedPaipuExtractor:
                 return None, session_id
 
             # 添加小延迟，避免点击过快
-            time.sleep(random.uniform(CLICK_DELAY_MIN, CLICK_DELAY_MAX))
+            self.waits.pause("throttle_click", random.uniform(CLICK_DELAY_MIN, CLICK_DELAY_MAX))
 
             # 保存當前頁面 URL 和滾動位置（日期房間頁面）
             original_url = self.driver.current_url
@@ -694,46 +767,32 @@ class OptimizedPaipuExtractor:
                     print(f"[X] 點擊失敗: {str(e)}", file=sys.stderr)
                     return None, session_id
 
-                # 等待彈窗出現
-                time.sleep(0.3)
+                # 等待彈窗出現且其中的 "Player details" 連結已渲染
                 print(f"[3] 等待彈窗出現...", file=sys.stderr)
-
-                # 在彈窗中找到 "Player details" 連結並點擊
                 player_details_link = None
-                wait_start = time.time()
-                max_wait = 1.0
-                attempt_count = 0
-
-                while time.time() - wait_start < max_wait:
-                    attempt_count += 1
-                    dialog_info = self.driver.execute_script("""
-                        var dialog = document.querySelector('div[role="dialog"]');
-                        if (dialog) {
-                            var links = dialog.querySelectorAll('a[href*="/player/"]');
-                            var linkTexts = [];
-                            for (var i = 0; i < links.length; i++) {
-                                linkTexts.push(links[i].textContent);
-                                if (links[i].textContent.indexOf('Player details') > -1) {
-                                    return {found: true, link: links[i], allLinks: linkTexts};
-                                }
-                            }
-                            return {found: false, link: null, allLinks: linkTexts};
+                dialog_info = self.waits.js("dialog_open", """
+                    var dialog = document.querySelector('div[role="dialog"]');
+                    if (!dialog) return null;
+                    var links = dialog.querySelectorAll('a[href*="/player/"]');
+                    var linkTexts = [];
+                    for (var i = 0; i < links.length; i++) {
+                        linkTexts.push(links[i].textContent);
+                    }
+                    for (var i = 0; i < links.length; i++) {
+                        if (links[i].textContent.indexOf('Player details') > -1) {
+                            return {link: links[i], allLinks: linkTexts};
                         }
-                        return {found: false, link: null, allLinks: []};
-                    """)
-
-                    if dialog_info and dialog_info.get('found'):
-                        player_details_link = dialog_info['link']
-                        print(f"    彈窗中找到連結: {dialog_info['allLinks']}", file=sys.stderr)
-                        break
-                    elif attempt_count == 1:
-                        print(f"    彈窗狀態: 找到 {len(dialog_info.get('allLinks', []))} 個連結", file=sys.stderr)
+                    }
+                    return null;
+                """, 1.3)
 
-                    time.sleep(0.05)
+                if dialog_info:
+                    player_details_link = dialog_info['link']
+                    print(f"    彈窗中找到連結: {dialog_info['allLinks']}", file=sys.stderr)
 
                 if not player_details_link:
                     # 如果沒找到 Player details 連結，關閉彈窗並返回
-                    print(f"[X] 未找到 Player details 連結（嘗試 {attempt_count} 次）", file=sys.stderr)
+                    print(f"[X] 未找到 Player details 連結（等待逾時）", file=sys.stderr)
                     self.close_dialog()
                     return None, session_id
 
@@ -764,35 +823,27 @@ class OptimizedPaipuExtractor:
                         print(f"[X] 頁面導航失敗: {str(e)}", file=sys.stderr)
                         return None, session_id
 
-                    # 等待頁面載入
-                    print(f"[6] 等待頁面載入...", file=sys.stderr)
-                    time.sleep(1.0)
                 else:
                     print(f"[X] 無法獲取玩家 URL", file=sys.stderr)
                     self.close_dialog()
                     return None, session_id
 
-                # 等待牌譜連結出現
+                # 等待牌譜連結出現（頁面載入完成的訊號，取代固定等待）
                 print(f"[7] 等待牌譜連結出現...", file=sys.stderr)
-                try:
-                    WebDriverWait(self.driver, 10).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "a[href*='paipu=']"))
-                    )
+                if self.waits.present("player_links", "a[href*='paipu=']", 10):
                     print(f"[8] 牌譜連結已出現", file=sys.stderr)
-                except Exception as e:
+                else:
                     # 如果沒有牌譜連結，返回原頁面並恢復滾動位置
-                    print(f"[X] 未找到牌譜連結: {str(e)}", file=sys.stderr)
-                    self.driver.get(original_url)
-                    time.sleep(1)
-                    self.driver.execute_script(f"window.scrollTo(0, {original_scroll_position});")
-                    time.sleep(0.3)
+                    print(f"[X] 未找到牌譜連結（10 秒內未出現）", file=sys.stderr)
+                    self._return_to_room_page(original_url, original_scroll_position)
                     return None, session_id
 
                 # 下滑頁面以載入更多牌譜
                 print(f"[9] 下滑頁面載入更多牌譜...", file=sys.stderr)
                 for _ in range(3):
+                    token = self.waits.mark()
                     self.driver.execute_script("window.scrollBy(0, 500);")
-                    time.sleep(0.3)
+                    self.waits.after_scroll("player_scroll", token, 0.3)
 
                 # 使用 JavaScript 計算牌譜連結數量（避免 stale element）
                 paipu_count = self.driver.execute_script("""
@@ -875,10 +926,7 @@ class OptimizedPaipuExtractor:
                     if clean_paipu_id and self.is_valid_paipu_id(clean_paipu_id):
                         print(f"[✓] 找到匹配的牌譜: {clean_paipu_id}", file=sys.stderr)
                         print(f"[12] 返回原頁面並恢復滾動位置...", file=sys.stderr)
-                        self.driver.get(original_url)
-                        time.sleep(1)
-                        self.driver.execute_script(f"window.scrollTo(0, {original_scroll_position});")
-                        time.sleep(0.3)
+                        self._return_to_room_page(original_url, original_scroll_position)
                         return clean_paipu_id, session_id
 
                 # 快速下滑以找出牌譜
@@ -888,9 +936,10 @@ class OptimizedPaipuExtractor:
                 wait = 0.15 if self.fast_mode else 0.25
 
                 for _ in range(max_scrolls):
+                    token = self.waits.mark()
                     self.driver.execute_script("window.scrollBy(0, arguments[0]);", step)
                     self.driver.execute_script("window.dispatchEvent(new Event('scroll'));")
-                    time.sleep(wait)
+                    self.waits.after_scroll("player_scroll", token, wait)
                     # 檢查所有欄位
                     matched_href = self.driver.execute_script("""
                         var candidates = arguments[0];
@@ -922,10 +971,7 @@ class OptimizedPaipuExtractor:
                         if clean_paipu_id and self.is_valid_paipu_id(clean_paipu_id):
                             print(f"[✓] 找到匹配的牌譜: {clean_paipu_id}", file=sys.stderr)
                             print(f"[12] 返回原頁面並恢復滾動位置...", file=sys.stderr)
-                            self.driver.get(original_url)
-                            time.sleep(1)
-                            self.driver.execute_script(f"window.scrollTo(0, {original_scroll_position});")
-                            time.sleep(0.3)
+                            self._return_to_room_page(original_url, original_scroll_position)
                             return clean_paipu_id, session_id
 
 
@@ -1030,20 +1076,14 @@ class OptimizedPaipuExtractor:
                             print(f"[✓] 找到匹配的牌譜: {clean_paipu_id}", file=sys.stderr)
                             print(f"    匹配資訊: 玩家={result['nameMatches']}, 時間={result['timeMatch']}", file=sys.stderr)
                             print(f"[12] 返回原頁面並恢復滾動位置...", file=sys.stderr)
-                            self.driver.get(original_url)
-                            time.sleep(1)
-                            self.driver.execute_script(f"window.scrollTo(0, {original_scroll_position});")
-                            time.sleep(0.3)
+                            self._return_to_room_page(original_url, original_scroll_position)
                             return clean_paipu_id, session_id
 
                 print(f"[X] 未找到匹配的牌譜", file=sys.stderr)
 
                 # 如果沒找到匹配的，返回原頁面並恢復滾動位置
                 print(f"[12] 返回原頁面並恢復滾動位置...", file=sys.stderr)
-                self.driver.get(original_url)
-                time.sleep(1)
-                self.driver.execute_script(f"window.scrollTo(0, {original_scroll_position});")
-                time.sleep(0.3)
+                self._return_to_room_page(original_url, original_scroll_position)
                 return None, session_id
 
             except Exception as e:
@@ -1052,10 +1092,7 @@ class OptimizedPaipuExtractor:
                 import traceback
                 traceback.print_exc(file=sys.stderr)
                 try:
-                    self.driver.get(original_url)
-                    time.sleep(1)
-                    self.driver.execute_script(f"window.scrollTo(0, {original_scroll_position});")
-                    time.sleep(0.3)
+                    self._return_to_room_page(original_url, original_scroll_position)
                 except:
                     pass
                 return None, session_id
@@ -1065,6 +1102,14 @@ class OptimizedPaipuExtractor:
             return None, None
 
 
+    def _return_to_room_page(self, original_url, scroll_position):
+        """回到日期房間頁並恢復捲動位置：等表格列出現、捲回原位後等列重繪完成。"""
+        self.driver.get(original_url)
+        self.waits.present("room_reload", ".ReactVirtualized__Table__row", 10)
+        token = self.waits.mark()
+        self.driver.execute_script(f"window.scrollTo(0, {scroll_position});")
+        self.waits.after_scroll("room_reload", token, 1)
+
     def collect_all_paipus_on_player_page(self, existing_ids=None, date_prefix=None, limit=None):
         """在當前玩家頁面向下捲動並收集所有 paipu= 連結的牌譜 ID。
 
@@ -1087,14 +1132,10 @@ class OptimizedPaipuExtractor:
 
         try:
             print(f"[PlayerMode] 等待玩家頁面 paipu 連結載入...", file=sys.stderr)
-            try:
-                WebDriverWait(self.driver, 20).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "a[href*='paipu=']"))
-                )
-            except Exception as e:
-                print(f"[PlayerMode] 等待 paipu 連結超時: {e}", file=sys.stderr)
+            if not self.waits.present("player_links", "a[href*='paipu=']", 20):
+                print(f"[PlayerMode] 等待 paipu 連結超時", file=sys.stderr)
 
-            time.sleep(1)
+            self.waits.settled("player_page_settle", 1, quiet=0.2)
 
             while True:
                 paipu_links = self.driver.find_elements(By.CSS_SELECTOR, "a[href*='paipu=']")
@@ -1129,7 +1170,7 @@ class OptimizedPaipuExtractor:
 
                     # 立即輸出到 stdout 供 Spider 即時讀取
                     print(f"[PlayerMode] 收集到牌譜 #{len(collected)}: {clean_paipu_id}", file=sys.stderr)
-                    print(clean_paipu_id, flush=True)
+                    self._emit(clean_paipu_id)
 
                     if limit is not None and len(collected) >= limit:
                         break
@@ -1145,8 +1186,9 @@ class OptimizedPaipuExtractor:
                 if at_bottom:
                     break
 
+                token = self.waits.mark()
                 self.driver.execute_script("window.scrollBy(0, 500);")
-                time.sleep(random.uniform(0.3, 0.8))
+                self.waits.after_scroll("player_scroll", token, 0.8)
 
             print(f"[PlayerMode] 玩家頁面共新增 {len(collected)} 個牌譜", file=sys.stderr)
 
@@ -1228,17 +1270,19 @@ class OptimizedPaipuExtractor:
                         print(f"[PlayerMode]   構建的 filtered_url: {filtered_url}", file=sys.stderr)
                         
                         self.driver.get(filtered_url)
-                        time.sleep(1.5)
-                        
-                        # Check for common error text
-                        error_check = self.driver.execute_script("""
-                            var bodyText = document.body.innerText;
-                            return bodyText.includes('Error loading data') || 
-                                   bodyText.includes('500 Internal Server Error') ||
-                                   bodyText.includes('An error occurred');
-                        """)
-                        
-                        if error_check:
+
+                        # 等到牌譜連結或錯誤訊息其中之一出現（取代固定等待後才檢查）
+                        page_state = self.waits.js("player_page_load", """
+                            var bodyText = document.body ? document.body.innerText : '';
+                            if (bodyText.includes('Error loading data') ||
+                                bodyText.includes('500 Internal Server Error') ||
+                                bodyText.includes('An error occurred')) {
+                                return 'error';
+                            }
+                            return document.querySelector("a[href*='paipu=']") ? 'ready' : null;
+                        """, 5)
+
+                        if page_state == 'error':
                             raise Exception("Page displayed error message")
                             
                         success = True
@@ -1250,7 +1294,6 @@ class OptimizedPaipuExtractor:
                         if retry < max_retries:
                             print(f"[PlayerMode] 嘗試重啟 Driver...", file=sys.stderr)
                             self.restart_driver()
-                            time.sleep(1)
                         else:
                             print(f"[PlayerMode] 放棄此玩家", file=sys.stderr)
 
@@ -1267,10 +1310,7 @@ class OptimizedPaipuExtractor:
             # 返回原日期房間頁面並恢復滾動位置
             try:
                 print(f"[PlayerMode] 返回日期房間頁面並恢復滾動位置...", file=sys.stderr)
-                self.driver.get(original_url)
-                time.sleep(1)
-                self.driver.execute_script(f"window.scrollTo(0, {original_scroll_position});")
-                time.sleep(0.3)
+                self._return_to_room_page(original_url, original_scroll_position)
             except Exception as e:
                 print(f"[PlayerMode] 返回日期房間頁面失敗: {e}", file=sys.stderr)
 
@@ -1305,8 +1345,8 @@ class OptimizedPaipuExtractor:
             # Additional wait for headless mode to ensure full initialization
             if self.headless:
                 wait_time = 1.5 if self.fast_mode else 3
-                print(f"  Headless mode: Extra initialization wait ({wait_time}s)...", file=sys.stderr)
-                time.sleep(wait_time)
+                print(f"  Headless mode: Waiting for page to settle (max {wait_time}s)...", file=sys.stderr)
+                self.waits.settled("headless_init", wait_time, quiet=0.3)
 
                 # # Debug: Save screenshot in headless mode to verify page loaded
                 # try:
@@ -1320,8 +1360,9 @@ class OptimizedPaipuExtractor:
             initial_page_height = self.driver.execute_script("return document.body.scrollHeight;")
             print(f"  Initial page height: {initial_page_height}px", file=sys.stderr)
 
+            token = self.waits.mark()
             self.driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(1)
+            self.waits.after_scroll("scroll_top", token, 1)
 
             print(f"Reset scroll position to top", file=sys.stderr)
 
@@ -1330,19 +1371,23 @@ class OptimizedPaipuExtractor:
                 if self.fast_mode:
                     # Fast mode: minimal warmup
                     print(f"  Fast mode: Quick warmup...", file=sys.stderr)
+                    token = self.waits.mark()
                     self.driver.execute_script("window.scrollTo(0, 600);")
                     self.driver.execute_script("window.dispatchEvent(new Event('scroll'));")
-                    time.sleep(0.5)
+                    self.waits.after_scroll("warmup", token, 0.5)
+                    token = self.waits.mark()
                     self.driver.execute_script("window.scrollTo(0, 0);")
-                    time.sleep(0.5)
+                    self.waits.after_scroll("warmup", token, 0.5)
                 else:
                     print(f"  Headless mode: Warming up virtual scroll...", file=sys.stderr)
                     for warmup in range(3):
+                        token = self.waits.mark()
                         self.driver.execute_script(f"window.scrollTo(0, {(warmup+1)*400});")
                         self.driver.execute_script("window.dispatchEvent(new Event('scroll'));")
-                        time.sleep(0.8)
+                        self.waits.after_scroll("warmup", token, 0.8)
+                    token = self.waits.mark()
                     self.driver.execute_script("window.scrollTo(0, 0);")
-                    time.sleep(1)
+                    self.waits.after_scroll("warmup", token, 1)
                     print(f"  Warm-up complete", file=sys.stderr)
 
             scroll_position = 0
@@ -1437,7 +1482,7 @@ class OptimizedPaipuExtractor:
                             processed_any = True
                             print(f"  Successfully extracted paipu #{len(extracted_paipus)}: {paipu_id}", file=sys.stderr)
                             # 立即輸出到 stdout 供 PaipuSpider 即時讀取
-                            print(paipu_id, flush=True)
+                            self._emit(paipu_id)
                         elif session_id:
                             processed_session_ids.add(session_id)
                             processed_any = True
@@ -1463,7 +1508,8 @@ class OptimizedPaipuExtractor:
                 if current_position + viewport_height >= page_height - 50:
                     # Verify we're really at bottom by checking if new scroll attempts don't move
                     old_height = page_height
-                    time.sleep(0.5)
+                    self.waits.js("bottom_check",
+                                  "return document.body.scrollHeight != arguments[0];", 0.5, old_height)
                     new_height = self.driver.execute_script("return document.body.scrollHeight;")
                     new_position = self.driver.execute_script("return window.pageYOffset;")
 
@@ -1490,18 +1536,15 @@ class OptimizedPaipuExtractor:
                     if scroll_count % 50 == 0 and old_scroll_pos != scroll_position:
                         print(f"  Adjusted scroll position: {old_scroll_pos} -> {scroll_position} (page height: {current_page_height})", file=sys.stderr)
 
+                token = self.waits.mark()
                 self.driver.execute_script(f"window.scrollTo(0, {scroll_position});")
 
                 # Force trigger page re-render (important for virtual scrolling)
                 self.driver.execute_script("window.dispatchEvent(new Event('scroll'));")
 
                 # Wait for content to load - critical for virtual scrolling!
-                if self.fast_mode:
-                    time.sleep(0.5)  # Fast: must wait enough for processing (NOT just rendering)
-                elif self.headless:
-                    time.sleep(0.8)  # Headless: more wait
-                else:
-                    time.sleep(0.5)  # Normal
+                # Rows re-rendered + DOM quiet; the old per-mode sleep is the upper bound.
+                self.waits.after_scroll("scroll", token, 0.8 if (self.headless and not self.fast_mode) else 0.5)
 
                 # Check if scroll actually moved
                 new_position = self.driver.execute_script("return window.pageYOffset;")
@@ -1519,8 +1562,9 @@ class OptimizedPaipuExtractor:
 
                 # Scroll to bottom first
                 page_height = self.driver.execute_script("return document.body.scrollHeight;")
+                token = self.waits.mark()
                 self.driver.execute_script(f"window.scrollTo(0, {page_height});")
-                time.sleep(2)
+                self.waits.after_scroll("reverse_scroll", token, 2)
 
                 reverse_found = 0
                 # Adjust reverse scan based on mode
@@ -1575,7 +1619,7 @@ class OptimizedPaipuExtractor:
                                 reverse_found += 1
                                 print(f"  Reverse scan found paipu #{len(extracted_paipus)}: {paipu_id}", file=sys.stderr)
                                 # 立即輸出到 stdout
-                                print(paipu_id, flush=True)
+                                self._emit(paipu_id)
                             elif session_id:
                                 processed_session_ids.add(session_id)
 
@@ -1588,9 +1632,10 @@ class OptimizedPaipuExtractor:
                     reverse_position += reverse_step
                     if reverse_position < 0:
                         reverse_position = 0
+                    token = self.waits.mark()
                     self.driver.execute_script(f"window.scrollTo(0, {reverse_position});")
                     self.driver.execute_script("window.dispatchEvent(new Event('scroll'));")
-                    time.sleep(reverse_wait)
+                    self.waits.after_scroll("reverse_scroll", token, reverse_wait)
 
                 print(f"Reverse scan completed: found {reverse_found} additional paipus", file=sys.stderr)
                 print(f"{'-'*60}\n", file=sys.stderr)
@@ -1611,8 +1656,9 @@ class OptimizedPaipuExtractor:
                 if sweep_pass > 0:
                     print(f"  Starting sweep pass {sweep_pass + 1}/{num_sweeps}...", file=sys.stderr)
 
+                token = self.waits.mark()
                 self.driver.execute_script("window.scrollTo(0, 0);")
-                time.sleep(1.5 if self.headless else 1)
+                self.waits.after_scroll("sweep_scroll", token, 1.5 if self.headless else 1)
 
                 final_sweep_scroll = 0
                 # Adjust sweep step based on mode
@@ -1671,7 +1717,7 @@ class OptimizedPaipuExtractor:
                                 final_sweep_found += 1
                                 print(f"  Final sweep pass {sweep_pass + 1} found paipu #{len(extracted_paipus)}: {paipu_id}", file=sys.stderr)
                                 # 立即輸出到 stdout
-                                print(paipu_id, flush=True)
+                                self._emit(paipu_id)
                             elif session_id:
                                 processed_session_ids.add(session_id)
 
@@ -1681,7 +1727,8 @@ class OptimizedPaipuExtractor:
                     page_h = self.driver.execute_script("return document.body.scrollHeight;")
                     if current_pos + viewport_h >= page_h - 50:
                         # Verify we're really at bottom
-                        time.sleep(0.3)
+                        self.waits.js("bottom_check",
+                                      "return document.body.scrollHeight != arguments[0];", 0.3, page_h)
                         new_page_h = self.driver.execute_script("return document.body.scrollHeight;")
                         if abs(new_page_h - page_h) < 100:
                             print(f"  Final sweep reached bottom", file=sys.stderr)
@@ -1689,16 +1736,12 @@ class OptimizedPaipuExtractor:
                         # If page height changed significantly, continue scanning
 
                     final_sweep_scroll += final_sweep_step
+                    token = self.waits.mark()
                     self.driver.execute_script(f"window.scrollTo(0, {final_sweep_scroll});")
                     # Trigger scroll event explicitly
                     self.driver.execute_script("window.dispatchEvent(new Event('scroll'));")
-                    # Adjust wait time based on mode
-                    if self.fast_mode:
-                        time.sleep(0.3)  # Fast: adequate wait for processing
-                    elif self.headless:
-                        time.sleep(0.5)
-                    else:
-                        time.sleep(0.3)
+                    # Adjust wait bound based on mode
+                    self.waits.after_scroll("sweep_scroll", token, 0.5 if (self.headless and not self.fast_mode) else 0.3)
 
                 total_final_found += final_sweep_found
                 print(f"  Sweep pass {sweep_pass + 1} completed: found {final_sweep_found} additional paipus", file=sys.stderr)
@@ -1711,6 +1754,7 @@ class OptimizedPaipuExtractor:
             print(f"Collected {len(extracted_paipus)} paipus", file=sys.stderr)
             print(f"Processed {len(processed_session_ids)} games", file=sys.stderr)
             print(f"Total scrolls: {scroll_count}", file=sys.stderr)
+            print(f"Time spent waiting (cumulative): {self.waits.total():.1f}s", file=sys.stderr)
             print(f"{'='*60}\n", file=sys.stderr)
 
             return extracted_paipus
@@ -1722,6 +1766,138 @@ class OptimizedPaipuExtractor:
             print(f"Collected {len(extracted_paipus)} paipus before error", file=sys.stderr)
             return extracted_paipus
 
+    # ── capture 模式：收割頁面自己抓的 API JSON，取代點擊/DOM 掃描 ─────────────────
+    def _api_pl(self):
+        return "pl3" if self.game_mode == "sanma" else "pl4"
+
+    def _page_fetch_json(self, url, timeout=20):
+        """在頁面內以 fetch 取 JSON（與 SPA 同源同 cookie；回應同樣經過網路事件）。"""
+        self.driver.set_script_timeout(timeout)
+        result = self.driver.execute_async_script("""
+            var done = arguments[arguments.length - 1];
+            fetch(arguments[0], {credentials: 'omit'})
+                .then(function (r) { return r.ok ? r.json() : null; })
+                .then(function (j) { done(j); })
+                .catch(function () { done(null); });
+        """, url)
+        return result
+
+    def _player_records_in_page(self, account_id, room_number, win_start, win_end):
+        url = (f"https://5-data.amae-koromo.com/api/v2/{self._api_pl()}/player_records/"
+               f"{account_id}/{win_end}/{win_start}?limit=100&mode={room_number}&descending=true")
+        try:
+            return list(iter_records(self._page_fetch_json(url)))
+        except Exception as e:
+            print(f"  player_records fetch failed for {account_id}: {e}", file=sys.stderr)
+            return []
+
+    def _trigger_more_rows(self):
+        """捲動虛擬表格與視窗到底，觸發頁面載入下一批資料（只負責觸發，不等待）。"""
+        try:
+            self.driver.execute_script("""
+                var grids = document.querySelectorAll('.ReactVirtualized__Grid');
+                for (var i = 0; i < grids.length; i++) { grids[i].scrollTop = grids[i].scrollHeight; }
+                window.scrollTo(0, document.body.scrollHeight);
+            """)
+        except Exception:
+            pass
+
+    def process_room_via_network_capture(self, room_info, max_paipus=5):
+        """capture 模式的單一房間處理：
+
+        1. 開房間頁，房間對局清單（games 端點）的回應一到就收下；捲到底觸發下一批，
+           直到一段時間內沒有新的清單回應（以回應抵達判定完成，而非固定 sleep）。
+        2. 清單中的 uuid 若未遮蔽直接採用；遮蔽者用該局玩家的 player_records（同樣在頁面
+           內 fetch）以 startTime 還原。player 模式則收下各玩家當日的全部完整 UUID。
+        """
+        if self.network_capture is None:
+            self.network_capture = NetworkCapture(self.driver)
+        capture = self.network_capture
+        room_number = room_info['room_number']
+        extracted = []
+        seen = set()
+
+        try:
+            day = datetime.strptime(room_info['date'], "%Y-%m-%d")
+            win_start = int(time.mktime(day.timetuple()))
+            win_end = win_start + 86400
+        except (KeyError, ValueError):
+            win_start, win_end = 0, int(time.time())
+
+        def emit(paipu_id):
+            if paipu_id in seen or len(extracted) >= max_paipus:
+                return
+            # 與 DOM 路徑一致，日期前綴只過濾 player 模式（玩家頁跨日）；房間清單本身就是當日
+            # 時間窗，跨午夜開局或時區差會讓 uuid 前綴與當日不符，不能據此丟棄。
+            if self.player_mode and self.date_prefix and not paipu_id.startswith(self.date_prefix):
+                return
+            seen.add(paipu_id)
+            extracted.append(paipu_id)
+            self._emit(paipu_id)
+
+        capture.drain()
+        print(f"\n[capture] {room_info['rank']} {room_info['date']}: {room_info['url']}", file=sys.stderr)
+        started = time.monotonic()
+        self.driver.get(room_info['url'])
+
+        games = {}
+        is_games = lambda r: "/games/" in r.url
+        timeout = 30
+        while True:
+            got = capture.wait_for(is_games, timeout=timeout)
+            if not got:
+                break
+            before = len(games)
+            for resp in got:
+                for rec in iter_records(resp.data):
+                    key = rec.get("uuid") or (rec.get("startTime"), rec.get("modeId"))
+                    games[key] = rec
+            print(f"  [capture] game list responses: +{len(games) - before} games "
+                  f"(total {len(games)})", file=sys.stderr)
+            self._trigger_more_rows()
+            timeout = 3 if self.fast_mode else 5   # 後續批次：這段時間內沒新回應即視為載完
+
+        cache = {}   # startTime -> full uuid
+        resolved_players = set()
+        for rec in games.values():
+            if len(extracted) >= max_paipus:
+                break
+            full = full_uuid_of(rec)
+            if full and not self.player_mode:
+                emit(full)
+                continue
+            st = rec.get("startTime")
+            for p in rec.get("players", []):
+                acc = p.get("accountId")
+                if not acc or (not self.player_mode and st in cache):
+                    continue
+                if acc in resolved_players:
+                    continue
+                resolved_players.add(acc)
+                for prec in self._player_records_in_page(acc, room_number, win_start, win_end):
+                    u = full_uuid_of(prec)
+                    if not u:
+                        continue
+                    if prec.get("startTime") is not None:
+                        cache.setdefault(prec["startTime"], u)
+                    if self.player_mode:
+                        emit(u)
+                if not self.player_mode and st in cache:
+                    break
+            if not self.player_mode:
+                if st in cache:
+                    emit(cache[st])
+                elif full:
+                    emit(full)
+                else:
+                    print(f"  [capture] unresolved game start={st}", file=sys.stderr)
+
+        elapsed = time.monotonic() - started
+        rate = len(extracted) / elapsed * 60 if elapsed > 0 else 0
+        print(f"[capture] {room_info['rank']}: {len(extracted)} paipus from {len(games)} games "
+              f"in {elapsed:.1f}s ({rate:.0f}/min, {capture.responses} API responses)", file=sys.stderr)
+        return extracted
+
     def extract_from_rooms(self, target_date, target_ranks=None, max_paipus=5):
         if target_ranks is None:
             target_ranks = ["Jade"]
@@ -1745,7 +1921,10 @@ class OptimizedPaipuExtractor:
                     break
 
                 remaining_slots = max_paipus - len(all_paipus)
-                room_paipus = self.process_room_with_continuous_scroll(room_info, remaining_slots)
+                if self.capture_mode:
+                    room_paipus = self.process_room_via_network_capture(room_info, remaining_slots)
+                else:
+                    room_paipus = self.process_room_with_continuous_scroll(room_info, remaining_slots)
 
                 for paipu in room_paipus:
                     if paipu not in all_paipus:
@@ -1756,7 +1935,15 @@ class OptimizedPaipuExtractor:
         except:
             return all_paipus
 
+        finally:
+            # 各等待點的累計耗時（哪裡在等、等多久、逾時幾次）
+            self.waits.report(f"{target_date} ({len(all_paipus)} paipus)")
+
     def close(self):
+        if self.driver and self.driver_pool is not None:
+            self.driver_pool.release(self.driver)
+            self.driver = None
+            return
         if self.driver:
             try:
                 self.driver.quit()
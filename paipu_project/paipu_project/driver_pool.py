@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""driver_pool —— 可重用的 Chrome WebDriver 池（Selenium 各收集模式共用）。
+
+為什麼要池化
+------------
+舊流程每處理一位玩家就 create_stealth_driver() + driver.quit()，extractor 的
+restart_driver() 也是「quit -> sleep(2) -> 冷啟動」。Chrome 冷啟動加上反偵測注入每次要
+數秒，玩家一多這就是主要成本。DriverPool 讓 driver 長駐、逐任務借出：
+
+- 預熱：warm() 在背景把池補滿，第一個任務不必等冷啟動。
+- 健康檢查：歸還時（或任務中拋例外時）以一次極輕的 execute_script 確認 driver 仍活著，
+  死掉（Chrome 崩潰、session 失效）就丟棄並在背景補一台新的。
+- 回收：同一台 driver 借出達 max_uses 次即換新（長時間執行的 Chrome 記憶體只增不減）。
+- 並行：size 台 driver 可同時被不同執行緒借用（逐玩家並行）。
+
+driver 的建法由呼叫端提供的 factory 決定（spider 的 create_stealth_driver、extractor 的
+build_extractor_driver），本模組不依賴 selenium。
+"""
+from __future__ import annotations
+
+import contextlib
+import queue
+import sys
+import threading
+from typing import Callable, Optional
+
+
+def _log(msg: str) -> None:
+    print(msg, file=sys.stderr, flush=True)
+
+
+class DriverPool:
+    """size 台長駐 driver 的借還池。acquire()/release() 或 `with pool.driver() as d:`。"""
+
+    def __init__(self, factory: Callable[[], object], size: int = 1, max_uses: int = 50,
+                 name: str = "chrome") -> None:
+        self._factory = factory
+        self.size = max(1, int(size))
+        self.max_uses = max(1, int(max_uses))
+        self.name = name
+        self._idle: "queue.Queue" = queue.Queue()
+        self._uses: dict = {}          # id(driver) -> 已借出次數
+        self._live = 0                 # 已建立（含建立中、借出中、閒置）的 driver 數
+        self._lock = threading.Lock()
+        self._closed = False
+        self.created = 0
+        self.recycled = 0
+        self.crashed = 0
+
+    # ── 建立 / 丟棄 ───────────────────────────────────────────────────────────
+    def _spawn(self, raise_errors: bool = False) -> None:
+        """建立一台 driver 放入閒置佇列；失敗則釋出名額。背景補位失敗只記 log（下次
+        acquire 會在呼叫端執行緒再試，那時的失敗才往上拋）。"""
+        try:
+            drv = self._factory()
+        except Exception as exc:  # noqa: BLE001 Chrome 起不來
+            _log(f"[pool:{self.name}] 建立 driver 失敗：{exc}")
+            with self._lock:
+                self._live -= 1
+            if raise_errors:
+                raise
+            self._idle.put(None)   # 喚醒等待中的 acquire，讓它重新判斷要不要自己建
+            return
+        if isinstance(drv, tuple):  # create_stealth_driver 回 (driver, port)
+            drv = drv[0]
+        with self._lock:
+            self.created += 1
+            self._uses[id(drv)] = 0
+            closed = self._closed
+            if closed:
+                self._live -= 1
+        if closed:   # 建好時池已關：直接關掉，並喚醒等它的 acquire（會看到已關閉而拋錯）
+            self._quit(drv)
+            self._idle.put(None)
+            return
+        self._idle.put(drv)
+
+    def _reserve(self) -> bool:
+        with self._lock:
+            if self._closed or self._live >= self.size:
+                return False
+            self._live += 1
+            return True
+
+    def _quit(self, drv) -> None:
+        self._uses.pop(id(drv), None)
+        try:
+            drv.quit()
+        except Exception:  # noqa: BLE001 已崩潰的 driver quit 也會拋，無所謂
+            pass
+
+    def _discard(self, drv) -> None:
+        self._quit(drv)
+        with self._lock:
+            self._live -= 1
+            closed = self._closed
+        if not closed:   # 關閉中：借出的 driver 陸續歸還被丟棄，不再補新的
+            self.refill()
+
+    def refill(self) -> None:
+        """在背景把池補滿到 size（丟棄/回收後自動呼叫）。"""
+        while self._reserve():
+            threading.Thread(target=self._spawn, daemon=True).start()
+
+    warm = refill  # 預熱：啟動時先在背景把 driver 建好
+
+    # ── 借還 ─────────────────────────────────────────────────────────────────
+    @staticmethod
+    def healthy(drv) -> bool:
+        """driver 是否還能用（Chrome 崩潰/視窗被關/session 失效都會在這裡拋例外）。"""
+        try:
+            return drv.execute_script("return 1") == 1
+        except Exception:  # noqa: BLE001
+            return False
+
+    def acquire(self, timeout: Optional[float] = None):
+        """借出一台健康的 driver（必要時就地建立）；timeout 內拿不到則 raise TimeoutError。"""
+        while True:
+            if self._closed:
+                raise RuntimeError("driver pool 已關閉")
+            try:
+                drv = self._idle.get_nowait()
+            except queue.Empty:
+                if self._reserve():
+                    self._spawn(raise_errors=True)   # 池未滿：就地建立（呼叫端本來就得等）
+                    continue
+                try:
+                    drv = self._idle.get(timeout=timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"driver pool 在 {timeout}s 內沒有可用的 driver")
+            if drv is None:
+                continue
+            if not self.healthy(drv):
+                self.crashed += 1
+                _log(f"[pool:{self.name}] 閒置 driver 已失效，換新")
+                self._discard(drv)
+                continue
+            self._uses[id(drv)] = self._uses.get(id(drv), 0) + 1
+            return drv
+
+    def release(self, drv, broken: bool = False) -> None:
+        """歸還 driver。broken=True（任務中拋例外）時先做健康檢查，死了就丟棄；
+        借出次數達 max_uses 則回收換新；其餘清成空白頁放回池中。"""
+        if self._closed:
+            self._discard(drv)
+            return
+        if broken and not self.healthy(drv):
+            self.crashed += 1
+            _log(f"[pool:{self.name}] driver 已崩潰，丟棄並補新")
+            self._discard(drv)
+            return
+        if self._uses.get(id(drv), 0) >= self.max_uses:
+            self.recycled += 1
+            self._discard(drv)
+            return
+        try:
+            drv.get("about:blank")   # 釋放上一頁的 DOM/JS 記憶體，也確保下個任務從乾淨狀態開始
+        except Exception:  # noqa: BLE001
+            self.crashed += 1
+            self._discard(drv)
+            return
+        self._idle.put(drv)
+
+    def retire(self, drv) -> None:
+        """不論健康與否都丟棄這台（呼叫端判定它卡住了），背景補一台新的。"""
+        self.recycled += 1
+        self._discard(drv)
+
+    @contextlib.contextmanager
+    def driver(self, timeout: Optional[float] = None):
+        drv = self.acquire(timeout)
+        broken = False
+        try:
+            yield drv
+        except BaseException:
+            broken = True
+            raise
+        finally:
+            self.release(drv, broken=broken)
+
+    def close(self) -> None:
+        """關閉池與所有閒置 driver（借出中的會在歸還時被關閉）。可重複呼叫，只有第一次有效。
+        每個名額放一個 None 進閒置佇列，卡在 acquire() 等待的執行緒醒來後看到已關閉即拋錯。"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        while True:
+            try:
+                drv = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if drv is not None:
+                self._quit(drv)
+                with self._lock:
+                    self._live -= 1
+        for _ in range(self.size):
+            self._idle.put(None)
+        _log(f"[pool:{self.name}] 關閉：建立 {self.created} 台，回收 {self.recycled} 次，"
+             f"崩潰替換 {self.crashed} 次")
@@ -7,6 +7,12 @@ import scrapy
 
 
 class PaipuProjectItem(scrapy.Item):
-    # define the fields for your item here like:
-    # name = scrapy.Field()
-    pass
+    """One collected paipu UUID on its way to PaipuProjectPipeline."""
+
+    paipu_id = scrapy.Field()
+    # crawler_mode that produced it (auto / manual / date_room / date_room_player / date_room_api)
+    source = scrapy.Field()
+    # where it came from: player page URL, room/date, ... (free-form, manifest DB only)
+    context = scrapy.Field()
+    # unix time the collector saw it
+    found_at = scrapy.Field()
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""network_capture —— 從 Chrome 的網路事件直接收割 amae-koromo 前端自己抓的 JSON。
+
+為什麼
+------
+DOM 抓取路線（點 ReactVirtualized 表格的列 -> 等對話框 -> 找 5-data 連結）每局要好幾次
+固定 sleep，完整模式只有每分鐘 30~40 筆。但頁面渲染表格用的資料，本來就是它自己向
+``*-data.amae-koromo.com/api/v2/...`` 抓回的 JSON（對局清單、玩家紀錄）。開啟 Chrome 的
+performance log（CDP Network 事件）後，即可在回應抵達時用 ``Network.getResponseBody``
+直接讀出原始 JSON——點擊/捲動只用來「觸發載入」，完成與否看回應有沒有到，而不是睡多久。
+
+用法：driver 需以 ``goog:loggingPrefs = {"performance": "ALL"}`` 建立
+（build_extractor_driver(network_capture=True)）。
+"""
+from __future__ import annotations
+
+import json
+import re
+import sys
+import time
+from typing import Callable, Iterator, List, Optional
+
+# 只收 amae-koromo 資料端點（各鏡像網域不同，路徑一致）。
+_API_URL = re.compile(r"^https://[\w.-]*amae-koromo\.com/api/v2/")
+FULL_UUID = re.compile(
+    r"\d{6}-[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+)
+
+
+def _log(msg: str) -> None:
+    print(msg, file=sys.stderr, flush=True)
+
+
+class CapturedResponse:
+    __slots__ = ("url", "status", "data")
+
+    def __init__(self, url: str, status: int, data) -> None:
+        self.url = url
+        self.status = status
+        self.data = data
+
+
+class NetworkCapture:
+    """讀 driver 的 performance log，把完成載入的 amae-koromo API 回應解析成 JSON。
+
+    Network.responseReceived 記下 requestId -> (url, status)；等到該請求的
+    Network.loadingFinished 才取 body（之前取會拿到不完整內容或失敗）。
+    """
+
+    def __init__(self, driver, url_filter=_API_URL) -> None:
+        self.driver = driver
+        self._filter = url_filter
+        self._pending: dict = {}
+        self.responses = 0
+        self.bytes = 0
+        try:
+            # 放大 Network 緩衝，避免長清單回應在取 body 前被 Chrome 丟掉
+            driver.execute_cdp_cmd("Network.enable", {
+                "maxTotalBufferSize": 64 * 1024 * 1024,
+                "maxResourceBufferSize": 16 * 1024 * 1024,
+            })
+        except Exception as exc:  # noqa: BLE001 仍可用預設緩衝
+            _log(f"[capture] Network.enable 失敗（使用預設緩衝）：{exc}")
+
+    def _events(self) -> Iterator[dict]:
+        try:
+            entries = self.driver.get_log("performance")
+        except Exception as exc:  # noqa: BLE001 driver 未開 performance log
+            raise RuntimeError(f"performance log 不可用（需 goog:loggingPrefs）：{exc}")
+        for entry in entries:
+            try:
+                yield json.loads(entry["message"])["message"]
+            except (KeyError, ValueError, TypeError):
+                continue
+
+    def poll(self) -> List[CapturedResponse]:
+        """處理目前累積的網路事件，回傳這段期間完成載入的 API 回應（已解析 JSON）。"""
+        out: List[CapturedResponse] = []
+        for msg in self._events():
+            method = msg.get("method")
+            params = msg.get("params") or {}
+            if method == "Network.responseReceived":
+                resp = params.get("response") or {}
+                url = resp.get("url") or ""
+                if self._filter.search(url):
+                    self._pending[params.get("requestId")] = (url, int(resp.get("status") or 0))
+            elif method == "Network.loadingFinished":
+                meta = self._pending.pop(params.get("requestId"), None)
+                if meta is None:
+                    continue
+                url, status = meta
+                try:
+                    body = self.driver.execute_cdp_cmd(
+                        "Network.getResponseBody", {"requestId": params.get("requestId")})
+                    text = body.get("body") or ""
+                    data = json.loads(text)
+                except Exception as exc:  # noqa: BLE001 body 已被回收/非 JSON：略過這筆
+                    _log(f"[capture] 讀取回應失敗 {url}: {exc}")
+                    continue
+                self.responses += 1
+                self.bytes += len(text)
+                out.append(CapturedResponse(url, status, data))
+            elif method == "Network.loadingFailed":
+                self._pending.pop(params.get("requestId"), None)
+        return out
+
+    def drain(self) -> None:
+        """丟棄目前累積的事件（切換頁面前呼叫，避免把上一頁的回應算進來）。"""
+        self.poll()
+        self._pending.clear()
+
+    def wait_for(self, predicate: Callable[[CapturedResponse], bool], timeout: float,
+                 interval: float = 0.1) -> List[CapturedResponse]:
+        """等到至少一筆符合 predicate 的回應抵達（或逾時），回傳期間收到的符合者。
+
+        完成訊號是「回應到了」：資料一到即返回，不必猜要睡多久；逾時回空清單。"""
+        deadline = time.monotonic() + timeout
+        matched: List[CapturedResponse] = []
+        while True:
+            matched.extend(r for r in self.poll() if predicate(r))
+            if matched or time.monotonic() >= deadline:
+                return matched
+            time.sleep(interval)
+
+
+def iter_records(data) -> Iterator[dict]:
+    """API 回應中的對局紀錄（games / player_records 都是 list；部分端點包在 data 裡）。"""
+    if isinstance(data, dict):
+        data = data.get("data") or data.get("list") or []
+    if isinstance(data, list):
+        for rec in data:
+            if isinstance(rec, dict):
+                yield rec
+
+
+def full_uuid_of(rec: dict) -> Optional[str]:
+    """紀錄中的完整（未遮蔽）UUID；遮蔽短碼回 None。"""
+    for key in ("uuid", "_id"):
+        val = rec.get(key)
+        if isinstance(val, str) and FULL_UUID.fullmatch(val):
+            return val
+    return None
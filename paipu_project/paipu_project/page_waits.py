@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""page_waits —— 事件驅動的頁面等待（取代 extractor 中依模式調好的固定 time.sleep）。
+
+為什麼
+------
+OptimizedPaipuExtractor 原本在捲動、點擊、換頁後各睡固定秒數（headless / fast / 一般
+模式各一組數字），資料早到也照睡、晚到則漏抓。PageWaiter 在頁面注入一個
+MutationObserver 與 fetch/XHR 進行中計數器，提供「等到某件事發生」的原語：
+
+- changed(token)：自 mark() 取得 token 以來 DOM 有變動（捲動後虛擬表格列已重繪）。
+- settled(quiet)：DOM 已靜止 quiet 秒且沒有進行中的請求（渲染/載入完成）。
+- after_scroll(token)：上面兩者的組合，捲動後使用。
+- present / gone / js：CSS 選擇器出現/消失、任意 JS 條件成立（對話框、連結）。
+- pause：刻意的節流延遲（反爬蟲間隔），不是在等事件，但一樣計時。
+
+每個原語都有 timeout（取原本的固定秒數為上限，最壞情況與舊行為相同），且每次等待
+的耗時依 label 累計，report() 列出時間花在哪裡。注入的腳本在每次查詢時自動補裝，
+換頁（window 重建）後不需另外處理。
+"""
+from __future__ import annotations
+
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# 每次查詢都帶上：window 上沒有狀態（首次或換頁後）就安裝觀察器與請求計數器。
+_STATE_JS = """
+var s = window.__pwState;
+if (!s) {
+    s = window.__pwState = {
+        id: Math.random().toString(36).slice(2), mut: 0, last: performance.now(), inflight: 0
+    };
+    new MutationObserver(function (recs) { s.mut += recs.length; s.last = performance.now(); })
+        .observe(document.documentElement, {childList: true, subtree: true, characterData: true});
+    var done = function () { s.inflight = Math.max(0, s.inflight - 1); s.last = performance.now(); };
+    if (window.fetch) {
+        var origFetch = window.fetch;
+        window.fetch = function () {
+            s.inflight++;
+            return origFetch.apply(this, arguments).finally(done);
+        };
+    }
+    var origSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        s.inflight++;
+        this.addEventListener('loadend', done);
+        return origSend.apply(this, arguments);
+    };
+}
+return {id: s.id, mut: s.mut, quiet: performance.now() - s.last, inflight: s.inflight};
+"""
+
+Token = Tuple[Optional[str], int]
+
+
+class PageWaiter:
+    """綁定一個 driver 來源（extractor 重啟 driver 後仍有效）的等待原語與耗時統計。"""
+
+    def __init__(self, get_driver: Callable[[], Any], interval: float = 0.05) -> None:
+        self._get_driver = get_driver
+        self.interval = interval
+        # label -> [次數, 總秒數, 最長秒數, 逾時次數]
+        self.stats: Dict[str, List[float]] = {}
+
+    # ── 內部 ─────────────────────────────────────────────────────────────────
+    def _state(self) -> Optional[dict]:
+        try:
+            return self._get_driver().execute_script(_STATE_JS)
+        except Exception:  # noqa: BLE001 換頁中/driver 忙：視為尚未就緒
+            return None
+
+    def _poll(self, predicate: Callable[[], Any], deadline: float) -> Any:
+        while True:
+            try:
+                value = predicate()
+            except Exception:  # noqa: BLE001 stale element / 換頁中：下一輪再試
+                value = None
+            if value or time.monotonic() >= deadline:
+                return value
+            time.sleep(self.interval)
+
+    def _record(self, label: str, started: float, ok: bool) -> None:
+        elapsed = time.monotonic() - started
+        row = self.stats.setdefault(label, [0, 0.0, 0.0, 0])
+        row[0] += 1
+        row[1] += elapsed
+        row[2] = max(row[2], elapsed)
+        if not ok:
+            row[3] += 1
+
+    def _changed_since(self, token: Token) -> bool:
+        st = self._state()
+        return bool(st) and (st["id"] != token[0] or st["mut"] > token[1])
+
+    def _is_settled(self, quiet: float) -> bool:
+        st = self._state()
+        return bool(st) and st["inflight"] == 0 and st["quiet"] >= quiet * 1000
+
+    # ── 原語 ─────────────────────────────────────────────────────────────────
+    def mark(self) -> Token:
+        """目前的 DOM 變動計數；傳給 changed/after_scroll 作為「從這之後」的基準。"""
+        st = self._state() or {}
+        return st.get("id"), int(st.get("mut") or 0)
+
+    def until(self, label: str, predicate: Callable[[], Any], timeout: float) -> Any:
+        """等到 predicate() 為真值（回傳該值）或逾時（回傳最後一次的假值）。"""
+        started = time.monotonic()
+        value = self._poll(predicate, started + timeout)
+        self._record(label, started, bool(value))
+        return value
+
+    def js(self, label: str, script: str, timeout: float, *args) -> Any:
+        """等到頁面中 script（以 return 回傳）為真值。"""
+        return self.until(label, lambda: self._get_driver().execute_script(script, *args), timeout)
+
+    def present(self, label: str, css: str, timeout: float) -> bool:
+        return bool(self.js(label, "return document.querySelector(arguments[0]) !== null;",
+                            timeout, css))
+
+    def gone(self, label: str, css: str, timeout: float) -> bool:
+        return bool(self.js(label, "return document.querySelector(arguments[0]) === null;",
+                            timeout, css))
+
+    def changed(self, label: str, token: Token, timeout: float) -> bool:
+        return bool(self.until(label, lambda: self._changed_since(token), timeout))
+
+    def settled(self, label: str, timeout: float, quiet: float = 0.15) -> bool:
+        """等到 DOM 靜止 quiet 秒且沒有進行中的 fetch/XHR（網路閒置）。"""
+        return bool(self.until(label, lambda: self._is_settled(quiet), timeout))
+
+    def after_scroll(self, label: str, token: Token, timeout: float, quiet: float = 0.1) -> bool:
+        """捲動後：先等列重繪（DOM 自 token 起有變動），再等靜止；兩段共用 timeout。"""
+        started = time.monotonic()
+        deadline = started + timeout
+        ok = bool(self._poll(lambda: self._changed_since(token), deadline))
+        if ok:
+            ok = bool(self._poll(lambda: self._is_settled(quiet), deadline))
+        self._record(label, started, ok)
+        return ok
+
+    def pause(self, label: str, seconds: float) -> None:
+        """刻意的節流延遲（不是在等頁面）；照樣計入統計，看得出節流佔了多少時間。"""
+        started = time.monotonic()
+        time.sleep(seconds)
+        self._record(label, started, True)
+
+    # ── 統計 ─────────────────────────────────────────────────────────────────
+    def total(self) -> float:
+        return sum(row[1] for row in self.stats.values())
+
+    def report(self, title: str = "wait stats", file=None) -> None:
+        """依總耗時排序列出各等待點：次數、總秒數、平均、最長、逾時次數。"""
+        if not self.stats:
+            return
+        out = file or sys.stderr
+        print(f"[waits] {title}: total {self.total():.1f}s", file=out)
+        for label, (count, total, longest, timeouts) in sorted(
+                self.stats.items(), key=lambda kv: kv[1][1], reverse=True):
+            print(f"  {label:<22} n={int(count):<5} total={total:7.1f}s "
+                  f"avg={total / count:5.2f}s max={longest:5.2f}s timeouts={int(timeouts)}",
+                  file=out)
+
+    def reset(self) -> None:
+        self.stats.clear()
@@ -1,13 +1,276 @@
-# Define your item pipelines here
-#
-# Don't forget to add your pipeline to the ITEM_PIPELINES setting
-# See: https://docs.scrapy.org/en/latest/topics/item-pipeline.html
+# -*- coding: utf-8 -*-
+"""pipelines —— 牌譜 UUID 的輸出階段：去重、批次寫入、定期 fsync、多 sink 分流。
 
+為什麼
+------
+各收集路徑（date_room_api、Selenium 玩家頁、extractor worker 池、player_records API）
+原本各自 ``output_file.write(uuid + "\\n"); output_file.flush()`` 逐筆寫檔，並各自維護
+seen 集合。PaipuProjectPipeline 把這件事收斂成一個 Scrapy item pipeline：
 
-# useful for handling different item types with a single interface
-from itemadapter import ItemAdapter
+- 去重：本次執行的集合＋輸出檔既有內容＋（選用）跨輸出檔的持久索引檔。
+- 批次：累積 PAIPU_BATCH_SIZE 筆或距上次寫入 PAIPU_FLUSH_INTERVAL 秒即寫出（背景執行緒
+  兜底，最後一筆不會卡在緩衝區）；每 PAIPU_FSYNC_INTERVAL 秒 fsync 一次，而非逐筆。
+- 分流：sinks 依序收到同一批 UUID——文字輸出檔（text，必有）、索引檔（index）、
+  manifest SQLite（manifest）。live 下載佇列不另開回呼：爬蟲跑在子行程，GUI 的 run_pipeline
+  追讀文字輸出檔（OutputTail），輸出檔就是即時 sink。
 
+收集端與 pipeline 的接法
+------------------------
+spider 的收集流程在單一 callback 內同步執行（含多執行緒 worker），無法把 item 逐筆 yield
+回 Scrapy 引擎；故 pipeline 在 open_spider 時把自己掛到 ``spider.item_pipeline``，收集端
+拿到的 ``output_file`` 換成 :class:`PipelineWriter`——介面同檔案（write/flush），每行
+UUID 轉成 PaipuProjectItem 交給 process_item。既有收集函式不需修改即走 pipeline。
+Scrapy 引擎若真的收到 callback yield 的 item，也走同一個 process_item。
 
+GUI 進度：凍結模式輪詢輸出檔、pipeline 模式追讀輸出檔，兩者只多了至多
+PAIPU_FLUSH_INTERVAL 秒的延遲；dev 模式解析 stdout，不受影響。
+"""
+from __future__ import annotations
+
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from typing import Iterable, List, Optional
+
+from scrapy.exceptions import DropItem
+
+from .items import PaipuProjectItem
+
+_UUID_RE = re.compile(r"[0-9]{6}-[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+
+
+def _log(msg: str) -> None:
+    print(msg, file=sys.stderr, flush=True)
+
+
+def _read_ids(path: Optional[str]) -> set:
+    ids: set = set()
+    if not path:
+        return ids
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                m = _UUID_RE.search(line)
+                if m:
+                    ids.add(m.group(0))
+    except FileNotFoundError:
+        pass
+    return ids
+
+
+# ── sinks ────────────────────────────────────────────────────────────────────
+class TextFileSink:
+    """一行一個 UUID 的 append 檔（spider 的 output_filename、或持久索引檔）。"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._f = open(path, "a", encoding="utf-8")
+
+    def write_batch(self, items: List[dict]) -> None:
+        self._f.write("".join(it["paipu_id"] + "\n" for it in items))
+        self._f.flush()
+
+    def sync(self) -> None:
+        try:
+            os.fsync(self._f.fileno())
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        self.sync()
+        self._f.close()
+
+
+class ManifestSink:
+    """SQLite manifest：uuid（主鍵）、來源模式、上下文、發現時間。"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS paipu ("
+            " uuid TEXT PRIMARY KEY, source TEXT, context TEXT, found_at REAL)"
+        )
+        self._db.commit()
+
+    def known_ids(self) -> set:
+        return {row[0] for row in self._db.execute("SELECT uuid FROM paipu")}
+
+    def write_batch(self, items: List[dict]) -> None:
+        self._db.executemany(
+            "INSERT OR IGNORE INTO paipu (uuid, source, context, found_at) VALUES (?, ?, ?, ?)",
+            [(it["paipu_id"], it.get("source"), it.get("context"), it.get("found_at"))
+             for it in items],
+        )
+        self._db.commit()
+
+    def sync(self) -> None:
+        pass  # commit 即落盤
+
+    def close(self) -> None:
+        self._db.close()
+
+
+# ── pipeline ─────────────────────────────────────────────────────────────────
 class PaipuProjectPipeline:
-    def process_item(self, item, spider):
+    """見模組說明。設定（settings.py）：PAIPU_BATCH_SIZE、PAIPU_FLUSH_INTERVAL、
+    PAIPU_FSYNC_INTERVAL、PAIPU_INDEX_FILE、PAIPU_MANIFEST_DB；啟用哪些 sink 由
+    crawler_config 的 output_sinks 決定（預設只有 text）。"""
+
+    def __init__(self, batch_size: int = 50, flush_interval: float = 1.0,
+                 fsync_interval: float = 10.0, index_file: str = "paipu_index.txt",
+                 manifest_db: str = "paipu_manifest.sqlite3") -> None:
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = float(flush_interval)
+        self.fsync_interval = float(fsync_interval)
+        self.index_file = index_file
+        self.manifest_db = manifest_db
+        self.seen: set = set()
+        self.sinks: list = []
+        self._buffer: List[dict] = []
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._last_flush = time.monotonic()
+        self._last_sync = time.monotonic()
+        self.accepted = 0
+        self.dropped = 0
+        self.batches = 0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        s = crawler.settings
+        return cls(
+            batch_size=s.getint("PAIPU_BATCH_SIZE", 50),
+            flush_interval=s.getfloat("PAIPU_FLUSH_INTERVAL", 1.0),
+            fsync_interval=s.getfloat("PAIPU_FSYNC_INTERVAL", 10.0),
+            index_file=s.get("PAIPU_INDEX_FILE", "paipu_index.txt"),
+            manifest_db=s.get("PAIPU_MANIFEST_DB", "paipu_manifest.sqlite3"),
+        )
+
+    # ── 生命週期 ─────────────────────────────────────────────────────────────
+    def open(self, output_path: str, sinks: Iterable[str] = ("text",),
+             known_ids: Optional[Iterable[str]] = None) -> None:
+        """開啟各 sink 並載入去重索引：輸出檔既有內容一律讀入，known_ids（例如 spider 已處理
+        過的 UUID）再併進來。"""
+        names = list(dict.fromkeys(["text", *sinks]))  # text 一定在，且排第一
+        self.seen = _read_ids(output_path)
+        if known_ids:
+            self.seen |= set(known_ids)
+        for name in names:
+            if name == "text":
+                self.sinks.append(TextFileSink(output_path))
+            elif name == "index":
+                self.seen |= _read_ids(self.index_file)
+                self.sinks.append(TextFileSink(self.index_file))
+            elif name == "manifest":
+                sink = ManifestSink(self.manifest_db)
+                self.seen |= sink.known_ids()
+                self.sinks.append(sink)
+            else:
+                raise ValueError(f"Unknown output sink: {name}. Valid options: ['text', 'index', 'manifest']")
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+        _log(f"[pipeline] sinks={names} known={len(self.seen)} batch={self.batch_size} "
+             f"flush={self.flush_interval}s fsync={self.fsync_interval}s")
+
+    def open_spider(self, spider) -> None:
+        config = getattr(spider, "config", None)
+        output_path = getattr(config, "output_filename", None) or "tonpuulist.txt"
+        self.open(output_path,
+                  sinks=getattr(config, "output_sinks", None) or ("text",),
+                  known_ids=getattr(spider, "processed_paipu_ids", None))
+        spider.item_pipeline = self
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=2)
+        with self._lock:
+            self.flush(force_sync=True)
+            for sink in self.sinks:
+                try:
+                    sink.close()
+                except Exception as exc:  # noqa: BLE001
+                    _log(f"[pipeline] 關閉 sink 失敗：{exc}")
+            self.sinks = []
+        _log(f"[pipeline] 寫入 {self.accepted} 筆（{self.batches} 批），略過重複 {self.dropped} 筆")
+
+    def close_spider(self, spider) -> None:  # noqa: ARG002 - Scrapy hook signature
+        self.close()
+
+    # ── 寫入 ─────────────────────────────────────────────────────────────────
+    def emit(self, paipu_id: str, source: Optional[str] = None,
+             context: Optional[str] = None) -> bool:
+        """收下一筆 UUID；重複則回 False。執行緒安全。"""
+        with self._lock:
+            if paipu_id in self.seen:
+                self.dropped += 1
+                return False
+            self.seen.add(paipu_id)
+            self.accepted += 1
+            self._buffer.append({"paipu_id": paipu_id, "source": source,
+                                 "context": context, "found_at": time.time()})
+            if len(self._buffer) >= self.batch_size:
+                self.flush()
+        return True
+
+    def process_item(self, item, spider):  # noqa: ARG002 - Scrapy hook signature
+        paipu_id = item.get("paipu_id")
+        if not paipu_id or not _UUID_RE.fullmatch(paipu_id):
+            raise DropItem(f"invalid paipu id: {paipu_id!r}")
+        if not self.emit(paipu_id, item.get("source"), item.get("context")):
+            raise DropItem(f"duplicate paipu id: {paipu_id}")
         return item
+
+    def flush(self, force_sync: bool = False) -> None:
+        """把緩衝區寫到每個 sink；距上次 fsync 超過 PAIPU_FSYNC_INTERVAL（或 force_sync）則 fsync。"""
+        with self._lock:
+            if self._buffer:
+                batch, self._buffer = self._buffer, []
+                for sink in self.sinks:
+                    sink.write_batch(batch)
+                self.batches += 1
+            self._last_flush = time.monotonic()
+            if force_sync or time.monotonic() - self._last_sync >= self.fsync_interval:
+                for sink in self.sinks:
+                    sink.sync()
+                self._last_sync = time.monotonic()
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as exc:  # noqa: BLE001 寫檔失敗留待下一輪/close 再試
+                _log(f"[pipeline] flush 失敗：{exc}")
+
+
+class PipelineWriter:
+    """給收集函式的 output_file 替身：write() 的每行 UUID 轉成 PaipuProjectItem 交給
+    pipeline，flush() 由 pipeline 的批次策略接手（此處不逐筆落盤）。"""
+
+    def __init__(self, pipeline: PaipuProjectPipeline, spider=None, source: Optional[str] = None) -> None:
+        self.pipeline = pipeline
+        self.spider = spider
+        self.source = source
+
+    def write(self, text: str) -> int:
+        for m in _UUID_RE.finditer(text):
+            item = PaipuProjectItem(paipu_id=m.group(0), source=self.source, found_at=time.time())
+            try:
+                self.pipeline.process_item(item, self.spider)
+            except DropItem:
+                pass
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.pipeline.flush()
@@ -62,9 +62,18 @@ ROBOTSTXT_OBEY = False
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
-#ITEM_PIPELINES = {
-#    "paipu_project.pipelines.PaipuProjectPipeline": 300,
-#}
+ITEM_PIPELINES = {
+    "paipu_project.pipelines.PaipuProjectPipeline": 300,
+}
+
+# UUID output pipeline: write in batches of PAIPU_BATCH_SIZE or every PAIPU_FLUSH_INTERVAL
+# seconds, fsync every PAIPU_FSYNC_INTERVAL seconds. Index / manifest paths are used only when
+# crawler_config.json lists "index" / "manifest" in output_sinks.
+PAIPU_BATCH_SIZE = 50
+PAIPU_FLUSH_INTERVAL = 1.0
+PAIPU_FSYNC_INTERVAL = 10.0
+PAIPU_INDEX_FILE = "paipu_index.txt"
+PAIPU_MANIFEST_DB = "paipu_manifest.sqlite3"
 
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
@@ -18,6 +18,9 @@ import signal
 import random
 import traceback
 import logging
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
 
 # selenium 的 remote_connection logger 在 DEBUG 等級會把「每一個」WebDriver 指令（含整段
 # getAttribute 注入 JS，單筆數 KB）印出來。scrapy 預設 LOG_LEVEL=DEBUG，會讓它噴出 MB 級
@@ -31,9 +34,29 @@ for _noisy_logger in ("selenium", "selenium.webdriver.remote.remote_connection",
 # 套件 paipu_project.spiders 載入本檔，故相對匯入為主；直接執行 PaipuSpider.py（CWD=spiders）
 # 時退回絕對匯入。
 try:
-    from .akoromo_api import collect_room_paipus
+    from .akoromo_api import collect_players_paipus, collect_room_paipus, get_top_player_ids
 except ImportError:  # pragma: no cover - 直接執行 / CWD=spiders 後備
-    from akoromo_api import collect_room_paipus
+    from akoromo_api import collect_players_paipus, collect_room_paipus, get_top_player_ids
+
+# Selenium 玩家頁的 driver 池（與 date_room_extractor 共用）；位於 inner package 根目錄。
+try:
+    from ..driver_pool import DriverPool
+except ImportError:  # pragma: no cover - 直接執行 / CWD=spiders 後備
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from driver_pool import DriverPool
+
+# lean Chrome profile (blocked images/fonts/analytics, no animations, small viewport)
+try:
+    from ..browser_profile import add_lean_options, apply_lean, is_lean
+except ImportError:  # pragma: no cover - 直接執行 / CWD=spiders 後備
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from browser_profile import add_lean_options, apply_lean, is_lean
+
+# UUID output goes through the item pipeline (dedupe, batched writes, sinks) when it is enabled
+try:
+    from ..pipelines import PipelineWriter
+except ImportError:  # pragma: no cover - 直接執行 / CWD=spiders 後備
+    PipelineWriter = None
 
 @dataclass
 class CrawlerConfig:
@@ -77,6 +100,35 @@ class CrawlerConfig:
     # Save verification screenshots
     save_screenshots: bool = True
 
+    # manual/auto mode: how the leaderboard and player pages are collected. "api" reads the
+    # amae-koromo ranking / player_records endpoints directly (no browser; whatever the API
+    # cannot serve falls back to Chrome), "browser" keeps the original Selenium scrapers.
+    player_source: str = "api"
+
+    # manual/auto mode with player_source="api": number of players fetched concurrently
+    api_concurrency: int = 4
+
+    # Selenium player pages: number of long-lived Chrome drivers (= players processed in parallel)
+    browser_pool_size: int = 1
+
+    # Selenium player pages: recycle a pooled driver after this many player pages
+    browser_max_pages: int = 50
+
+    # date_room / date_room_player: harvest the JSON the page itself fetches (CDP network
+    # events) instead of clicking rows and scraping the DOM
+    network_capture: bool = False
+
+    # date_room / date_room_player: number of days processed in parallel (one Chrome each)
+    date_room_workers: int = 1
+
+    # Selenium modes: "full" loads the whole SPA, "lean" blocks images / fonts / media /
+    # analytics, disables animations and uses a smaller viewport (much lower RSS per Chrome)
+    browser_profile: str = "full"
+
+    # Extra outputs besides the text file: "index" (cross-run UUID index file, also used for
+    # dedupe) and/or "manifest" (SQLite with source + timestamp). See pipelines.py
+    output_sinks: List[str] = None
+
     @classmethod
     def from_json(cls, json_path: str):
         """Load configuration from JSON file"""
@@ -137,6 +189,19 @@ class CrawlerConfig:
         if self.game_mode not in ("yonma", "sanma"):
             raise ValueError(f"Invalid game_mode: {self.game_mode}. Valid options: ['yonma', 'sanma']")
 
+        if self.player_source not in ("api", "browser"):
+            raise ValueError(f"Invalid player_source: {self.player_source}. Valid options: ['api', 'browser']")
+
+        if self.browser_profile not in ("full", "lean"):
+            raise ValueError(f"Invalid browser_profile: {self.browser_profile}. Valid options: ['full', 'lean']")
+
+        for sink in (self.output_sinks or []):
+            if sink not in ("text", "index", "manifest"):
+                raise ValueError(f"Invalid output sink: {sink}. Valid options: ['text', 'index', 'manifest']")
+
+        if int(self.date_room_workers) < 1:
+            raise ValueError(f"date_room_workers must be at least 1 (got {self.date_room_workers})")
+
         # Validate corresponding parameters based on mode
         if self.crawler_mode == "manual":
             if not self.manual_player_urls or len(self.manual_player_urls) == 0:
@@ -244,10 +309,12 @@ def apply_stealth_js(driver):
     except Exception as e:
         print(f"Error applying anti-detection measures: {e}")
 
-def create_stealth_driver(headless_mode: bool, extra_args: List[str] = None):
+def create_stealth_driver(headless_mode: bool, extra_args: List[str] = None, lean: bool = False):
     """Build a Chrome WebDriver with stability flags, log suppression and anti-detection applied.
 
     Returns (driver, remote_port). extra_args are appended verbatim (e.g. window size).
+    lean applies the browser_profile lean settings; an explicit --window-size in extra_args wins
+    over the lean viewport.
     """
     chrome_options = Options()
 
@@ -279,6 +346,10 @@ def create_stealth_driver(headless_mode: bool, extra_args: List[str] = None):
     for arg in (extra_args or []):
         chrome_options.add_argument(arg)
 
+    sized = any(arg.startswith("--window-size") for arg in (extra_args or []))
+    if lean:
+        add_lean_options(chrome_options, with_window_size=not sized)
+
     # Prevent detection as automation tool
     chrome_options.add_argument("--disable-blink-features=AutomationControlled")
     chrome_options.add_experimental_option("excludeSwitches", ["enable-automation", "enable-logging"])
@@ -295,6 +366,8 @@ def create_stealth_driver(headless_mode: bool, extra_args: List[str] = None):
 
     driver = webdriver.Chrome(options=chrome_options)
     apply_stealth_js(driver)  # Apply anti-detection
+    if lean:
+        apply_lean(driver, viewport=not sized)  # after stealth; touches no navigator props
     return driver, remote_port
 
 # game_mode → amae-koromo 前端網域（四麻=預設站；三麻=ikeda 站，後端走 pl3）。
@@ -337,7 +410,7 @@ def get_period_display_name(period: str) -> str:
     }
     return period_mapping.get(period, period)
 
-def execute_date_room_extractor_py(target_date: str, target_room: str, headless_mode: bool = True, fast_mode: bool = False, output_file=None, player_mode: bool = False, game_mode: str = "yonma") -> List[str]:
+def execute_date_room_extractor_py(target_date: str, target_room: str, headless_mode: bool = True, fast_mode: bool = False, output_file=None, player_mode: bool = False, game_mode: str = "yonma", network_capture: bool = False, lean: bool = False) -> List[str]:
     """
     Execute date_room_extractor.py and get the output paipu ID list
 
@@ -347,6 +420,8 @@ def execute_date_room_extractor_py(target_date: str, target_room: str, headless_
         headless_mode: Whether to use headless mode
         fast_mode: Whether to use fast mode (faster but may miss 5-10% data)
         player_mode: True 表示啟用逐玩家頁面模式（date_room_player）
+        network_capture: Read the page's own API responses via CDP instead of scraping the DOM
+        lean: Use the lean browser profile (see browser_profile)
 
     Returns:
         List of paipu IDs
@@ -368,7 +443,7 @@ def main():
 
     target_ranks = convert_ranks_to_english(target_ranks)
 
-    extractor = OptimizedPaipuExtractor(headless=headless_mode, fast_mode=fast_mode, player_mode={player_mode}, game_mode=game_mode)
+    extractor = OptimizedPaipuExtractor(headless=headless_mode, fast_mode=fast_mode, player_mode={player_mode}, game_mode=game_mode, capture_mode={network_capture}, lean={lean})
 
     try:
         results = extractor.extract_from_rooms(
@@ -392,7 +467,9 @@ if __name__ == "__main__":
         headless_mode=str(headless_mode),
         fast_mode=str(fast_mode),
         player_mode=str(player_mode),
-        game_mode=game_mode
+        game_mode=game_mode,
+        network_capture=str(network_capture),
+        lean=str(lean)
     )
 
     # 凍結 (PyInstaller) 模式下，sys.executable 是 backend.exe 而非 python，且沒有
@@ -409,6 +486,8 @@ if __name__ == "__main__":
             '--fast', str(fast_mode),
             '--player-mode', str(player_mode),
             '--game-mode', str(game_mode),
+            '--capture', str(network_capture),
+            '--lean', str(lean),
         ]
     else:
         # Create temporary file
@@ -477,8 +556,252 @@ if __name__ == "__main__":
                 pass
 
 
+def import_date_room_extractor():
+    """Import date_room_extractor in-process.
+
+    It lives at the inner package root and imports its sibling helpers (network_capture,
+    page_waits) as top-level modules, so that directory has to be on sys.path.
+    """
+    try:
+        import date_room_extractor
+    except ImportError:
+        inner = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        if inner not in sys.path:
+            sys.path.insert(0, inner)
+        import date_room_extractor
+    return date_room_extractor
+
+
+def _load_date_room_progress(progress_file: str, config: CrawlerConfig) -> set:
+    """Dates already finished by an earlier run of the same date_room_player task.
+
+    Older progress files only carry last_processed_date (every day up to it is done);
+    the worker pool also records completed_dates, since days finish out of order.
+    """
+    done = set()
+    if not os.path.exists(progress_file):
+        return done
+    try:
+        with open(progress_file, 'r', encoding='utf-8') as f:
+            progress = json.load(f)
+        if progress.get('mode') != 'date_room_player' or \
+           progress.get('target_room') != config.target_room or \
+           progress.get('end_date') != config.end_date:
+            return done
+        done.update(progress.get('completed_dates') or [])
+        last_date_str = progress.get('last_processed_date')
+        if last_date_str:
+            day = datetime.strptime(config.start_date, "%Y-%m-%d")
+            last_date = datetime.strptime(last_date_str, "%Y-%m-%d")
+            while day <= last_date:
+                done.add(day.strftime("%Y-%m-%d"))
+                day += timedelta(days=1)
+    except Exception as e:
+        print(f"Error reading progress file: {e}")
+    return done
+
+
+def collect_paipus_by_date_room_pool(config: CrawlerConfig, output_file=None, player_mode: bool = False,
+                                     extractor_module=None) -> List[str]:
+    """In-process date_room collection: date_room_workers threads, each with its own Chrome.
+
+    Days are queued as (date, room) tasks. Every worker runs OptimizedPaipuExtractor directly
+    (no temp script / subprocess per day), borrowing a long-lived driver from a shared
+    DriverPool. Dedupe and the output file are shared under one lock, and in player mode
+    crawler_progress.json is rewritten after every finished day (completed_dates plus the
+    contiguous last_processed_date, so the sequential resume logic still understands it).
+    """
+    extractor_module = extractor_module or import_date_room_extractor()
+    mode_label = "date_room_player" if player_mode else "date_room"
+    progress_file = "crawler_progress.json"
+    all_paipus: List[str] = []
+    seen = set()
+    lock = threading.Lock()
+    stop = threading.Event()
+    active = {}  # worker index -> extractor currently running (to abort on Ctrl+C)
+
+    def signal_handler(sig, frame):  # noqa: ARG001 - callback signature fixed by signal
+        print(f"\n\nInterrupt signal received (Ctrl+C)")
+        print(f"Currently collected {len(all_paipus)} paipus")
+        print(f"Stopping workers...")
+        stop.set()
+
+    signal.signal(signal.SIGINT, signal_handler)
+
+    start_date = datetime.strptime(config.start_date, "%Y-%m-%d")
+    end_date = datetime.strptime(config.end_date, "%Y-%m-%d")
+    all_dates = []
+    day = start_date
+    while day <= end_date:
+        all_dates.append(day.strftime("%Y-%m-%d"))
+        day += timedelta(days=1)
+
+    completed = _load_date_room_progress(progress_file, config) if player_mode else set()
+    tasks = [(d, config.target_room) for d in all_dates if d not in completed]
+    if completed:
+        print(f"\nFound progress file. Skipping {len(all_dates) - len(tasks)} finished days...")
+
+    workers = max(1, min(int(config.date_room_workers), len(tasks) or 1))
+    print(f"\n{'='*70}")
+    print(f"Starting {mode_label} mode collection (in-process, {workers} workers)")
+    print(f"{'='*70}")
+    print(f"Date range: {config.start_date} to {config.end_date} ({len(tasks)} days to process)")
+    print(f"Target room: {config.target_room}")
+    print(f"Headless mode: {'Enabled' if config.headless_mode else 'Disabled'}")
+    print(f"Fast mode: {' Enabled' if config.fast_mode else 'Disabled (complete)'}")
+    print(f"Output file: {config.output_filename}")
+    print(f"{'='*70}\n")
+
+    def on_paipu(paipu_id: str) -> None:
+        with lock:
+            if paipu_id in seen:
+                return
+            seen.add(paipu_id)
+            all_paipus.append(paipu_id)
+            if output_file:
+                output_file.write(paipu_id + "\n")
+                output_file.flush()
+        print(f"[Spider] 即時寫入牌譜: {paipu_id}", flush=True)
+
+    def save_progress(date_str: str) -> None:
+        completed.add(date_str)
+        last_contiguous = None
+        for d in all_dates:
+            if d not in completed:
+                break
+            last_contiguous = d
+        progress_data = {
+            'mode': 'date_room_player',
+            'target_room': config.target_room,
+            'start_date': config.start_date,
+            'end_date': config.end_date,
+            'last_processed_date': last_contiguous,
+            'completed_dates': sorted(completed),
+            'timestamp': time.time()
+        }
+        with open(progress_file, 'w', encoding='utf-8') as f:
+            json.dump(progress_data, f, ensure_ascii=False, indent=2)
+        print(f"Progress saved: {date_str}")
+
+    pool = DriverPool(
+        lambda: extractor_module.build_extractor_driver(
+            config.headless_mode, network_capture=config.network_capture,
+            lean=is_lean(config.browser_profile)),
+        size=workers,
+        max_uses=config.browser_max_pages,
+        name="date_room",
+    )
+    pool.warm()
+    task_queue = list(reversed(tasks))
+    start_time = time.time()
+    days_done = [0]
+
+    def worker(index: int) -> None:
+        while not stop.is_set():
+            with lock:
+                if not task_queue:
+                    return
+                date_str, room = task_queue.pop()
+            day_start = time.time()
+            print(f"\n[W{index}] Processing date: {date_str} ({room})")
+            day_results = []
+            try:
+                extractor = extractor_module.OptimizedPaipuExtractor(
+                    headless=config.headless_mode,
+                    fast_mode=config.fast_mode,
+                    player_mode=player_mode,
+                    game_mode=config.game_mode,
+                    driver_pool=pool,
+                    capture_mode=config.network_capture,
+                    on_paipu=on_paipu,
+                )
+                active[index] = extractor
+                try:
+                    day_results = extractor.extract_from_rooms(
+                        target_date=date_str,
+                        target_ranks=extractor_module.convert_ranks_to_english([room]),
+                        max_paipus=99999,
+                    )
+                finally:
+                    active.pop(index, None)
+                    extractor.close()
+            except Exception as e:
+                print(f"[W{index}] Error processing {date_str}: {e}")
+                traceback.print_exc()
+            if stop.is_set():
+                return  # day cut short: leave it out of the progress file
+            with lock:
+                days_done[0] += 1
+                if player_mode:
+                    try:
+                        save_progress(date_str)
+                    except Exception as e:
+                        print(f"Error saving progress: {e}")
+                total_elapsed = time.time() - start_time
+                remaining = len(task_queue)
+                print(f"\n[W{index}] {date_str} completed:")
+                print(f"  Collected today: {len(day_results)} paipus")
+                print(f"  Cumulative total: {len(all_paipus)} unique paipus")
+                print(f"  Time today: {time.time() - day_start:.1f} seconds")
+                print(f"  Days: {days_done[0]}/{len(tasks)} done, {remaining} queued")
+                if remaining:
+                    eta = total_elapsed / days_done[0] * remaining / workers / 60
+                    print(f"  Estimated remaining time: {eta:.1f} minutes")
+
+    threads = [threading.Thread(target=worker, args=(i + 1,), daemon=True) for i in range(workers)]
+    try:
+        for t in threads:
+            t.start()
+        # Join with a timeout so Ctrl+C is handled promptly on the main thread
+        while any(t.is_alive() for t in threads):
+            for t in threads:
+                t.join(timeout=0.5)
+            if stop.is_set():
+                # Close the pool first so the killed drivers are not replaced when the
+                # extractors release them, then abort in-flight days: a dead driver makes
+                # the extractor return what it has
+                pool.close()
+                for extractor in list(active.values()):
+                    try:
+                        extractor.driver.quit()
+                    except Exception:
+                        pass
+    finally:
+        pool.close()
+
+    total_time = time.time() - start_time
+    print(f"\n{'='*70}")
+    if stop.is_set():
+        print(f"{mode_label} mode collection interrupted by user!")
+    else:
+        print(f"{mode_label} mode collection completed!")
+        if player_mode and os.path.exists(progress_file):
+            try:
+                os.remove(progress_file)
+                print("Progress file removed (task completed)")
+            except Exception:
+                pass
+    print(f"{'='*70}")
+    print(f"Total collected: {len(all_paipus)} unique paipu IDs")
+    print(f"Days processed: {days_done[0]} days")
+    print(f"Total time: {total_time/60:.1f} minutes ({total_time/3600:.2f} hours)")
+    if len(all_paipus) > 0 and total_time > 0:
+        print(f"Average speed: {len(all_paipus)/total_time*60:.1f} paipus/minute")
+    print(f"{'='*70}\n")
+    return all_paipus
+
+
 def collect_paipus_by_date_room(config: CrawlerConfig, output_file=None, player_mode: bool = False) -> List[str]:
     """Collect paipus using date_room mode (player_mode=True 逐玩家收集所有玩家頁面牌譜)"""
+    # Preferred path: in-process worker pool. The per-day temp-script subprocess below is only
+    # kept as a fallback for trees where the extractor cannot be imported in this process.
+    try:
+        extractor_module = import_date_room_extractor()
+    except ImportError as e:
+        print(f"In-process extractor unavailable ({e}); falling back to one subprocess per day")
+    else:
+        return collect_paipus_by_date_room_pool(config, output_file, player_mode, extractor_module)
+
     mode_label = "date_room_player" if player_mode else "date_room"
     all_paipus: List[str] = []
     seen = set()
@@ -556,6 +879,8 @@ def collect_paipus_by_date_room(config: CrawlerConfig, output_file=None, player_
                     output_file=output_file,  # 傳遞 output_file 以實現即時寫入
                     player_mode=player_mode,
                     game_mode=config.game_mode,
+                    network_capture=config.network_capture,
+                    lean=is_lean(config.browser_profile),
                 )
             except Exception as e:
                 print(f"Error processing {date_str}: {e}")
@@ -701,11 +1026,47 @@ def setup_rank_selection(driver, target_ranks: List[str]):
     except Exception as e:
         print(f"Error configuring rank selection: {e}")
 
+def _player_page_url(config: CrawlerConfig, player_id) -> str:
+    """Player page URL used by the auto mode (room filter + paipu limit)."""
+    filter_mode = AUTO_PLAYER_FILTER_MODE.get((config.game_mode or 'yonma').lower(), '12')
+    return (f"https://{_domain_for(config.game_mode)}/player/{player_id}/{filter_mode}"
+            f"?limit={config.paipu_limit}")
+
+
+def get_top_players_urls_api(config: CrawlerConfig):
+    """Leaderboard player URLs from the amae-koromo ranking API (no browser).
+
+    Same result shape as get_top_players_urls: the top max_players_per_period players of
+    each period's Positive ranking, deduplicated across periods. Raises on API failure.
+    """
+    per_period = get_top_player_ids(
+        config.time_periods, config.ranks, config.game_mode, config.max_players_per_period
+    )
+    urls, seen = [], set()
+    for period in config.time_periods:
+        for player_id in per_period.get(period, []):
+            if player_id not in seen:
+                seen.add(player_id)
+                urls.append(_player_page_url(config, player_id))
+    print(f"Obtained {len(urls)} unique player URLs from ranking API")
+    return urls
+
+
 def get_top_players_urls(config: CrawlerConfig):
     """Automatically crawl leaderboard player URLs based on configuration"""
+    if config.player_source == "api":
+        try:
+            urls = get_top_players_urls_api(config)
+            if urls:
+                return urls
+            print("Ranking API returned no players, falling back to browser")
+        except (RuntimeError, ValueError) as e:
+            print(f"Ranking API failed ({e}), falling back to browser")
+
     driver, remote_port = create_stealth_driver(
         config.headless_mode,
         ["--disable-infobars", "--window-size=1920,1080"],
+        lean=is_lean(config.browser_profile),
     )
     print(f"Chrome instance started (debug port: {remote_port})")
 
@@ -860,9 +1221,7 @@ def extract_positive_ranking_players(driver, period, config: CrawlerConfig):
                     player_id = player_id_match.group(1)
                     if player_id not in seen_players:
                         seen_players.add(player_id)
-                        base_url = (f"https://{_domain_for(config.game_mode)}"
-                                    f"/player/{player_id}/{AUTO_PLAYER_FILTER_MODE.get((config.game_mode or 'yonma').lower(), '12')}")
-                        url = f"{base_url}?limit={config.paipu_limit}"
+                        url = _player_page_url(config, player_id)
                         player_urls.append(url)
                         print(f"Added player URL ({period}): {url}")
 
@@ -874,9 +1233,20 @@ def extract_positive_ranking_players(driver, period, config: CrawlerConfig):
 
     return player_urls
 
-def process_player(url, processed_paipu_ids, player_counts, config: CrawlerConfig, output_file=None):
-    """Process paipu fetching for a single player"""
-    driver, _ = create_stealth_driver(config.headless_mode)
+def process_player(url, processed_paipu_ids, player_counts, config: CrawlerConfig, output_file=None,
+                   driver=None, lock=None):
+    """Process paipu fetching for a single player.
+
+    driver: a pooled driver to reuse (left open); None starts and quits a private one.
+    lock: guards the shared id set / counts / output file when players run in parallel.
+
+    Errors are logged and swallowed for a private driver. With a pooled driver they are
+    re-raised after logging, so the pool health-checks the driver and replaces it if dead.
+    """
+    own_driver = driver is None
+    if own_driver:
+        driver, _ = create_stealth_driver(config.headless_mode, lean=is_lean(config.browser_profile))
+    guard = lock if lock is not None else contextlib.nullcontext()
 
     try:
         driver.get(url)
@@ -912,7 +1282,9 @@ def process_player(url, processed_paipu_ids, player_counts, config: CrawlerConfi
                 if href and "paipu=" in href:
                     paipu_id = href.split("paipu=")[1].split("_")[0]
 
-                    if paipu_id not in processed_paipu_ids:
+                    with guard:
+                        if paipu_id in processed_paipu_ids:
+                            continue
                         processed_paipu_ids.add(paipu_id)
                         player_counts[url] += 1
                         print(f"Wrote new paipu ({url}):", paipu_id)
@@ -922,10 +1294,10 @@ def process_player(url, processed_paipu_ids, player_counts, config: CrawlerConfi
                             output_file.write(paipu_id + "\n")
                             output_file.flush()  # 強制刷新緩衝區，確保立即寫入磁碟
 
-                        new_paipu_found = True
+                    new_paipu_found = True
 
-                        # 添加小延迟，避免处理过快 (0.05-0.15秒)
-                        time.sleep(random.uniform(0.05, 0.15))
+                    # 添加小延迟，避免处理过快 (0.05-0.15秒)
+                    time.sleep(random.uniform(0.05, 0.15))
 
             # 檢查是否已經滾動到底部
             if driver.execute_script("return window.innerHeight + window.scrollY + 10 >= document.body.offsetHeight"):
@@ -942,8 +1314,43 @@ def process_player(url, processed_paipu_ids, player_counts, config: CrawlerConfi
 
     except Exception as e:
         print(f"Error processing player {url}: {e}")
+        if not own_driver:
+            raise
     finally:
-        driver.quit()
+        if own_driver:
+            driver.quit()
+
+
+def process_players_with_pool(urls, processed_paipu_ids, player_counts, config: CrawlerConfig,
+                              output_file=None):
+    """Run process_player over urls with a pool of long-lived stealth drivers.
+
+    browser_pool_size drivers are pre-warmed and shared; players run in parallel across
+    them. Drivers are health-checked between players and recycled after browser_max_pages.
+    """
+    pool = DriverPool(
+        lambda: create_stealth_driver(config.headless_mode, lean=is_lean(config.browser_profile)),
+        size=min(config.browser_pool_size, max(1, len(urls))),
+        max_uses=config.browser_max_pages,
+        name="player",
+    )
+    pool.warm()
+    lock = threading.Lock()
+
+    def work(url):
+        with pool.driver() as driver:
+            process_player(url, processed_paipu_ids, player_counts, config, output_file,
+                           driver=driver, lock=lock)
+
+    try:
+        with ThreadPoolExecutor(max_workers=pool.size) as executor:
+            for future in [executor.submit(work, url) for url in urls]:
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Error processing player with pooled driver: {e}")
+    finally:
+        pool.close()
 
 class PaipuSpider(scrapy.Spider):
     name = "paipu_spider"
@@ -1006,9 +1413,17 @@ class PaipuSpider(scrapy.Spider):
     def start_requests(self):
         yield scrapy.Request(url="https://amae-koromo.sapk.ch", callback=self.start_crawling)
 
+    def _output(self):
+        """Where collectors write UUIDs: the item pipeline (dedupe + batched writes + sinks)
+        when Scrapy opened it for this spider, else the output file opened for append."""
+        pipeline = getattr(self, "item_pipeline", None)
+        if pipeline is not None and PipelineWriter is not None:
+            return PipelineWriter(pipeline, self, source=self.config.crawler_mode)
+        return open(self.config.output_filename, "a", encoding='utf-8')
+
     def start_crawling(self, response):  # noqa: ARG002 - Scrapy callback signature
-        # 以追加模式打開文件，用於即時寫入
-        with open(self.config.output_filename, "a", encoding='utf-8') as output_file:
+        # 收集端照舊 write/flush；走 pipeline 時由它去重、批次寫入與分流
+        with self._output() as output_file:
             if self.config.crawler_mode == "date_room_api":
                 # 純 amae-koromo API 直取（無 Selenium）：依房間+日期收集完整 UUID。
                 # collect_room_paipus 會即時 write+flush 並把新 UUID 加進 processed set。
@@ -1033,8 +1448,24 @@ class PaipuSpider(scrapy.Spider):
                 # Original auto and manual mode processing
                 print(f"Starting to process {len(self.player_urls)} players...")
 
-                for url in self.player_urls:
-                    process_player(url, self.processed_paipu_ids, self.player_counts, self.config, output_file)
+                browser_urls = self.player_urls
+                if self.config.player_source == "api":
+                    # player_records API returns full UUIDs directly; only players it
+                    # cannot serve go through the Chrome scraper below.
+                    browser_urls = collect_players_paipus(
+                        self.player_urls,
+                        self.processed_paipu_ids,
+                        self.player_counts,
+                        output_file=output_file,
+                        paipu_limit=self.config.paipu_limit,
+                        concurrency=self.config.api_concurrency,
+                    )
+                    if browser_urls:
+                        print(f"Falling back to browser for {len(browser_urls)} players")
+
+                if browser_urls:
+                    process_players_with_pool(browser_urls, self.processed_paipu_ids,
+                                              self.player_counts, self.config, output_file)
 
                 self.spider_closed(None)
 
@@ -17,12 +17,16 @@ amae-koromo 的 room `games` 端點對匿名請求會把 uuid **遮蔽成短碼*
 """
 from __future__ import annotations
 
+import os
 import random
 import re
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
 
 import requests
 
@@ -59,6 +63,9 @@ API_MIRRORS = [
     "https://2-data.amae-koromo.com",
     "https://4-data.amae-koromo.com",
 ]
+# 離線壓測：指向 fake_akoromo.py 起的本機假 API（取代全部鏡像）
+if os.getenv("AKOROMO_FAKE_API"):
+    API_MIRRORS = [os.getenv("AKOROMO_FAKE_API").rstrip("/")]
 _UA = {"User-Agent": "Mozilla/5.0", "Accept": "application/json"}
 # 共享連線池（keep-alive）：避免每發請求都重做 DNS 查詢＋TLS 握手——
 # 長時間收集時上千次 getaddrinfo 會把本機/路由器 DNS 打到暫時失靈（NameResolutionError）
@@ -71,6 +78,22 @@ _ENUM_CAP = 500               # 單批達此值視為被截，需把時間窗再
 _PAGE_LIMIT = 1000
 _PLAYER_LIMIT = 100
 _REQ_DELAY = (0.15, 0.4)      # 每次請求後的禮貌延遲（秒），避開速率限制；嫌慢可再調小
+# follow 模式（持續追新局）預設：每 _FOLLOW_INTERVAL 秒重掃「最近 _FOLLOW_LOOKBACK 秒」。
+# amae-koromo 收錄新局有數分鐘到數十分鐘的延遲，故回看窗要遠大於輪詢間隔，
+# 已見過的局由 seen 去重（seen 只保留回看窗內的局，記憶體不隨執行時間成長）。
+_FOLLOW_INTERVAL = 120
+_FOLLOW_LOOKBACK = 3 * 3600
+# 還原不了完整 UUID 的局（player_records 查不到）最多試幾輪：第二輪補抓「剛收錄、玩家紀錄
+# 還沒同步」的情形，之後在它離開回看窗前不再為它打 player_records（否則每輪都重打一次）。
+_FOLLOW_RESOLVE_TRIES = 2
+# 玩家頁收集（manual/auto 模式 API 版）：amae-koromo 收錄起點（2019-08-20）之前不會有資料，
+# 以此為時間窗下界；同時打幾位玩家的 player_records（各玩家的分頁本身是串行的）。
+_PLAYER_HISTORY_START = 1566230400
+_PLAYER_CONCURRENCY = 4
+# 排行榜（auto 模式 API 版）：amae-koromo 前端 /ranking/delta 頁背後的端點，回
+# {"positive": [...], "negative": [...]}，每筆含玩家 id 與該期間的點數增減。
+_RANKING_PERIODS = ("4w", "1w", "3d", "1d")
+_PLAYER_URL = re.compile(r"/player/(\d+)(?:/([\d.]+))?")
 _FULL_UUID = re.compile(
     r"\d{6}-[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
 )
@@ -85,11 +108,16 @@ def _is_full(u) -> bool:
     return bool(u and _FULL_UUID.fullmatch(str(u)))
 
 
+class ClientError(RuntimeError):
+    """API 回 4xx（429 除外）：請求本身有誤（缺參數、查無此人），換鏡像或退避都不會變。"""
+
+
 def _get(path: str, params: dict) -> object:
     """GET 一個 amae-koromo API，回傳解析後 JSON。
 
     鏡像失效自動換下一個；整輪鏡像全失敗則按 _RETRY_BACKOFF 退避後重來
-    （本地 DNS 抽風／網路抖動幾秒內會自癒），全部用盡才 raise。
+    （本地 DNS 抽風／網路抖動幾秒內會自癒），全部用盡才 raise。4xx（429 限速除外）
+    不重試，直接 raise ClientError（RuntimeError 子類，呼叫端照舊以 RuntimeError 接）。
     """
     last_err = None
     for attempt, wait in enumerate([0] + _RETRY_BACKOFF):
@@ -104,6 +132,8 @@ def _get(path: str, params: dict) -> object:
                     time.sleep(random.uniform(*_REQ_DELAY))
                     return r.json()
                 last_err = f"HTTP {r.status_code}: {r.text[:120]}"
+                if 400 <= r.status_code < 500 and r.status_code != 429:
+                    raise ClientError(f"amae-koromo API 請求失敗 {path} params={params} -> {last_err}")
             except requests.RequestException as exc:
                 last_err = repr(exc)
             time.sleep(random.uniform(*_REQ_DELAY))
@@ -182,6 +212,8 @@ def collect_room_paipus(
     output_file=None,
     existing_ids=None,
     game_mode: str = "yonma",
+    on_new: Optional[Callable[[str], None]] = None,
+    stop_event=None,
 ) -> List[str]:
     """依房間 + 日期區間，透過 amae-koromo API 收集完整 UUID。
 
@@ -190,6 +222,9 @@ def collect_room_paipus(
 
     每收到一筆新 UUID 就 write+flush 到 output_file（凍結模式靠輪詢檔案回報進度），並
     print 到 stdout（dev 模式 run_crawler 解析 stdout 統計進度）。回傳本次新增的 UUID 清單。
+
+    on_new：同程序內邊收集邊下載（gui backend pipeline）時，每筆新 UUID 寫檔後再交給它
+    （下載端佇列，滿了會阻塞＝背壓）；stop_event 被 set 時提早結束（下載端已中止）。
     """
     gm = (game_mode or "yonma").lower()
     if gm not in _GAME_MODES:
@@ -209,6 +244,9 @@ def collect_room_paipus(
         games = _enumerate(pl, mode, win_start, win_end)
         _log(f"[api] {datetime.fromtimestamp(win_start):%Y-%m-%d %H:%M} 起 6h：列舉 {len(games)} 局")
         for g in games:
+            if stop_event is not None and stop_event.is_set():
+                _log("[api] 收到停止要求，提前結束")
+                return collected
             total_games += 1
             full = _resolve_full_uuid(pl, g, mode, win_start, win_end, cache)
             if not full:
@@ -224,6 +262,280 @@ def collect_room_paipus(
                 output_file.write(full + "\n")
                 output_file.flush()
             print(full, flush=True)   # 供 dev run_crawler 即時統計
+            if on_new is not None:
+                on_new(full)
 
     _log(f"[api] 完成：新增 {len(collected)} 筆（列舉 {total_games} 局，無法還原 {unresolved} 局）")
     return collected
+
+
+def follow_room_paipus(
+    target_rooms,
+    on_new: Callable[[str], None],
+    stop_event=None,
+    game_mode: str = "yonma",
+    interval: Optional[float] = None,
+    lookback: Optional[int] = None,
+    existing_ids=None,
+    output_file=None,
+) -> int:
+    """持續追新局（follow 模式）：每 interval 秒重掃各房間「最近 lookback 秒」的對局，
+    新出現的完整 UUID 逐筆交給 on_new（下載端的佇列），直到 stop_event 被 set。
+    interval / lookback 缺省為 _FOLLOW_INTERVAL / _FOLLOW_LOOKBACK。
+
+    與 collect_room_paipus 的差別：不再對固定日期區間做一次性列舉，而是只看「現在往回
+    一段」的滑動窗——每日重爬整天的時間窗會把同樣的局重列舉上萬次，這裡每輪只多看到
+    上一輪之後新收錄的那幾局。
+
+    記憶體有上界：seen（UUID -> startTime）與 startTime 快取都只保留滑動窗內的局，
+    每輪把窗外的條目剪掉；existing_ids 僅用於啟動時略過已下載/已收集的 UUID，不被修改。
+    還原不了的局以 (startTime, accountIds) 記在 unresolved（同樣依窗剪枝），最多試
+    _FOLLOW_RESOLVE_TRIES 輪就放棄，免得每輪都為它重打一遍 player_records。
+
+    on_new 可能阻塞（下載端佇列滿時的背壓），這是刻意的：下載跟不上時就慢下來輪詢，
+    而不是在記憶體裡無限堆積。output_file 若給定，新 UUID 會 write+flush（中斷後可續跑）。
+    回傳本次交出的 UUID 總數。
+    """
+    gm = (game_mode or "yonma").lower()
+    if gm not in _GAME_MODES:
+        raise ValueError(f"未知 game_mode {game_mode}，可用：{list(_GAME_MODES)}")
+    room_map, pl = _GAME_MODES[gm]
+    rooms = [target_rooms] if isinstance(target_rooms, str) else list(target_rooms)
+    for room in rooms:
+        if room not in room_map:
+            raise ValueError(f"未知房間 {room}（{gm}），可用：{list(room_map)}")
+    interval = interval or _FOLLOW_INTERVAL
+    lookback = int(lookback or _FOLLOW_LOOKBACK)
+    existing = existing_ids if existing_ids is not None else set()
+    seen: Dict[str, int] = {}
+    unresolved: Dict[tuple, int] = {}   # (startTime, accountIds) -> 已嘗試輪數
+    caches: Dict[int, Dict[int, str]] = {room_map[r]: {} for r in rooms}
+    emitted = 0
+
+    def stopped() -> bool:
+        return stop_event is not None and stop_event.is_set()
+
+    _log(f"[api] follow 開始：{gm} 房間={rooms} 每 {interval:g}s 回看 {lookback // 60} 分鐘")
+    while not stopped():
+        round_start = time.time()
+        win_end = int(round_start)
+        win_start = win_end - lookback
+        fresh = failed = given_up = 0
+        for room in rooms:
+            mode = room_map[room]
+            cache = caches[mode]
+            try:
+                games = _enumerate(pl, mode, win_start, win_end)
+            except RuntimeError as exc:
+                # 整輪鏡像都失敗：這輪跳過，下一輪的回看窗會涵蓋到漏掉的局。
+                _log(f"[api] follow 列舉失敗 {room}：{exc}")
+                continue
+            for g in games:
+                if stopped():
+                    break
+                st = g.get("startTime") or win_end
+                key = (st, tuple(p.get("accountId") for p in g.get("players", [])))
+                tries = unresolved.get(key, 0)
+                if tries >= _FOLLOW_RESOLVE_TRIES and st not in cache:
+                    given_up += 1
+                    continue
+                full = _resolve_full_uuid(pl, g, mode, win_start, win_end, cache)
+                if not full:
+                    unresolved[key] = tries + 1
+                    failed += 1
+                    continue
+                unresolved.pop(key, None)
+                if full in seen:
+                    continue
+                seen[full] = st
+                if full in existing:
+                    continue
+                fresh += 1
+                emitted += 1
+                if output_file is not None:
+                    output_file.write(full + "\n")
+                    output_file.flush()
+                on_new(full)
+            # startTime 快取只留窗內的局（player_records 會順帶拉回窗外的舊局）。
+            for st in [st for st in cache if st < win_start]:
+                del cache[st]
+        for u in [u for u, st in seen.items() if st < win_start]:
+            del seen[u]
+        for key in [key for key in unresolved if key[0] < win_start]:
+            del unresolved[key]
+        _log(f"[api] follow 本輪新增 {fresh} 筆（累計 {emitted}，追蹤中 {len(seen)} 局，"
+             f"無法還原 {failed} 局、已放棄 {given_up} 局，耗時 {time.time() - round_start:.1f}s）")
+        wait = max(0.0, interval - (time.time() - round_start))
+        if stop_event is not None:
+            stop_event.wait(wait)
+        else:
+            time.sleep(wait)
+    _log(f"[api] follow 結束：共新增 {emitted} 筆")
+    return emitted
+
+
+def parse_player_url(url: str) -> Optional[Tuple[str, int, Optional[str], Optional[int]]]:
+    """解析 amae-koromo 玩家頁 URL -> (pl, account_id, mode, limit)；非玩家頁回 None。
+
+    ``https://amae-koromo.sapk.ch/player/123/12?limit=9999`` -> ("pl4", 123, "12", 9999)。
+    三麻站（ikeda）走 pl3；路徑最後一段即房間篩選（可為 ``16.12.9`` 多房間），缺省=不篩選。
+    """
+    parsed = urlparse(url)
+    m = _PLAYER_URL.search(parsed.path)
+    if not m:
+        return None
+    pl = "pl3" if "ikeda" in (parsed.netloc or "") else "pl4"
+    limit = None
+    raw_limit = parse_qs(parsed.query).get("limit")
+    if raw_limit and raw_limit[0].isdigit():
+        limit = int(raw_limit[0])
+    return pl, int(m.group(1)), m.group(2) or None, limit
+
+
+def _all_modes(pl: str) -> str:
+    """pl4/pl3 的全部房間 mode（. 串接）：玩家頁 URL 未指定房間時 player_records 的 mode。"""
+    room_map = SANMA_ROOM_MODE if pl == "pl3" else ROOM_MODE
+    return ".".join(str(m) for m in room_map.values())
+
+
+def iter_player_uuids(pl: str, account_id: int, mode: Optional[str] = None,
+                      limit: Optional[int] = None, start_ts: int = _PLAYER_HISTORY_START,
+                      end_ts: Optional[int] = None):
+    """依時間新→舊分頁走完一位玩家的 player_records，逐筆 yield 完整 UUID（最多 limit 筆）。
+
+    mode 缺省＝該 pl 的全部段位房間（player_records 的 mode 必填）。每頁 _PLAYER_LIMIT 筆；
+    下一頁的時間窗上界改為本頁最舊一局的 startTime（邊界那局會重複出現，以 uuid 去重）。
+    上界不再前進（同一秒內超過一頁）即停止，避免無限迴圈。API 失敗（鏡像與退避全部用盡，
+    或 4xx 立即失敗）直接 raise RuntimeError，交由呼叫端回退瀏覽器。
+    """
+    end = int(end_ts or time.time()) + 1
+    params = {"limit": _PLAYER_LIMIT, "mode": mode or _all_modes(pl), "descending": "true"}
+    seen: set = set()
+    while end > start_ts:
+        data = _get(f"/api/v2/{pl}/player_records/{account_id}/{end}/{start_ts}", params)
+        page = data if isinstance(data, list) else []
+        oldest = end
+        for rec in page:
+            u = rec.get("uuid") or rec.get("_id")
+            st = rec.get("startTime")
+            if st is not None:
+                oldest = min(oldest, int(st))
+            if not _is_full(u) or u in seen:
+                continue
+            seen.add(u)
+            yield u
+            if limit is not None and len(seen) >= limit:
+                return
+        if len(page) < _PLAYER_LIMIT or oldest >= end:
+            return
+        end = oldest
+
+
+def collect_players_paipus(
+    player_urls: List[str],
+    processed_ids: set,
+    player_counts: Dict[str, int],
+    output_file=None,
+    paipu_limit: Optional[int] = None,
+    concurrency: int = _PLAYER_CONCURRENCY,
+) -> List[str]:
+    """manual/auto 模式的 API 版玩家收集：對每個玩家頁 URL 打 player_records 取完整 UUID，
+    取代逐玩家開一個 Chrome 捲動抓 ``a[href*='paipu=']``（單人數十秒 -> 一秒內）。
+
+    與 PaipuSpider.process_player 的輸出慣例一致：新 UUID 加進 processed_ids、累加
+    player_counts[url]、write+flush 到 output_file 並 print 到 stdout。玩家之間以
+    concurrency 條執行緒並行；去重/寫檔在鎖內進行，輸出檔不會交錯。
+    房間篩選取 URL 最後一段 mode；筆數上限取 URL 的 ?limit=，缺省用 paipu_limit——上限只計
+    本次**新增**的 UUID（processed_ids 已有的不算），續跑時每位玩家照樣補足 limit 筆新局。
+
+    回傳 API 取不到（URL 無法解析或請求全數失敗）的 URL 清單，供呼叫端以瀏覽器回退。
+    """
+    lock = threading.Lock()
+    failed: List[str] = []
+
+    def work(url: str) -> None:
+        spec = parse_player_url(url)
+        if spec is None:
+            with lock:
+                failed.append(url)
+            return
+        pl, account_id, mode, limit = spec
+        limit = limit or paipu_limit
+        added = 0
+        try:
+            for u in iter_player_uuids(pl, account_id, mode):
+                with lock:
+                    if u in processed_ids:
+                        continue
+                    processed_ids.add(u)
+                    player_counts[url] = player_counts.get(url, 0) + 1
+                    if output_file is not None:
+                        output_file.write(u + "\n")
+                        output_file.flush()
+                    print(u, flush=True)   # 供 dev run_crawler 即時統計
+                added += 1
+                if limit and added >= limit:
+                    break
+        except RuntimeError as exc:
+            _log(f"[api] 玩家 {account_id} 取牌譜失敗，改用瀏覽器：{exc}")
+            with lock:
+                failed.append(url)
+            return
+        _log(f"[api] 玩家 {account_id}（{pl} mode={mode or '全部'}）收集 "
+             f"{player_counts.get(url, 0)} 筆")
+
+    _log(f"[api] 玩家收集開始：{len(player_urls)} 位，並行 {max(1, concurrency)}")
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        list(pool.map(work, player_urls))
+    _log(f"[api] 玩家收集完成：API 失敗 {len(failed)} 位")
+    return failed
+
+
+def _ranking_modes(ranks: List[str], game_mode: str) -> str:
+    """排行榜勾選的房間 -> API mode 參數（多房間以 . 串接，與前端網址一致）；含 All = 全部房間。"""
+    room_map, _ = _GAME_MODES[(game_mode or "yonma").lower()]
+    if not ranks or "All" in ranks:
+        return ".".join(str(m) for m in room_map.values())
+    unknown = [r for r in ranks if r not in room_map]
+    if unknown:
+        raise ValueError(f"未知房間 {unknown}，可用：{list(room_map)} 或 All")
+    return ".".join(str(room_map[r]) for r in ranks)
+
+
+def get_positive_ranking(period: str, ranks: List[str], game_mode: str = "yonma",
+                         top: int = 20) -> List[int]:
+    """取某期間、某些房間合併後的「Positive ranking」（點數增加最多）前 top 名玩家 accountId。
+
+    等同 get_top_players_urls 在 /ranking/delta 頁勾選房間、切換期間後抓 Positive 欄，
+    但只是一個 HTTP 請求。失敗（鏡像全滅）raise RuntimeError。
+    """
+    if period not in _RANKING_PERIODS:
+        raise ValueError(f"未知期間 {period}，可用：{list(_RANKING_PERIODS)}")
+    gm = (game_mode or "yonma").lower()
+    if gm not in _GAME_MODES:
+        raise ValueError(f"未知 game_mode {game_mode}，可用：{list(_GAME_MODES)}")
+    _, pl = _GAME_MODES[gm]
+    data = _get(f"/api/v2/{pl}/player_delta_ranking/{period}",
+                {"mode": _ranking_modes(ranks, gm)})
+    rows = data.get("positive", []) if isinstance(data, dict) else (data or [])
+    ids: List[int] = []
+    for row in rows:
+        acc = (row.get("id") or row.get("accountId")) if isinstance(row, dict) else None
+        if acc and int(acc) not in ids:
+            ids.append(int(acc))
+        if len(ids) >= top:
+            break
+    return ids
+
+
+def get_top_player_ids(time_periods: List[str], ranks: List[str], game_mode: str = "yonma",
+                       top: int = 20) -> Dict[str, List[int]]:
+    """各期間的 Positive ranking 前 top 名（期間之間並行請求）。回傳 {period: [accountId...]}，
+    依 time_periods 原順序；任一期間請求失敗即 raise（由呼叫端整體回退瀏覽器）。"""
+    periods = list(dict.fromkeys(time_periods))
+    with ThreadPoolExecutor(max_workers=max(1, len(periods))) as pool:
+        results = pool.map(lambda p: get_positive_ranking(p, ranks, game_mode, top), periods)
+        out = dict(zip(periods, results))
+    for period, ids in out.items():
+        _log(f"[api] 排行榜 {period}：Positive 前 {len(ids)} 名")
+    return out
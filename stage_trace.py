@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""stage_trace —— Stage 2 逐筆牌譜的分段計時（可選開啟），輸出 Chrome/Perfetto trace 與分位數摘要。
+
+為什麼需要這支
+--------------
+run_download 只回報每筆的 ``net_ms`` 與整體 ``rate``：慢的時候看得出「不是網路」，卻看不出
+時間到底耗在哪一段。一筆牌譜實際會經過：
+
+  rpc            雀魂 fetchGameRecord 來回（每次嘗試各一段）
+  retry          重試前的退避與重連／換帳號（download_recovery）
+  backpressure   下載迴圈等後處理名額（轉換跟不上下載）
+  decode         protobuf -> tenhou6/mjai（執行緒池，含排隊）
+  tenhou_write   寫 tenhou6 檔（四麻另寫一份給 mjai-reviewer 的暫存檔）
+  mjai_wait      等 mjai-reviewer 並發名額（Semaphore）
+  mjai_run       mjai-reviewer 子程序（四麻）
+  mjai_write     直接寫出 tensoul 的 mjai 事件（三麻）
+  timing_inject  思考時間擷取＋注入 mjai
+  gzip           壓縮 mjai 輸出
+
+開啟後（``enable()``），各段以 ``span(uuid, stage)`` 記下起訖；關閉時 ``span`` 回傳共用的
+空 context manager，成本只有一次函式呼叫。結束時：
+
+- ``write_chrome(path)``：Chrome trace event JSON（chrome://tracing 或 ui.perfetto.dev 開啟），
+  一筆牌譜一條軌道、各段為其上的區塊，瀑布圖一眼看出哪段拖長、哪裡在排隊。
+- ``summary()`` / ``format_summary()``：各段 p50/p95/p99（同一筆同一段多次的時間先加總，
+  例如多次 rpc 嘗試），依 network / cpu / disk / wait 分類加總，並判斷這次執行受哪一類限制。
+
+run_download 以 params ``trace_path`` 或環境變數 ``TRACE_PATH`` 開啟。
+"""
+from __future__ import annotations
+
+import contextlib
+import json
+import threading
+import time
+
+# 段名 -> 分類（判斷瓶頸用）
+STAGES = {
+    "rpc": "network",
+    "retry": "network",
+    "backpressure": "wait",
+    "decode": "cpu",
+    "tenhou_write": "disk",
+    "mjai_wait": "wait",
+    "mjai_run": "cpu",
+    "mjai_write": "disk",
+    "timing_inject": "cpu",
+    "gzip": "disk",
+}
+# 每筆約十來段；上限防止長時間 follow 執行把記憶體吃光（超過只計數、不再記錄）
+MAX_SPANS = 2_000_000
+
+_NULL = contextlib.nullcontext()
+_tracer: "Tracer | None" = None
+
+
+class _Span:
+    __slots__ = ("tracer", "uuid", "stage", "start")
+
+    def __init__(self, tracer: "Tracer", uuid: str, stage: str):
+        self.tracer = tracer
+        self.uuid = uuid
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer.add(self.uuid, self.stage, self.start, time.perf_counter_ns(), exc_type is not None)
+        return False
+
+
+class Tracer:
+    """收集 (uuid, stage, start_ns, end_ns, error, thread) 區段。list.append 在 GIL 下是原子的，
+    decode 在執行緒池裡記錄也不需要鎖。"""
+
+    def __init__(self, max_spans: int = MAX_SPANS):
+        self.spans: list[tuple] = []
+        self.max_spans = max_spans
+        self.dropped = 0
+        self.origin = time.perf_counter_ns()
+
+    def span(self, uuid: str, stage: str) -> _Span:
+        return _Span(self, uuid, stage)
+
+    def add(self, uuid: str, stage: str, start_ns: int, end_ns: int, error: bool = False) -> None:
+        if len(self.spans) >= self.max_spans:
+            self.dropped += 1
+            return
+        self.spans.append((uuid, stage, start_ns, end_ns, error, threading.get_ident()))
+
+    # ── 輸出 ─────────────────────────────────────────────────────────
+    def chrome_events(self) -> list[dict]:
+        """Chrome trace event 格式：每個 uuid 一條軌道（tid），第一次出現的順序排列。"""
+        lanes: dict[str, int] = {}
+        events = []
+        for uuid, stage, start, end, error, thread in self.spans:
+            lane = lanes.get(uuid)
+            if lane is None:
+                lane = lanes[uuid] = len(lanes) + 1
+                events.append({"ph": "M", "name": "thread_name", "pid": 1, "tid": lane,
+                               "args": {"name": uuid}})
+                events.append({"ph": "M", "name": "thread_sort_index", "pid": 1, "tid": lane,
+                               "args": {"sort_index": lane}})
+            args = {"uuid": uuid, "thread": thread}
+            if error:
+                args["error"] = True
+            events.append({"ph": "X", "name": stage, "cat": STAGES.get(stage, "other"), "pid": 1,
+                           "tid": lane, "ts": (start - self.origin) / 1000, "dur": (end - start) / 1000,
+                           "args": args})
+        return events
+
+    def write_chrome(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.chrome_events(), "displayTimeUnit": "ms",
+                       "otherData": {"dropped_spans": self.dropped}}, f, ensure_ascii=False)
+
+    def summary(self) -> dict:
+        """{"stages": {stage: {count, p50_ms, p95_ms, p99_ms, total_s}}, "categories": {...},
+        "wall_s", "records", "bound"}。百分位以「每筆在該段的總時間」計。"""
+        per_record: dict[tuple, int] = {}
+        first = last = None
+        for uuid, stage, start, end, _, _ in self.spans:
+            per_record[(stage, uuid)] = per_record.get((stage, uuid), 0) + (end - start)
+            first = start if first is None or start < first else first
+            last = end if last is None or end > last else last
+        by_stage: dict[str, list[int]] = {}
+        for (stage, _), ns in per_record.items():
+            by_stage.setdefault(stage, []).append(ns)
+
+        stages, categories = {}, {}
+        for stage in sorted(by_stage, key=lambda s: list(STAGES).index(s) if s in STAGES else len(STAGES)):
+            values = sorted(by_stage[stage])
+            total = sum(values) / 1e9
+            stages[stage] = {"count": len(values), "p50_ms": _pct(values, 50), "p95_ms": _pct(values, 95),
+                             "p99_ms": _pct(values, 99), "total_s": round(total, 3)}
+            cat = STAGES.get(stage, "other")
+            categories[cat] = round(categories.get(cat, 0.0) + total, 3)
+        wall = (last - first) / 1e9 if first is not None else 0.0
+        return {"stages": stages, "categories": categories, "wall_s": round(wall, 3),
+                "records": len({uuid for _, uuid in per_record}), "dropped_spans": self.dropped,
+                "bound": _bound(stages, categories, wall)}
+
+    def format_summary(self, summary: dict | None = None) -> str:
+        s = summary or self.summary()
+        lines = [f"{'stage':<15}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'total s':>10}"]
+        for stage, r in s["stages"].items():
+            lines.append(f"{stage:<15}{r['count']:>8}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}"
+                         f"{r['p99_ms']:>10.1f}{r['total_s']:>10.2f}")
+        cats = "  ".join(f"{k} {v:.2f}s" for k, v in s["categories"].items())
+        lines.append(f"{s['records']} 筆，歷時 {s['wall_s']:.2f}s；分類合計：{cats}")
+        lines.append(f"判斷：{s['bound']}")
+        return "\n".join(lines)
+
+
+def _pct(sorted_ns: list[int], p: int) -> float:
+    """最近排名法百分位（ms）。"""
+    if not sorted_ns:
+        return 0.0
+    k = max(0, min(len(sorted_ns) - 1, -(-len(sorted_ns) * p // 100) - 1))
+    return round(sorted_ns[k] / 1e6, 3)
+
+
+def _bound(stages: dict, categories: dict, wall: float) -> str:
+    """下載本身是嚴格串行、後處理在背景並行：平常整體節奏＝網路；只有下載迴圈常在等後處理
+    名額（backpressure）時，才是後處理拖慢，再看 cpu 與 disk 哪個佔得多。"""
+    if wall <= 0:
+        return "no data"
+    stalled = stages.get("backpressure", {}).get("total_s", 0.0)
+    if stalled / wall < 0.10:
+        return f"network-bound（下載迴圈等後處理僅佔 {stalled / wall:.0%}）"
+    cpu, disk = categories.get("cpu", 0.0), categories.get("disk", 0.0)
+    kind = "cpu-bound" if cpu >= disk else "disk-bound"
+    detail = f"下載迴圈有 {stalled / wall:.0%} 時間在等後處理；cpu {cpu:.1f}s vs disk {disk:.1f}s"
+    if stages.get("mjai_wait", {}).get("total_s", 0.0) > cpu * 0.5:
+        detail += "；mjai-reviewer 並發名額不足（mjai_wait 偏高）"
+    return f"{kind}（{detail}）"
+
+
+# ── 模組層級開關 ──────────────────────────────────────────────────────
+def enable(max_spans: int = MAX_SPANS) -> Tracer:
+    global _tracer
+    _tracer = Tracer(max_spans)
+    return _tracer
+
+
+def disable() -> "Tracer | None":
+    """關閉並回傳剛才的 tracer（常駐後端跨 job 重用程序，結束一定要關）。"""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def active() -> "Tracer | None":
+    return _tracer
+
+
+def span(uuid: str, stage: str):
+    """``with span(uuid, "decode"): ...``；未開啟時是共用的空 context manager。"""
+    tracer = _tracer
+    return _NULL if tracer is None else _Span(tracer, uuid, stage)
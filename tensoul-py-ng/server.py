@@ -1,9 +1,7 @@
 import asyncio
-import nest_asyncio
 from tensoul import MajsoulPaipuDownloader
 from tensoul.cfg import ms_cfg
-
-nest_asyncio.apply()
+from tensoul.result_cache import ResultCache
 
 APP_VERSION = "1.1.0"
 
@@ -12,7 +10,10 @@ async def connect_and_serve():
     downloader = MajsoulPaipuDownloader(True, APP_VERSION)
     await downloader.start()
     await downloader.login(ms_cfg['ms_username'], ms_cfg['ms_password'])
-    downloader.start_server(ms_cfg['server_host'], ms_cfg['server_port'])
+    # keyed on tensoul's converter version, not APP_VERSION: only output changes invalidate results
+    cache = ResultCache(max_entries=int(ms_cfg.get('cache_entries', 2048)),
+                        cache_dir=ms_cfg.get('cache_dir', 'cache'))
+    await downloader.start_server(ms_cfg['server_host'], ms_cfg['server_port'], cache=cache)
 
 
 asyncio.run(connect_and_serve())
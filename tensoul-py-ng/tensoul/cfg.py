@@ -1,10 +1,108 @@
+import hashlib
 import ujson
+from collections.abc import Mapping
 from pathlib import Path
 
-with open(Path(__file__).parent / "cfg.json", "r", encoding="utf-8") as f:
-    cfg = ujson.load(f)
+_CFG_PATH = Path(__file__).parent / "cfg.json"
+_TABLES_PATH = Path(__file__).parent / "cfg_tables.py"
+
+# name in cfg_tables -> (path to the table in cfg.json, field to keep)
+_TABLES = {
+    "LEVEL_FULL_NAME_JP": (("level_definition", "level_definition"), "full_name_jp"),
+    "ROOM_NAME_JP": (("desktop", "matchmode"), "room_name_jp"),
+    "FAN_NAME_JP": (("fan", "fan"), "name_jp"),
+}
+
+
+class _LazyJson(Mapping):
+    """Read-only view of a JSON object that is parsed on first access.
+
+    cfg.json is ~160 KB and, thanks to cfg_tables, rarely needed at all, so
+    importing tensoul (e.g. for a login or a nettest) no longer pays for it.
+    """
+
+    def __init__(self, path):
+        self._path = path
+        self._data = None
+
+    def _load(self):
+        if self._data is None:
+            with open(self._path, "r", encoding="utf-8") as f:
+                self._data = ujson.load(f)
+        return self._data
+
+    def __getitem__(self, key):
+        return self._load()[key]
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+
+cfg = _LazyJson(_CFG_PATH)
 
 with open(Path(__file__).parent / "ms_cfg.json", "r", encoding="utf-8") as f:
     ms_cfg = ujson.load(f)
 
-__all__ = ("cfg", "ms_cfg")
+
+def _extract_tables(data) -> dict:
+    """The id -> name tables the converter needs, keyed by int id."""
+    tables = {}
+    for name, (path, field) in _TABLES.items():
+        node = data
+        for key in path:
+            node = node[key]
+        tables[name] = {int(k): v[field] for k, v in node["map_"].items()}
+    return tables
+
+
+def _cfg_sha1() -> str:
+    with open(_CFG_PATH, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _load_tables() -> dict:
+    """Use the precompiled cfg_tables module when it was generated from this
+    exact cfg.json (same sha1), otherwise extract the tables from cfg.json.
+
+    Hashing the raw file is far cheaper than parsing it, and unlike the size it
+    catches updates that rename entries without changing the byte count."""
+    try:
+        from . import cfg_tables
+        if cfg_tables.CFG_SHA1 == _cfg_sha1():
+            return {name: getattr(cfg_tables, name) for name in _TABLES}
+    except (ImportError, AttributeError, OSError):
+        pass
+    return _extract_tables(cfg)
+
+
+def build_tables(out_path=_TABLES_PATH) -> None:
+    """Regenerate cfg_tables.py from cfg.json (run after updating cfg.json)."""
+    with open(_CFG_PATH, "r", encoding="utf-8") as f:
+        tables = _extract_tables(ujson.load(f))
+    lines = [
+        "# Generated by `python tensoul/cfg.py` from cfg.json -- do not edit.",
+        f"CFG_SHA1 = {_cfg_sha1()!r}",
+    ]
+    for name, table in tables.items():
+        lines.append("")
+        lines.append(f"{name} = {{")
+        lines.extend(f"    {k}: {v!r}," for k, v in sorted(table.items()))
+        lines.append("}")
+    with open(out_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+_tables = _load_tables()
+LEVEL_FULL_NAME_JP = _tables["LEVEL_FULL_NAME_JP"]  # level id -> e.g. "雀豪★1"
+ROOM_NAME_JP = _tables["ROOM_NAME_JP"]              # matchmode id -> e.g. "玉の間"
+FAN_NAME_JP = _tables["FAN_NAME_JP"]                # fan id -> yaku name
+del _tables
+
+__all__ = ("cfg", "ms_cfg", "LEVEL_FULL_NAME_JP", "ROOM_NAME_JP", "FAN_NAME_JP")
+
+if __name__ == "__main__":
+    build_tables()
+    print(f"wrote {_TABLES_PATH}")
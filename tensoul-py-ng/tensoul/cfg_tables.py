@@ -0,0 +1,213 @@
+# Generated by `python tensoul/cfg.py` from cfg.json -- do not edit.
+CFG_SHA1 = 'fdde94d8f727747aa515f7abad936670bda98722'
+
+LEVEL_FULL_NAME_JP = {
+    10101: '初心★1',
+    10102: '初心★2',
+    10103: '初心★3',
+    10201: '雀士★1',
+    10202: '雀士★2',
+    10203: '雀士★3',
+    10301: '雀傑★1',
+    10302: '雀傑★2',
+    10303: '雀傑★3',
+    10401: '雀豪★1',
+    10402: '雀豪★2',
+    10403: '雀豪★3',
+    10501: '雀聖★1',
+    10502: '雀聖★2',
+    10503: '雀聖★3',
+    10601: '魂天',
+    10701: '魂天Lv1',
+    10702: '魂天Lv2',
+    10703: '魂天Lv3',
+    10704: '魂天Lv4',
+    10705: '魂天Lv5',
+    10706: '魂天Lv6',
+    10707: '魂天Lv7',
+    10708: '魂天Lv8',
+    10709: '魂天Lv9',
+    10710: '魂天Lv10',
+    10711: '魂天Lv11',
+    10712: '魂天Lv12',
+    10713: '魂天Lv13',
+    10714: '魂天Lv14',
+    10715: '魂天Lv15',
+    10716: '魂天Lv16',
+    10717: '魂天Lv17',
+    10718: '魂天Lv18',
+    10719: '魂天Lv19',
+    10720: '魂天Lv20',
+    20101: '初心★1',
+    20102: '初心★2',
+    20103: '初心★3',
+    20201: '雀士★1',
+    20202: '雀士★2',
+    20203: '雀士★3',
+    20301: '雀傑★1',
+    20302: '雀傑★2',
+    20303: '雀傑★3',
+    20401: '雀豪★1',
+    20402: '雀豪★2',
+    20403: '雀豪★3',
+    20501: '雀聖★1',
+    20502: '雀聖★2',
+    20503: '雀聖★3',
+    20601: '魂天',
+    20701: '魂天Lv1',
+    20702: '魂天Lv2',
+    20703: '魂天Lv3',
+    20704: '魂天Lv4',
+    20705: '魂天Lv5',
+    20706: '魂天Lv6',
+    20707: '魂天Lv7',
+    20708: '魂天Lv8',
+    20709: '魂天Lv9',
+    20710: '魂天Lv10',
+    20711: '魂天Lv11',
+    20712: '魂天Lv12',
+    20713: '魂天Lv13',
+    20714: '魂天Lv14',
+    20715: '魂天Lv15',
+    20716: '魂天Lv16',
+    20717: '魂天Lv17',
+    20718: '魂天Lv18',
+    20719: '魂天Lv19',
+    20720: '魂天Lv20',
+}
+
+ROOM_NAME_JP = {
+    1: '銅の間',
+    2: '銅の間',
+    3: '銅の間',
+    4: '銀の間',
+    5: '銀の間',
+    6: '銀の間',
+    7: '金の間',
+    8: '金の間',
+    9: '金の間',
+    10: '玉の間',
+    11: '玉の間',
+    12: '玉の間',
+    13: '乱闘の間',
+    14: '乱闘の間',
+    15: '王座の間',
+    16: '王座の間',
+    17: '銅の間',
+    18: '銅の間',
+    19: '銀の間',
+    20: '銀の間',
+    21: '金の間',
+    22: '金の間',
+    23: '玉の間',
+    24: '玉の間',
+    25: '王座の間',
+    26: '王座の間',
+    29: '交流の間',
+    30: '交流の間',
+    31: '交流の間',
+    32: '交流の間',
+    33: 'ドラさんモード',
+    34: '配牌公開',
+    35: '龍の割目',
+    36: '試練の道',
+    37: '',
+    38: '',
+    39: '',
+    40: '修羅の戦',
+    41: '赤血の戦',
+    42: '特別対局',
+    43: '特別対局',
+    44: '明鏡の戦',
+    45: '闇夜の戦',
+    46: '幻界の戦',
+}
+
+FAN_NAME_JP = {
+    1: '門前清自摸和',
+    2: '立直',
+    3: '槍槓',
+    4: '嶺上開花',
+    5: '海底摸月',
+    6: '河底撈魚',
+    7: '役牌 白',
+    8: '役牌 發',
+    9: '役牌 中',
+    10: '自風 東',
+    11: '場風 東',
+    12: '断幺九',
+    13: '一盃口',
+    14: '平和',
+    15: '混全帯幺九',
+    16: '一気通貫',
+    17: '三色同順',
+    18: '両立直',
+    19: '三色同刻',
+    20: '三槓子',
+    21: '対々和',
+    22: '三暗刻',
+    23: '小三元',
+    24: '混老頭',
+    25: '七対子',
+    26: '純全帯幺九',
+    27: '混一色',
+    28: '二盃口',
+    29: '清一色',
+    30: '一発',
+    31: 'ドラ',
+    32: '赤ドラ',
+    33: '裏ドラ',
+    34: '抜きドラ',
+    35: '天和',
+    36: '地和',
+    37: '大三元',
+    38: '四暗刻',
+    39: '字一色',
+    40: '緑一色',
+    41: '清老頭',
+    42: '国士無双',
+    43: '小四喜',
+    44: '四槓子',
+    45: '九蓮宝燈',
+    46: '八連荘',
+    47: '純正九蓮宝燈',
+    48: '四暗刻単騎',
+    49: '国士無双１３面',
+    50: '大四喜',
+    51: '燕返し',
+    52: '槓振り',
+    53: '十二落抬',
+    54: '五門斉',
+    55: '三連刻',
+    56: '一色三順',
+    57: '一筒摸月',
+    58: '九筒撈魚',
+    59: '人和',
+    60: '大車輪',
+    61: '大竹林',
+    62: '大数隣',
+    63: '石の上にも三年',
+    64: '大七星',
+    1000: '根',
+    1001: '嶺上開花',
+    1002: '嶺上放銃',
+    1003: '無番和',
+    1004: '槍槓',
+    1005: '対々和',
+    1006: '清一色',
+    1007: '七対子',
+    1008: '帯幺九',
+    1009: '金勾釣',
+    1010: '清対',
+    1011: '将対',
+    1012: '龍七対',
+    1013: '清七対',
+    1014: '清金勾釣',
+    1015: '清龍七対',
+    1016: '十八羅漢',
+    1017: '清十八羅漢',
+    1018: '天和',
+    1019: '地和',
+    1020: '清幺九',
+    1021: '海底摸月',
+}
@@ -1,3 +1,7 @@
+# bump on any change to what parser/model/downloader output: ResultCache keys
+# (and ETags) carry it, so cached conversions from an older converter go stale
+CONVERTER_VERSION = 1
+
 # words that can end up in log, some are mandatory kanji in places
 JPNAME = 0
 RONAME = 1
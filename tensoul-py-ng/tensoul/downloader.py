@@ -2,6 +2,7 @@ import asyncio
 import hashlib
 import hmac
 import random
+import time
 import uuid
 
 import aiohttp
@@ -18,8 +19,9 @@ except ImportError:
 from websockets.exceptions import ConnectionClosedError
 from datetime import datetime, timezone
 
-from .cfg import cfg, ms_cfg
+from .cfg import ms_cfg, ROOM_NAME_JP, LEVEL_FULL_NAME_JP
 from .constants import RUNES, JPNAME
+from .metrics import RPC_SECONDS, PARSE_SECONDS, DOWNLOADS, DOWNLOAD_ERRORS, CONNECTS, HEARTBEAT_FAILURES
 from .parser import MajsoulPaipuParser
 
 
@@ -34,6 +36,7 @@ class MajsoulDownloadError(BaseException):
 
 class MajsoulPaipuDownloader:
     MS_HOST = "https://game.maj-soul.com"
+    WS_SCHEME = "wss"  # a local fake gateway (fake_majsoul.py) serves plain ws
     MS_LOGIN_BEAT_CONTRACT_UUID = "DF2vkXCnfeXp4WoGSBGNcJBufZiMN3UP"
 
     def __init__(self, with_http_server=False, tensoul_version="0.0.0"):
@@ -60,6 +63,14 @@ class MajsoulPaipuDownloader:
         await self.close()
 
     async def _connect(self):
+        try:
+            await self._do_connect()
+        except BaseException:
+            CONNECTS.inc("error")
+            raise
+        CONNECTS.inc("ok")
+
+    async def _do_connect(self):
         async with aiohttp.ClientSession() as session:
             async with session.get("{}/1/version.json".format(self.MS_HOST)) as res:
                 version_res = await res.json()
@@ -79,7 +90,7 @@ class MajsoulPaipuDownloader:
                if "routes" in routes['data']:
                    routes = routes['data']["routes"]
                    server = random.choice(routes)
-                   self.endpoint = "wss://{}/gateway".format(server['domain'])
+                   self.endpoint = "{}://{}/gateway".format(self.WS_SCHEME, server['domain'])
                    self.route_id = str(server['id']).strip()
                else:
                    raise RuntimeError("Cannot detect endpoint. Response: " + await res.text())
@@ -125,13 +136,17 @@ class MajsoulPaipuDownloader:
                 req_heartbeat.no_operation_counter = 0
                 req_heartbeat.platform = 11
                 req_heartbeat.network_quality = 0
+                start = time.perf_counter()
                 res_heatbeat = await route.heartbeat(req_heartbeat)
+                RPC_SECONDS.observe(time.perf_counter() - start, "heartbeat")
                 if int(res_heatbeat.error.ByteSize()) > 0:
+                    HEARTBEAT_FAILURES.inc()
                     await self.channel.close()
                 await asyncio.sleep(ping_interval)
         except asyncio.CancelledError:
             print("`sustain` task cancelled")
         except Exception as e:
+            HEARTBEAT_FAILURES.inc()
             print(f"Exception occurred in `sustain` task: {e}")
 
     async def login(self, username, password):
@@ -161,78 +176,48 @@ class MajsoulPaipuDownloader:
     def make_error_message(self, error_msg):
         return {"is_error": True, "error_msg": error_msg}
 
-    def start_server(self, host, port):
-        from flask import Flask, request
-        from tornado.wsgi import WSGIContainer
-        from tornado.httpserver import HTTPServer
-        from tornado.ioloop import IOLoop
-        import ujson as json
-
-        app = Flask(__name__)
-        app_token = ms_cfg['app_token']
-        is_token_auth = ms_cfg['is_token_auth']
-        downloader = self
-
-        def check_token(request):
-            if is_token_auth:
-                request_token = request.args.get('app_token')
-                return app_token == request_token
-            return True
-
-        def make_json_response(data):
-            return app.response_class(response=json.dumps(data),
-                                      mimetype='application/json')
-
-        def prepare_lobby_id(lobby_id):
-            if not lobby_id:
-                lobby_id = 0
-            else:
-                lobby_id = int(lobby_id)
-                if lobby_id < 0:
-                    lobby_id = 0
-            return lobby_id
-
-        @app.route("/status/", methods=['GET'])
-        def status():
-            return make_json_response({'version': self.tensoul_version})
-
-        @app.route("/health/", methods=['GET'])
-        def health():
-            status = 'OK' if self.is_channel_connection_open(self.channel) else 'ERROR'
-            return make_json_response({'status': status})
-
-        @app.route("/convert/", methods=['GET'])
-        def convert():
-            if not check_token(request):
-                return make_json_response(self.make_error_message("app_token not valid!"))
-            id = request.args.get('id')
-            lobby_id = prepare_lobby_id(request.args.get('lobby_id'))
-            if id:
-                response = asyncio.run(downloader.download(id, lobby_id))
-                return make_json_response(response)
-            return make_json_response(self.make_error_message("replay id required!"))
-
-        http_server = HTTPServer(WSGIContainer(app))
-        http_server.listen(port, host)
-        print("==== server start at %s:%s ====" % (host, port))
-        if is_token_auth:
-            print("The API is GET /convert?id={mahjong_soul_log_id}&app_token={app_token}")
-        else:
-            print("The API is GET /convert?id={mahjong_soul_log_id}")
-        IOLoop.instance().start()
+    async def start_server(self, host, port, **options):
+        """
+        Serve GET /convert/, /status/ and /health/ on this event loop until
+        cancelled. `options` go to ConversionServer (concurrency, queue_size,
+        request_timeout, session, ...).
+        """
+        from .http_server import ConversionServer
+
+        await ConversionServer(self, **options).serve_forever(host, port)
 
     async def download(self, record_uuid: str, lobby_id: int = 0):
         req = pb.ReqGameRecord()
         req.game_uuid = record_uuid
         req.client_version_string = f'web-{self.version_to_force}'
-        res = await self.lobby.fetch_game_record(req)
+        return await self.download_request(req, lobby_id)
+
+    async def download_request(self, req, lobby_id: int = 0):
+        """
+        fetch and convert the record for a prepared ReqGameRecord; the one place
+        the fetch RPC latency and error codes are counted.
+        """
+        start = time.perf_counter()
+        try:
+            res = await self.lobby.fetch_game_record(req)
+        except Exception as e:
+            DOWNLOADS.inc("exception")
+            DOWNLOAD_ERRORS.inc(type(e).__name__)
+            raise
+        finally:
+            RPC_SECONDS.observe(time.perf_counter() - start, "fetch_game_record")
 
         if res.error.code:
+            DOWNLOADS.inc("error")
+            DOWNLOAD_ERRORS.inc(str(res.error.code))
             return self.make_error_message("error_code: %s" % res.error.code)
 
-        return {"is_error": False, "log": self._handle_game_record(res, lobby_id)}
+        log = self._handle_game_record(res, lobby_id)
+        DOWNLOADS.inc("ok")
+        return {"is_error": False, "log": log}
 
     def _handle_game_record(self, record, lobby_id):
+        start = time.perf_counter()
         res = {}
         ruledisp = ""
         lobby = ""  # usually 0, is the custom lobby number
@@ -250,7 +235,7 @@ class MajsoulPaipuDownloader:
         if nplayers == 3:
             ruledisp += RUNES["sanma"][JPNAME]
         if record.head.config.meta.mode_id:  # ranked or casual
-            ruledisp += cfg["desktop"]["matchmode"]["map_"][str(record.head.config.meta.mode_id)]["room_name_jp"]
+            ruledisp += ROOM_NAME_JP[record.head.config.meta.mode_id]
         elif record.head.config.meta.room_id:  # friendly
             lobby = f": {record.head.config.meta.room_id}"  # can set room number as lobby number
             ruledisp += RUNES["friendly"][JPNAME]  # "Friendly"
@@ -284,7 +269,7 @@ class MajsoulPaipuDownloader:
         # ranks
         res["dan"] = [""] * nplayers
         for e in record.head.accounts:
-            res["dan"][e.seat] = cfg["level_definition"]["level_definition"]["map_"][str(e.level.id)]["full_name_jp"]
+            res["dan"][e.seat] = LEVEL_FULL_NAME_JP[e.level.id]
 
         # level score, no real analog to rate
         res["rate"] = [0] * nplayers
@@ -330,8 +315,6 @@ class MajsoulPaipuDownloader:
                 log = getattr(pb, round_record_wrapper.name[len(".lq."):])()
                 log.ParseFromString(round_record_wrapper.data)
                 converter.feed(log)
-
-                res["log"] = [e.dump() for e in converter.getvalue()]
         else:
             for act in details.actions:
                 if len(act.result) != 0:
@@ -342,13 +325,15 @@ class MajsoulPaipuDownloader:
                     log.ParseFromString(round_record_wrapper.data)
                     converter.feed(log)
 
-                    res["log"] = [e.dump() for e in converter.getvalue()]
+        # dumped once at the end: rebuilding it after every action made a game O(n^2)
+        res["log"] = [e.dump() for e in converter.getvalue()]
 
         # mjai event stream (sanma 3-seat / yonma 4-seat), built in lock-step above.
         res["mjai"] = converter.finalize_mjai()
 
         res["playerMapping"] = self._preparePlayerMapping(record)
 
+        PARSE_SECONDS.observe(time.perf_counter() - start)
         return res
 
     def _preparePlayerMapping(self, record):
@@ -0,0 +1,498 @@
+import asyncio
+import re
+import time
+from typing import Awaitable, Callable, Optional
+
+import ujson
+from aiohttp import web
+
+from .cfg import ms_cfg
+from .metrics import REGISTRY, DOWNLOAD_ERRORS
+from .result_cache import ResultCache
+
+DownloadFn = Callable[[str, int], Awaitable[dict]]
+
+BATCH_FORMATS = ("tenhou6", "mjai", "both")
+
+HTTP_REQUESTS = REGISTRY.counter("tensoul_http_requests_total", "HTTP requests by route and status",
+                                 ("route", "status"))
+HTTP_SECONDS = REGISTRY.histogram("tensoul_http_request_seconds", "HTTP request latency (time to response "
+                                  "headers for streamed batches)", ("route",))
+QUEUE_WAIT_SECONDS = REGISTRY.histogram("tensoul_queue_wait_seconds", "Time a job waited for a worker")
+RECOVERIES = REGISTRY.counter("tensoul_session_recoveries_total", "Session recoveries triggered by workers")
+
+# what says "the session is bad, not this record" - the same split as
+# download_recovery.is_session_error, which tensoul can't import: Majsoul codes
+# 151 (handshake / client version rejected) and 1004 (not logged in), and
+# exceptions from a dead or half-rebuilt channel or a timed-out RPC
+SESSION_ERROR_CODES = ("151", "1004")
+_SESSION_PATTERNS = ("nonetype", "connectionclosed", "connection is closed", "no close frame",
+                     "cannot write to closing", "socket", "eof", "keepalive ping")
+
+
+def _is_session_failure(error) -> bool:
+    """error: a download's error result (dict) or the exception it raised."""
+    if isinstance(error, dict):
+        match = re.search(r"error_code: (\d+)", error.get("error_msg", ""))
+        return match is not None and match.group(1) in SESSION_ERROR_CODES
+    if isinstance(error, (OSError, asyncio.TimeoutError)):
+        return True
+    text = f"{type(error).__name__}: {error}".lower()
+    return any(p in text for p in _SESSION_PATTERNS)
+
+
+class _Job:
+    __slots__ = ("record_uuid", "lobby_id", "future", "queued_at")
+
+    def __init__(self, record_uuid: str, lobby_id: int, future: asyncio.Future):
+        self.record_uuid = record_uuid
+        self.lobby_id = lobby_id
+        self.future = future
+        self.queued_at = time.perf_counter()
+
+
+@web.middleware
+async def _instrument(request, handler):
+    route = request.match_info.route.resource
+    route = route.canonical if route is not None else "unmatched"
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await handler(request)
+        status = response.status
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        HTTP_REQUESTS.inc(route, status)
+        HTTP_SECONDS.observe(time.perf_counter() - start, route)
+
+
+class ConversionServer:
+    """
+    asyncio-native HTTP front end for a single logged-in MajsoulPaipuDownloader.
+
+    Requests don't touch the websocket themselves: they are put on a bounded
+    queue and `concurrency` workers (default 1 - one account, one stateful
+    session) run the downloads on the same event loop as the channel.
+
+    - backpressure: when `queue_size` jobs are already waiting, /convert/ answers
+      503 with Retry-After instead of piling up more work.
+    - timeouts: a client waits at most `request_timeout` seconds (queueing
+      included) and gets a 504; its job is dropped if it hasn't started yet. A
+      download itself is cut off after the same time, so a hung RPC can't stall
+      the worker.
+    - recovery: `session` may be any object with the download_recovery.AccountSession
+      interface (`wait_ready()`, `generation`, `recover(generation, reason=...)`).
+      Workers then wait out a running recovery before each download and trigger
+      one (then retry once) when a download fails on the session - error codes
+      151/1004, a closed socket, a timeout; a record's own error code or a
+      converter exception is answered as is.
+    - caching: with a ResultCache, successful results are answered from memory/disk
+      with an ETag; a matching If-None-Match gets a 304 as long as the entry is
+      still cached, so /admin/cache/invalidate/ also ends revalidation.
+    """
+
+    def __init__(self, downloader, *, download: Optional[DownloadFn] = None, session=None,
+                 concurrency: int = 1, queue_size: int = 64, request_timeout: float = 60.0,
+                 app_token: Optional[str] = None, is_token_auth: Optional[bool] = None,
+                 cache: Optional[ResultCache] = None):
+        self.downloader = downloader
+        self.download = download or downloader.download
+        self.session = session
+        self.concurrency = max(1, concurrency)
+        self.queue_size = queue_size
+        self.request_timeout = request_timeout
+        self.app_token = ms_cfg['app_token'] if app_token is None else app_token
+        self.is_token_auth = ms_cfg['is_token_auth'] if is_token_auth is None else is_token_auth
+        self.cache = cache
+        self.not_modified = 0
+        self.busy_workers = 0
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: list[asyncio.Task] = []
+        self._runner: Optional[web.AppRunner] = None
+
+        self.app = web.Application(middlewares=[_instrument])
+        self.app.router.add_get("/metrics", self.metrics)
+        self.app.router.add_get("/status/", self.status)
+        self.app.router.add_get("/health/", self.health)
+        self.app.router.add_get("/convert/", self.convert)
+        self.app.router.add_post("/convert/batch/", self.convert_batch)
+        self.app.router.add_get("/admin/cache/", self.cache_stats)
+        self.app.router.add_post("/admin/cache/invalidate/", self.cache_invalidate)
+        self.app.on_startup.append(self._start_workers)
+        self.app.on_cleanup.append(self._stop_workers)
+
+    # ---- lifecycle ----
+
+    async def _start_workers(self, app=None):
+        self._register_gauges()
+        self._queue = asyncio.Queue(self.queue_size)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def _stop_workers(self, app=None):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        while self._queue is not None and not self._queue.empty():
+            job = self._queue.get_nowait()
+            if not job.future.done():
+                job.future.cancel()
+
+    async def start(self, host: str, port: int):
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def serve_forever(self, host: str, port: int):
+        await self.start(host, port)
+        print("==== server start at %s:%s ====" % (host, port))
+        if self.is_token_auth:
+            print("The API is GET /convert?id={mahjong_soul_log_id}&app_token={app_token}")
+        else:
+            print("The API is GET /convert?id={mahjong_soul_log_id}")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await self.stop()
+
+    # ---- workers ----
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.future.done():
+                    continue  # client already timed out / disconnected
+                QUEUE_WAIT_SECONDS.observe(time.perf_counter() - job.queued_at)
+                self.busy_workers += 1
+                try:
+                    result = await self._run(job)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    result = self.downloader.make_error_message(f"{type(e).__name__}: {e}")
+                finally:
+                    self.busy_workers -= 1
+                if not job.future.done():
+                    job.future.set_result(result)
+            finally:
+                self._queue.task_done()
+
+    async def _download(self, job: _Job) -> dict:
+        try:
+            return await asyncio.wait_for(self.download(job.record_uuid, job.lobby_id), self.request_timeout)
+        except asyncio.TimeoutError:
+            DOWNLOAD_ERRORS.inc("timeout")
+            raise
+
+    async def _run(self, job: _Job) -> dict:
+        if self.session is None:
+            return await self._download(job)
+
+        await self.session.wait_ready()
+        generation = self.session.generation
+        try:
+            result = await self._download(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if not _is_session_failure(e):
+                raise  # a converter bug: reconnecting won't help
+            reason = f"{type(e).__name__}: {e}"
+        else:
+            if not result.get("is_error") or not _is_session_failure(result):
+                return result  # success, or the record's own error (1203 etc.)
+            reason = result["error_msg"]
+        RECOVERIES.inc()
+        await self.session.recover(generation, reason=f"{job.record_uuid}: {reason}")
+        await self.session.wait_ready()
+        return await self._download(job)
+
+    # ---- handlers ----
+
+    def _json(self, data, status=200, headers=None):
+        return web.json_response(data, status=status, headers=headers, dumps=ujson.dumps)
+
+    def _check_token(self, request) -> bool:
+        if self.is_token_auth:
+            return self.app_token == request.query.get('app_token')
+        return True
+
+    @staticmethod
+    def _lobby_id(value) -> int:
+        try:
+            return max(int(value), 0) if value else 0
+        except ValueError:
+            return 0
+
+    async def status(self, request):
+        return self._json({'version': self.downloader.tensoul_version})
+
+    async def health(self, request):
+        channel = getattr(self.downloader, "channel", None)
+        try:
+            ok = channel is not None and self.downloader.is_channel_connection_open(channel)
+        except AttributeError:  # channel is mid-(re)connect
+            ok = False
+        return self._json({'status': 'OK' if ok else 'ERROR',
+                           'queued': self._queue.qsize() if self._queue is not None else 0})
+
+    @staticmethod
+    def _cached_response(body: bytes, etag: str):
+        # no-cache: clients may keep it but must revalidate, which costs them a 304
+        return web.Response(body=body, content_type="application/json",
+                            headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    async def convert(self, request):
+        if not self._check_token(request):
+            return self._json(self.downloader.make_error_message("app_token not valid!"))
+        record_uuid = request.query.get('id')
+        if not record_uuid:
+            return self._json(self.downloader.make_error_message("replay id required!"))
+        lobby_id = self._lobby_id(request.query.get('lobby_id'))
+
+        if self.cache is not None:
+            key = self.cache.key(record_uuid, lobby_id)
+            etag = self.cache.etag(key)
+            body = await self.cache.get(key)
+            if body is not None:
+                # only a live entry validates the ETag: after an invalidation the
+                # client's copy is exactly what we no longer vouch for
+                if etag in (t.strip() for t in request.headers.get("If-None-Match", "").split(",")):
+                    self.not_modified += 1
+                    return web.Response(status=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+                return self._cached_response(body, etag)
+
+        job = _Job(record_uuid, lobby_id, asyncio.get_running_loop().create_future())
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            return self._json(self.downloader.make_error_message("server busy, retry later"),
+                              status=503, headers={"Retry-After": "1"})
+
+        try:
+            # cancelling the future only tells the worker nobody is waiting; a download
+            # already on the wire runs to completion and its result is dropped
+            result = await asyncio.wait_for(job.future, self.request_timeout)
+        except asyncio.TimeoutError:
+            return self._json(self.downloader.make_error_message(
+                f"timeout after {self.request_timeout:.0f}s"), status=504)
+        finally:
+            if not job.future.done():
+                job.future.cancel()  # client went away: skip the job if still queued
+
+        if self.cache is not None and not result.get("is_error"):
+            body = ujson.dumps(result).encode("utf-8")
+            await self.cache.put(key, body)
+            return self._cached_response(body, etag)
+        return self._json(result)
+
+    # ---- batch ----
+
+    async def _read_batch(self, request):
+        """
+        ids (and optional format / lobby_id) from a batch request body:
+          - application/json: ["id", ...] or {"ids": [...], "format": ..., "lobby_id": ...}
+          - multipart/form-data: a "file" upload with one id per line, other fields as options
+          - anything else: plain text, one id per line
+        query parameters fill in whatever the body doesn't set.
+        """
+        options = dict(request.query)
+        if request.content_type == "application/json":
+            body = await request.json(loads=ujson.loads)
+            if isinstance(body, dict):
+                ids = body.get("ids") or []
+                options.update({k: v for k, v in body.items() if k != "ids"})
+            else:
+                ids = body
+        elif request.content_type == "multipart/form-data":
+            ids = []
+            async for part in await request.multipart():
+                if part.name == "file" or part.filename:
+                    ids.extend((await part.text()).splitlines())
+                elif part.name:
+                    options[part.name] = await part.text()
+        else:
+            ids = (await request.text()).splitlines()
+
+        ids = [str(e).strip() for e in ids]
+        return list(dict.fromkeys(e for e in ids if e)), options
+
+    @staticmethod
+    def _batch_line(record_uuid: str, result: dict, fmt: str) -> bytes:
+        line = {"id": record_uuid, "is_error": result.get("is_error", True)}
+        if line["is_error"]:
+            line["error_msg"] = result.get("error_msg", "")
+        else:
+            log = dict(result["log"])
+            mjai = log.pop("mjai", None)
+            if fmt != "mjai":
+                line["log"] = log
+            if fmt != "tenhou6":
+                line["mjai"] = mjai
+        return ujson.dumps(line, ensure_ascii=False).encode("utf-8") + b"\n"
+
+    async def convert_batch(self, request):
+        """
+        POST /convert/batch/?format=tenhou6|mjai|both&gzip=1
+
+        Streams one NDJSON line per id in completion order:
+        {"id", "is_error", "log"/"mjai" | "error_msg"}. A failing id only fails
+        its own line. Unlike /convert/ the batch doesn't bounce off a full queue:
+        it feeds its ids in as room frees up. If feeding itself fails, the ids
+        that never got queued get an error line and the stream still ends.
+        """
+        if not self._check_token(request):
+            return self._json(self.downloader.make_error_message("app_token not valid!"), status=403)
+        try:
+            ids, options = await self._read_batch(request)
+        except ValueError as e:
+            return self._json(self.downloader.make_error_message(f"bad batch body: {e}"), status=400)
+        fmt = options.get("format", "tenhou6")
+        if fmt not in BATCH_FORMATS:
+            return self._json(self.downloader.make_error_message(
+                f"format must be one of {', '.join(BATCH_FORMATS)}"), status=400)
+        if not ids:
+            return self._json(self.downloader.make_error_message("replay id required!"), status=400)
+        lobby_id = self._lobby_id(options.get("lobby_id"))
+
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson; charset=utf-8"})
+        if str(options.get("gzip", "")).lower() in ("1", "true", "yes"):
+            response.enable_compression(web.ContentCoding.gzip)
+        await response.prepare(request)
+
+        loop = asyncio.get_running_loop()
+        finished = asyncio.Queue()
+        jobs = []
+        from_cache = set()
+
+        async def feed():
+            for record_uuid in ids:
+                job = _Job(record_uuid, lobby_id, loop.create_future())
+                job.future.add_done_callback(lambda f, job=job: finished.put_nowait(job))
+                if self.cache is not None:
+                    body = await self.cache.get(self.cache.key(record_uuid, lobby_id))
+                    if body is not None:
+                        from_cache.add(record_uuid)
+                        job.future.set_result(ujson.loads(body))
+                        jobs.append(job)
+                        continue
+                await self._queue.put(job)
+                jobs.append(job)  # only once queued: every job in `jobs` will finish
+
+        feeder = asyncio.create_task(feed())
+        getter = None
+        expected, written, feed_checked = len(ids), 0, False
+        try:
+            while written < expected:
+                if feeder.done() and not feed_checked:
+                    feed_checked = True
+                    error = None if feeder.cancelled() else feeder.exception()
+                    if error is not None:
+                        # feeding died: ids it never queued get an error line now, the
+                        # queued ones still finish below
+                        fed = {job.record_uuid for job in jobs}
+                        result = self.downloader.make_error_message(
+                            f"not queued: {type(error).__name__}: {error}")
+                        for record_uuid in ids:
+                            if record_uuid not in fed:
+                                await response.write(self._batch_line(record_uuid, result, fmt))
+                        expected = len(jobs)
+                        continue
+                getter = asyncio.ensure_future(finished.get())
+                await asyncio.wait({getter} if feed_checked else {getter, feeder},
+                                   return_when=asyncio.FIRST_COMPLETED)
+                if not getter.done():
+                    getter.cancel()
+                    continue
+                job = getter.result()
+                if job.future.cancelled():
+                    result = self.downloader.make_error_message("cancelled")
+                else:
+                    result = job.future.result()
+                    if self.cache is not None and not result.get("is_error") \
+                            and job.record_uuid not in from_cache:
+                        await self.cache.put(self.cache.key(job.record_uuid, lobby_id),
+                                             ujson.dumps(result).encode("utf-8"))
+                await response.write(self._batch_line(job.record_uuid, result, fmt))
+                written += 1
+        finally:
+            # client went away (or we're done): stop feeding, skip whatever is still queued
+            if getter is not None:
+                getter.cancel()
+            feeder.cancel()
+            for job in jobs:
+                if not job.future.done():
+                    job.future.cancel()
+        await response.write_eof()
+        return response
+
+    # ---- admin ----
+
+    async def cache_stats(self, request):
+        if not self._check_token(request):
+            return self._json(self.downloader.make_error_message("app_token not valid!"), status=403)
+        if self.cache is None:
+            return self._json(self.downloader.make_error_message("cache disabled"), status=404)
+        return self._json({**self.cache.metrics(), "not_modified": self.not_modified})
+
+    async def cache_invalidate(self, request):
+        """
+        POST /admin/cache/invalidate/ drops entries from older converter versions
+        (what you want after an upgrade); ?id=<uuid>, ?version=<v> or ?all=1
+        narrow or widen that.
+        """
+        if not self._check_token(request):
+            return self._json(self.downloader.make_error_message("app_token not valid!"), status=403)
+        if self.cache is None:
+            return self._json(self.downloader.make_error_message("cache disabled"), status=404)
+        query = request.query
+        if "id" in query:
+            dropped = self.cache.invalidate(record_uuid=query["id"])
+        elif "version" in query:
+            dropped = self.cache.invalidate(version=query["version"])
+        elif query.get("all") in ("1", "true", "yes"):
+            dropped = self.cache.invalidate()
+        else:
+            dropped = self.cache.invalidate(stale=True)
+        return self._json({"is_error": False, "dropped": dropped, "version": self.cache.version})
+
+    # ---- metrics ----
+
+    def _channel_open(self) -> int:
+        channel = getattr(self.downloader, "channel", None)
+        try:
+            return int(channel is not None and self.downloader.is_channel_connection_open(channel))
+        except AttributeError:
+            return 0
+
+    def _register_gauges(self):
+        REGISTRY.gauge("tensoul_queue_depth", "Jobs waiting for a worker",
+                       lambda: self._queue.qsize() if self._queue is not None else 0)
+        REGISTRY.gauge("tensoul_busy_workers", "Workers currently downloading", lambda: self.busy_workers)
+        REGISTRY.gauge("tensoul_channel_open", "1 if the Majsoul websocket is open", self._channel_open)
+        REGISTRY.gauge("tensoul_http_not_modified", "304 answers to If-None-Match", lambda: self.not_modified)
+        if self.cache is not None:
+            REGISTRY.gauge("tensoul_cache_lookups", "Result cache lookups by outcome",
+                           lambda: {(k,): self.cache.stats[k] for k in ("memory_hits", "disk_hits", "misses")},
+                           ("outcome",))
+            REGISTRY.gauge("tensoul_cache_entries", "Results held in the memory LRU",
+                           lambda: self.cache.metrics()["entries"])
+            REGISTRY.gauge("tensoul_cache_hit_rate", "Result cache hit rate since start",
+                           lambda: self.cache.metrics()["hit_rate"])
+
+    async def metrics(self, request):
+        if not self._check_token(request):
+            return self._json(self.downloader.make_error_message("app_token not valid!"), status=403)
+        return web.Response(body=REGISTRY.render().encode("utf-8"),
+                            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
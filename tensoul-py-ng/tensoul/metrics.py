@@ -0,0 +1,144 @@
+"""
+Minimal in-process metrics rendered in the Prometheus text format.
+
+Counters and histograms are plain dicts/lists updated inline under a per-metric
+lock: the server itself is a single event loop, but PARSE_SECONDS is observed
+from whatever thread runs _handle_game_record (toumajsoul decodes in an
+executor), and `+=` on a shared list slot is not atomic. An uncontended lock
+keeps instrumenting a hot path at a dict lookup and a bisect. Gauges are
+callbacks read only at scrape time.
+"""
+import threading
+from bisect import bisect_left
+from typing import Callable, Union
+
+# seconds; covers a parse (~ms) up to a stuck RPC
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount: float = 1):
+        with self._lock:
+            self.values[labelvalues] = self.values.get(labelvalues, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = list(self.values.items())
+        for values, v in snapshot:
+            lines.append(f"{self.name}{_labels(self.labelnames, values)} {v}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        # labelvalues -> [count per bucket..., +Inf count, sum]
+        self.values: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues):
+        bucket = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.values.get(labelvalues)
+            if series is None:
+                series = self.values[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bucket] += 1
+            series[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(values, series[:]) for values, series in self.values.items()]
+        for values, series in snapshot:
+            cumulative = 0
+            for bound, n in zip(self.buckets + ("+Inf",), series):
+                cumulative += n
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, values)} {series[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, values)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Value read from `fn` at scrape time; fn may return a number or {labelvalues: number}."""
+
+    def __init__(self, name: str, help: str, fn: Callable[[], Union[float, dict]], labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.labelnames = labelnames
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        value = self.fn()
+        if isinstance(value, dict):
+            for values, v in value.items():
+                lines.append(f"{self.name}{_labels(self.labelnames, values)} {v}")
+        elif value is not None:
+            lines.append(f"{self.name} {value}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: dict[str, Union[Counter, Histogram, Gauge]] = {}
+
+    def _add(self, metric):
+        # re-registering (e.g. a second server in tests) returns the existing series
+        return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labelnames: tuple = ()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name: str, help: str, fn: Callable, labelnames: tuple = ()) -> Gauge:
+        # a gauge's callback belongs to whoever registered last
+        metric = self.metrics[name] = Gauge(name, help, fn, labelnames)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# ---- converter / Majsoul connection ----
+RPC_SECONDS = REGISTRY.histogram("tensoul_rpc_seconds", "Majsoul RPC latency", ("method",))
+PARSE_SECONDS = REGISTRY.histogram("tensoul_parse_seconds", "Time to decode and convert one game record")
+DOWNLOADS = REGISTRY.counter("tensoul_downloads_total", "Record downloads by outcome", ("outcome",))
+DOWNLOAD_ERRORS = REGISTRY.counter("tensoul_download_errors_total",
+                                   "Failed downloads by Majsoul error code or exception type", ("code",))
+CONNECTS = REGISTRY.counter("tensoul_connects_total", "Websocket (re)connects by outcome", ("outcome",))
+HEARTBEAT_FAILURES = REGISTRY.counter("tensoul_heartbeat_failures_total",
+                                      "Keepalive heartbeats that errored or ended the sustain loop")
+
+__all__ = ("Counter", "Histogram", "Gauge", "Registry", "REGISTRY", "RPC_SECONDS", "PARSE_SECONDS",
+           "DOWNLOADS", "DOWNLOAD_ERRORS", "CONNECTS", "HEARTBEAT_FAILURES")
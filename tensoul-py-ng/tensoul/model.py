@@ -2,7 +2,7 @@ from dataclasses import dataclass
 from enum import IntEnum
 from typing import NamedTuple, Union, Protocol, Optional, Sequence
 
-from .cfg import cfg
+from .cfg import FAN_NAME_JP
 from .constants import TSUMOGIRI, RUNES, JPNAME
 from .utils import pad_list
 
@@ -37,6 +37,10 @@ class Tile(NamedTuple):
            41-47    - 1-7z
            51,52,53 - 0m, 0p, 0s
         """
+        result = _TENHOU_CODES.get(self)
+        if result is not None:
+            return result
+
         if self.num != 0:
             result = 10 * (self.type.value + 1) + self.num
         else:
@@ -52,6 +56,10 @@ class Tile(NamedTuple):
            E,S,W,N,P,F,C                   - 1z..7z (winds + haku/hatsu/chun)
            5mr,5pr,5sr                     - red fives (aka, num==0)
         """
+        result = _MJAI_CODES.get(self)
+        if result is not None:
+            return result
+
         if self.type == TileType.Z:
             # majsoul/tenhou 1z..7z -> E S W N P(白) F(發) C(中)
             return "_ESWNPFC"[self.num]
@@ -62,6 +70,9 @@ class Tile(NamedTuple):
 
     @classmethod
     def parse(cls, text: str) -> "Tile":
+        tile = _TILES.get(text)
+        if tile is not None:
+            return tile
         assert len(text) == 2
         return Tile(int(text[0]), TileType[text[1].upper()])
 
@@ -72,9 +83,22 @@ class Tile(NamedTuple):
         """
         return normal tile from aka
         """
-        if self.type != TileType.Z and self.num == 0:
-            return Tile(5, self.type)
-        return self
+        return _DEAKA.get(self, self)
+
+
+# majsoul's whole tile alphabet (0-9m/p/s with 0 = aka five, 1-7z): parse() hands
+# out these singletons and the encoders look their strings/ints up instead of
+# formatting them for every draw, discard, meld and dora of every record.
+_TILES: dict[str, Tile] = {
+    f"{num}{suit}": Tile(num, TileType[suit.upper()])
+    for suit, nums in (("m", range(10)), ("p", range(10)), ("s", range(10)), ("z", range(1, 8)))
+    for num in nums
+}
+_TENHOU_CODES: dict[Tile, int] = {}
+_MJAI_CODES: dict[Tile, str] = {}
+_TENHOU_CODES.update((t, t.encode_tenhou()) for t in _TILES.values())
+_MJAI_CODES.update((t, t.encode_mjai()) for t in _TILES.values())
+_DEAKA: dict[Tile, Tile] = {_TILES[f"0{suit}"]: _TILES[f"5{suit}"] for suit in "mps"}
 
 
 class DiscardSymbol(NamedTuple):
@@ -298,7 +322,7 @@ class Yaku:
         elif self.id == 18:
             return RUNES['dabururiichi'][JPNAME]
         else:
-            return cfg['fan']['fan']['map_'][str(self.id)]['name_jp']
+            return FAN_NAME_JP[self.id]
 
 
 @dataclass
@@ -379,25 +403,37 @@ class Agari:
         return li
 
 
-@dataclass
 class Kyoku:
-    nplayers: int
-
-    round: Round
-
-    initscores: list[int]
-
-    doras: list[Tile]
-
-    draws: list[list[Symbol]]
+    """
+    one round, kept in the form it is dumped in: draws/discards/haipais hold
+    tenhou ints/strs, encoded as they are recorded through draw()/discard(),
+    so a finished kyoku waiting in the post-processing queue is a few lists of
+    shared small ints instead of a tree of symbol objects.
+    """
+    __slots__ = ("nplayers", "round", "initscores", "doras", "draws", "discards", "haipais", "result")
 
-    discards: list[list[Symbol]]
+    def __init__(self, nplayers: int, round: Round, initscores: list[int], doras: list[Tile],
+                 haipais: Sequence[Sequence[Tile]], result: Optional[KyokuResult] = None):
+        self.nplayers = nplayers
+        self.round = round
+        self.initscores = initscores
+        self.doras = doras
+        self.haipais: list[list[int]] = [[t.encode_tenhou() for t in haipais[i]] for i in range(nplayers)]
+        self.draws: list[list[Union[int, str]]] = [[] for _ in range(nplayers)]
+        self.discards: list[list[Union[int, str]]] = [[] for _ in range(nplayers)]
+        self.result = result
 
-    haipais: list[list[Tile]]
+    def draw(self, seat: int, sym: Symbol):
+        self.draws[seat].append(sym.encode_tenhou())
 
-    result: Optional[KyokuResult] = None
+    def discard(self, seat: int, sym: Symbol):
+        self.discards[seat].append(sym.encode_tenhou())
 
     def dump(self):
+        """
+        tenhou6 entry; haipais/draws/discards are copied, so a dumped entry is
+        not changed by later draw()/discard() calls on this kyoku
+        """
         entry = [self.round, self.initscores, [t.encode_tenhou() for t in self.doras]]
 
         if isinstance(self.result, Agari):
@@ -406,9 +442,9 @@ class Kyoku:
             entry.append([])
 
         for i in range(self.nplayers):
-            entry.append([t.encode_tenhou() for t in self.haipais[i]])
-            entry.append([t.encode_tenhou() for t in self.draws[i]])
-            entry.append([t.encode_tenhou() for t in self.discards[i]])
+            entry.append(self.haipais[i][:])
+            entry.append(self.draws[i][:])
+            entry.append(self.discards[i][:])
 
         if self.result is not None:
             entry.append(self.result.dump())
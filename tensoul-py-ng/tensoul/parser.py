@@ -98,18 +98,18 @@ class MajsoulPaipuParser:
             self._handle_hu_le(log)
 
     def _handle_new_round(self, log):
+        haipais = [[Tile.parse(t) for t in getattr(log, f"tiles{i}")] for i in range(4)]
+
+        # 转换为庄家摸13张牌的形式
+        self.poppedtile = haipais[log.ju].pop()
+
         self.cur = Kyoku(nplayers=len(log.scores),
                          round=Round(4 * log.chang + log.ju, log.ben, log.liqibang),
                          initscores=pad_list(list(log.scores), 4, 0),
                          doras=[Tile.parse(log.dora)] if log.dora else [Tile.parse(t) for t in log.doras],
-                         draws=[[] for i in range(4)],
-                         discards=[[] for i in range(4)],
-                         haipais=[[Tile.parse(t) for t in getattr(log, f"tiles{i}")] for i in range(4)]
+                         haipais=haipais
                          )
-
-        # 转换为庄家摸13张牌的形式
-        self.poppedtile = self.cur.haipais[log.ju].pop()
-        self.cur.draws[log.ju].append(self.poppedtile)
+        self.cur.draw(log.ju, self.poppedtile)
 
         # information we need, but can 't expect in every record
         self.dealerseat = log.ju
@@ -124,6 +124,9 @@ class MajsoulPaipuParser:
         self.paowind = -1  # seat of who dealt the final wind, -1 if no one is responsible
         self.paodrag = -1
 
+        # side index for kakan: pons per seat, keyed by their non-aka tile
+        self.pons = [{} for i in range(4)]
+
         # ---- MJAI: start_game (once) / start_kyoku / dealer's first draw ----
         nplayers = self.cur.nplayers
         if not self._mjai_started:
@@ -140,7 +143,7 @@ class MajsoulPaipuParser:
                  kyotaku=log.liqibang,
                  oya=log.ju,
                  scores=list(log.scores)[:nplayers],
-                 tehais=[[t.encode_mjai() for t in self.cur.haipais[i]] for i in range(nplayers)])
+                 tehais=[[t.encode_mjai() for t in haipais[i]] for i in range(nplayers)])
         self._mjai_dora_count = 1
         self._pending_reach = None
         # dealer was dealt 14 tiles; tensoul popped the 14th into draws[oya] above
@@ -161,7 +164,7 @@ class MajsoulPaipuParser:
             self.priichi = True
             sym = DiscardSymbol(sym.tile, sym.tsumogiri, True)
 
-        self.cur.discards[log.seat].append(sym)
+        self.cur.discard(log.seat, sym)
         self.ldseat = log.seat
 
         # 更新dora
@@ -188,14 +191,15 @@ class MajsoulPaipuParser:
         if len(log.doras) > len(self.cur.doras):
             self.cur.doras = [Tile.parse(t) for t in log.doras]
 
-        self.cur.draws[log.seat].append(Tile.parse(log.tile))
+        tile = Tile.parse(log.tile)
+        self.cur.draw(log.seat, tile)
 
         # ---- MJAI: reach_accepted (if a riichi is pending) then the draw ----
         # flush dora before tsumo: an ankan's new indicator is revealed on this
         # (rinshan) draw record and must precede the drawn tile in mjai.
         self._mjai_accept_riichi()
         self._mjai_flush_dora()
-        self._me(type="tsumo", actor=log.seat, pai=Tile.parse(log.tile).encode_mjai())
+        self._me(type="tsumo", actor=log.seat, pai=tile.encode_mjai())
 
     def _countpao(self, tile: Tile, owner: int, feeder: int):
         if tile.type != TileType.Z:
@@ -216,20 +220,22 @@ class MajsoulPaipuParser:
         if log.type == 0:
             # chi
             tiles = [Tile.parse(t) for t in log.tiles]
-            self.cur.draws[log.seat].append(ChiSymbol(*tiles))
+            self.cur.draw(log.seat, ChiSymbol(*tiles))
         elif log.type == 1:
             # pon
             tiles = [Tile.parse(t) for t in log.tiles]
             idx = relative_seating(log.seat, self.ldseat)
             self._countpao(tiles[0], log.seat, self.ldseat)
-            self.cur.draws[log.seat].append(PonSymbol(tiles[0], tiles[1], tiles[2], idx))
+            sym = PonSymbol(tiles[0], tiles[1], tiles[2], idx)
+            self.pons[log.seat][sym.tile.deaka()] = sym
+            self.cur.draw(log.seat, sym)
         elif log.type == 2:
             # daiminkan
             tiles = [Tile.parse(t) for t in log.tiles]
             idx = relative_seating(log.seat, self.ldseat)
             self._countpao(tiles[0], log.seat, self.ldseat)
-            self.cur.draws[log.seat].append(DaiminkanSymbol(tiles[0], tiles[1], tiles[2], tiles[3], idx))
-            self.cur.discards[log.seat].append(ZeroSymbol())  # tenhou drops a 0 in discards for this
+            self.cur.draw(log.seat, DaiminkanSymbol(tiles[0], tiles[1], tiles[2], tiles[3], idx))
+            self.cur.discard(log.seat, ZeroSymbol())  # tenhou drops a 0 in discards for this
             self.nkan += 1
         else:
             raise RuntimeError(f"invalid RecordChiPengGang.type={log.type}")
@@ -249,7 +255,7 @@ class MajsoulPaipuParser:
         if log.type == 3:
             # ankan
             self._countpao(tile, log.seat, -1)  # count the group as visible, but don't set pao
-            self.cur.discards[log.seat].append(AnkanSymbol(tile.deaka()))
+            self.cur.discard(log.seat, AnkanSymbol(tile.deaka()))
             self.nkan += 1
             # ---- MJAI: ankan (4 concealed tiles; include the aka five if in play) ----
             base = tile.deaka()
@@ -262,22 +268,21 @@ class MajsoulPaipuParser:
         elif log.type == 2:
             # kakan
             # find pon and swap in new symbol
-            for sy in self.cur.draws[log.seat]:
-                if isinstance(sy, PonSymbol) and (sy.tile.deaka() == tile.deaka()):
-                    self.cur.discards[log.seat].append(KakanSymbol(sy.a, sy.b, sy.tile, tile, sy.feeder_relative))
-                    self.nkan += 1
-                    # ---- MJAI: kakan (added tile + the existing pon's 3 tiles) ----
-                    self._me(type="kakan", actor=log.seat, pai=tile.encode_mjai(),
-                             consumed=[sy.a.encode_mjai(), sy.b.encode_mjai(),
-                                       sy.tile.encode_mjai()])
-                    self._mjai_flush_dora()
-                    break
+            sy = self.pons[log.seat].get(tile.deaka())
+            if sy is not None:
+                self.cur.discard(log.seat, KakanSymbol(sy.a, sy.b, sy.tile, tile, sy.feeder_relative))
+                self.nkan += 1
+                # ---- MJAI: kakan (added tile + the existing pon's 3 tiles) ----
+                self._me(type="kakan", actor=log.seat, pai=tile.encode_mjai(),
+                         consumed=[sy.a.encode_mjai(), sy.b.encode_mjai(),
+                                   sy.tile.encode_mjai()])
+                self._mjai_flush_dora()
         else:
             raise RuntimeError(f"invalid RecordAnGangAddGang.type={log.type}")
 
     def _handle_ba_bei(self, log):
         # kita - this record (only) gives {seat, moqie}
-        self.cur.discards[log.seat].append(PeSymbol())
+        self.cur.discard(log.seat, PeSymbol())
 
         # ---- MJAI: nukidora (sanma north-pull bonus dora) ----
         self._me(type="nukidora", actor=log.seat, pai="N")
@@ -0,0 +1,155 @@
+import asyncio
+import hashlib
+import os
+import re
+import shutil
+from collections import OrderedDict
+from typing import Optional
+
+from .cfg import _cfg_sha1
+from .constants import CONVERTER_VERSION
+
+_SAFE_NAME = re.compile(r"^[A-Za-z0-9._-]+$")
+
+
+def converter_version() -> str:
+    """
+    CONVERTER_VERSION plus a short hash of cfg.json: a converter change bumps
+    the former, a Majsoul cfg update (yaku names etc.) changes the latter.
+    """
+    return f"{CONVERTER_VERSION}-{_cfg_sha1()[:10]}"
+
+
+class ResultCache:
+    """
+    Converted results keyed by (converter version, uuid, lobby_id).
+
+    Finished game records never change, so a result only goes stale when the
+    converter does - hence the version in the key (and in the ETag). Lookups go
+    through a bounded in-memory LRU first, then `cache_dir/<version>/` on disk.
+    Values are the serialized JSON bytes the server sends, so a hit costs no
+    parsing or re-encoding.
+    """
+
+    def __init__(self, version: Optional[str] = None, max_entries: int = 2048, cache_dir: Optional[str] = None):
+        self.version = version or converter_version()
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._memory: OrderedDict[tuple, bytes] = OrderedDict()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    # ---- keys ----
+
+    def key(self, record_uuid: str, lobby_id: int = 0) -> tuple:
+        return self.version, record_uuid, lobby_id
+
+    @staticmethod
+    def etag(key: tuple) -> str:
+        return '"%s"' % hashlib.sha1("\0".join(map(str, key)).encode("utf-8")).hexdigest()
+
+    def _path(self, key: tuple) -> Optional[str]:
+        version, record_uuid, lobby_id = key
+        if not self.cache_dir or not _SAFE_NAME.match(version) or not _SAFE_NAME.match(record_uuid):
+            return None
+        return os.path.join(self.cache_dir, version, f"{record_uuid}__{lobby_id}.json")
+
+    # ---- lookups ----
+
+    async def get(self, key: tuple) -> Optional[bytes]:
+        body = self._memory.get(key)
+        if body is not None:
+            self._memory.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return body
+
+        path = self._path(key)
+        if path is not None:
+            body = await asyncio.to_thread(self._read, path)
+            if body is not None:
+                self.stats["disk_hits"] += 1
+                self._remember(key, body)
+                return body
+
+        self.stats["misses"] += 1
+        return None
+
+    async def put(self, key: tuple, body: bytes):
+        self.stats["stores"] += 1
+        self._remember(key, body)
+        path = self._path(key)
+        if path is not None:
+            await asyncio.to_thread(self._write, path, body)
+
+    def _remember(self, key: tuple, body: bytes):
+        self._memory[key] = body
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    @staticmethod
+    def _read(path: str) -> Optional[bytes]:
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    @staticmethod
+    def _write(path: str, body: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(body)
+            os.replace(tmp, path)  # readers never see a half-written file
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    # ---- invalidation ----
+
+    def invalidate(self, record_uuid: Optional[str] = None, version: Optional[str] = None,
+                   stale: bool = False) -> int:
+        """
+        Drop entries; returns how many memory entries went. Pick one of:
+          record_uuid - every cached lobby of that record (current version)
+          version     - everything cached under that converter version
+          stale=True  - everything *not* from the current version
+        With no argument the whole cache goes.
+        """
+        if record_uuid is not None:
+            match = lambda k: k[0] == self.version and k[1] == record_uuid
+        elif version is not None:
+            match = lambda k: k[0] == version
+        elif stale:
+            match = lambda k: k[0] != self.version
+        else:
+            match = lambda k: True
+
+        dropped = [k for k in self._memory if match(k)]
+        for k in dropped:
+            del self._memory[k]
+
+        if self.cache_dir and os.path.isdir(self.cache_dir):
+            if record_uuid is not None:
+                if _SAFE_NAME.match(record_uuid) and _SAFE_NAME.match(self.version):
+                    folder = os.path.join(self.cache_dir, self.version)
+                    for name in os.listdir(folder) if os.path.isdir(folder) else ():
+                        if name.startswith(f"{record_uuid}__"):
+                            os.remove(os.path.join(folder, name))
+            else:
+                for name in os.listdir(self.cache_dir):
+                    if match((name, None, None)):
+                        shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+        return len(dropped)
+
+    # ---- metrics ----
+
+    def metrics(self) -> dict:
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        lookups = hits + self.stats["misses"]
+        return {**self.stats, "entries": len(self._memory), "max_entries": self.max_entries,
+                "hit_rate": hits / lookups if lookups else 0.0, "version": self.version}
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""共用 fixture：把 repo 各子專案放上 sys.path，並在背景執行緒跑 aiohttp 假服務。"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import os
+import sys
+import threading
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for _path in (os.path.join(ROOT, "paipu_project"), os.path.join(ROOT, "tensoul-py-ng"), ROOT):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+
+@contextlib.contextmanager
+def serve_in_thread(server):
+    """在獨立事件迴圈執行緒上 start() 一個假服務（FakeAkoromo / FakeMajsoul），供同步程式
+    碼打它；離開時 stop() 並收掉迴圈。"""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        asyncio.run_coroutine_threadsafe(server.start(), loop).result(10)
+        yield server
+    finally:
+        asyncio.run_coroutine_threadsafe(server.stop(), loop).result(10)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+        loop.close()
+
+
+@pytest.fixture
+def akoromo_api(monkeypatch):
+    """akoromo_api 模組，拿掉請求間的禮貌延遲與重試退避（測試不該 sleep）。"""
+    import fake_akoromo
+
+    api = fake_akoromo.akoromo_api_module()
+    monkeypatch.setattr(api, "_REQ_DELAY", (0.0, 0.0))
+    monkeypatch.setattr(api, "_RETRY_BACKOFF", [])
+    return api
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""akoromo_api 玩家頁收集（player_records 分頁）對 fake_akoromo 的行為測試。"""
+from __future__ import annotations
+
+import io
+import threading
+import time
+
+import pytest
+
+import fake_akoromo
+from conftest import serve_in_thread
+
+ACCOUNT = 4242
+T0 = 1_700_000_000
+
+
+def _game(i: int, start: int, mode: int = 12, pl: str = "pl4") -> dict:
+    return {"pl": pl, "uuid": f"231114-{i:08x}-0000-0000-0000-000000000000", "modeId": mode,
+            "startTime": start, "endTime": start + 1200,
+            "players": [{"accountId": ACCOUNT, "nickname": "me", "level": 10401, "score": 25000}]}
+
+
+@pytest.fixture
+def fake(akoromo_api):
+    def make(games, **kw):
+        server = fake_akoromo.FakeAkoromo(games, **kw)
+        return serve_in_thread(server)
+    yield make
+    fake_akoromo.uninstall()
+
+
+def test_pages_through_all_records_newest_first(akoromo_api, fake):
+    games = [_game(i, T0 + 60 * i) for i in range(250)]
+    with fake(games) as server:
+        fake_akoromo.install(server.base_url)
+        got = list(akoromo_api.iter_player_uuids("pl4", ACCOUNT, end_ts=T0 + 60 * 300))
+    assert got == [g["uuid"] for g in reversed(games)]
+    assert server.stats["player_records"] == 3
+
+
+def test_page_boundary_game_is_yielded_once(akoromo_api, fake, monkeypatch):
+    monkeypatch.setattr(akoromo_api, "_PLAYER_LIMIT", 4)
+    # 第一頁（新→舊 4 筆）以 T0+10 兩局中的一局結尾，另一局落在下一頁
+    starts = [T0 + 30, T0 + 20, T0 + 10, T0 + 10, T0 + 10, T0, T0 - 10]
+    games = [_game(i, st) for i, st in enumerate(starts)]
+    with fake(games) as server:
+        fake_akoromo.install(server.base_url)
+        got = list(akoromo_api.iter_player_uuids("pl4", ACCOUNT, end_ts=T0 + 100))
+    assert sorted(got) == sorted(g["uuid"] for g in games)
+    assert len(got) == len(set(got))
+
+
+def test_stops_when_a_full_page_shares_one_second(akoromo_api, fake, monkeypatch):
+    monkeypatch.setattr(akoromo_api, "_PLAYER_LIMIT", 3)
+    games = [_game(i, T0) for i in range(5)]
+    with fake(games) as server:
+        fake_akoromo.install(server.base_url)
+        got = list(akoromo_api.iter_player_uuids("pl4", ACCOUNT, end_ts=T0 + 100))
+    # 上界無法前進：拿到一頁後即停，不會無限迴圈
+    assert len(got) == 3
+    assert server.stats["player_records"] == 2
+
+
+def test_mode_defaults_to_all_rank_rooms(akoromo_api, fake):
+    ranked = [_game(i, T0 + i, mode=m) for i, m in enumerate((16, 12, 9, 11))]
+    friendly = _game(99, T0 + 50, mode=2)
+    sanma = _game(98, T0 + 60, mode=24, pl="pl3")
+    with fake(ranked + [friendly, sanma]) as server:
+        fake_akoromo.install(server.base_url)
+        pl4 = set(akoromo_api.iter_player_uuids("pl4", ACCOUNT, end_ts=T0 + 100))
+        pl3 = set(akoromo_api.iter_player_uuids("pl3", ACCOUNT, end_ts=T0 + 100))
+    assert pl4 == {g["uuid"] for g in ranked}
+    assert pl3 == {sanma["uuid"]}
+
+
+def test_client_error_fails_fast_without_trying_other_mirrors(akoromo_api, fake):
+    with fake([_game(0, T0)], errors={404: 1.0}) as server:
+        fake_akoromo.install(server.base_url, mirrors=4)
+        with pytest.raises(akoromo_api.ClientError):
+            list(akoromo_api.iter_player_uuids("pl4", ACCOUNT, end_ts=T0 + 100))
+    assert server.stats["requests"] == 1
+
+
+def test_server_error_still_rotates_mirrors(akoromo_api, fake):
+    with fake([_game(0, T0)], errors={503: 1.0}) as server:
+        fake_akoromo.install(server.base_url, mirrors=4)
+        with pytest.raises(RuntimeError) as exc:
+            list(akoromo_api.iter_player_uuids("pl4", ACCOUNT, end_ts=T0 + 100))
+    assert not isinstance(exc.value, akoromo_api.ClientError)
+    assert server.stats["requests"] == 4
+
+
+def test_limit_counts_only_new_uuids(akoromo_api, fake, capsys):
+    games = [_game(i, T0 + 60 * i) for i in range(30)]
+    newest_first = [g["uuid"] for g in reversed(games)]
+    processed = set(newest_first[:5])           # 上次已收集的最新 5 局
+    counts: dict = {}
+    out = io.StringIO()
+    url = f"https://amae-koromo.sapk.ch/player/{ACCOUNT}/12?limit=10"
+    with fake(games) as server:
+        fake_akoromo.install(server.base_url)
+        failed = akoromo_api.collect_players_paipus([url], processed, counts, output_file=out)
+    assert failed == []
+    assert counts[url] == 10
+    assert out.getvalue().split() == newest_first[5:15]
+    capsys.readouterr()
+
+
+def test_unparsable_url_is_returned_for_browser_fallback(akoromo_api):
+    failed = akoromo_api.collect_players_paipus(["https://amae-koromo.sapk.ch/ranking"], set(), {})
+    assert failed == ["https://amae-koromo.sapk.ch/ranking"]
+
+
+def test_follow_gives_up_on_unresolvable_games(akoromo_api, fake, monkeypatch):
+    now = int(time.time())
+    games = fake_akoromo.synthesize_games(now - 2 * 3600, now - 60, modes={12}, players=300,
+                                          unresolvable_rate=0.05, seed=7)
+    hidden = sum(1 for g in games if g.get("_hidden"))
+    assert hidden
+    stop = threading.Event()
+    per_round = []
+    with fake(games) as server:
+        fake_akoromo.install(server.base_url)
+
+        def log(msg):
+            if "follow 本輪" in msg:
+                per_round.append(server.stats["player_records"] - sum(per_round))
+                if len(per_round) == 4:
+                    stop.set()
+
+        monkeypatch.setattr(akoromo_api, "_log", log)
+        emitted = akoromo_api.follow_room_paipus("Jade", lambda u: None, stop_event=stop, interval=0.01)
+    assert 0 < emitted <= len(games) - hidden   # 同房間同秒開局的碰撞只還原得出一局
+    # 第一輪全部還原、第二輪只重試還原不了的局，之後不再為它們打 player_records
+    assert per_round[1] <= hidden * 4
+    assert per_round[2:] == [0, 0]
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""bridge._EventWriter：progress 合併間隔（全域與 daemon 的單一 job 覆寫）。"""
+from __future__ import annotations
+
+import io
+import json
+
+from gui.backend.bridge import _EventWriter
+
+
+def _progress(writer, job, n):
+    for done in range(1, n + 1):
+        writer.put({"type": "progress", "stage": "download", "job": job, "done": done})
+
+
+def test_job_interval_overrides_only_that_job():
+    out = io.StringIO()
+    writer = _EventWriter(out, 60.0)
+    writer.set_job_interval("2", 0)
+    _progress(writer, "1", 3)
+    _progress(writer, "2", 3)
+    writer.flush()
+    events = [json.loads(line) for line in out.getvalue().splitlines()]
+    # job 1：前緣 1 筆＋窗內合併 1 筆；job 2 不合併
+    assert [e["done"] for e in events if e["job"] == "1"] == [1, 3]
+    assert [e["done"] for e in events if e["job"] == "2"] == [1, 2, 3]
+
+    writer.set_job_interval("2", None)
+    assert writer.interval_for("2") == 60.0
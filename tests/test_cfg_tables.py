@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""tensoul.cfg 預先產生的 cfg_tables 是否與 cfg.json 一致、以及 cfg.json 變動時的回退。"""
+from __future__ import annotations
+
+import ujson
+
+from tensoul import cfg, cfg_tables
+
+
+def test_checked_in_tables_match_cfg_json():
+    assert cfg_tables.CFG_SHA1 == cfg._cfg_sha1()
+    with open(cfg._CFG_PATH, "r", encoding="utf-8") as f:
+        extracted = cfg._extract_tables(ujson.load(f))
+    for name, table in extracted.items():
+        assert getattr(cfg_tables, name) == table, name
+
+
+def test_same_size_rename_falls_back_to_cfg_json(tmp_path, monkeypatch):
+    raw = cfg._CFG_PATH.read_bytes()
+    old = '"name_jp": "門前清自摸和"'.encode("utf-8")
+    new = '"name_jp": "門前清自摸ツ"'.encode("utf-8")
+    assert old in raw and len(old) == len(new)
+    edited = tmp_path / "cfg.json"
+    edited.write_bytes(raw.replace(old, new, 1))
+    monkeypatch.setattr(cfg, "_CFG_PATH", edited)
+    monkeypatch.setattr(cfg, "cfg", cfg._LazyJson(edited))
+    tables = cfg._load_tables()
+    assert tables["FAN_NAME_JP"][1] == "門前清自摸ツ"
+
+
+def test_build_tables_records_the_hash(tmp_path):
+    out = tmp_path / "cfg_tables.py"
+    cfg.build_tables(out)
+    assert f"CFG_SHA1 = {cfg._cfg_sha1()!r}" in out.read_text(encoding="utf-8")
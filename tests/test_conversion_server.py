@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+"""tensoul ConversionServer：佇列、逾時、背壓與重連後重試（/convert/），以及 NDJSON 批次。
+
+下載函式換成可控的 FakeDownloader，server 用 aiohttp.test_utils 跑在本測試自己的事件迴圈上。
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from tensoul.http_server import ConversionServer
+from tensoul.result_cache import ResultCache
+
+
+class FakeDownloader:
+    """download() 依 uuid 決定行為：'hang' 等到 release 才回、'boom' 拋例外、'code-<n>' 回雀魂錯誤碼
+    （一次後成功）、'parse' 模擬轉換端 KeyError，其餘立即成功。"""
+
+    tensoul_version = "test"
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.calls: list[str] = []
+        self.fail_once: set[str] = set()
+
+    def make_error_message(self, error_msg):
+        return {"is_error": True, "error_msg": error_msg}
+
+    async def download(self, record_uuid: str, lobby_id: int = 0):
+        self.calls.append(record_uuid)
+        if record_uuid.startswith("hang"):
+            await self.release.wait()
+        if record_uuid.startswith("boom"):
+            raise RuntimeError("rpc broke")
+        if record_uuid in self.fail_once:
+            self.fail_once.discard(record_uuid)
+            raise ConnectionError("socket closed")
+        if record_uuid.startswith("code-") and self.calls.count(record_uuid) == 1:
+            return self.make_error_message("error_code: %s" % record_uuid[len("code-"):])
+        if record_uuid == "parse":
+            raise KeyError("hules")
+        return {"is_error": False, "log": {"id": record_uuid, "lobby": lobby_id, "mjai": [{"type": "end_game"}]}}
+
+
+class FakeSession:
+    def __init__(self):
+        self.generation = 0
+        self.recovered: list[str] = []
+        self.ready = asyncio.Event()
+        self.ready.set()
+
+    async def wait_ready(self):
+        await self.ready.wait()
+
+    async def recover(self, generation, reason=""):
+        self.generation += 1
+        self.recovered.append(reason)
+
+
+def run_server(test, **options):
+    """以 FakeDownloader 起一個 ConversionServer，把 (client, downloader, server) 交給 test。"""
+    async def main():
+        downloader = FakeDownloader()
+        options.setdefault("app_token", "")
+        options.setdefault("is_token_auth", False)
+        server = ConversionServer(downloader, **options)
+        async with TestClient(TestServer(server.app)) as client:
+            await test(client, downloader, server)
+
+    asyncio.run(main())
+
+
+def test_convert_returns_the_download_result():
+    async def test(client, downloader, server):
+        resp = await client.get("/convert/", params={"id": "abc", "lobby_id": "3"})
+        assert resp.status == 200
+        assert (await resp.json())["log"] == {"id": "abc", "lobby": 3, "mjai": [{"type": "end_game"}]}
+
+    run_server(test)
+
+
+def test_missing_id_and_bad_token_are_errors():
+    async def test(client, downloader, server):
+        body = await (await client.get("/convert/")).json()
+        assert body == {"is_error": True, "error_msg": "app_token not valid!"}
+        body = await (await client.get("/convert/", params={"app_token": "t"})).json()
+        assert body == {"is_error": True, "error_msg": "replay id required!"}
+        assert downloader.calls == []
+
+    run_server(test, app_token="t", is_token_auth=True)
+
+
+def test_download_exception_becomes_an_error_response():
+    async def test(client, downloader, server):
+        body = await (await client.get("/convert/", params={"id": "boom"})).json()
+        assert body == {"is_error": True, "error_msg": "RuntimeError: rpc broke"}
+
+    run_server(test)
+
+
+def test_full_queue_answers_503_with_retry_after():
+    async def test(client, downloader, server):
+        running = asyncio.create_task(client.get("/convert/", params={"id": "hang-1"}))
+        while downloader.calls != ["hang-1"]:
+            await asyncio.sleep(0.01)
+        queued = asyncio.create_task(client.get("/convert/", params={"id": "hang-2"}))
+        while server._queue.qsize() != 1:
+            await asyncio.sleep(0.01)
+
+        resp = await client.get("/convert/", params={"id": "third"})
+        assert resp.status == 503
+        assert resp.headers["Retry-After"] == "1"
+        assert downloader.calls == ["hang-1"]
+
+        downloader.release.set()
+        assert (await running).status == 200
+        assert (await queued).status == 200
+        assert downloader.calls == ["hang-1", "hang-2"]
+
+    run_server(test, queue_size=1)
+
+
+def test_hung_download_answers_504_and_frees_the_worker():
+    async def test(client, downloader, server):
+        resp = await client.get("/convert/", params={"id": "hang-1"})
+        assert resp.status == 504
+        assert (await resp.json())["error_msg"] == "timeout after 0s"
+        resp = await client.get("/convert/", params={"id": "next"})
+        assert resp.status == 200
+
+    run_server(test, request_timeout=0.2)
+
+
+def test_timed_out_job_is_dropped_before_it_runs():
+    session = FakeSession()
+    session.ready.clear()  # a recovery is running: the worker holds its job in wait_ready()
+
+    async def test(client, downloader, server):
+        first = asyncio.create_task(client.get("/convert/", params={"id": "first"}))
+        while server.busy_workers != 1:
+            await asyncio.sleep(0.01)
+        resp = await client.get("/convert/", params={"id": "queued"})
+        assert resp.status == 504
+        assert (await first).status == 504
+        session.ready.set()
+        await server._queue.join()
+        # "first" had already left the queue; "queued" is skipped since nobody waits for it
+        assert downloader.calls == ["first"]
+
+    run_server(test, session=session, request_timeout=0.2)
+
+
+def test_failed_download_triggers_recovery_and_one_retry():
+    session = FakeSession()
+
+    async def test(client, downloader, server):
+        downloader.fail_once.add("flaky")
+        body = await (await client.get("/convert/", params={"id": "flaky"})).json()
+        assert body["is_error"] is False
+        assert downloader.calls == ["flaky", "flaky"]
+        assert session.generation == 1
+        assert session.recovered[0].startswith("flaky: ConnectionError")
+
+    run_server(test, session=session)
+
+
+def test_session_error_code_triggers_recovery_and_one_retry():
+    session = FakeSession()
+
+    async def test(client, downloader, server):
+        body = await (await client.get("/convert/", params={"id": "code-1004"})).json()
+        assert body["is_error"] is False
+        assert downloader.calls == ["code-1004", "code-1004"]
+        assert session.recovered == ["code-1004: error_code: 1004"]
+
+    run_server(test, session=session)
+
+
+def test_record_and_converter_errors_do_not_recover():
+    session = FakeSession()
+
+    async def test(client, downloader, server):
+        body = await (await client.get("/convert/", params={"id": "code-1203"})).json()
+        assert body == {"is_error": True, "error_msg": "error_code: 1203"}
+        body = await (await client.get("/convert/", params={"id": "parse"})).json()
+        assert body == {"is_error": True, "error_msg": "KeyError: 'hules'"}
+        assert downloader.calls == ["code-1203", "parse"]
+        assert session.recovered == []
+
+    run_server(test, session=session)
+
+
+# ---- batch ----
+
+class BrokenCache(ResultCache):
+    """cache lookup for `broken` raises, which kills the batch's feeder mid-way."""
+
+    async def get(self, key):
+        if key[1] == "broken":
+            raise OSError("disk gone")
+        return await super().get(key)
+
+
+async def _batch(client, body, **params):
+    resp = await client.post("/convert/batch/", json=body, params=params)
+    assert resp.status == 200
+    return [json.loads(line) for line in (await resp.text()).splitlines()]
+
+
+def test_batch_streams_one_line_per_id_in_each_format():
+    async def test(client, downloader, server):
+        lines = await _batch(client, ["a", "b", "a", " "])
+        assert sorted(line["id"] for line in lines) == ["a", "b"]
+        assert lines[0]["log"] == {"id": lines[0]["id"], "lobby": 0} and "mjai" not in lines[0]
+        (line,) = await _batch(client, {"ids": ["c"], "format": "mjai"})
+        assert line == {"id": "c", "is_error": False, "mjai": [{"type": "end_game"}]}
+        (line,) = await _batch(client, ["d"], format="both", lobby_id="2")
+        assert line["log"]["lobby"] == 2 and line["mjai"]
+
+        resp = await client.post("/convert/batch/", json=["e"], params={"format": "xml"})
+        assert resp.status == 400
+        resp = await client.post("/convert/batch/", data="\n\n")
+        assert resp.status == 400
+
+    run_server(test)
+
+
+def test_batch_failing_id_only_fails_its_line():
+    async def test(client, downloader, server):
+        lines = {line["id"]: line for line in await _batch(client, ["ok-1", "boom", "ok-2"])}
+        assert lines["boom"] == {"id": "boom", "is_error": True, "error_msg": "RuntimeError: rpc broke"}
+        assert not lines["ok-1"]["is_error"] and not lines["ok-2"]["is_error"]
+
+    run_server(test)
+
+
+def test_batch_larger_than_the_queue_is_fed_as_room_frees():
+    async def test(client, downloader, server):
+        ids = [f"id-{i}" for i in range(10)]
+        lines = await _batch(client, ids)
+        assert sorted(line["id"] for line in lines) == sorted(ids)
+        assert downloader.calls == ids
+
+    run_server(test, queue_size=1)
+
+
+def test_batch_ends_the_stream_when_feeding_fails():
+    async def test(client, downloader, server):
+        lines = await asyncio.wait_for(_batch(client, ["a", "b", "broken", "c"]), 5)
+        by_id = {line["id"]: line for line in lines}
+        assert sorted(by_id) == ["a", "b", "broken", "c"]
+        assert not by_id["a"]["is_error"] and not by_id["b"]["is_error"]
+        for record_uuid in ("broken", "c"):
+            assert by_id[record_uuid]["error_msg"] == "not queued: OSError: disk gone"
+        assert downloader.calls == ["a", "b"]
+
+    run_server(test, cache=BrokenCache("v"))
+
+
+# ---- conditional requests ----
+
+def test_etag_revalidates_only_while_cached():
+    cache = ResultCache("v")
+
+    async def test(client, downloader, server):
+        resp = await client.get("/convert/", params={"id": "a"})
+        etag = resp.headers["ETag"]
+        assert etag == cache.etag(cache.key("a"))
+
+        resp = await client.get("/convert/", params={"id": "a"}, headers={"If-None-Match": etag})
+        assert resp.status == 304
+        assert downloader.calls == ["a"]
+
+        resp = await client.post("/admin/cache/invalidate/", params={"id": "a"})
+        assert (await resp.json())["dropped"] == 1
+        resp = await client.get("/convert/", params={"id": "a"}, headers={"If-None-Match": etag})
+        assert resp.status == 200
+        assert downloader.calls == ["a", "a"]
+        assert server.not_modified == 1
+
+    run_server(test, cache=cache)
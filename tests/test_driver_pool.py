@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""driver_pool.DriverPool 借還、健康檢查、回收與關閉的行為測試（假 driver，不需 selenium）。"""
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from paipu_project.driver_pool import DriverPool
+
+
+class FakeDriver:
+    def __init__(self):
+        self.alive = True
+        self.quit_called = False
+        self.pages = []
+
+    def execute_script(self, script):
+        if not self.alive:
+            raise RuntimeError("session deleted")
+        return 1
+
+    def get(self, url):
+        if not self.alive:
+            raise RuntimeError("session deleted")
+        self.pages.append(url)
+
+    def quit(self):
+        self.quit_called = True
+        self.alive = False
+
+
+class Factory:
+    def __init__(self):
+        self.made = []
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        drv = FakeDriver()
+        with self.lock:
+            self.made.append(drv)
+        return drv
+
+
+def _wait_for(cond, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if cond():
+            return True
+        time.sleep(0.01)
+    return cond()
+
+
+def test_driver_is_reused_and_reset_between_tasks():
+    factory = Factory()
+    pool = DriverPool(factory, size=1)
+    with pool.driver() as first:
+        first.get("https://example.invalid/a")
+    with pool.driver() as second:
+        pass
+    pool.close()
+    assert first is second
+    assert len(factory.made) == 1
+    assert first.pages[-1] == "about:blank"
+
+
+def test_dead_driver_is_replaced_after_a_failed_task():
+    factory = Factory()
+    pool = DriverPool(factory, size=1)
+    with pytest.raises(RuntimeError):
+        with pool.driver() as drv:
+            drv.alive = False
+            raise RuntimeError("chrome crashed")
+    assert pool.crashed == 1
+    assert drv.quit_called
+    assert _wait_for(lambda: len(factory.made) == 2)   # 背景補位
+    with pool.driver() as fresh:
+        assert fresh is not drv and fresh.alive
+    pool.close()
+
+
+def test_healthy_driver_survives_a_failed_task():
+    factory = Factory()
+    pool = DriverPool(factory, size=1)
+    with pytest.raises(ValueError):
+        with pool.driver() as drv:
+            raise ValueError("page layout changed")
+    with pool.driver() as again:
+        pass
+    pool.close()
+    assert again is drv
+    assert pool.crashed == 0
+
+
+def test_driver_is_recycled_after_max_uses():
+    factory = Factory()
+    pool = DriverPool(factory, size=1, max_uses=2)
+    seen = []
+    for _ in range(3):
+        with pool.driver() as drv:
+            seen.append(drv)
+    pool.close()
+    assert seen[0] is seen[1] and seen[2] is not seen[0]
+    assert pool.recycled == 1 and seen[0].quit_called
+
+
+def test_release_after_close_quits_without_refilling():
+    factory = Factory()
+    pool = DriverPool(factory, size=2)
+    drv = pool.acquire()
+    pool.close()
+    drv.alive = False                     # 關閉時主執行緒已把借出的 driver quit 掉
+    pool.release(drv, broken=True)
+    time.sleep(0.1)
+    assert len(factory.made) == 1
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+
+
+def test_acquire_times_out_when_every_driver_is_borrowed():
+    pool = DriverPool(Factory(), size=1)
+    drv = pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.05)
+    pool.release(drv)
+    pool.close()
+
+
+def test_close_is_idempotent():
+    factory = Factory()
+    pool = DriverPool(factory, size=1)
+    with pool.driver():
+        pass
+    pool.close()
+    pool.close()
+    assert factory.made[0].quit_called
+
+
+def test_drivers_killed_after_close_are_not_replaced():
+    """Ctrl+C 路徑：先關池、再 quit 借出中的 driver，extractor 歸還死 driver 時不補新。"""
+    factory = Factory()
+    pool = DriverPool(factory, size=2)
+    borrowed = [pool.acquire(), pool.acquire()]
+    pool.close()
+    for drv in borrowed:
+        drv.quit()
+    for drv in borrowed:
+        pool.release(drv)
+    time.sleep(0.1)
+    assert len(factory.made) == 2
+
+
+def test_close_wakes_a_thread_waiting_in_acquire():
+    """預熱中按 Ctrl+C：close() 要叫醒等著 driver 的 acquire()，不能讓收集執行緒永遠卡住。"""
+    started, go = threading.Event(), threading.Event()
+    made = []
+
+    def slow_factory():
+        started.set()
+        go.wait(5)
+        drv = FakeDriver()
+        made.append(drv)
+        return drv
+
+    pool = DriverPool(slow_factory, size=1)
+    pool.warm()
+    assert started.wait(2)
+    errors = []
+
+    def borrow():
+        try:
+            pool.acquire()
+        except RuntimeError as exc:
+            errors.append(exc)
+
+    waiter = threading.Thread(target=borrow, daemon=True)
+    waiter.start()
+    time.sleep(0.05)
+    pool.close()
+    waiter.join(2)
+    assert not waiter.is_alive()
+    assert len(errors) == 1
+
+    go.set()                                  # 預熱中的那台建好時池已關：關掉並釋出名額
+    assert _wait_for(lambda: made and made[0].quit_called)
+    assert pool._live == 0
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""tensoul.metrics：Prometheus 文字格式。"""
+from __future__ import annotations
+
+from tensoul.metrics import Registry
+
+
+def test_render_counter_histogram_and_gauge():
+    registry = Registry()
+    counter = registry.counter("t_total", "things", ("kind",))
+    hist = registry.histogram("t_seconds", "latency", buckets=(0.1, 1.0))
+    registry.gauge("t_depth", "depth", lambda: 3)
+    counter.inc("a")
+    counter.inc("a", amount=2)
+    hist.observe(0.05)
+    hist.observe(0.5)
+    hist.observe(5)
+    text = registry.render()
+    assert 't_total{kind="a"} 3' in text
+    assert 't_seconds_bucket{le="0.1"} 1' in text
+    assert 't_seconds_bucket{le="1.0"} 2' in text
+    assert 't_seconds_bucket{le="+Inf"} 3' in text
+    assert "t_seconds_count 3" in text and "t_seconds_sum 5.55" in text
+    assert "t_depth 3" in text
+    assert registry.counter("t_total", "again") is counter
+
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""run_crawler.OutputTail 增量追讀輸出檔的行為測試。"""
+from __future__ import annotations
+
+import os
+
+from gui.backend.run_crawler import OutputTail
+
+
+def uid(i: int) -> str:
+    return f"261001-{i:08x}-0000-0000-0000-000000000000"
+
+
+def _append(path, text: str) -> None:
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_missing_file_then_appended_lines(tmp_path):
+    path = tmp_path / "out.txt"
+    tail = OutputTail(str(path))
+    assert tail.poll() == []
+    _append(path, uid(1) + "\n" + uid(2) + "\n")
+    assert tail.poll() == [uid(1), uid(2)]
+    assert tail.poll() == []
+    _append(path, uid(3) + "\n")
+    assert tail.poll() == [uid(3)]
+    assert (tail.count, tail.current) == (3, uid(3))
+
+
+def test_partial_line_waits_for_its_newline(tmp_path):
+    path = tmp_path / "out.txt"
+    tail = OutputTail(str(path))
+    line = uid(1)
+    _append(path, line[:20])
+    assert tail.poll() == []
+    _append(path, line[20:] + "\n")
+    assert tail.poll() == [uid(1)]
+
+
+def test_starts_from_offset_and_skips_non_uuid_lines(tmp_path):
+    path = tmp_path / "out.txt"
+    _append(path, uid(1) + "\n")
+    tail = OutputTail(str(path), offset=os.path.getsize(path))
+    _append(path, "Wrote new paipu: " + uid(2) + "\n\nnot a uuid\n")
+    assert tail.poll() == [uid(2)]
+
+
+def test_truncation_rereads_from_the_start(tmp_path):
+    path = tmp_path / "out.txt"
+    _append(path, uid(1) + "\n" + uid(2) + "\n")
+    tail = OutputTail(str(path))
+    tail.poll()
+    path.write_text(uid(9) + "\n", encoding="utf-8")
+    assert tail.poll() == [uid(9)]
+    assert (tail.count, tail.resets) == (1, 1)
+
+
+def test_rotation_rereads_the_new_file(tmp_path):
+    path = tmp_path / "out.txt"
+    _append(path, uid(1) + "\n" + uid(2) + "\n" + uid(3) + "\n")
+    tail = OutputTail(str(path))
+    tail.poll()
+    rotated = tmp_path / "new.txt"
+    rotated.write_text("".join(uid(i) + "\n" for i in range(10, 14)), encoding="utf-8")
+    os.replace(rotated, path)             # 較長的新檔：只靠大小判斷不出來，要看 inode
+    assert tail.poll() == [uid(i) for i in range(10, 14)]
+    assert tail.resets == 1
+
+
+def test_deleted_file_resets_the_count(tmp_path):
+    path = tmp_path / "out.txt"
+    _append(path, uid(1) + "\n")
+    tail = OutputTail(str(path))
+    tail.poll()
+    path.unlink()
+    assert tail.poll() == []
+    assert (tail.count, tail.current) == (0, None)
+    _append(path, uid(2) + "\n")
+    assert tail.poll() == [uid(2)]
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""PaipuProjectPipeline 去重、批次寫入與各 sink 的行為測試。"""
+from __future__ import annotations
+
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("scrapy")
+
+from scrapy.exceptions import DropItem  # noqa: E402
+
+from paipu_project.items import PaipuProjectItem  # noqa: E402
+from paipu_project.pipelines import PaipuProjectPipeline, PipelineWriter  # noqa: E402
+
+
+def uid(i: int) -> str:
+    return f"261001-{i:08x}-0000-0000-0000-000000000000"
+
+
+def _lines(path) -> list:
+    return path.read_text(encoding="utf-8").split()
+
+
+def _spider(output, sinks=None, processed=None):
+    config = SimpleNamespace(output_filename=str(output), output_sinks=sinks)
+    return SimpleNamespace(config=config, processed_paipu_ids=set() if processed is None else processed)
+
+
+def _pipeline(tmp_path, **kw) -> PaipuProjectPipeline:
+    kw.setdefault("flush_interval", 60)
+    return PaipuProjectPipeline(index_file=str(tmp_path / "index.txt"),
+                                manifest_db=str(tmp_path / "manifest.sqlite3"), **kw)
+
+
+def test_dedupes_against_existing_output_file(tmp_path):
+    output = tmp_path / "out.txt"
+    output.write_text(uid(1) + "\n" + uid(2) + "\n", encoding="utf-8")
+    pipeline = _pipeline(tmp_path)
+    spider = _spider(output)              # spider 一開始的 processed_paipu_ids 是空集合
+    pipeline.open_spider(spider)
+    assert spider.item_pipeline is pipeline
+    assert not pipeline.emit(uid(1))
+    assert pipeline.emit(uid(3))
+    pipeline.close_spider(spider)
+    assert _lines(output) == [uid(1), uid(2), uid(3)]
+    assert (pipeline.accepted, pipeline.dropped) == (1, 1)
+
+
+def test_known_ids_are_merged_with_the_output_file(tmp_path):
+    output = tmp_path / "out.txt"
+    output.write_text(uid(1) + "\n", encoding="utf-8")
+    pipeline = _pipeline(tmp_path)
+    pipeline.open_spider(_spider(output, processed={uid(2)}))
+    assert not pipeline.emit(uid(1))
+    assert not pipeline.emit(uid(2))
+    pipeline.close()
+    assert _lines(output) == [uid(1)]
+
+
+def test_writes_in_batches_and_flushes_the_rest_on_close(tmp_path):
+    output = tmp_path / "out.txt"
+    pipeline = _pipeline(tmp_path, batch_size=2)
+    pipeline.open(str(output))
+    for i in range(3):
+        pipeline.emit(uid(i))
+    assert _lines(output) == [uid(0), uid(1)]
+    pipeline.close()
+    assert _lines(output) == [uid(0), uid(1), uid(2)]
+    assert pipeline.batches == 2
+
+
+def test_background_flush_writes_a_partial_batch(tmp_path):
+    import time
+
+    output = tmp_path / "out.txt"
+    pipeline = _pipeline(tmp_path, batch_size=100, flush_interval=0.05)
+    pipeline.open(str(output))
+    pipeline.emit(uid(7))
+    deadline = time.time() + 2
+    while not output.read_text(encoding="utf-8") and time.time() < deadline:
+        time.sleep(0.02)
+    assert _lines(output) == [uid(7)]
+    pipeline.close()
+
+
+def test_index_and_manifest_sinks(tmp_path):
+    (tmp_path / "index.txt").write_text(uid(9) + "\n", encoding="utf-8")
+    output = tmp_path / "out.txt"
+    pipeline = _pipeline(tmp_path)
+    pipeline.open(str(output), sinks=("index", "manifest"))
+    assert not pipeline.emit(uid(9))      # 其他輸出檔收過的（索引檔）也算重複
+    pipeline.emit(uid(1), source="date_room_api", context="Jade 2026-10-01")
+    pipeline.close()
+    assert _lines(output) == [uid(1)]
+    assert _lines(tmp_path / "index.txt") == [uid(9), uid(1)]
+    with sqlite3.connect(tmp_path / "manifest.sqlite3") as db:
+        rows = db.execute("SELECT uuid, source, context FROM paipu").fetchall()
+    assert rows == [(uid(1), "date_room_api", "Jade 2026-10-01")]
+
+    reopened = _pipeline(tmp_path)
+    reopened.open(str(tmp_path / "other.txt"), sinks=("manifest",))
+    assert not reopened.emit(uid(1))
+    reopened.close()
+
+
+def test_unknown_sink_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        _pipeline(tmp_path).open(str(tmp_path / "out.txt"), sinks=("s3",))
+
+
+def test_process_item_drops_invalid_and_duplicate_ids(tmp_path):
+    pipeline = _pipeline(tmp_path)
+    pipeline.open(str(tmp_path / "out.txt"))
+    item = PaipuProjectItem(paipu_id=uid(1))
+    assert pipeline.process_item(item, None) is item
+    with pytest.raises(DropItem):
+        pipeline.process_item(PaipuProjectItem(paipu_id=uid(1)), None)
+    with pytest.raises(DropItem):
+        pipeline.process_item(PaipuProjectItem(paipu_id="972bOfSK3ME"), None)
+    pipeline.close()
+
+
+def test_writer_feeds_lines_and_drops_duplicates(tmp_path):
+    output = tmp_path / "out.txt"
+    pipeline = _pipeline(tmp_path)
+    pipeline.open(str(output))
+    with PipelineWriter(pipeline, source="manual") as writer:
+        writer.write(uid(1) + "\n")
+        writer.write(uid(1) + "\n" + uid(2) + "\n")
+        writer.flush()
+    assert (pipeline.accepted, pipeline.dropped) == (2, 1)
+    assert _lines(output) == [uid(1), uid(2)]
+    pipeline.close()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""tensoul ResultCache：記憶體 LRU、磁碟層、版本分隔與失效。"""
+from __future__ import annotations
+
+import asyncio
+import os
+
+from tensoul import result_cache
+from tensoul.result_cache import ResultCache
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_memory_hit_and_lru_eviction():
+    cache = ResultCache("v1", max_entries=2)
+    for uuid in ("a", "b", "c"):
+        run(cache.put(cache.key(uuid), uuid.encode()))
+    assert run(cache.get(cache.key("a"))) is None
+    assert run(cache.get(cache.key("c"))) == b"c"
+    assert cache.stats["evictions"] == 1
+    assert cache.metrics()["entries"] == 2
+    assert cache.metrics()["hit_rate"] == 0.5
+
+
+def test_disk_layer_survives_a_restart_per_version(tmp_path):
+    cache = ResultCache("v1", cache_dir=str(tmp_path))
+    run(cache.put(cache.key("a", 3), b"body"))
+    assert os.path.exists(tmp_path / "v1" / "a__3.json")
+
+    again = ResultCache("v1", cache_dir=str(tmp_path))
+    assert run(again.get(again.key("a", 3))) == b"body"
+    assert again.stats["disk_hits"] == 1
+    assert run(again.get(again.key("a", 0))) is None
+
+    newer = ResultCache("v2", cache_dir=str(tmp_path))
+    assert run(newer.get(newer.key("a", 3))) is None
+    assert newer.etag(newer.key("a", 3)) != cache.etag(cache.key("a", 3))
+
+
+def test_unsafe_names_stay_in_memory(tmp_path):
+    cache = ResultCache("v1", cache_dir=str(tmp_path))
+    run(cache.put(cache.key("../escape"), b"x"))
+    assert run(cache.get(cache.key("../escape"))) == b"x"
+    assert os.listdir(tmp_path) == []
+
+
+def test_invalidate_by_record_and_stale_versions(tmp_path):
+    old = ResultCache("v1", cache_dir=str(tmp_path))
+    run(old.put(old.key("a"), b"old"))
+    cache = ResultCache("v2", cache_dir=str(tmp_path))
+    for uuid in ("a", "b"):
+        run(cache.put(cache.key(uuid), uuid.encode()))
+
+    assert cache.invalidate(record_uuid="a") == 1
+    assert run(cache.get(cache.key("a"))) is None
+    assert not os.path.exists(tmp_path / "v2" / "a__0.json")
+    assert run(cache.get(cache.key("b"))) == b"b"
+
+    cache.invalidate(stale=True)
+    assert sorted(os.listdir(tmp_path)) == ["v2"]
+    cache.invalidate()
+    assert os.listdir(tmp_path) == [] and cache.metrics()["entries"] == 0
+
+
+def test_default_version_follows_converter_and_cfg(monkeypatch):
+    version = ResultCache().version
+    assert version == result_cache.converter_version()
+    monkeypatch.setattr(result_cache, "CONVERTER_VERSION", result_cache.CONVERTER_VERSION + 1)
+    assert ResultCache().version != version
+    monkeypatch.setattr(result_cache, "_cfg_sha1", lambda: "0" * 40)
+    assert ResultCache().version.endswith("-" + "0" * 10)
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""tensoul 轉換輸出（tenhou6 log＋mjai）與改寫前的基準版本逐字相同。
+
+fixtures/tensoul/<name>.bin 是 ``fake_majsoul.synthesize_record(name, 8, 人數)`` 的
+ResGameRecord，挑的是有碰→加槓、大明槓、暗槓、吃、立直、自摸／榮和與大三元包牌的種子
+（三麻另有拔北）；同名 .json 是 Kyoku 改成 __slots__／編碼後存放之前的 tensoul 對它的
+``_handle_game_record`` 輸出，之後不再重產——這兩份就是「輸出不變」的定義。
+"""
+from __future__ import annotations
+
+import collections
+import json
+import os
+
+import pytest
+
+import ms.protocol_pb2 as pb
+from tensoul import MajsoulPaipuDownloader
+from tensoul.model import Kyoku, Round, Tile
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "tensoul")
+RECORDS = ["golden-yonma-33", "golden-sanma-126"]
+
+
+def _load(name):
+    res = pb.ResGameRecord()
+    with open(os.path.join(FIXTURES, f"{name}.bin"), "rb") as f:
+        res.ParseFromString(f.read())
+    with open(os.path.join(FIXTURES, f"{name}.json"), "r", encoding="utf-8") as f:
+        return res, json.load(f)
+
+
+def _convert(res):
+    # tuple／list 的差別不算輸出變動：走一次 JSON，與寫檔時相同
+    return json.loads(json.dumps(MajsoulPaipuDownloader()._handle_game_record(res, 0), ensure_ascii=False))
+
+
+@pytest.mark.parametrize("name", RECORDS)
+def test_fixture_covers_calls_kans_and_pao(name):
+    _, golden = _load(name)
+    types = collections.Counter(ev["type"] for ev in golden["mjai"])
+    for kind in ("pon", "kakan", "daiminkan", "ankan", "reach", "hora"):
+        assert types[kind], kind
+    # 和了欄位 [seat, ldseat, paoseat, ...]；沒有包牌時 paoseat == seat
+    agari = [r[i] for r in (kyoku[-1] for kyoku in golden["log"]) if r[0] == "和了"
+             for i in range(2, len(r), 2)]
+    assert any(a[2] != a[0] for a in agari)
+
+
+@pytest.mark.parametrize("name", RECORDS)
+def test_output_matches_baseline(name):
+    res, golden = _load(name)
+    out = _convert(res)
+    assert out["log"] == golden["log"]
+    assert out["mjai"] == golden["mjai"]
+    assert out == golden
+
+
+def test_dump_returns_copies():
+    kyoku = Kyoku(4, Round(0, 0, 0), [25000] * 4, [], [[Tile.parse("1m")]] * 4)
+    kyoku.draw(0, Tile.parse("2m"))
+    entry = kyoku.dump()
+    kyoku.draw(0, Tile.parse("3m"))
+    kyoku.discard(0, Tile.parse("1m"))
+    assert entry[4:7] == [[11], [12], []]
+    entry[4].append(99)
+    assert kyoku.dump()[4:7] == [[11], [12, 13], [11]]
@@ -5,17 +5,25 @@ import sys
 import gzip
 import time
 import subprocess
-from tqdm import tqdm
-import dotenv
 from google.protobuf import json_format
 
 # 添加 tensoul-py-ng 路徑
 sys.path.append('tensoul-py-ng')
 # 可攜式補丁 (繞過 error 151 + 自動建立 ms_cfg.json)；必須在 import tensoul 前 ensure_ms_cfg
 import ms_patch
+import stage_trace
 ms_patch.ensure_ms_cfg()
 from tensoul import MajsoulPaipuDownloader
 import ms.protocol_pb2 as pb
+# 離線壓測：MS_FAKE_GATEWAY 有值時改連本機假雀魂 (fake_majsoul.py)，run_download 亦經此生效。
+# fake_majsoul 是測試工具、不打包進 GUI 後端（backend.spec），打包版設了這個變數要講清楚而非 ImportError
+if os.getenv("MS_FAKE_GATEWAY"):
+    try:
+        import fake_majsoul
+    except ImportError as e:
+        raise RuntimeError("已設定 MS_FAKE_GATEWAY，但找不到 fake_majsoul.py：假閘道只能在原始碼目錄使用，"
+                           "打包版後端請移除此環境變數") from e
+    fake_majsoul.install_from_env()
 
 def extract_timing_data(raw_details, debug=False):
     """從原始數據中提取思考時間（基於 RecordDiscardTile 順序匹配）"""
@@ -158,7 +166,7 @@ async def process_log(record_uuid, log_data, base_dir, raw_timing_data=None, ful
     # log_data 已經是 tenhou.net/6 格式的字典，直接保存
     try:
         tenhou_path = os.path.join(tenhou_dir, f"{record_uuid}.json")
-        with open(tenhou_path, "w", encoding="utf-8") as f:
+        with stage_trace.span(record_uuid, "tenhou_write"), open(tenhou_path, "w", encoding="utf-8") as f:
             json.dump(log_data, f, ensure_ascii=False)
     except Exception as e:
         print(f"Error saving tenhou format for {record_uuid}: {str(e)}")
@@ -173,7 +181,7 @@ async def process_log(record_uuid, log_data, base_dir, raw_timing_data=None, ful
         # 三麻：mjai-reviewer (convlog) 硬性拒絕三麻 (disp 含「三」-> NotFourPlayer)，
         # 改用 tensoul 直出、對齊 mortal-sanma libriichi3p 規格的 mjai 事件串流。
         try:
-            with open(mjai_temp, "w", encoding="utf-8") as f:
+            with stage_trace.span(record_uuid, "mjai_write"), open(mjai_temp, "w", encoding="utf-8") as f:
                 for ev in mjai_events:
                     f.write(json.dumps(ev, ensure_ascii=False) + "\n")
         except Exception as e:
@@ -183,7 +191,7 @@ async def process_log(record_uuid, log_data, base_dir, raw_timing_data=None, ful
         # mjai-reviewer 可由環境變數覆寫路徑 (凍結版指向內建的 mjai-reviewer.exe 絕對路徑)。
         # mjai_semaphore (若提供) 限制同時並發的轉換數，讓 GUI 能並行轉換多個牌譜。
         try:
-            with open(temp_file, "w", encoding="utf-8") as f:
+            with stage_trace.span(record_uuid, "tenhou_write"), open(temp_file, "w", encoding="utf-8") as f:
                 json.dump(log_data, f, ensure_ascii=False)
         except Exception as e:
             print(f"Error saving temp file for {record_uuid}: {str(e)}")
@@ -194,13 +202,19 @@ async def process_log(record_uuid, log_data, base_dir, raw_timing_data=None, ful
             # 用一個不限量的 Semaphore 當作「無限制」的 fallback，避免 nullcontext 在
             # Python 3.8/3.9 不支援 async with 的問題。
             sem = mjai_semaphore if mjai_semaphore is not None else asyncio.Semaphore(2 ** 31)
-            async with sem:
-                proc = await asyncio.create_subprocess_shell(
-                    mjai_cmd,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                )
-                _, stderr_data = await proc.communicate()
+            # 等名額與實際執行分開計時（stage_trace：mjai_wait 高＝並發數不夠）
+            with stage_trace.span(record_uuid, "mjai_wait"):
+                await sem.acquire()
+            try:
+                with stage_trace.span(record_uuid, "mjai_run"):
+                    proc = await asyncio.create_subprocess_shell(
+                        mjai_cmd,
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.PIPE,
+                    )
+                    _, stderr_data = await proc.communicate()
+            finally:
+                sem.release()
             if proc.returncode != 0:
                 print(f"Warning: mjai conversion failed for {record_uuid}")
                 print(f"Error: {stderr_data.decode('utf-8', errors='replace')}")
@@ -209,35 +223,36 @@ async def process_log(record_uuid, log_data, base_dir, raw_timing_data=None, ful
 
     # 如果有思考時間數據，注入到 mjai
     if os.path.exists(mjai_temp) and raw_timing_data:
-        try:
-            # 保存原始JSON（如果启用）
-            if save_raw_json and full_record:
-                raw_json_file = os.path.join(raw_json_dir, f"{record_uuid}_full.json")
-                with open(raw_json_file, 'w', encoding='utf-8') as f:
-                    json.dump(full_record, f, ensure_ascii=False, indent=2)
+        with stage_trace.span(record_uuid, "timing_inject"):
+            try:
+                # 保存原始JSON（如果启用）
+                if save_raw_json and full_record:
+                    raw_json_file = os.path.join(raw_json_dir, f"{record_uuid}_full.json")
+                    with open(raw_json_file, 'w', encoding='utf-8') as f:
+                        json.dump(full_record, f, ensure_ascii=False, indent=2)
             
-            timing_map = extract_timing_data(raw_timing_data)
+                timing_map = extract_timing_data(raw_timing_data)
             
-            # 如果启用debug，保存原始timing数据
-            if save_debug:
-                timing_dict = {f"{k[0]},{k[1]}": v for k, v in timing_map.items()}
-                debug_file = os.path.join(debug_dir, f"{record_uuid}_timing_map.json")
-                with open(debug_file, 'w', encoding='utf-8') as f:
-                    json.dump(timing_dict, f, ensure_ascii=False, indent=2)
+                # 如果启用debug，保存原始timing数据
+                if save_debug:
+                    timing_dict = {f"{k[0]},{k[1]}": v for k, v in timing_map.items()}
+                    debug_file = os.path.join(debug_dir, f"{record_uuid}_timing_map.json")
+                    with open(debug_file, 'w', encoding='utf-8') as f:
+                        json.dump(timing_dict, f, ensure_ascii=False, indent=2)
                 
-                # 保存原始actions
-                raw_file = os.path.join(debug_dir, f"{record_uuid}_raw_actions.json")
-                with open(raw_file, 'w', encoding='utf-8') as f:
-                    json.dump(raw_timing_data, f, ensure_ascii=False, indent=2)
+                    # 保存原始actions
+                    raw_file = os.path.join(debug_dir, f"{record_uuid}_raw_actions.json")
+                    with open(raw_file, 'w', encoding='utf-8') as f:
+                        json.dump(raw_timing_data, f, ensure_ascii=False, indent=2)
             
-            inject_timing_to_mjai(mjai_temp, timing_map, debug=save_debug)
-        except Exception as e:
-            print(f"Warning: Failed to inject timing data: {str(e)}")
+                inject_timing_to_mjai(mjai_temp, timing_map, debug=save_debug)
+            except Exception as e:
+                print(f"Warning: Failed to inject timing data: {str(e)}")
     
     # 保存 mjai 格式 (gzip 壓縮)
     if os.path.exists(mjai_temp):
         try:
-            with open(mjai_temp, "rb") as f_in:
+            with stage_trace.span(record_uuid, "gzip"), open(mjai_temp, "rb") as f_in:
                 with gzip.open(f"{mjai_dir}/{record_uuid}.json.gz", "wb") as f_out:
                     f_out.writelines(f_in)
         except Exception as e:
@@ -453,6 +468,8 @@ async def main():
             finally:
                 slots.release()
 
+        from tqdm import tqdm  # 只有 CLI 的進度條用得到；GUI 只 import 本模組的函式，不載入 tqdm
+
         try:
             with tqdm(total=total_unique_ids, desc="下載進度", unit="log") as download_progress:
                 for index, record_uuid in enumerate(unique_ids):